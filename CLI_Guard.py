@@ -4,11 +4,20 @@ import CLI_SQL.CLI_Guard_SQL as sqlite
 import bcrypt
 from cryptography.fernet import Fernet
 import base64
+import copy
 import hashlib
 import os
-from typing import Optional
-
+import shlex
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+import completion
 from logger import log
+from search_index import NameIndex
+from secret_cache import SecretCache
 
 
 # ---------------------------------------------------------------------------
@@ -19,6 +28,16 @@ class AuthenticationError(Exception):
     """Raised when password authentication fails (wrong credentials or locked account)"""
 
 
+class LoginRateLimitedError(AuthenticationError):
+    """Raised when too many recent failed sign-ins mean the next attempt must wait"""
+
+    def __init__(self, user: str, retry_after: float):
+        self.user = user
+        self.retry_after = retry_after
+        super().__init__(f"Too many failed sign-in attempts for '{user}' - "
+                         f"try again in {int(retry_after) + 1} seconds")
+
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -27,14 +46,26 @@ class AuthenticationError(Exception):
 # to per-user salts. Do NOT use for new key derivation.
 LEGACY_SALT = b'CLI_Guard_Salt_v1_2025'
 
-# Session management - stores the current user's encryption key and username
-_session_encryption_key: Optional[bytes] = None
-_session_user: Optional[str] = None
+# Fuzzy account matching - per-user trigram indexes of account names with the data version they
+# were built at; rebuilt on first use after that user's secrets are added, updated or deleted
+_account_name_indexes: dict[str, tuple[int, NameIndex]] = {}
+
+# Failed sign-in rate limiting, shared by every interface through the login_attempts table:
+# the first LOGIN_FREE_ATTEMPTS failures inside the sliding window are free, then each further
+# failure doubles the wait before the next attempt is even checked (no bcrypt/PBKDF2 work while waiting)
+LOGIN_WINDOW_SECONDS = 15 * 60
+LOGIN_FREE_ATTEMPTS = 3
+LOGIN_BACKOFF_BASE_SECONDS = 2
+LOGIN_BACKOFF_MAX_SECONDS = 5 * 60
+
+# A fuzzy match is only auto-resolved when it is this similar and clearly ahead of the runner-up
+FUZZY_RESOLVE_MIN_SCORE = 0.6
+FUZZY_RESOLVE_MIN_MARGIN = 0.1
 
 
 def getUsers() -> list[list[str]]:
     """
-    Retrieve list of all users from database
+    Retrieve list of all users from database (every routed database file included)
 
     Returns:
         List of lists, each containing [username]
@@ -43,14 +74,18 @@ def getUsers() -> list[list[str]]:
     users_list: list[list[str]] = []
 
     # Query Users table
-    data: list[tuple] = sqlite.queryData(user=None, table="users")
+    data: list[tuple] = sqlite.queryData(user=None, table="users") or []
 
-    if not data:
-        return users_list
+    # With database routing (CLIGUARD_DB_ROUTES), other users live in their own files
+    for db_path in sqlite.routed_database_paths():
+        try:
+            data += sqlite.queryData(user=None, table="users", connection=sqlite.open_database(db_path)) or []
+        except (OSError, sqlite3.Error):
+            log("DATABASE", f"Could not list users in {db_path}", exc_info=True)
 
     # Loop through query data and insert relevant data to users_list
-    for user_record in data:
-        users_list.append([user_record[0]])  # Just the username
+    for user in dict.fromkeys(user_record[0] for user_record in data):
+        users_list.append([user])  # Just the username
 
     return users_list
 
@@ -115,6 +150,9 @@ def authUser(user: str, attempted_password: str) -> bool:
     """
     Authenticate a user by checking their password against stored bcrypt hash
 
+    Refused without hashing while the user is rate limited (see loginRetryAfter);
+    failures are recorded and a success clears them.
+
     Args:
         user: Username to authenticate
         attempted_password: Plaintext password attempt
@@ -122,17 +160,98 @@ def authUser(user: str, attempted_password: str) -> bool:
     Returns:
         True if authentication successful, False otherwise
     """
+    if loginRetryAfter(user) > 0:
+        log("AUTH", f"Authentication refused for '{user}' - too many recent failures")
+        return False
+
     # Query Users table for user data
     user_data: list[tuple] = sqlite.queryData(user=user, table="users")
 
     if not user_data or len(user_data) == 0:
         log("AUTH", f"Authentication failed for '{user}' - user not found")
+        recordFailedLogin(user)
         return False
 
     # Get the stored password hash
     # Assuming structure: (username, password_hash, ...)
-    stored_hash = user_data[0][1]
+    if verifyPasswordHash(user, attempted_password, user_data[0][1]):
+        clearFailedLogins(user)
+        return True
+    recordFailedLogin(user)
+    return False
+
+
+def loginRetryAfter(user: str, connection=None) -> float:
+    """
+    Seconds until user may attempt to sign in again (0 if they may now)
+
+    A single indexed range query — cheap enough to run before every
+    attempt, so a script hammering the CLI never reaches bcrypt.
+
+    Args:
+        user: Username signing in
+        connection: Optional explicit SQLite connection
+
+    Returns:
+        Seconds to wait; 0.0 when an attempt is allowed
+    """
+    now = time.time()
+    failures, latest = sqlite.queryLoginAttempts(user, now - LOGIN_WINDOW_SECONDS, connection=connection)
+    if failures < LOGIN_FREE_ATTEMPTS or latest is None:
+        return 0.0
+    delay = min(LOGIN_BACKOFF_MAX_SECONDS, LOGIN_BACKOFF_BASE_SECONDS * 2 ** (failures - LOGIN_FREE_ATTEMPTS))
+    return max(0.0, latest + delay - now)
+
+
+def checkLoginAllowed(user: str, connection=None) -> None:
+    """
+    Raise if user must wait before another sign-in attempt
+
+    Raises:
+        LoginRateLimitedError: With retry_after seconds
+    """
+    retry_after = loginRetryAfter(user, connection=connection)
+    if retry_after > 0:
+        raise LoginRateLimitedError(user, retry_after)
+
+
+def recordFailedLogin(user: str, connection=None) -> int:
+    """
+    Record a failed sign-in for user (any interface) and prune expired attempts
 
+    Args:
+        user: Username that failed to sign in
+        connection: Optional explicit SQLite connection
+
+    Returns:
+        The user's failures within the current window, including this one
+    """
+    now = time.time()
+    window_start = now - LOGIN_WINDOW_SECONDS
+    sqlite.insertLoginAttempt(user, now, prune_before=window_start, connection=connection)
+    return sqlite.queryLoginAttempts(user, window_start, connection=connection)[0]
+
+
+def clearFailedLogins(user: str, connection=None) -> None:
+    """Forget user's failed sign-ins after a successful one"""
+    sqlite.deleteLoginAttempts(user, connection=connection)
+
+
+def verifyPasswordHash(user: str, attempted_password: str, stored_hash) -> bool:
+    """
+    Check a password attempt against an already-fetched bcrypt hash
+
+    Split out of authUser so the slow bcrypt comparison can run off the
+    thread that owns the database connection (e.g. a TUI worker thread).
+
+    Args:
+        user: Username (for logging only)
+        attempted_password: Plaintext password attempt
+        stored_hash: bcrypt hash from the users table (bytes or str)
+
+    Returns:
+        True if the password matches, False otherwise
+    """
     # Handle if stored_hash is string (convert to bytes)
     if isinstance(stored_hash, str):
         stored_hash = stored_hash.encode('utf-8')
@@ -150,6 +269,554 @@ def authUser(user: str, attempted_password: str) -> bool:
         return False
 
 
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+class Vault:
+    """
+    One user's session: their encryption key, a cached cipher, and (optionally) a DB handle
+
+    Every Vault is independent, so a process can hold sessions for several
+    users at once (e.g. the JSON-RPC server or AsyncVault) without swapping
+    a shared key. The module-level functions below (startSession, getSecret,
+    addSecret, ...) are thin wrappers over a default Vault and behave exactly
+    as before.
+
+    Usage:
+        vault = CLI_Guard.Vault()
+        vault.startSession("admin", password)
+        secret = vault.getSecret("prod-db")
+        vault.close()
+
+    Args:
+        db_path: Open a private connection to this database file instead of
+            sharing the module-level one. The connection may be used from any
+            thread; calls on one Vault are serialized by its lock.
+        cache: Optional SecretCache serving repeat getSecret/getSecretsByAccounts
+            lookups without a query or decrypt (may be shared between vaults)
+    """
+
+    def __init__(self, db_path: Optional[str] = None, cache: Optional[SecretCache] = None):
+        self.user: Optional[str] = None
+        self.cache = cache
+        self._encryption_key: Optional[bytes] = None
+        self._fernet: Optional[Fernet] = None
+        self._connection = (sqlite.get_db_connection(db_path, check_same_thread=False)
+                            if db_path is not None else None)
+        self._lock = threading.RLock()
+
+    # --- session ---
+
+    def startSession(self, user: str, password: str) -> None:
+        """
+        Derive the encryption key from the password and the user's salt
+
+        Raises:
+            RuntimeError: If the user has no encryption salt in the database
+        """
+        with self._lock:
+            salt_hex = sqlite.queryUserSalt(user, **self._db())
+        if salt_hex is None:
+            raise RuntimeError(f"No encryption salt found for user '{user}' — run migration first")
+
+        self._setKey(user, deriveEncryptionKey(password, bytes.fromhex(salt_hex)))
+        log("AUTH", f"Session started for '{user}'")
+
+    def startSessionFromKey(self, user: str, encryption_key: bytes) -> None:
+        """
+        Start the session with a pre-derived key (for token-based auth)
+
+        Raises:
+            ValueError: If the key is not a valid Fernet key
+        """
+        self._setKey(user, encryption_key)
+        log("AUTH", f"Session started from pre-derived key for '{user}'")
+
+    def _setKey(self, user: str, encryption_key: bytes) -> None:
+        # Validate the key by trying to instantiate Fernet — this catches
+        # truncated, corrupted, or wrong-length keys before we store them
+        try:
+            fernet = Fernet(encryption_key)
+        except (ValueError, Exception) as e:
+            raise ValueError(f"Invalid encryption key: {e}")
+
+        self.user = user
+        self._encryption_key = encryption_key
+        self._fernet = fernet
+
+    def endSession(self) -> None:
+        """Forget the user and encryption key, and drop the user's cached plaintext"""
+        log("AUTH", f"Session ended for '{self.user}'")
+        if self.cache is not None and self.user is not None:
+            self.cache.invalidate(self.user)
+        self.user = None
+        self._encryption_key = None
+        self._fernet = None
+
+    def close(self) -> None:
+        """End the session and close the private connection, if any"""
+        self.endSession()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> "Vault":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def encryptionKey(self) -> Optional[bytes]:
+        """The session's encryption key, or None if no active session"""
+        return self._encryption_key
+
+    @property
+    def isActive(self) -> bool:
+        """True while a session is started"""
+        return self._fernet is not None
+
+    def _db(self) -> dict:
+        """Connection kwarg for the SQL layer — empty when sharing the module-level connection"""
+        return {"connection": self._connection} if self._connection is not None else {}
+
+    def _requireSession(self, action: str) -> None:
+        if self._fernet is None:
+            raise RuntimeError(f"No active session - cannot {action}")
+
+    def _asUser(self, user: str) -> "Vault":
+        """
+        This vault acting for user — a shallow copy sharing the key and connection when user differs
+
+        Keeps the module-level functions' contract, where the user is passed per call.
+        """
+        if user == self.user:
+            return self
+        view = copy.copy(self)
+        view.user = user
+        return view
+
+    # --- encryption ---
+
+    def encryptPassword(self, password: str) -> str:
+        """
+        Encrypt a password with this session's key
+
+        Raises:
+            RuntimeError: If no active session exists
+        """
+        if self._fernet is None:
+            log("ERROR", "Encryption attempted with no active session")
+            raise RuntimeError("No active session - cannot encrypt password")
+
+        encrypted = self._fernet.encrypt(password.encode('utf-8'))
+        log("AUTH", "Password encrypted successfully")
+        return encrypted.decode('utf-8')
+
+    def decryptPassword(self, encrypted_password: str) -> str:
+        """
+        Decrypt a password with this session's key
+
+        Raises:
+            RuntimeError: If no active session exists
+        """
+        if self._fernet is None:
+            log("ERROR", "Decryption attempted with no active session")
+            raise RuntimeError("No active session - cannot decrypt password")
+
+        decrypted = self._fernet.decrypt(encrypted_password.encode('utf-8'))
+        log("AUTH", "Password decrypted successfully")
+        return decrypted.decode('utf-8')
+
+    def dataVersion(self) -> int:
+        """This user's data version (see getDataVersion)"""
+        self._requireSession("read data version")
+        with self._lock:
+            return sqlite.queryDataVersion(self.user, **self._db())
+
+    def _syncCache(self) -> None:
+        """Drop cached secrets if another writer has changed this user's data since they were cached"""
+        if self.cache is not None:
+            with self._lock:
+                version = sqlite.queryDataVersion(self.user, **self._db())
+            self.cache.syncVersion(self.user, version)
+
+    def _toSecret(self, row: tuple, decrypt: bool = False) -> dict:
+        # row tuple: (user, category, account, username, encrypted_password, last_modified, secret_id, path)
+        password = row[4]
+        if decrypt:
+            try:
+                password = self.decryptPassword(row[4])
+            except Exception:
+                password = None
+        return {
+            "category": row[1],
+            "account": row[2],
+            "username": row[3],
+            "password": password,
+            "last_modified": str(row[5]),
+            "path": row[7],
+        }
+
+    @staticmethod
+    def _toMetadata(row: tuple) -> dict:
+        # row tuple: sqlite.METADATA_COLUMNS — (user, category, account, username, last_modified, secret_id, path)
+        return {
+            "category": row[1],
+            "account": row[2],
+            "username": row[3],
+            "last_modified": str(row[4]),
+            "path": row[6],
+        }
+
+    # --- secrets (see the module-level functions of the same name for details) ---
+
+    def getSecrets(self, category: str = None, text: str = None,
+                   sort_by: str = None, sort_column: str = None,
+                   metadata_only: bool = False) -> list[dict]:
+        """All of this user's secrets as dicts, passwords left encrypted (or not read at all)"""
+        self._requireSession("query secrets")
+        columns = sqlite.METADATA_COLUMNS if metadata_only else None
+        with self._lock:
+            data = sqlite.queryData(user=self.user, table="passwords", category=category,
+                                    text=text, sort_by=sort_by, sort_column=sort_column,
+                                    columns=columns, **self._db())
+        convert = self._toMetadata if metadata_only else self._toSecret
+        return [convert(row) for row in (data or [])]
+
+    def iterSecretMetadata(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                           batch_size: int = None) -> Iterator[dict]:
+        """This user's secrets' metadata in account order, fetched in bounded keyset batches"""
+        # Checked here rather than inside the generator so errors surface at the call, not the first next()
+        self._requireSession("list secrets")
+        after = decodeListCursor(cursor) if cursor else None
+        return self._iterMetadataBatches(after, limit, batch_size or LIST_BATCH_SIZE)
+
+    def _iterMetadataBatches(self, after: Optional[tuple], limit: Optional[int],
+                             batch_size: int) -> Iterator[dict]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            # Each batch is read under the lock; callers consume it between batches without holding it
+            with self._lock:
+                rows = list(sqlite.iterMetadata(self.user, after=after, limit=size, **self._db()))
+            for row in rows:
+                yield {
+                    "category": row[0],
+                    "account": row[1],
+                    "username": row[2],
+                    "last_modified": str(row[3]),
+                    "secret_id": row[4],
+                    "path": row[5],
+                }
+            if len(rows) < size:
+                return
+            after = (rows[-1][1], rows[-1][4])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def searchSecrets(self, text: str, limit: Optional[int] = 50, metadata_only: bool = False) -> list[dict]:
+        """Full-text search over category, account and username, best match first"""
+        self._requireSession("search secrets")
+        match_query = buildSearchQuery(text)
+        if not match_query:
+            return []
+
+        columns = sqlite.METADATA_COLUMNS if metadata_only else None
+        with self._lock:
+            data = sqlite.searchData(self.user, match_query, limit=limit, columns=columns, **self._db())
+        convert = self._toMetadata if metadata_only else self._toSecret
+        return [convert(row) for row in (data or [])]
+
+    def getSecret(self, account: str, username: str = None) -> Optional[dict]:
+        """One secret by exact account name (and optionally username), password decrypted"""
+        self._requireSession("retrieve secret")
+        self._syncCache()
+        if self.cache is not None:
+            cached = self.cache.get(self.user, account, username)
+            if cached is not None:
+                return cached
+
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return None
+
+        secret = self._toSecret(row, decrypt=True)
+        if self.cache is not None and secret["password"] is not None:
+            self.cache.put(self.user, secret, username)
+        return secret
+
+    def _findSecretRow(self, account: str, username: str = None) -> Optional[tuple]:
+        """Full passwords row of the first secret with this exact account (and username)"""
+        # queryData uses LIKE with %text%, so we post-filter for exact match
+        with self._lock:
+            data = sqlite.queryData(user=self.user, table="passwords",
+                                    category="account", text=account, **self._db())
+        matches = [row for row in (data or []) if row[2] == account]
+        if username:
+            matches = [row for row in matches if row[3] == username]
+        return matches[0] if matches else None
+
+    def findSecret(self, account: str, username: str = None) -> Optional[dict]:
+        """One secret by exact account (and username) with its encrypted password — the row identity update/delete need"""
+        self._requireSession("find secret")
+        row = self._findSecretRow(account, username)
+        return self._toSecret(row) if row is not None else None
+
+    def getSecretHistory(self, account: str, username: str = None) -> Optional[list[dict]]:
+        """A secret's stored versions, newest first (nothing decrypted)"""
+        self._requireSession("read secret history")
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return None
+        with self._lock:
+            versions = sqlite.queryPasswordVersions(self.user, row[6], **self._db())
+        return [
+            {"version": version, "created_at": created_at, "current": index == 0}
+            for index, (version, created_at) in enumerate(versions or [])
+        ]
+
+    def getSecretVersion(self, account: str, username: str = None,
+                         version: Optional[int] = None, at: Optional[str] = None) -> Optional[dict]:
+        """A past (or the current) version of a secret, password decrypted"""
+        self._requireSession("retrieve secret version")
+        at = normalizeTimestamp(at) if at is not None else None
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return None
+        return self._secretVersion(row, version, at)
+
+    def getSecretVersionByPath(self, path: str, version: Optional[int] = None,
+                               at: Optional[str] = None) -> Optional[dict]:
+        """A past (or the current) version of the secret at path, password decrypted"""
+        self._requireSession("retrieve secret version")
+        at = normalizeTimestamp(at) if at is not None else None
+        with self._lock:
+            row = sqlite.queryDataByPath(self.user, path, **self._db())
+        if row is None:
+            return None
+        return self._secretVersion(row, version, at)
+
+    def _secretVersion(self, row: tuple, version: Optional[int], at: Optional[str]) -> Optional[dict]:
+        """One version of the secret in row — history is read by its secret_id, never re-found by name"""
+        with self._lock:
+            found = sqlite.queryPasswordVersion(self.user, row[6], version=version, at=at, **self._db())
+        if found is None:
+            return None
+
+        # Same shape as getSecret, with the version's password and when it was set
+        secret = self._toSecret(row[:4] + (found[1],) + row[5:], decrypt=True)
+        secret["version"] = found[0]
+        secret["created_at"] = found[2]
+        return secret
+
+    def getSecretsByAccounts(self, accounts: list[str]) -> dict[str, dict]:
+        """Several secrets by exact account name in one query, passwords decrypted"""
+        self._requireSession("retrieve secrets")
+        self._syncCache()
+
+        results: dict[str, dict] = {}
+        if self.cache is not None:
+            for account in accounts:
+                cached = self.cache.get(self.user, account)
+                if cached is not None:
+                    results[account] = cached
+            accounts = [account for account in accounts if account not in results]
+            if not accounts:
+                return results
+
+        with self._lock:
+            rows = sqlite.queryDataByAccounts(self.user, accounts, **self._db())
+        for row in (rows or []):
+            # Rows arrive in secret_id order, so the first row per account wins
+            if row[2] not in results:
+                secret = self._toSecret(row, decrypt=True)
+                results[row[2]] = secret
+                if self.cache is not None and secret["password"] is not None:
+                    self.cache.put(self.user, secret)
+        return results
+
+    def suggestAccounts(self, account: str, limit: Optional[int] = 5) -> list[tuple[str, float]]:
+        """This user's account names ranked by similarity to account"""
+        self._requireSession("suggest accounts")
+        with self._lock:
+            return getAccountNameIndex(self.user, self._connection).suggest(account, limit=limit)
+
+    def addSecret(self, category: str, account: str, username: str, password: str,
+                  path: Optional[str] = None, tags: list[str] = ()) -> Optional[int]:
+        """Encrypt and store a new secret, optionally under a hierarchical path and with tags; returns its secret_id"""
+        self._requireSession("add secret")
+        encrypted = self.encryptPassword(password)
+        with self._lock:
+            if path is not None and sqlite.queryDataByPath(self.user, path, **self._db()) is not None:
+                raise ValueError(f"Path '{path}' is already in use")
+            secret_id = sqlite.insertData(self.user, category, account, username, encrypted, path=path, **self._db())
+            # Tag the row just inserted — not whichever secret an account/username lookup finds first
+            if secret_id is not None and tags:
+                sqlite.insertTags(self.user, secret_id, tags, **self._db())
+        invalidateAccountNameIndex(self.user)
+        if self.cache is not None:
+            self.cache.invalidate(self.user, account)
+        if secret_id is None:
+            return None
+        log("AUTH", f"Secret added for account '{account}' by user '{self.user}'")
+        return secret_id
+
+    def updateSecret(self, account: str, username: str,
+                     old_encrypted_password: str, new_password: str) -> bool:
+        """Encrypt a new password and replace the identified secret's"""
+        self._requireSession("update secret")
+        new_encrypted = self.encryptPassword(new_password)
+        with self._lock:
+            sqlite.updateData(self.user, new_encrypted, account, username, old_encrypted_password, **self._db())
+        invalidateAccountNameIndex(self.user)
+        if self.cache is not None:
+            self.cache.invalidate(self.user, account)
+        log("AUTH", f"Secret updated for account '{account}' by user '{self.user}'")
+        return True
+
+    def getSecretByPath(self, path: str) -> Optional[dict]:
+        """One secret by its exact path, password decrypted"""
+        self._requireSession("retrieve secret")
+        with self._lock:
+            row = sqlite.queryDataByPath(self.user, path, **self._db())
+        return self._toSecret(row, decrypt=True) if row is not None else None
+
+    def listSecretsByPrefix(self, prefix: str, limit: Optional[int] = None) -> list[dict]:
+        """Metadata of the secrets whose path starts with prefix, in path order"""
+        self._requireSession("list secrets")
+        with self._lock:
+            data = sqlite.queryDataByPathPrefix(self.user, prefix, columns=sqlite.METADATA_COLUMNS,
+                                                limit=limit, **self._db())
+        return [self._toMetadata(row) for row in (data or [])]
+
+    def setSecretPath(self, account: str, username: str = None, path: Optional[str] = None) -> bool:
+        """Give a secret a path, move it to another, or remove it (path=None); False if not found"""
+        self._requireSession("update secret")
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return False
+        with self._lock:
+            if not sqlite.updateDataPath(self.user, row[6], path, **self._db()):
+                raise ValueError(f"Path '{path}' is already in use")
+        if self.cache is not None:
+            self.cache.invalidate(self.user, account)
+        log("AUTH", f"Secret path set for account '{account}' by user '{self.user}'")
+        return True
+
+    def getSecretsByTags(self, tags: list[str]) -> list[dict]:
+        """Every secret carrying all of tags in one query, passwords decrypted"""
+        self._requireSession("retrieve secrets")
+        with self._lock:
+            rows = sqlite.queryDataByTags(self.user, tags, **self._db())
+        return [self._toSecret(row, decrypt=True) for row in (rows or [])]
+
+    def listSecretsByTags(self, tags: list[str], limit: Optional[int] = None) -> list[dict]:
+        """Metadata of every secret carrying all of tags"""
+        self._requireSession("list secrets")
+        with self._lock:
+            rows = sqlite.queryDataByTags(self.user, tags, columns=sqlite.METADATA_COLUMNS,
+                                          limit=limit, **self._db())
+        return [self._toMetadata(row) for row in (rows or [])]
+
+    def getSecretTags(self, account: str, username: str = None) -> Optional[list[str]]:
+        """A secret's tags alphabetically; None if not found"""
+        self._requireSession("read secret tags")
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return None
+        with self._lock:
+            return sqlite.queryTags(self.user, row[6], **self._db())
+
+    def tagSecret(self, account: str, username: str = None,
+                  add: list[str] = (), remove: list[str] = ()) -> bool:
+        """Add and/or remove tags on a secret; False if not found"""
+        self._requireSession("tag secret")
+        row = self._findSecretRow(account, username)
+        if row is None:
+            return False
+        with self._lock:
+            if add:
+                sqlite.insertTags(self.user, row[6], add, **self._db())
+            if remove:
+                sqlite.deleteTags(self.user, row[6], remove, **self._db())
+        log("AUTH", f"Secret tags changed for account '{account}' by user '{self.user}'")
+        return True
+
+    def getTagNames(self) -> list[tuple[str, int]]:
+        """This user's tags with the number of secrets carrying each"""
+        self._requireSession("list tags")
+        with self._lock:
+            return sqlite.queryTagNames(self.user, **self._db())
+
+    def deleteSecret(self, account: str, username: str, encrypted_password: str) -> bool:
+        """Delete the identified secret"""
+        self._requireSession("delete secret")
+        with self._lock:
+            sqlite.deleteData(self.user, account, username, encrypted_password, **self._db())
+        invalidateAccountNameIndex(self.user)
+        if self.cache is not None:
+            self.cache.invalidate(self.user, account)
+        log("AUTH", f"Secret deleted for account '{account}' by user '{self.user}'")
+        return True
+
+
+# The session used by the module-level functions (TUI, CLI and scripts)
+_default_vault = Vault()
+
+
+def getDefaultVault() -> Vault:
+    """
+    Get the Vault behind the module-level session functions
+
+    Returns:
+        The process-wide default Vault
+    """
+    return _default_vault
+
+
+def enableSecretCache(ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                      max_bytes: Optional[int] = None) -> SecretCache:
+    """
+    Turn on the decrypted-secret cache for the module-level functions
+
+    Off by default. Worth enabling in long-running processes that read the
+    same secrets repeatedly; see secret_cache.py for the bounds and wiping.
+
+    Args:
+        ttl: Seconds an entry stays valid (default secret_cache.DEFAULT_TTL_SECONDS)
+        max_entries: LRU bound on cached secrets (default secret_cache.DEFAULT_MAX_ENTRIES)
+        max_bytes: LRU bound on cached bytes (default secret_cache.DEFAULT_MAX_BYTES)
+
+    Returns:
+        The SecretCache now in use (call .stats() for hit/miss counters)
+    """
+    options = {name: value for name, value in
+               (("ttl", ttl), ("max_entries", max_entries), ("max_bytes", max_bytes)) if value is not None}
+    disableSecretCache()
+    _default_vault.cache = SecretCache(**options)
+    return _default_vault.cache
+
+
+def disableSecretCache() -> None:
+    """Turn off the module-level secret cache, wiping anything it held"""
+    if _default_vault.cache is not None:
+        _default_vault.cache.clear()
+        _default_vault.cache = None
+
+
+def getSecretCacheStats() -> Optional[dict]:
+    """
+    Hit/miss counters of the module-level secret cache
+
+    Returns:
+        Dict with keys hits, misses, evictions, entries, bytes — or None if the cache is off
+    """
+    return _default_vault.cache.stats() if _default_vault.cache is not None else None
+
+
 def startSession(user: str, password: str) -> None:
     """
     Initialize a session by deriving and storing the encryption key
@@ -165,18 +832,7 @@ def startSession(user: str, password: str) -> None:
     Raises:
         RuntimeError: If the user has no encryption salt in the database
     """
-    global _session_encryption_key, _session_user
-
-    # Look up the user's per-user salt from the database
-    salt_hex = sqlite.queryUserSalt(user)
-    if salt_hex is None:
-        raise RuntimeError(f"No encryption salt found for user '{user}' — run migration first")
-
-    salt = bytes.fromhex(salt_hex)
-
-    _session_user = user
-    _session_encryption_key = deriveEncryptionKey(password, salt)
-    log("AUTH", f"Session started for '{user}'")
+    _default_vault.startSession(user, password)
 
 
 def startSessionFromKey(user: str, encryption_key: bytes) -> None:
@@ -194,18 +850,7 @@ def startSessionFromKey(user: str, encryption_key: bytes) -> None:
     Raises:
         ValueError: If the key is not a valid Fernet key
     """
-    global _session_encryption_key, _session_user
-
-    # Validate the key by trying to instantiate Fernet — this catches
-    # truncated, corrupted, or wrong-length keys before we store them
-    try:
-        Fernet(encryption_key)
-    except (ValueError, Exception) as e:
-        raise ValueError(f"Invalid encryption key: {e}")
-
-    _session_user = user
-    _session_encryption_key = encryption_key
-    log("AUTH", f"Session started from pre-derived key for '{user}'")
+    _default_vault.startSessionFromKey(user, encryption_key)
 
 
 def endSession() -> None:
@@ -215,11 +860,7 @@ def endSession() -> None:
     This should be called when the user signs out to ensure
     sensitive data is removed from memory.
     """
-    global _session_encryption_key, _session_user
-
-    log("AUTH", f"Session ended for '{_session_user}'")
-    _session_encryption_key = None
-    _session_user = None
+    _default_vault.endSession()
 
 
 def getSessionEncryptionKey() -> Optional[bytes]:
@@ -229,7 +870,7 @@ def getSessionEncryptionKey() -> Optional[bytes]:
     Returns:
         Encryption key as bytes, or None if no active session
     """
-    return _session_encryption_key
+    return _default_vault.encryptionKey
 
 
 def getSessionUser() -> Optional[str]:
@@ -239,7 +880,7 @@ def getSessionUser() -> Optional[str]:
     Returns:
         Username as string, or None if no active session
     """
-    return _session_user
+    return _default_vault.user
 
 
 def encryptPassword(password: str) -> str:
@@ -255,14 +896,7 @@ def encryptPassword(password: str) -> str:
     Raises:
         RuntimeError: If no active session exists
     """
-    if _session_encryption_key is None:
-        log("ERROR", "Encryption attempted with no active session")
-        raise RuntimeError("No active session - cannot encrypt password")
-
-    fernet = Fernet(_session_encryption_key)
-    encrypted = fernet.encrypt(password.encode('utf-8'))
-    log("AUTH", "Password encrypted successfully")
-    return encrypted.decode('utf-8')
+    return _default_vault.encryptPassword(password)
 
 
 def decryptPassword(encrypted_password: str) -> str:
@@ -278,14 +912,7 @@ def decryptPassword(encrypted_password: str) -> str:
     Raises:
         RuntimeError: If no active session exists
     """
-    if _session_encryption_key is None:
-        log("ERROR", "Decryption attempted with no active session")
-        raise RuntimeError("No active session - cannot decrypt password")
-
-    fernet = Fernet(_session_encryption_key)
-    decrypted = fernet.decrypt(encrypted_password.encode('utf-8'))
-    log("AUTH", "Password decrypted successfully")
-    return decrypted.decode('utf-8')
+    return _default_vault.decryptPassword(encrypted_password)
 
 
 # ---------------------------------------------------------------------------
@@ -297,8 +924,9 @@ def migrateUserSalt(user: str, password: str) -> bool:
     Migrate a user from the legacy global salt to a per-user random salt.
 
     This re-derives the encryption key with a new salt and re-encrypts all
-    of the user's stored secrets. The operation is atomic — if any step
-    fails, no changes are committed.
+    of the user's stored secrets and every stored version of them, so their
+    history stays readable. The operation is atomic — if any step fails, no
+    changes are committed.
 
     Args:
         user: Username to migrate
@@ -329,27 +957,35 @@ def migrateUserSalt(user: str, password: str) -> bool:
     if not data:
         data = []
 
-    # Re-encrypt each secret: decrypt with old key, re-encrypt with new key
-    re_encrypted = []
-    for row in data:
-        # row: (user, category, account, username, encrypted_password, last_modified)
-        old_encrypted = row[4]
+    def reEncrypt(old_encrypted: str, what: str) -> str:
         try:
             plaintext = old_fernet.decrypt(old_encrypted.encode('utf-8')).decode('utf-8')
         except Exception as e:
-            raise RuntimeError(
-                f"Failed to decrypt secret for account '{row[2]}' during migration: {e}"
-            )
-        new_encrypted = new_fernet.encrypt(plaintext.encode('utf-8')).decode('utf-8')
-        re_encrypted.append((row, new_encrypted))
+            raise RuntimeError(f"Failed to decrypt {what} during migration: {e}")
+        return new_fernet.encrypt(plaintext.encode('utf-8')).decode('utf-8')
+
+    # Re-encrypt each secret: decrypt with old key, re-encrypt with new key
+    # row: (user, category, account, username, encrypted_password, last_modified, secret_id, path)
+    re_encrypted = {}
+    current = {}
+    for row in data:
+        re_encrypted[row[6]] = reEncrypt(row[4], f"secret for account '{row[2]}'")
+        current[row[6]] = row[4]
+
+    # ... and every stored version; the current one gets the same ciphertext as the secret itself
+    versions = []
+    for secret_id, version, old_encrypted in sqlite.queryUserPasswordVersions(user):
+        if secret_id in current and old_encrypted == current[secret_id]:
+            versions.append((secret_id, version, re_encrypted[secret_id]))
+        else:
+            versions.append((secret_id, version, reEncrypt(old_encrypted, f"version {version} of secret {secret_id}")))
 
-    # Apply all changes: update each secret row and set the new salt
-    for (row, new_enc) in re_encrypted:
-        sqlite.updateData(user, new_enc, row[2], row[3], row[4])
+    # Apply all changes (secrets, history and the new salt) in one transaction
+    if not sqlite.reencryptUserData(user, list(re_encrypted.items()), versions, new_salt.hex()):
+        raise RuntimeError(f"Failed to store re-encrypted secrets for user '{user}' (see Logs.txt)")
 
-    sqlite.updateUserSalt(user, new_salt.hex())
     log("AUTH", f"Migrated user '{user}' from legacy salt to per-user salt "
-        f"({len(re_encrypted)} secrets re-encrypted)")
+        f"({len(re_encrypted)} secrets, {len(versions)} versions re-encrypted)")
     return True
 
 
@@ -371,8 +1007,26 @@ def isAccountLocked(user: str) -> bool:
     return sqlite.isUserLocked(user)
 
 
+def getDataVersion(user: str) -> int:
+    """
+    Get a user's data version — a counter that changes whenever any process adds,
+    updates or deletes one of the user's secrets
+
+    Cheap (one primary-key lookup), so interfaces holding secrets in memory can
+    poll it and requery only when it has moved.
+
+    Args:
+        user: Username to check
+
+    Returns:
+        The current version (0 if the user has never had a change recorded)
+    """
+    return sqlite.queryDataVersion(user)
+
+
 def getSecrets(user: str, category: str = None, text: str = None,
-               sort_by: str = None, sort_column: str = None) -> list[dict]:
+               sort_by: str = None, sort_column: str = None,
+               metadata_only: bool = False) -> list[dict]:
     """
     Query all secrets for a user, returning structured dicts
 
@@ -385,29 +1039,148 @@ def getSecrets(user: str, category: str = None, text: str = None,
         text: Search text for LIKE filtering
         sort_by: Sort order ('ascending' or 'descending')
         sort_column: Column to sort by (must be in ALLOWED_COLUMNS, defaults to category if None)
+        metadata_only: Don't read the ciphertext at all (for listings that never show it)
 
     Returns:
         List of dicts with keys: category, account, username, password (encrypted), last_modified
+        (no password key when metadata_only)
 
     Raises:
         RuntimeError: If no active session
     """
-    if _session_encryption_key is None:
-        raise RuntimeError("No active session - cannot query secrets")
+    return _default_vault._asUser(user).getSecrets(category=category, text=text,
+                                                  sort_by=sort_by, sort_column=sort_column,
+                                                  metadata_only=metadata_only)
 
-    data = sqlite.queryData(user=user, table="passwords", category=category,
-                            text=text, sort_by=sort_by, sort_column=sort_column)
-    results = []
-    for row in (data or []):
-        # row tuple: (user, category, account, username, encrypted_password, last_modified)
-        results.append({
-            "category": row[1],
-            "account": row[2],
-            "username": row[3],
-            "password": row[4],
-            "last_modified": str(row[5]),
-        })
-    return results
+
+# Rows fetched per query when streaming a listing — bounds memory regardless of vault size
+LIST_BATCH_SIZE = 1000
+
+
+def iterSecretMetadata(user: str, cursor: Optional[str] = None,
+                       limit: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream a user's secrets' metadata in (account, secret_id) order, without ciphertext
+
+    Rows are read in keyset batches of LIST_BATCH_SIZE, so memory stays
+    constant however many secrets the user has. Pass the cursor of the last
+    secret seen (encodeListCursor) to resume after it.
+
+    Args:
+        user: Username to list secrets for
+        cursor: Opaque position from encodeListCursor (None to start at the beginning)
+        limit: Maximum number of secrets to yield (None for all)
+
+    Yields:
+        Dicts with keys: category, account, username, last_modified, secret_id
+
+    Raises:
+        RuntimeError: If no active session
+        ValueError: If cursor is not a valid list cursor
+    """
+    return _default_vault._asUser(user).iterSecretMetadata(cursor=cursor, limit=limit)
+
+
+def encodeListCursor(secret: dict) -> str:
+    """
+    Opaque cursor pointing just past secret in an iterSecretMetadata listing
+
+    Args:
+        secret: A dict yielded by iterSecretMetadata
+
+    Returns:
+        URL-safe token, e.g. for `cli-guard list --cursor`
+    """
+    raw = f"{secret['secret_id']}:{secret['account']}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decodeListCursor(cursor: str) -> tuple[str, int]:
+    """
+    Decode a list cursor into its (account, secret_id) keyset position
+
+    Raises:
+        ValueError: If cursor was not produced by encodeListCursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        secret_id, account = raw.split(":", 1)
+        return account, int(secret_id)
+    except ValueError:
+        # Also covers bad base64 (binascii.Error) and bad UTF-8
+        raise ValueError(f"Invalid list cursor: {cursor!r}") from None
+
+
+# Metadata columns covered by the passwords_fts full-text index (the user column is filtered separately)
+SEARCH_COLUMNS = ("category", "account", "username")
+
+
+def buildSearchQuery(text: str) -> str:
+    """
+    Translate user search text into an FTS5 MATCH expression
+
+    Each whitespace-separated term (or "quoted phrase") becomes a prefix
+    match, terms are ANDed together, and a bare OR between terms is kept
+    as an operator. All terms are quoted, so FTS5 syntax characters in
+    user input are treated as literal text.
+
+    Examples:
+        'prod db'         → {category account username} : ("prod"* "db"*)
+        'stripe OR paypal' → {category account username} : ("stripe"* OR "paypal"*)
+
+    Args:
+        text: Raw search text
+
+    Returns:
+        FTS5 query string, or "" if text contains no terms
+    """
+    try:
+        terms = shlex.split(text)
+    except ValueError:
+        # Unbalanced quotes — fall back to plain whitespace splitting
+        terms = text.split()
+
+    parts: list[str] = []
+    for term in terms:
+        if term == "OR":
+            # Only keep OR between two terms
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        term = term.rstrip("*").strip()
+        if not term:
+            continue
+        parts.append('"' + term.replace('"', '""') + '"*')
+
+    if parts and parts[-1] == "OR":
+        parts.pop()
+    if not parts:
+        return ""
+
+    return "{" + " ".join(SEARCH_COLUMNS) + "} : (" + " ".join(parts) + ")"
+
+
+def searchSecrets(user: str, text: str, limit: Optional[int] = 50, metadata_only: bool = False) -> list[dict]:
+    """
+    Full-text search across category, account and username, best match first
+
+    Served by the passwords_fts index, so it stays fast on large vaults
+    regardless of which column the text appears in.
+
+    Args:
+        user: Username to search secrets for
+        text: Search text — terms are prefix-matched and ANDed; "OR" and "quoted phrases" supported
+        limit: Maximum number of results (None for no limit)
+        metadata_only: Don't read the ciphertext at all (for result lists that never show it)
+
+    Returns:
+        List of dicts with keys: category, account, username, password (encrypted), last_modified
+        (no password key when metadata_only)
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).searchSecrets(text, limit=limit, metadata_only=metadata_only)
 
 
 def getSecret(user: str, account: str, username: str = None) -> Optional[dict]:
@@ -423,49 +1196,391 @@ def getSecret(user: str, account: str, username: str = None) -> Optional[dict]:
         username: Optional username to disambiguate multiple matches
 
     Returns:
-        Dict with keys: category, account, username, password (decrypted), last_modified
+        Dict with keys: category, account, username, password (decrypted), last_modified, path
         None if no matching secret found
 
     Raises:
         RuntimeError: If no active session
     """
-    if _session_encryption_key is None:
-        raise RuntimeError("No active session - cannot retrieve secret")
+    return _default_vault._asUser(user).getSecret(account, username=username)
 
-    # queryData uses LIKE with %text%, so we post-filter for exact match
-    data = sqlite.queryData(user=user, table="passwords",
-                            category="account", text=account)
-    if not data:
-        return None
 
-    # Filter for exact account match
-    matches = [row for row in data if row[2] == account]
-    if not matches:
-        return None
+def getSecretByPath(user: str, path: str) -> Optional[dict]:
+    """
+    Get a secret by its full hierarchical path (e.g. "prod/payments/stripe"), password decrypted
 
-    # Narrow by username if provided
-    if username:
-        matches = [row for row in matches if row[3] == username]
-        if not matches:
-            return None
+    Args:
+        user: Username who owns the secrets
+        path: Exact path of the secret
+
+    Returns:
+        Dict with the same keys as getSecret, or None if no secret has that path
 
-    row = matches[0]
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getSecretByPath(path)
+
+
+def listSecretsByPrefix(user: str, prefix: str, limit: Optional[int] = None) -> list[dict]:
+    """
+    List the secrets whose path starts with prefix, in path order (metadata only)
+
+    "prod/payments/" lists everything under that folder; "" lists every secret
+    that has a path. Served by a range scan of the path index.
+
+    Args:
+        user: Username who owns the secrets
+        prefix: Path prefix
+        limit: Maximum number of secrets (None for all)
+
+    Returns:
+        Dicts with keys: category, account, username, last_modified, path
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).listSecretsByPrefix(prefix, limit=limit)
+
+
+def setSecretPath(user: str, account: str, username: str = None, path: Optional[str] = None) -> bool:
+    """
+    Give a secret a path, move it to another path, or remove its path (path=None)
+
+    Args:
+        user: Username who owns the secret
+        account: Account name of the secret
+        username: Optional username to disambiguate multiple matches
+        path: New path, or None to remove it
+
+    Returns:
+        True if updated, False if no matching secret was found
+
+    Raises:
+        RuntimeError: If no active session
+        ValueError: If another secret already has that path
+    """
+    return _default_vault._asUser(user).setSecretPath(account, username=username, path=path)
+
+
+def getSecretsByTags(user: str, tags: list[str]) -> list[dict]:
+    """
+    Get every secret carrying all of the given tags in a single query, passwords decrypted
+
+    e.g. getSecretsByTags(user, ["service=payments"]) fetches everything a
+    payments deploy needs as one batch, via the secret_tags index.
+
+    Args:
+        user: Username who owns the secrets
+        tags: Tags a secret must all carry (at most CLI_Guard_SQL.MAX_FILTER_TAGS)
+
+    Returns:
+        Dicts with the same keys as getSecret, oldest secret first
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getSecretsByTags(tags)
+
+
+def listSecretsByTags(user: str, tags: list[str], limit: Optional[int] = None) -> list[dict]:
+    """
+    List the secrets carrying all of the given tags (metadata only)
+
+    Args:
+        user: Username who owns the secrets
+        tags: Tags a secret must all carry
+        limit: Maximum number of secrets (None for all)
+
+    Returns:
+        Dicts with keys: category, account, username, last_modified, path
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).listSecretsByTags(tags, limit=limit)
+
+
+def getSecretTags(user: str, account: str, username: str = None) -> Optional[list[str]]:
+    """
+    Get a secret's tags
+
+    Args:
+        user: Username who owns the secret
+        account: Account name of the secret
+        username: Optional username to disambiguate multiple matches
+
+    Returns:
+        Tags in alphabetical order, or None if no matching secret was found
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getSecretTags(account, username=username)
+
+
+def tagSecret(user: str, account: str, username: str = None,
+              add: list[str] = (), remove: list[str] = ()) -> bool:
+    """
+    Add and/or remove tags on a secret
+
+    Tags are free-form labels such as "deploy" or "service=payments"; adding a
+    tag the secret already carries, or removing one it lacks, is not an error.
+
+    Args:
+        user: Username who owns the secret
+        account: Account name of the secret
+        username: Optional username to disambiguate multiple matches
+        add: Tags to add
+        remove: Tags to remove
+
+    Returns:
+        True if updated, False if no matching secret was found
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).tagSecret(account, username=username, add=add, remove=remove)
+
+
+def getTagNames(user: str) -> list[tuple[str, int]]:
+    """
+    Get a user's distinct tags (metadata only, nothing decrypted)
+
+    Args:
+        user: Username who owns the secrets
+
+    Returns:
+        List of (tag, number of secrets) tuples in tag order
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getTagNames()
+
+
+def normalizeTimestamp(text: str) -> str:
+    """
+    Normalise a user-supplied point in time to the "YYYY-MM-DD HH:MM:SS" form history is stored in
+
+    Accepts ISO 8601 dates and date-times ("2026-03-01", "2026-03-01 14:30", "2026-03-01T14:30:05");
+    a bare date means the start of that day.
+
+    Raises:
+        ValueError: If text is not an ISO 8601 date or date-time
+    """
     try:
-        decrypted = decryptPassword(row[4])
-    except Exception:
-        decrypted = None
+        moment = datetime.fromisoformat(text.strip())
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid timestamp '{text}' - use YYYY-MM-DD or YYYY-MM-DD HH:MM[:SS]") from None
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
 
-    return {
-        "category": row[1],
-        "account": row[2],
-        "username": row[3],
-        "password": decrypted,
-        "last_modified": str(row[5]),
-    }
+def getSecretHistory(user: str, account: str, username: str = None) -> Optional[list[dict]]:
+    """
+    List the stored versions of a secret, newest first (nothing is decrypted)
+
+    Every password change appends a version (see CLI_SQL.createPasswordVersionsTable);
+    the newest CLI_SQL.PASSWORD_VERSIONS_KEEP are kept.
+
+    Args:
+        user: Username who owns the secret
+        account: Account name to look up
+        username: Optional username to disambiguate multiple matches
+
+    Returns:
+        List of dicts with keys: version, created_at, current — or None if no such secret
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getSecretHistory(account, username=username)
+
+
+def getSecretVersion(user: str, account: str, username: str = None,
+                     version: Optional[int] = None, at: Optional[str] = None) -> Optional[dict]:
+    """
+    Get a secret as it was at a given version or point in time, password decrypted
+
+    Args:
+        user: Username who owns the secret
+        account: Account name to look up
+        username: Optional username to disambiguate multiple matches
+        version: Version number (from getSecretHistory)
+        at: Timestamp — returns the version in effect then (see normalizeTimestamp)
+
+    Returns:
+        Dict with keys: category, account, username, password (decrypted), last_modified,
+        version, created_at — or None if the secret or that version doesn't exist
+        (including versions already pruned, or a time before the secret existed)
+
+    Raises:
+        RuntimeError: If no active session
+        ValueError: If at is not a valid timestamp
+    """
+    return _default_vault._asUser(user).getSecretVersion(account, username=username, version=version, at=at)
+
+
+def getSecretVersionByPath(user: str, path: str, version: Optional[int] = None,
+                           at: Optional[str] = None) -> Optional[dict]:
+    """
+    Get the secret at a path as it was at a given version or point in time, password decrypted
+
+    The history is read by the path's secret_id, so another secret sharing its
+    account and username is never consulted.
+
+    Args:
+        user: Username who owns the secret
+        path: Exact path of the secret
+        version: Version number (from getSecretHistory)
+        at: Timestamp — returns the version in effect then (see normalizeTimestamp)
+
+    Returns:
+        Dict with the same keys as getSecretVersion, or None if no secret has that
+        path or that version doesn't exist
+
+    Raises:
+        RuntimeError: If no active session
+        ValueError: If at is not a valid timestamp
+    """
+    return _default_vault._asUser(user).getSecretVersionByPath(path, version=version, at=at)
+
+
+def getSecretsByAccounts(user: str, accounts: list[str]) -> dict[str, dict]:
+    """
+    Get several secrets by exact account name in a single query, passwords decrypted
+
+    Like calling getSecret once per account, but with one database round trip.
+    When several secrets share an account name the first-created one is used,
+    matching getSecret without a username.
+
+    Args:
+        user: Username who owns the secrets
+        accounts: Account names to look up (duplicates are fine)
+
+    Returns:
+        Dict mapping each found account name to a dict with keys:
+        category, account, username, password (decrypted), last_modified.
+        Accounts with no secret are absent from the result.
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).getSecretsByAccounts(accounts)
+
+
+def getSecretNames(user: str) -> tuple[list[str], list[str]]:
+    """
+    Get a user's distinct account and category names (metadata only, nothing decrypted)
+
+    Used to refresh the shell-completion metadata cache.
+
+    Args:
+        user: Username who owns the secrets
+
+    Returns:
+        (account names, category names)
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    if not _default_vault.isActive:
+        raise RuntimeError("No active session - cannot list secret names")
+
+    return sqlite.queryAccountNames(user), sqlite.queryCategoryNames(user)
+
+
+def getAccountNameIndex(user: str, connection=None) -> NameIndex:
+    """
+    Get the cached account-name index for a user, building it on first use
+
+    Built from a metadata-only query (no ciphertext is read), then reused
+    for every fuzzy lookup until the user's secrets change — in this process
+    or any other, as tracked by the user's data version. The index is also
+    saved next to the shell-completion cache, so the next CLI process loads
+    it instead of re-reading and re-indexing every account name.
+
+    Args:
+        user: Username whose account names to index
+        connection: Explicit DB connection (a Vault's own) to build the index from
+
+    Returns:
+        NameIndex over the user's distinct account names
+    """
+    db = {} if connection is None else {"connection": connection}
+    version = sqlite.queryDataVersion(user, **db)
+    cached = _account_name_indexes.get(user)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = None
+    saved = completion.read_name_index(user)
+    if saved is not None and saved[0] == version:
+        try:
+            index = NameIndex.loads(saved[1])
+        except (ValueError, KeyError, TypeError):
+            index = None  # Corrupt or from an older format — rebuilt and rewritten below
+
+    if index is None:
+        index = NameIndex(sqlite.queryAccountNames(user, **db))
+        try:
+            completion.write_name_index(user, version, index.dumps())
+        except OSError as e:
+            log("CACHE", f"Could not save account name index for user '{user}': {e}")
+
+    _account_name_indexes[user] = (version, index)
+    return index
+
+
+def invalidateAccountNameIndex(user: str) -> None:
+    """Drop the cached account-name index for a user, in memory and on disk (called on add/update/delete)"""
+    _account_name_indexes.pop(user, None)
+    completion.remove_name_index(user)
+
+
+def suggestAccounts(user: str, account: str, limit: Optional[int] = 5) -> list[tuple[str, float]]:
+    """
+    Rank a user's account names by similarity to a (possibly mistyped) account name
+
+    Args:
+        user: Username who owns the secrets
+        account: Account name to match
+        limit: Maximum number of suggestions (None for all above the similarity threshold)
+
+    Returns:
+        List of (account, score) tuples, best first; scores range 0.0–1.0
+
+    Raises:
+        RuntimeError: If no active session
+    """
+    return _default_vault._asUser(user).suggestAccounts(account, limit=limit)
+
+
+def resolveFuzzyAccount(suggestions: list[tuple[str, float]]) -> Optional[str]:
+    """
+    Pick the account to auto-resolve to from ranked suggestions, if one is unambiguous
+
+    Args:
+        suggestions: Output of suggestAccounts()
+
+    Returns:
+        The best account name if it scores at least FUZZY_RESOLVE_MIN_SCORE and leads
+        the runner-up by FUZZY_RESOLVE_MIN_MARGIN, otherwise None
+    """
+    if not suggestions:
+        return None
+
+    best_name, best_score = suggestions[0]
+    if best_score < FUZZY_RESOLVE_MIN_SCORE:
+        return None
+    if len(suggestions) > 1 and best_score - suggestions[1][1] < FUZZY_RESOLVE_MIN_MARGIN:
+        return None
+    return best_name
 
 
 def addSecret(user: str, category: str, account: str,
-              username: str, password: str) -> bool:
+              username: str, password: str, path: Optional[str] = None,
+              tags: list[str] = ()) -> Optional[int]:
     """
     Encrypt a password and store it as a new secret entry
 
@@ -475,20 +1590,17 @@ def addSecret(user: str, category: str, account: str,
         account: Account name
         username: Username for the account
         password: Plaintext password to encrypt and store
+        path: Optional hierarchical path (e.g. "prod/payments/stripe"), unique per user
+        tags: Tags to put on the new secret
 
     Returns:
-        True if successful
+        The new secret's secret_id, or None if it could not be stored
 
     Raises:
         RuntimeError: If no active session
+        ValueError: If another secret already has that path
     """
-    if _session_encryption_key is None:
-        raise RuntimeError("No active session - cannot add secret")
-
-    encrypted = encryptPassword(password)
-    sqlite.insertData(user, category, account, username, encrypted)
-    log("AUTH", f"Secret added for account '{account}' by user '{user}'")
-    return True
+    return _default_vault._asUser(user).addSecret(category, account, username, password, path=path, tags=tags)
 
 
 def updateSecret(user: str, account: str, username: str,
@@ -509,13 +1621,7 @@ def updateSecret(user: str, account: str, username: str,
     Raises:
         RuntimeError: If no active session
     """
-    if _session_encryption_key is None:
-        raise RuntimeError("No active session - cannot update secret")
-
-    new_encrypted = encryptPassword(new_password)
-    sqlite.updateData(user, new_encrypted, account, username, old_encrypted_password)
-    log("AUTH", f"Secret updated for account '{account}' by user '{user}'")
-    return True
+    return _default_vault._asUser(user).updateSecret(account, username, old_encrypted_password, new_password)
 
 
 def deleteSecret(user: str, account: str, username: str,
@@ -535,9 +1641,4 @@ def deleteSecret(user: str, account: str, username: str,
     Raises:
         RuntimeError: If no active session
     """
-    if _session_encryption_key is None:
-        raise RuntimeError("No active session - cannot delete secret")
-
-    sqlite.deleteData(user, account, username, encrypted_password)
-    log("AUTH", f"Secret deleted for account '{account}' by user '{user}'")
-    return True
+    return _default_vault._asUser(user).deleteSecret(account, username, encrypted_password)
@@ -15,18 +15,54 @@ Authentication uses tokens — no plaintext passwords on data commands:
         export CLIGUARD_SERVICE_TOKEN=<your-service-token>
         DB_PASS=$(python3 CLI_Guard_CLI.py get --user admin --account prod-db)
 
+    Inject several secrets into a command's environment (one auth, one query):
+        python3 CLI_Guard_CLI.py exec --user admin \\
+            --map DB_PASS=prod-db --map DB_USER=prod-db:username -- ./deploy.sh
+
+    Render a config template with {{ cliguard "account" "field" }} placeholders:
+        python3 CLI_Guard_CLI.py render --user admin app.conf.in > app.conf
+
     Create a service token:
         python3 CLI_Guard_CLI.py token create --user admin --name "ci-pipeline"
+
+    List a very large vault a page (or a line) at a time:
+        python3 CLI_Guard_CLI.py list --user admin --limit 500 --cursor <next_cursor>
+        python3 CLI_Guard_CLI.py list --user admin --ndjson | jq -r .account
+
+    Group secrets across categories with tags, then list a group in one indexed lookup:
+        python3 CLI_Guard_CLI.py tag --user admin --account stripe --add service=payments
+        python3 CLI_Guard_CLI.py list --user admin --tag service=payments
+
+    Roll back a rotated credential (history keeps the last 10 versions):
+        python3 CLI_Guard_CLI.py history --user admin --account prod-db
+        python3 CLI_Guard_CLI.py get --user admin --account prod-db --version 3
+
+    Nightly backups that grow with the changes, not the vault (first run is a full copy):
+        python3 CLI_Guard_CLI.py db backup /srv/backups/cli-guard
+        python3 CLI_Guard_CLI.py db restore /srv/backups/cli-guard --output restored.db
+
+    Keep the database file healthy after mass deletes (check, ANALYZE, VACUUM):
+        python3 CLI_Guard_CLI.py db stats
+        python3 CLI_Guard_CLI.py db maintain
+
+    Shell completion (account/category names come from a local metadata cache, no auth per <TAB>):
+        eval "$(python3 CLI_Guard_CLI.py completion bash)"
 """
 
 import argparse
 import getpass
+import itertools
 import json
 import os
+import re
 import sys
+import tempfile
 from typing import Optional
 
 import CLI_Guard
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import backup
+import completion
 import token_manager
 import validation
 from logger import log
@@ -116,6 +152,13 @@ def _authenticate(user: str, password: str) -> None:
         print(f"Error: Invalid username — {error}", file=sys.stderr)
         sys.exit(EXIT_ERROR)
 
+    # Refuse early (before any bcrypt work) after too many recent failures from any interface
+    try:
+        CLI_Guard.checkLoginAllowed(user)
+    except CLI_Guard.LoginRateLimitedError as e:
+        print(f"Error: {e}.", file=sys.stderr)
+        sys.exit(EXIT_AUTH_FAILURE)
+
     # Authenticate against stored bcrypt hash
     if not CLI_Guard.authUser(user, password):
         print(f"Error: Authentication failed for user '{user}'.", file=sys.stderr)
@@ -161,6 +204,7 @@ def _resolve_auth(user: str) -> None:
                 )
                 sys.exit(EXIT_AUTH_FAILURE)
             CLI_Guard.startSessionFromKey(user, encryption_key)
+            _refresh_completion_cache(user)
             return
         except token_manager.TokenRevokedError as e:
             print(f"Error: {e}", file=sys.stderr)
@@ -185,6 +229,7 @@ def _resolve_auth(user: str) -> None:
                 )
                 sys.exit(EXIT_AUTH_FAILURE)
             CLI_Guard.startSessionFromKey(user, encryption_key)
+            _refresh_completion_cache(user)
             return
         except token_manager.TokenExpiredError as e:
             print(f"Error: {e}", file=sys.stderr)
@@ -209,6 +254,37 @@ def _resolve_auth(user: str) -> None:
     sys.exit(EXIT_AUTH_FAILURE)
 
 
+def _validate_tags(tags: list[str]) -> None:
+    """Exit with an error if any --tag value is not a valid tag"""
+    for tag in tags:
+        valid, error = validation.validate_tag(tag)
+        if not valid:
+            print(f"Error: Invalid tag '{tag}' — {error}", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+
+
+def _refresh_completion_cache(user: str) -> None:
+    """
+    Rewrite the user's shell-completion metadata cache if their data version has moved
+
+    Called once a session is active, and again after add/update/delete, so
+    <TAB> completion reflects changes made through any interface. Failures are
+    logged and ignored — completion must never break a real command.
+
+    Args:
+        user: Username with an active session
+    """
+    try:
+        version = CLI_Guard.getDataVersion(user)
+        cached = completion.read_metadata_cache(user)
+        if cached is not None and cached.get("data_version") == version:
+            return
+        accounts, categories = CLI_Guard.getSecretNames(user)
+        completion.write_metadata_cache(user, version, accounts, categories)
+    except (OSError, RuntimeError):
+        log("CLI", f"Could not refresh completion cache for '{user}'", exc_info=True)
+
+
 # ---------------------------------------------------------------------------
 # Auth subcommand handlers (signin, signout)
 # ---------------------------------------------------------------------------
@@ -371,17 +447,62 @@ def cmd_token_revoke(args: argparse.Namespace) -> None:
 # ---------------------------------------------------------------------------
 
 def cmd_get(args: argparse.Namespace) -> None:
-    """Retrieve a single secret by account name"""
+    """Retrieve a single secret by account name or full path"""
+    path = getattr(args, "path", None)
+    if path is not None:
+        valid, error = validation.validate_secret_path(path)
+        if not valid:
+            print(f"Error: Invalid path — {error}", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+
     _resolve_auth(args.user)
 
+    version = getattr(args, "version", None)
+    at = getattr(args, "at", None)
+
+    def lookup(account: str) -> Optional[dict]:
+        # --version/--at read from the secret's history; otherwise the current secret
+        if version is None and at is None:
+            return CLI_Guard.getSecret(args.user, account, username=getattr(args, "username", None))
+        return CLI_Guard.getSecretVersion(args.user, account, username=getattr(args, "username", None),
+                                          version=version, at=at)
+
     try:
-        secret = CLI_Guard.getSecret(
-            args.user, args.account,
-            username=getattr(args, "username", None)
-        )
+        if path is not None:
+            # By path: an exact seek on the path index; --version/--at then read that secret's history by its id
+            secret = CLI_Guard.getSecretByPath(args.user, path)
+            if secret is None:
+                print(f"Error: No secret found at path '{path}'.", file=sys.stderr)
+                sys.exit(EXIT_NOT_FOUND)
+            args.account = secret["account"]
+            if version is not None or at is not None:
+                secret = CLI_Guard.getSecretVersionByPath(args.user, path, version=version, at=at)
+        else:
+            secret = lookup(args.account)
+
+        suggestions: list[tuple[str, float]] = []
+        if secret is None and path is None:
+            # Exact lookup missed — rank similar account names from the cached name index
+            suggestions = CLI_Guard.suggestAccounts(args.user, args.account)
+            resolved = CLI_Guard.resolveFuzzyAccount(suggestions) if getattr(args, "fuzzy", False) else None
+            if resolved is not None:
+                print(
+                    f"Note: No exact match for '{args.account}' — using closest account '{resolved}'.",
+                    file=sys.stderr
+                )
+                secret = lookup(resolved)
 
         if secret is None:
+            if version is not None or at is not None:
+                wanted = f"version {version}" if version is not None else f"time {at}"
+                print(f"Error: No secret found for account '{args.account}' at {wanted}.", file=sys.stderr)
+                sys.exit(EXIT_NOT_FOUND)
             print(f"Error: No secret found for account '{args.account}'.", file=sys.stderr)
+            if suggestions:
+                print(
+                    "Did you mean: " + ", ".join(name for name, _ in suggestions) + "?",
+                    file=sys.stderr
+                )
             sys.exit(EXIT_NOT_FOUND)
 
         field = getattr(args, "field", "password")
@@ -402,6 +523,31 @@ def cmd_get(args: argparse.Namespace) -> None:
                     sys.exit(EXIT_ERROR)
                 print(value)
 
+    except (RuntimeError, ValueError) as e:
+        # ValueError: malformed --at timestamp
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        CLI_Guard.endSession()
+
+
+def cmd_history(args: argparse.Namespace) -> None:
+    """List the stored versions of a secret, newest first (no passwords shown)"""
+    _resolve_auth(args.user)
+
+    try:
+        versions = CLI_Guard.getSecretHistory(args.user, args.account, username=args.username)
+        if versions is None:
+            print(f"Error: No secret found for account '{args.account}'.", file=sys.stderr)
+            sys.exit(EXIT_NOT_FOUND)
+
+        if args.json:
+            print(json.dumps(versions, indent=2))
+        else:
+            print("Version\tCreated\tCurrent")
+            for v in versions:
+                print(f"{v['version']}\t{v['created_at']}\t{'yes' if v['current'] else ''}")
+
     except RuntimeError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(EXIT_ERROR)
@@ -409,33 +555,365 @@ def cmd_get(args: argparse.Namespace) -> None:
         CLI_Guard.endSession()
 
 
+# Fields shown by list/search output — never the (encrypted) password or internal ids
+LIST_FIELDS = ("category", "account", "username", "last_modified", "path")
+
+
+def _take_page(secrets, limit: Optional[int], page: dict):
+    """
+    Yield up to limit secrets, recording in page whether more follow
+
+    Expects the iterator to have been asked for limit + 1 rows; the extra
+    row is only used to detect a next page. Sets page["last"] to the last
+    secret yielded and page["more"] to True if one was held back.
+    """
+    for count, secret in enumerate(secrets):
+        if limit is not None and count == limit:
+            page["more"] = True
+            return
+        page["last"] = secret
+        yield secret
+
+
+def _print_secret_rows(secrets, output_format: str) -> None:
+    """
+    Print secrets one at a time as a tab-separated table, a JSON array or NDJSON
+
+    Each row is written as it arrives, so output of any size uses constant memory.
+    """
+    if output_format == "ndjson":
+        for s in secrets:
+            print(json.dumps({k: s[k] for k in (*LIST_FIELDS, "score") if k in s}))
+    elif output_format == "json":
+        # Same text json.dumps(list, indent=2) produces, written element by element
+        print("[", end="")
+        separator = "\n"
+        for s in secrets:
+            item = json.dumps({k: s[k] for k in (*LIST_FIELDS, "score") if k in s}, indent=2)
+            print(separator + "  " + item.replace("\n", "\n  "), end="")
+            separator = ",\n"
+        print("\n]")
+    else:
+        # Tab-separated table for easy parsing with cut/awk
+        print("Category\tAccount\tUsername\tLast Modified\tPath")
+        for s in secrets:
+            print(f"{s['category']}\t{s['account']}\t{s['username']}\t{s['last_modified']}\t{s.get('path') or ''}")
+
+
 def cmd_list(args: argparse.Namespace) -> None:
-    """List all secrets for a user (no passwords shown)"""
+    """
+    List secrets for a user (no passwords shown)
+
+    Rows are streamed in account order straight from the database, so very
+    large vaults list in constant memory. --limit/--cursor page through them;
+    the cursor for the next page is printed to stderr as "next_cursor: <token>".
+    """
+    limit = getattr(args, "limit", None)
+    cursor = getattr(args, "cursor", None)
+    if limit is not None and limit < 1:
+        print("Error: --limit must be at least 1", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    if getattr(args, "match", None) and (limit is not None or cursor):
+        print("Error: --match cannot be combined with --limit or --cursor", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    # --tag and --prefix results have no cursor to resume from, so --limit would silently drop the rest
+    tags = getattr(args, "tag", None) or []
+    if tags:
+        if limit is not None or cursor or getattr(args, "match", None) or getattr(args, "prefix", None) is not None:
+            print("Error: --tag cannot be combined with --limit, --cursor, --match or --prefix", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        if len(tags) > sqlite.MAX_FILTER_TAGS:
+            print(f"Error: At most {sqlite.MAX_FILTER_TAGS} --tag filters", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        _validate_tags(tags)
+    prefix = getattr(args, "prefix", None)
+    if prefix is not None:
+        if limit is not None or cursor or getattr(args, "match", None):
+            print("Error: --prefix cannot be combined with --limit, --cursor or --match", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        valid, error = validation.validate_secret_path(prefix, prefix=True)
+        if not valid:
+            print(f"Error: Invalid prefix — {error}", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+
     _resolve_auth(args.user)
 
     try:
-        secrets = CLI_Guard.getSecrets(args.user)
+        # --tag: the secrets carrying every tag given (one lookup on the tag index)
+        if tags:
+            secrets = iter(CLI_Guard.listSecretsByTags(args.user, tags))
+        # --prefix: the secrets under a path, in path order (a range scan of the path index)
+        elif prefix is not None:
+            secrets = iter(CLI_Guard.listSecretsByPrefix(args.user, prefix))
+        # --match: keep only accounts similar to the term, most similar first
+        elif getattr(args, "match", None):
+            ranked = CLI_Guard.suggestAccounts(args.user, args.match, limit=None)
+            scores = dict(ranked)
+            order = {name: position for position, (name, _) in enumerate(ranked)}
+            secrets = iter(sorted(
+                (dict(s, score=scores[s["account"]])
+                 for s in CLI_Guard.iterSecretMetadata(args.user) if s["account"] in scores),
+                key=lambda s: order[s["account"]]
+            ))
+        else:
+            # One extra row tells us whether there is a next page
+            secrets = CLI_Guard.iterSecretMetadata(args.user, cursor=cursor,
+                                                   limit=limit + 1 if limit is not None else None)
 
-        if not secrets:
+        first = next(secrets, None)
+        if first is None:
             print("No secrets found.", file=sys.stderr)
             sys.exit(EXIT_SUCCESS)
 
-        if args.json:
-            # Strip encrypted passwords from output
-            safe = [{k: v for k, v in s.items() if k != "password"} for s in secrets]
-            print(json.dumps(safe, indent=2))
+        page: dict = {"last": None, "more": False}
+        output_format = "ndjson" if getattr(args, "ndjson", False) else "json" if args.json else "table"
+        _print_secret_rows(_take_page(itertools.chain([first], secrets), limit, page), output_format)
+
+        if page["more"]:
+            print(f"next_cursor: {CLI_Guard.encodeListCursor(page['last'])}", file=sys.stderr)
+
+    except ValueError as e:
+        # Malformed --cursor
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        CLI_Guard.endSession()
+
+
+def cmd_search(args: argparse.Namespace) -> None:
+    """Full-text search across category, account and username (no passwords shown)"""
+    _resolve_auth(args.user)
+
+    try:
+        # Metadata only — the ciphertext is never shown, so it isn't read
+        secrets = CLI_Guard.searchSecrets(args.user, " ".join(args.terms), limit=args.limit, metadata_only=True)
+
+        if not secrets:
+            print("No matching secrets found.", file=sys.stderr)
+            sys.exit(EXIT_NOT_FOUND)
+
+        # Best match first, same columns as list
+        _print_secret_rows(secrets, "json" if args.json else "table")
+
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        CLI_Guard.endSession()
+
+
+# Environment variable names accepted by exec --map
+_ENV_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Secret fields that exec --map and render placeholders can reference
+SECRET_FIELDS = ("password", "username", "category", "last_modified")
+
+
+def _parse_env_mapping(spec: str) -> tuple[str, str, str]:
+    """
+    Parse an exec --map value of the form ENV=account[:field]
+
+    The field defaults to password. Account names may themselves contain
+    colons — only a trailing ':<known field>' is treated as the field.
+
+    Args:
+        spec: Raw --map argument
+
+    Returns:
+        Tuple of (env_name, account, field)
+
+    Raises:
+        ValueError: If the mapping is malformed
+    """
+    env_name, sep, target = spec.partition("=")
+    if not sep or not _ENV_NAME.match(env_name):
+        raise ValueError(f"Invalid mapping '{spec}' — expected ENV=account[:field]")
+
+    account, field = target, "password"
+    head, sep, tail = target.rpartition(":")
+    if sep and tail in SECRET_FIELDS:
+        account, field = head, tail
+
+    if not account:
+        raise ValueError(f"Invalid mapping '{spec}' — account name is empty")
+    return env_name, account, field
+
+
+def cmd_exec(args: argparse.Namespace) -> None:
+    """Run a command with secrets injected into its environment"""
+    command = list(args.cmd)
+    if command and command[0] == "--":
+        command = command[1:]
+    if not command:
+        print("Error: No command given. Usage: exec --map ENV=account -- cmd [args...]", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    try:
+        mappings = [_parse_env_mapping(spec) for spec in args.map]
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    _resolve_auth(args.user)
+
+    try:
+        # One query for every mapped account
+        secrets = CLI_Guard.getSecretsByAccounts(args.user, [account for _, account, _ in mappings])
+
+        missing = sorted({account for _, account, _ in mappings if account not in secrets})
+        if missing:
+            print(f"Error: No secret found for account(s): {', '.join(missing)}.", file=sys.stderr)
+            sys.exit(EXIT_NOT_FOUND)
+
+        env = dict(os.environ)
+        # The child gets the secrets, not our credentials
+        env.pop("CLIGUARD_SERVICE_TOKEN", None)
+        env.pop("CLIGUARD_SESSION", None)
+        env.pop("CLIGUARD_PASSWORD", None)
+        for env_name, account, field in mappings:
+            value = secrets[account].get(field)
+            if value is None:
+                print(f"Error: Could not read '{field}' for account '{account}'.", file=sys.stderr)
+                sys.exit(EXIT_ERROR)
+            env[env_name] = str(value)
+
+        log("CLI", f"exec: injecting {len(mappings)} variable(s) into '{command[0]}' for user '{args.user}'")
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        # exec replaces this process, so clear the key before handing over
+        CLI_Guard.endSession()
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvpe(command[0], command, env)
+    except OSError as e:
+        print(f"Error: Cannot run '{command[0]}': {e.strerror}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+
+# Template placeholder: {{ cliguard "account" }} or {{ cliguard "account" "field" }}
+# Quoted strings allow backslash escapes, so account names may contain quotes
+_TEMPLATE_REF = re.compile(
+    r'\{\{\s*cliguard\s+"((?:[^"\\]|\\.)*)"(?:\s+"((?:[^"\\]|\\.)*)")?\s*\}\}'
+)
+_TEMPLATE_ESCAPE = re.compile(r'\\(.)')
+
+
+def _template_ref(match: re.Match) -> tuple[str, str]:
+    """(account, field) for a placeholder match, unescaping both strings"""
+    account = _TEMPLATE_ESCAPE.sub(r"\1", match.group(1))
+    field = _TEMPLATE_ESCAPE.sub(r"\1", match.group(2)) if match.group(2) is not None else "password"
+    return account, field
+
+
+def _scan_template_refs(lines) -> list[tuple[str, str]]:
+    """
+    Collect the distinct (account, field) references in a template
+
+    Args:
+        lines: Iterable of template lines
+
+    Returns:
+        Unique references in first-seen order
+    """
+    refs: dict[tuple[str, str], None] = {}
+    for line in lines:
+        for match in _TEMPLATE_REF.finditer(line):
+            refs[_template_ref(match)] = None
+    return list(refs)
+
+
+def _render_template_line(line: str, secrets: dict[str, dict]) -> str:
+    """Substitute every placeholder in one line from already-fetched secrets"""
+    def substitute(match: re.Match) -> str:
+        account, field = _template_ref(match)
+        return str(secrets[account][field])
+    return _TEMPLATE_REF.sub(substitute, line)
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    """Render a template, replacing cliguard placeholders with secret values"""
+    # Pass 1: find the references. A file is re-read for pass 2 so large
+    # templates stream; stdin can only be read once, so it is buffered.
+    try:
+        if args.template == "-":
+            buffered = sys.stdin.readlines()
+            refs = _scan_template_refs(buffered)
         else:
-            # Tab-separated table for easy parsing with cut/awk
-            print("Category\tAccount\tUsername\tLast Modified")
-            for s in secrets:
-                print(f"{s['category']}\t{s['account']}\t{s['username']}\t{s['last_modified']}")
+            buffered = None
+            with open(args.template, "r", encoding="utf-8") as template:
+                refs = _scan_template_refs(template)
+    except OSError as e:
+        print(f"Error: Cannot read template '{args.template}': {e.strerror}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
 
+    bad_fields = sorted({field for _, field in refs if field not in SECRET_FIELDS})
+    if bad_fields:
+        print(
+            f"Error: Unknown field(s) in template: {', '.join(bad_fields)} "
+            f"(expected one of {', '.join(SECRET_FIELDS)}).",
+            file=sys.stderr
+        )
+        sys.exit(EXIT_ERROR)
+
+    _resolve_auth(args.user)
+
+    try:
+        # One query for every distinct account referenced
+        secrets = CLI_Guard.getSecretsByAccounts(args.user, [account for account, _ in refs])
     except RuntimeError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(EXIT_ERROR)
     finally:
         CLI_Guard.endSession()
 
+    missing = sorted({account for account, _ in refs if account not in secrets})
+    if missing:
+        print(f"Error: No secret found for account(s): {', '.join(missing)}.", file=sys.stderr)
+        sys.exit(EXIT_NOT_FOUND)
+    unreadable = sorted({account for account, field in refs if secrets[account].get(field) is None})
+    if unreadable:
+        print(f"Error: Could not decrypt secret(s) for account(s): {', '.join(unreadable)}.", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    # Pass 2: stream the substituted lines. The output file holds secrets, so it is written to a new
+    # owner-only (mkstemp, mode 600) file beside the target and swapped in — an existing target's looser
+    # mode never applies, and a failed render leaves the old file untouched
+    temp_path = None
+    try:
+        if args.output:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(args.output)),
+                                             prefix=f".{os.path.basename(args.output)}.", suffix=".tmp")
+            out = os.fdopen(fd, "w", encoding="utf-8")
+        else:
+            out = sys.stdout
+        try:
+            if buffered is not None:
+                for line in buffered:
+                    out.write(_render_template_line(line, secrets))
+            else:
+                with open(args.template, "r", encoding="utf-8") as template:
+                    for line in template:
+                        out.write(_render_template_line(line, secrets))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if temp_path is not None:
+            os.replace(temp_path, args.output)
+    except OSError as e:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.unlink(temp_path)
+        print(f"Error: Cannot write output: {e.strerror}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+    log("CLI", f"render: substituted {len(refs)} reference(s) from '{args.template}' for user '{args.user}'")
+
 
 def cmd_add(args: argparse.Namespace) -> None:
     """Add a new secret entry"""
@@ -454,13 +932,27 @@ def cmd_add(args: argparse.Namespace) -> None:
                 print(f"Error: {error}", file=sys.stderr)
                 sys.exit(EXIT_ERROR)
 
-        CLI_Guard.addSecret(
+        path = getattr(args, "path", None)
+        if path is not None:
+            valid, error = validation.validate_secret_path(path)
+            if not valid:
+                print(f"Error: Invalid path — {error}", file=sys.stderr)
+                sys.exit(EXIT_ERROR)
+        tags = getattr(args, "tag", None) or []
+        _validate_tags(tags)
+
+        secret_id = CLI_Guard.addSecret(
             args.user, args.category, args.account,
-            args.secret_username, args.secret
+            args.secret_username, args.secret, path=path, tags=tags
         )
+        if secret_id is None:
+            print(f"Error: Could not store secret for account '{args.account}'", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
         print(f"Secret added for account '{args.account}'.", file=sys.stderr)
+        _refresh_completion_cache(args.user)
 
-    except RuntimeError as e:
+    except (RuntimeError, ValueError) as e:
+        # ValueError: --path already in use
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(EXIT_ERROR)
     finally:
@@ -497,6 +989,65 @@ def cmd_update(args: argparse.Namespace) -> None:
             target["password"], args.new_secret
         )
         print(f"Secret updated for account '{args.account}'.", file=sys.stderr)
+        _refresh_completion_cache(args.user)
+
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        CLI_Guard.endSession()
+
+
+def cmd_set_path(args: argparse.Namespace) -> None:
+    """Give a secret a hierarchical path, move it to another, or remove it"""
+    if args.path is not None:
+        valid, error = validation.validate_secret_path(args.path)
+        if not valid:
+            print(f"Error: Invalid path — {error}", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+
+    _resolve_auth(args.user)
+
+    try:
+        if not CLI_Guard.setSecretPath(args.user, args.account, args.secret_username, path=args.path):
+            print(f"Error: No secret found for account '{args.account}'.", file=sys.stderr)
+            sys.exit(EXIT_NOT_FOUND)
+        if args.path is not None:
+            print(f"Secret for account '{args.account}' is now at '{args.path}'.", file=sys.stderr)
+        else:
+            print(f"Path removed from account '{args.account}'.", file=sys.stderr)
+
+    except (RuntimeError, ValueError) as e:
+        # ValueError: path already in use
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+    finally:
+        CLI_Guard.endSession()
+
+
+def cmd_tag(args: argparse.Namespace) -> None:
+    """Add or remove a secret's tags, or show them when neither --add nor --remove is given"""
+    _validate_tags(args.add + args.remove)
+
+    _resolve_auth(args.user)
+
+    try:
+        if args.add or args.remove:
+            if not CLI_Guard.tagSecret(args.user, args.account, args.secret_username,
+                                       add=args.add, remove=args.remove):
+                print(f"Error: No secret found for account '{args.account}'.", file=sys.stderr)
+                sys.exit(EXIT_NOT_FOUND)
+            print(f"Tags updated for account '{args.account}'.", file=sys.stderr)
+
+        tags = CLI_Guard.getSecretTags(args.user, args.account, args.secret_username)
+        if tags is None:
+            print(f"Error: No secret found for account '{args.account}'.", file=sys.stderr)
+            sys.exit(EXIT_NOT_FOUND)
+        if args.json:
+            print(json.dumps(tags))
+        else:
+            for tag in tags:
+                print(tag)
 
     except RuntimeError as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -536,6 +1087,7 @@ def cmd_delete(args: argparse.Namespace) -> None:
             target["username"], target["password"]
         )
         print(f"Secret deleted for account '{args.account}'.", file=sys.stderr)
+        _refresh_completion_cache(args.user)
 
     except RuntimeError as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -544,6 +1096,179 @@ def cmd_delete(args: argparse.Namespace) -> None:
         CLI_Guard.endSession()
 
 
+# ---------------------------------------------------------------------------
+# Database subcommand handlers (db backup, db restore, db maintain, db stats)
+# ---------------------------------------------------------------------------
+
+def _print_backup_progress(copied: int, total: int) -> None:
+    """Progress line for a paged full copy, rewritten in place on stderr"""
+    percent = 100 * copied // total if total else 100
+    end = "\n" if copied >= total else ""
+    print(f"\rCopied {copied}/{total} pages ({percent}%)", end=end, file=sys.stderr, flush=True)
+
+
+def cmd_db_backup(args: argparse.Namespace) -> None:
+    """
+    Write the next full or incremental snapshot to a backup directory
+
+    No authentication: like copying the database file, a snapshot holds only
+    ciphertext and password hashes. The snapshot path goes to stdout.
+    """
+    try:
+        info = backup.backupDatabase(
+            args.backup_dir, full=args.full, vacuum=args.vacuum,
+            progress=_print_backup_progress if args.progress else None
+        )
+    except backup.BackupError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+
+    print(info["path"])
+    if info["kind"] == "full":
+        print(f"Full backup: {info['secrets']} secrets.", file=sys.stderr)
+    else:
+        print(f"Incremental backup: {info['secrets']} changed secrets since {info['parent_id']}.",
+              file=sys.stderr)
+
+
+def cmd_db_restore(args: argparse.Namespace) -> None:
+    """Rebuild a database file from a backup directory's chain of snapshots"""
+    try:
+        chain = backup.restoreDatabase(args.backup_dir, args.output, until=args.until)
+    except backup.BackupError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+
+    print(args.output)
+    print(
+        f"Restored from {len(chain)} snapshot(s), ending at {chain[-1]['snapshot_id']} "
+        f"({chain[-1]['created_at']}).",
+        file=sys.stderr
+    )
+
+
+def _require_database() -> None:
+    """Exit with EXIT_DB_ERROR if the database can't be opened"""
+    if not sqlite.ensure_connection():
+        print("Error: Could not open the CLI Guard database.", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    """Human-readable byte count (e.g. 4.0 KiB), '-' when unknown"""
+    if size is None:
+        return "-"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def cmd_db_maintain(args: argparse.Namespace) -> None:
+    """
+    Check the database, then optimize the search index, refresh planner statistics and vacuum
+
+    Stops before changing anything if the integrity check finds a problem.
+    VACUUM needs the database to itself — run it when nothing else is using the vault.
+    """
+    _require_database()
+
+    problems = sqlite.checkIntegrity(quick=args.quick)
+    if problems != ["ok"]:
+        print("Integrity check failed:", file=sys.stderr)
+        for problem in problems:
+            print(f"  {problem}", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+    print("Integrity check: ok", file=sys.stderr)
+
+    failed = False
+    if sqlite.optimizeSearchIndex():
+        print("Search index: optimized", file=sys.stderr)
+    else:
+        failed = True
+        print("Search index: optimize failed (see Logs.txt)", file=sys.stderr)
+
+    if sqlite.analyzeDatabase():
+        print("Statistics: ANALYZE and PRAGMA optimize done", file=sys.stderr)
+    else:
+        failed = True
+        print("Statistics: ANALYZE failed (see Logs.txt)", file=sys.stderr)
+
+    if not args.no_vacuum:
+        sizes = sqlite.vacuumDatabase()
+        if sizes is None:
+            failed = True
+            print("Vacuum: failed — is another process using the database? (see Logs.txt)", file=sys.stderr)
+        else:
+            print(f"Vacuum: {_format_bytes(sizes[0])} -> {_format_bytes(sizes[1])}", file=sys.stderr)
+
+    if failed:
+        sys.exit(EXIT_DB_ERROR)
+
+
+def cmd_db_stats(args: argparse.Namespace) -> None:
+    """Report file size, free space, row counts per table and user, and per-table/index sizes"""
+    _require_database()
+    stats = sqlite.queryDatabaseStats()
+    if not stats:
+        print("Error: Could not read database statistics (see Logs.txt).", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+
+    if args.json:
+        stats["users"] = [{"user": user, "secrets": count} for user, count in stats["users"]]
+        stats["objects"] = [{"name": name, "type": kind, "table": table, "bytes": size, "stat": stat}
+                            for name, kind, table, size, stat in stats["objects"]]
+        print(json.dumps(stats, indent=2))
+        return
+
+    free_percent = 100 * stats["freelist_count"] // stats["page_count"] if stats["page_count"] else 0
+    print(f"File:\t{_format_bytes(stats['file_bytes'])} ({stats['page_count']} pages of {stats['page_size']} B)")
+    print(f"Free:\t{_format_bytes(stats['free_bytes'])} ({stats['freelist_count']} pages, {free_percent}%)")
+    print()
+    print("Table\tRows")
+    for table, rows in stats["tables"].items():
+        print(f"{table}\t{'-' if rows is None else rows}")
+    print()
+    print("User\tSecrets")
+    for user, count in stats["users"]:
+        print(f"{user}\t{count}")
+    print()
+    print("Name\tType\tTable\tSize\tStats (rows, rows per key)")
+    for name, kind, table, size, stat in stats["objects"]:
+        print(f"{name}\t{kind}\t{table}\t{_format_bytes(size)}\t{stat or '-'}")
+    if not any(stat for *_, stat in stats["objects"]):
+        print("\nNo planner statistics yet — run: cli-guard db maintain", file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Shell completion
+# ---------------------------------------------------------------------------
+
+def _completion_commands(parser: argparse.ArgumentParser) -> dict[str, list[str]]:
+    """Map each subcommand path ("get", "token create", ...) to the words completable after it"""
+    commands: dict[str, list[str]] = {}
+    for action in parser._actions:
+        if not isinstance(action, argparse._SubParsersAction):
+            continue
+        for name, subparser in action.choices.items():
+            nested = _completion_commands(subparser)
+            commands.update({f"{name} {path}": words for path, words in nested.items()})
+            words = [option for sub_action in subparser._actions for option in sub_action.option_strings]
+            # Positional choices (e.g. completion's shell) and nested subcommand names
+            words += [str(choice) for sub_action in subparser._actions
+                      if not sub_action.option_strings and sub_action.choices
+                      and not isinstance(sub_action, argparse._SubParsersAction)
+                      for choice in sub_action.choices]
+            commands[name] = words + sorted({path.split()[0] for path in nested})
+    return commands
+
+
+def cmd_completion(args: argparse.Namespace) -> None:
+    """Print a shell completion script (no authentication needed)"""
+    commands = _completion_commands(build_parser())
+    print(completion.SHELL_SCRIPTS[args.shell](commands), end="")
+
+
 # ---------------------------------------------------------------------------
 # Argument parser
 # ---------------------------------------------------------------------------
@@ -614,23 +1339,95 @@ def build_parser() -> argparse.ArgumentParser:
     tr_p.set_defaults(func=cmd_token_revoke)
 
     # --- get ---
-    get_p = subparsers.add_parser("get", help="Retrieve a secret by account name")
+    get_p = subparsers.add_parser("get", help="Retrieve a secret by account name or path")
     get_p.add_argument("--user", required=True, help="CLI Guard username")
-    get_p.add_argument("--account", required=True, help="Account name to retrieve")
+    get_which = get_p.add_mutually_exclusive_group(required=True)
+    get_which.add_argument("--account", help="Account name to retrieve")
+    get_which.add_argument("--path", help="Full path of the secret to retrieve (e.g. prod/payments/stripe)")
     get_p.add_argument("--username", default=None,
                        help="Username to disambiguate if multiple secrets share an account")
     get_p.add_argument("--field", default="password",
-                       choices=["password", "username", "category", "last_modified", "all"],
+                       choices=["password", "username", "category", "last_modified", "path", "all"],
                        help="Which field to return (default: password)")
     get_p.add_argument("--json", action="store_true", help="Output as JSON")
+    get_p.add_argument("--fuzzy", action="store_true",
+                       help="If no account matches exactly, use the closest account when it is unambiguous")
+    get_when = get_p.add_mutually_exclusive_group()
+    get_when.add_argument("--version", type=int, default=None,
+                          help="Return this version of the secret (see the history command)")
+    get_when.add_argument("--at", default=None, metavar="TIMESTAMP",
+                          help="Return the version in effect at this time (YYYY-MM-DD[ HH:MM[:SS]])")
     get_p.set_defaults(func=cmd_get)
 
+    # --- history ---
+    history_p = subparsers.add_parser("history", help="List the stored versions of a secret")
+    history_p.add_argument("--user", required=True, help="CLI Guard username")
+    history_p.add_argument("--account", required=True, help="Account name")
+    history_p.add_argument("--username", default=None,
+                           help="Username to disambiguate if multiple secrets share an account")
+    history_p.add_argument("--json", action="store_true", help="Output as JSON")
+    history_p.set_defaults(func=cmd_history)
+
     # --- list ---
     list_p = subparsers.add_parser("list", help="List all secrets for a user")
     list_p.add_argument("--user", required=True, help="CLI Guard username")
-    list_p.add_argument("--json", action="store_true", help="Output as JSON")
+    list_format = list_p.add_mutually_exclusive_group()
+    list_format.add_argument("--json", action="store_true", help="Output as JSON")
+    list_format.add_argument("--ndjson", action="store_true",
+                             help="Output one JSON object per line (streams; best for very large vaults)")
+    list_p.add_argument("--limit", type=int, default=None,
+                        help="Show at most this many secrets; the next page's cursor is printed to stderr "
+                             "(not with --match, --prefix or --tag)")
+    list_p.add_argument("--cursor", default=None,
+                        help="Resume listing after this cursor (from a previous --limit run)")
+    list_p.add_argument("--match", default=None,
+                        help="Only list accounts similar to this text, ranked most similar first")
+    list_p.add_argument("--prefix", default=None,
+                        help="Only list secrets whose path starts with this (e.g. prod/payments/), in path order")
+    list_p.add_argument("--tag", action="append", default=None, metavar="TAG",
+                        help="Only list secrets carrying this tag (repeatable; all must match)")
     list_p.set_defaults(func=cmd_list)
 
+    # --- search ---
+    search_p = subparsers.add_parser(
+        "search",
+        help="Full-text search across category, account and username"
+    )
+    search_p.add_argument("--user", required=True, help="CLI Guard username")
+    search_p.add_argument(
+        "terms", nargs="+",
+        help="Search terms — prefix-matched and combined with AND; use OR and \"quoted phrases\" as needed"
+    )
+    search_p.add_argument("--limit", type=int, default=50,
+                          help="Maximum number of results, best match first (default: 50)")
+    search_p.add_argument("--json", action="store_true", help="Output as JSON")
+    search_p.set_defaults(func=cmd_search)
+
+    # --- exec ---
+    exec_p = subparsers.add_parser(
+        "exec",
+        help="Run a command with secrets injected as environment variables"
+    )
+    exec_p.add_argument("--user", required=True, help="CLI Guard username")
+    exec_p.add_argument(
+        "--map", action="append", required=True, metavar="ENV=ACCOUNT[:FIELD]",
+        help=f"Set ENV to a secret field (repeatable; field is one of {', '.join(SECRET_FIELDS)}; default: password)"
+    )
+    exec_p.add_argument("cmd", nargs=argparse.REMAINDER,
+                        help="Command to run, after '--' (e.g. -- ./deploy.sh --prod)")
+    exec_p.set_defaults(func=cmd_exec)
+
+    # --- render ---
+    render_p = subparsers.add_parser(
+        "render",
+        help='Render a template, replacing {{ cliguard "account" "field" }} placeholders'
+    )
+    render_p.add_argument("--user", required=True, help="CLI Guard username")
+    render_p.add_argument("template", help="Template file to render ('-' for stdin)")
+    render_p.add_argument("-o", "--output", default=None,
+                          help="Write to this file (created mode 600) instead of stdout")
+    render_p.set_defaults(func=cmd_render)
+
     # --- add ---
     add_p = subparsers.add_parser("add", help="Add a new secret")
     add_p.add_argument("--user", required=True, help="CLI Guard username")
@@ -638,6 +1435,10 @@ def build_parser() -> argparse.ArgumentParser:
     add_p.add_argument("--account", required=True, help="Account name")
     add_p.add_argument("--secret-username", required=True, help="Username for the secret")
     add_p.add_argument("--secret", required=True, help="Secret value (password/API key/token)")
+    add_p.add_argument("--path", default=None,
+                       help="Hierarchical path for the secret, unique per user (e.g. prod/payments/stripe)")
+    add_p.add_argument("--tag", action="append", default=None, metavar="TAG",
+                       help="Tag the new secret (repeatable, e.g. --tag service=payments)")
     add_p.set_defaults(func=cmd_add)
 
     # --- update ---
@@ -648,6 +1449,26 @@ def build_parser() -> argparse.ArgumentParser:
     upd_p.add_argument("--new-secret", required=True, help="New secret value")
     upd_p.set_defaults(func=cmd_update)
 
+    # --- set-path ---
+    path_p = subparsers.add_parser("set-path", help="Give a secret a hierarchical path, move it, or remove it")
+    path_p.add_argument("--user", required=True, help="CLI Guard username")
+    path_p.add_argument("--account", required=True, help="Account of the secret")
+    path_p.add_argument("--secret-username", default=None, help="Username to disambiguate")
+    path_to = path_p.add_mutually_exclusive_group(required=True)
+    path_to.add_argument("--path", help="New path (e.g. prod/payments/stripe)")
+    path_to.add_argument("--clear", action="store_true", help="Remove the secret's path")
+    path_p.set_defaults(func=cmd_set_path)
+
+    # --- tag ---
+    tag_p = subparsers.add_parser("tag", help="Show, add or remove a secret's tags")
+    tag_p.add_argument("--user", required=True, help="CLI Guard username")
+    tag_p.add_argument("--account", required=True, help="Account of the secret")
+    tag_p.add_argument("--secret-username", default=None, help="Username to disambiguate")
+    tag_p.add_argument("--add", action="append", default=[], metavar="TAG", help="Tag to add (repeatable)")
+    tag_p.add_argument("--remove", action="append", default=[], metavar="TAG", help="Tag to remove (repeatable)")
+    tag_p.add_argument("--json", action="store_true", help="Output the tags as JSON")
+    tag_p.set_defaults(func=cmd_tag)
+
     # --- delete ---
     del_p = subparsers.add_parser("delete", help="Delete a secret")
     del_p.add_argument("--user", required=True, help="CLI Guard username")
@@ -657,6 +1478,55 @@ def build_parser() -> argparse.ArgumentParser:
                        help="Skip confirmation (required for scripting)")
     del_p.set_defaults(func=cmd_delete)
 
+    # --- db (with subcommands: backup, restore, maintain, stats) ---
+    db_p = subparsers.add_parser("db", help="Back up, restore and maintain the database")
+    db_sub = db_p.add_subparsers(dest="db_command", help="Database commands")
+
+    # db backup
+    dbb_p = db_sub.add_parser(
+        "backup",
+        help="Write a snapshot: full the first time, then only the secrets changed since the last one"
+    )
+    dbb_p.add_argument("backup_dir", help="Backup directory (created mode 700 if missing)")
+    dbb_p.add_argument("--full", action="store_true", help="Take a full snapshot, starting a new chain")
+    dbb_p.add_argument("--vacuum", action="store_true",
+                       help="Write full snapshots with VACUUM INTO (compacted; writers wait until it finishes) "
+                            "instead of the paged online copy")
+    dbb_p.add_argument("--progress", action="store_true", help="Show full-copy progress on stderr")
+    dbb_p.set_defaults(func=cmd_db_backup)
+
+    # db restore
+    dbr_p = db_sub.add_parser("restore", help="Rebuild a database from a backup directory")
+    dbr_p.add_argument("backup_dir", help="Backup directory")
+    dbr_p.add_argument("-o", "--output", required=True, help="New database file to write (must not exist)")
+    dbr_p.add_argument("--until", default=None, metavar="SNAPSHOT",
+                       help="Restore to this snapshot id or file name (default: the newest)")
+    dbr_p.set_defaults(func=cmd_db_restore)
+
+    # db maintain
+    dbm_p = db_sub.add_parser(
+        "maintain",
+        help="Integrity check, search index optimize, ANALYZE and VACUUM (run while the vault is idle)"
+    )
+    dbm_p.add_argument("--quick", action="store_true",
+                       help="Use PRAGMA quick_check (faster; skips index consistency checks)")
+    dbm_p.add_argument("--no-vacuum", action="store_true",
+                       help="Skip VACUUM (the only step that needs the database to itself)")
+    dbm_p.set_defaults(func=cmd_db_maintain)
+
+    # db stats
+    dbs_p = db_sub.add_parser("stats", help="Show file size, free pages, row counts and index statistics")
+    dbs_p.add_argument("--json", action="store_true", help="Output as JSON")
+    dbs_p.set_defaults(func=cmd_db_stats)
+
+    # --- completion ---
+    comp_p = subparsers.add_parser(
+        "completion",
+        help="Print a shell completion script (e.g. eval \"$(cli-guard completion bash)\")"
+    )
+    comp_p.add_argument("shell", choices=sorted(completion.SHELL_SCRIPTS), help="Target shell")
+    comp_p.set_defaults(func=cmd_completion)
+
     return parser
 
 
@@ -675,6 +1545,12 @@ def main() -> None:
         sys.exit(EXIT_ERROR)
 
     log("CLI", f"Command: {args.command}")
+
+    # Commands acting for a user run against that user's database file (CLIGUARD_DB_ROUTES)
+    if getattr(args, "user", None) and not sqlite.use_database_for_user(args.user):
+        print(f"Error: Could not open the database for user '{args.user}'.", file=sys.stderr)
+        sys.exit(EXIT_DB_ERROR)
+
     args.func(args)
 
 
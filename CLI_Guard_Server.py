@@ -0,0 +1,511 @@
+"""
+CLI Guard - Local JSON-RPC API server
+
+Optional long-running server so non-Python consumers (Go, Node, ...) can
+fetch secrets over a keep-alive connection instead of spawning the CLI for
+every lookup. Only listens on loopback or a Unix socket — never expose it on
+a network interface.
+
+Authentication uses the existing service tokens (token_manager): every HTTP
+request carries `Authorization: Bearer cg_svc_...` and acts as the token's user.
+
+    Start (loopback TCP or Unix socket):
+        python3 CLI_Guard_Server.py --port 8765
+        python3 CLI_Guard_Server.py --socket ~/.cli-guard/cli-guard.sock
+
+    Call (JSON-RPC 2.0 over HTTP/1.1, POST /rpc, single or batch):
+        curl -s http://127.0.0.1:8765/rpc \\
+            -H "Authorization: Bearer $CLIGUARD_SERVICE_TOKEN" \\
+            -d '{"jsonrpc": "2.0", "id": 1, "method": "get", "params": {"account": "prod-db"}}'
+
+Methods (params are JSON objects):
+    get       {account, username?, field?}   → secret dict, or one field's value
+    getMany   {accounts}                     → {account: secret dict} (one query)
+    getMany   {tags}                         → [secret dict] carrying every tag (one query)
+    list      {tags?}                        → secrets without passwords
+    search    {text, limit?}                 → secrets without passwords, best match first
+    add       {category, account, username, password}
+    update    {account, username?, password}
+    delete    {account, username?}
+
+Concurrency model:
+    Connections are handled concurrently on the asyncio event loop. All
+    database and crypto work runs on one dedicated worker thread, because the
+    SQLite connection belongs to the thread that opened it. Each validated
+    service token gets its own CLI_Guard.Vault, cached for TOKEN_CACHE_SECONDS
+    so the bcrypt/PBKDF2 check runs once per token, not once per request;
+    revocation therefore takes effect within that window.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import ipaddress
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import CLI_Guard
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import token_manager
+import validation
+from logger import log
+from secret_cache import SecretCache
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# How long a validated service token is trusted before it is re-checked against the database
+TOKEN_CACHE_SECONDS = 60
+
+# Request limits — this is a local API for small JSON payloads
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 30
+
+# JSON-RPC 2.0 error codes (-32000..-32099 are reserved for the application)
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+AUTH_ERROR = -32001
+NOT_FOUND_ERROR = -32004
+TOKEN_EXPIRED_ERROR = -32005
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large",
+}
+
+
+class HTTPError(Exception):
+    """A request that cannot be served at the HTTP level (closes the connection)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RPCError(Exception):
+    """A JSON-RPC error to return to the caller"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# ---------------------------------------------------------------------------
+# Secret operations (run on the worker thread only)
+# ---------------------------------------------------------------------------
+
+def _require_str(params: dict, name: str, optional: bool = False) -> Optional[str]:
+    """Fetch a string param, raising INVALID_PARAMS if it is missing or the wrong type"""
+    value = params.get(name)
+    if value is None and optional:
+        return None
+    if not isinstance(value, str) or not value:
+        raise RPCError(INVALID_PARAMS, f"'{name}' must be a non-empty string")
+    return value
+
+
+def _find_secret(vault: CLI_Guard.Vault, account: str, username: Optional[str]) -> dict:
+    """Locate a secret (encrypted password included) by exact account — one lookup, not a read of every row"""
+    secret = vault.findSecret(account, username=username)
+    if secret is None:
+        raise RPCError(NOT_FOUND_ERROR, f"No secret found for account '{account}'")
+    return secret
+
+
+def rpc_get(vault: CLI_Guard.Vault, params: dict) -> Any:
+    account = _require_str(params, "account")
+    username = _require_str(params, "username", optional=True)
+    field = _require_str(params, "field", optional=True) or "all"
+    secret = vault.getSecret(account, username=username)
+    if secret is None:
+        raise RPCError(NOT_FOUND_ERROR, f"No secret found for account '{account}'")
+    if field == "all":
+        return secret
+    if field not in secret:
+        raise RPCError(INVALID_PARAMS, f"Unknown field '{field}'")
+    return secret[field]
+
+
+def _require_tags(params: dict, optional: bool = False) -> Optional[list[str]]:
+    """Fetch the tags param, raising INVALID_PARAMS unless it is a short list of valid tags"""
+    tags = params.get("tags")
+    if tags is None and optional:
+        return None
+    if not isinstance(tags, list) or not tags or not all(isinstance(t, str) for t in tags):
+        raise RPCError(INVALID_PARAMS, "'tags' must be a non-empty list of strings")
+    if len(tags) > sqlite.MAX_FILTER_TAGS:
+        raise RPCError(INVALID_PARAMS, f"'tags' may hold at most {sqlite.MAX_FILTER_TAGS} tags")
+    for tag in tags:
+        valid, error = validation.validate_tag(tag)
+        if not valid:
+            raise RPCError(INVALID_PARAMS, error)
+    return tags
+
+
+def rpc_get_many(vault: CLI_Guard.Vault, params: dict) -> Any:
+    if "tags" in params:
+        return vault.getSecretsByTags(_require_tags(params))
+    accounts = params.get("accounts")
+    if not isinstance(accounts, list) or not all(isinstance(a, str) for a in accounts):
+        raise RPCError(INVALID_PARAMS, "'accounts' must be a list of strings")
+    return vault.getSecretsByAccounts(accounts)
+
+
+def rpc_list(vault: CLI_Guard.Vault, params: dict) -> Any:
+    tags = _require_tags(params, optional=True)
+    if tags is not None:
+        return vault.listSecretsByTags(tags)
+    return vault.getSecrets(metadata_only=True)
+
+
+def rpc_search(vault: CLI_Guard.Vault, params: dict) -> Any:
+    text = _require_str(params, "text")
+    limit = params.get("limit", 50)
+    if not isinstance(limit, int) or limit < 1:
+        raise RPCError(INVALID_PARAMS, "'limit' must be a positive integer")
+    return vault.searchSecrets(text, limit=limit, metadata_only=True)
+
+
+def rpc_add(vault: CLI_Guard.Vault, params: dict) -> Any:
+    values = {name: _require_str(params, name) for name in ("category", "account", "username", "password")}
+    for field_name, key, max_len in [
+        ("Category", "category", 50),
+        ("Account", "account", 100),
+        ("Username", "username", 100),
+        ("Secret value", "password", 500),
+    ]:
+        valid, error = validation.validate_text_field(values[key], field_name, max_len=max_len)
+        if not valid:
+            raise RPCError(INVALID_PARAMS, error)
+    return vault.addSecret(values["category"], values["account"], values["username"], values["password"])
+
+
+def rpc_update(vault: CLI_Guard.Vault, params: dict) -> Any:
+    account = _require_str(params, "account")
+    username = _require_str(params, "username", optional=True)
+    password = _require_str(params, "password")
+    valid, error = validation.validate_text_field(password, "Secret value", max_len=500)
+    if not valid:
+        raise RPCError(INVALID_PARAMS, error)
+    target = _find_secret(vault, account, username)
+    return vault.updateSecret(target["account"], target["username"], target["password"], password)
+
+
+def rpc_delete(vault: CLI_Guard.Vault, params: dict) -> Any:
+    account = _require_str(params, "account")
+    username = _require_str(params, "username", optional=True)
+    target = _find_secret(vault, account, username)
+    return vault.deleteSecret(target["account"], target["username"], target["password"])
+
+
+RPC_METHODS = {
+    "get":      rpc_get,
+    "getMany":  rpc_get_many,
+    "list":     rpc_list,
+    "search":   rpc_search,
+    "add":      rpc_add,
+    "update":   rpc_update,
+    "delete":   rpc_delete,
+}
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class SecretServer:
+    """asyncio HTTP/1.1 JSON-RPC server with a single database worker thread"""
+
+    def __init__(self, token_cache_seconds: float = TOKEN_CACHE_SECONDS,
+                 secret_cache: Optional[SecretCache] = None):
+        self.token_cache_seconds = token_cache_seconds
+        # Optional decrypted-secret cache shared by every token's Vault (keyed by user)
+        self.secret_cache = secret_cache
+        # sha256(token) → (the token user's Vault, validated_at)
+        self._token_cache: dict[str, tuple[CLI_Guard.Vault, float]] = {}
+        # One worker: the SQLite connection must stay on the thread that opened it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cli-guard-db",
+                                            initializer=sqlite.ensure_connection)
+
+    # --- worker-thread side ---
+
+    def _authenticate(self, token: str) -> CLI_Guard.Vault:
+        """Validate a service token (cached); returns the Vault for the token's user"""
+        cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = self._token_cache.get(cache_key)
+        now = time.monotonic()
+
+        if cached is not None:
+            vault, validated_at = cached
+            if now - validated_at > self.token_cache_seconds:
+                # Stale: re-validate so revocation and expiry are picked up
+                del self._token_cache[cache_key]
+                vault.endSession()
+                cached = None
+
+        if cached is None:
+            try:
+                user, key = token_manager.load_service_token(token)
+            except token_manager.TokenExpiredError as e:
+                raise RPCError(TOKEN_EXPIRED_ERROR, str(e))
+            except (token_manager.TokenInvalidError, token_manager.TokenRevokedError) as e:
+                raise RPCError(AUTH_ERROR, str(e))
+            vault = CLI_Guard.Vault(cache=self.secret_cache)
+            vault.startSessionFromKey(user, key)
+            self._token_cache[cache_key] = (vault, now)
+
+        # The worker's connection follows the caller's database file (CLIGUARD_DB_ROUTES)
+        if not sqlite.use_database_for_user(vault.user):
+            raise RPCError(INTERNAL_ERROR, "Database unavailable")
+        return vault
+
+    def _dispatch(self, token: str, calls: list) -> list[Optional[dict]]:
+        """Run a list of JSON-RPC call objects for one HTTP request; None entries are notifications"""
+        responses: list[Optional[dict]] = []
+        vault: Optional[CLI_Guard.Vault] = None
+        auth_error: Optional[RPCError] = None
+        try:
+            vault = self._authenticate(token)
+        except RPCError as e:
+            auth_error = e
+
+        for call in calls:
+            call_id = call.get("id") if isinstance(call, dict) else None
+            try:
+                if not isinstance(call, dict) or call.get("jsonrpc") != "2.0" \
+                        or not isinstance(call.get("method"), str):
+                    raise RPCError(INVALID_REQUEST, "Invalid JSON-RPC request")
+                if auth_error is not None:
+                    raise auth_error
+                method = RPC_METHODS.get(call["method"])
+                if method is None:
+                    raise RPCError(METHOD_NOT_FOUND, f"Unknown method '{call['method']}'")
+                params = call.get("params", {})
+                if not isinstance(params, dict):
+                    raise RPCError(INVALID_PARAMS, "params must be an object")
+                response = {"jsonrpc": "2.0", "id": call_id, "result": method(vault, params)}
+            except RPCError as e:
+                response = {"jsonrpc": "2.0", "id": call_id, "error": {"code": e.code, "message": e.message}}
+            except Exception:
+                log("SERVER", f"Unhandled error in '{call.get('method')}'", exc_info=True)
+                response = {"jsonrpc": "2.0", "id": call_id,
+                            "error": {"code": INTERNAL_ERROR, "message": "Internal error"}}
+            # Calls without an id are notifications — run them but send nothing back
+            responses.append(response if isinstance(call, dict) and "id" in call else None)
+        return responses
+
+    # --- event-loop side ---
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[tuple[str, str, dict, bytes]]:
+        """Read one HTTP request; returns None on a clean close between requests"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        headers[":version"] = version
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one connection until the client closes it or asks to"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    await writer.drain()
+                    break
+                except asyncio.IncompleteReadError:
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close" \
+                    and headers[":version"] == "HTTP/1.1"
+
+                if path == "/health" and method == "GET":
+                    self._write_response(writer, 200, {"status": "ok"}, keep_alive)
+                elif path != "/rpc":
+                    self._write_response(writer, 404, {"error": "Not found"}, keep_alive)
+                elif method != "POST":
+                    self._write_response(writer, 405, {"error": "Use POST"}, keep_alive)
+                else:
+                    status, payload = await self._handle_rpc(loop, headers, body)
+                    self._write_response(writer, status, payload, keep_alive)
+
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # Client went away, or the server is shutting down and cancelled this handler
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _handle_rpc(self, loop: asyncio.AbstractEventLoop, headers: dict, body: bytes) -> tuple[int, Any]:
+        """Parse a JSON-RPC body, run it on the worker thread and build the HTTP reply"""
+        auth = headers.get("authorization", "")
+        if not auth.startswith("Bearer "):
+            return 401, {"jsonrpc": "2.0", "id": None,
+                         "error": {"code": AUTH_ERROR, "message": "Missing 'Authorization: Bearer <service token>'"}}
+        token = auth[len("Bearer "):].strip()
+
+        try:
+            parsed = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            return 200, {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+
+        batch = isinstance(parsed, list)
+        calls = parsed if batch else [parsed]
+        if not calls:
+            return 200, {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Empty batch"}}
+
+        responses = await loop.run_in_executor(self._executor, self._dispatch, token, calls)
+        responses = [r for r in responses if r is not None]
+        if not responses:
+            return 200, None
+        return 200, responses if batch else responses[0]
+
+    def close(self) -> None:
+        """Stop the worker thread and drop cached keys"""
+        self._executor.shutdown(wait=True)
+        for vault, _ in self._token_cache.values():
+            vault.endSession()
+        self._token_cache.clear()
+
+
+def _check_loopback(host: str) -> None:
+    """Refuse to bind anything but a loopback address"""
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = host == "localhost"
+    if not loopback:
+        raise ValueError(f"Refusing to listen on non-loopback address '{host}' — use 127.0.0.1, ::1 or --socket")
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: Optional[str] = None,
+                ready: Optional[asyncio.Event] = None, cache_ttl: Optional[float] = None) -> None:
+    """
+    Run the server until cancelled
+
+    Args:
+        host: Loopback address to listen on (ignored with socket_path)
+        port: TCP port (ignored with socket_path)
+        socket_path: Listen on this Unix socket instead of TCP (created mode 600)
+        ready: Optional event set once the server is accepting connections
+        cache_ttl: Cache decrypted secrets for this many seconds (None or 0 to disable)
+
+    Raises:
+        ValueError: If host is not a loopback address
+    """
+    server_state = SecretServer(secret_cache=SecretCache(ttl=cache_ttl) if cache_ttl else None)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(server_state.handle_connection, path=socket_path,
+                                                     limit=MAX_HEADER_BYTES)
+        finally:
+            os.umask(old_umask)
+        where = socket_path
+    else:
+        _check_loopback(host)
+        server = await asyncio.start_server(server_state.handle_connection, host, port,
+                                            limit=MAX_HEADER_BYTES)
+        where = f"{host}:{port}"
+
+    log("SERVER", f"Listening on {where}")
+    try:
+        async with server:
+            if ready is not None:
+                ready.set()
+            await server.serve_forever()
+    finally:
+        server_state.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        log("SERVER", f"Stopped listening on {where}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for the server"""
+    parser = argparse.ArgumentParser(
+        prog="cli-guard-server",
+        description="CLI Guard local JSON-RPC API server (loopback or Unix socket only)"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Loopback address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", default=None, help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument("--cache-ttl", type=float, default=0,
+                        help="Cache decrypted secrets in memory for this many seconds (default: off)")
+    return parser
+
+
+def main() -> None:
+    """Main entry point for the CLI Guard server"""
+    args = build_parser().parse_args()
+    socket_path = os.path.expanduser(args.socket) if args.socket else None
+    try:
+        asyncio.run(serve(args.host, args.port, socket_path, cache_ttl=args.cache_ttl))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
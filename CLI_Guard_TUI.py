@@ -7,6 +7,9 @@ import CLI_Guard
 # Input validation
 import validation
 
+# In-memory metadata index for search-as-you-type
+from search_index import SearchIndex
+
 # Import curses for Terminal User Interface and navigation
 # https://docs.python.org/3/library/curses.html
 import curses
@@ -14,8 +17,8 @@ import curses.panel
 
 import bcrypt
 
-from typing import Any, Optional
-import time
+from typing import Any, Callable, Optional
+import threading
 
 from logger import log
 
@@ -138,13 +141,152 @@ def createWindows(stdscr: curses.window) -> dict[str, Any]:
         "settings_panel":       settings_panel,
         "popup_window":         popup_window,
         "popup_panel":          popup_panel,
-        "stdscr":               stdscr
+        "stdscr":               stdscr,
+        # Session state rather than a window: built on first search, dropped when windows are recreated on sign out
+        "search_index":         None,
+        # Data version the search index and table reflect (CLI_Guard.getDataVersion)
+        "data_version":         None
     }
 
     return windows
 
 
 
+# Spinner frames and redraw interval while waiting on a worker thread
+SPINNER_FRAMES: str = "|/-\\"
+SPINNER_INTERVAL_MS: int = 100
+
+
+
+def showMessage(window: curses.window, text: str, seconds: float = 2, y: int = 2, x: int = 2,
+                attr: int = curses.A_NORMAL, erase: bool = True) -> None:
+    """
+    Show a status message until it times out or any key is pressed
+
+    Uses a window input timeout instead of sleeping, so the user can dismiss
+    the message early and the terminal keeps processing input meanwhile.
+
+    Args:
+        window: Window to draw in (message_window, or a popup for inline errors)
+        text: Message to display
+        seconds: How long to show the message if no key is pressed
+        y: Row to draw at (0 draws over a popup's border as a title)
+        x: Column to draw at
+        attr: Curses attribute for the text
+        erase: Clear the window before drawing and after dismissal (False for popup titles)
+    """
+    if erase:
+        window.erase()
+    window.addstr(y, x, text, attr)
+    window.noutrefresh()
+    curses.doupdate()
+
+    # Block for at most the timeout; any key dismisses early (the key is consumed)
+    window.timeout(int(seconds * 1000))
+    try:
+        window.getch()
+    finally:
+        window.timeout(-1)
+
+    if erase:
+        window.erase()
+        window.noutrefresh()
+        curses.doupdate()
+
+
+
+def runInBackground(windows: dict[str, Any], text: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a slow call on a worker thread while animating a spinner in the message window
+
+    func must not touch curses or the SQLite connection (both belong to the
+    main thread) — fetch anything it needs from the database beforehand.
+
+    Args:
+        windows: Windows dictionary
+        text: Status text shown next to the spinner
+        func: Callable to run
+        *args, **kwargs: Passed to func
+
+    Returns:
+        Whatever func returns
+
+    Raises:
+        Any exception raised by func, re-raised on the main thread
+    """
+    message_window: curses.window = windows["message_window"]
+    outcome: dict[str, Any] = {}
+
+    def worker() -> None:
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as error:
+            outcome["error"] = error
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    frame: int = 0
+    message_window.timeout(SPINNER_INTERVAL_MS)
+    try:
+        while thread.is_alive():
+            message_window.erase()
+            message_window.addstr(2, 2, f"{SPINNER_FRAMES[frame % len(SPINNER_FRAMES)]} {text}")
+            message_window.noutrefresh()
+            curses.doupdate()
+            # Wait one frame; keys pressed while busy are discarded
+            message_window.getch()
+            frame += 1
+    finally:
+        message_window.timeout(-1)
+    thread.join()
+
+    message_window.erase()
+    message_window.noutrefresh()
+    curses.doupdate()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+
+def authenticateInBackground(windows: dict[str, Any], user: str, attempted_password: str) -> Optional[bytes]:
+    """
+    Verify a password and derive the session key without blocking the UI
+
+    The stored hash and salt are read on the main thread; bcrypt and PBKDF2
+    then run on a worker thread via runInBackground.
+
+    Args:
+        windows: Windows dictionary
+        user: Username signing in
+        attempted_password: Plaintext password attempt
+
+    Returns:
+        The derived encryption key on success, None if authentication failed
+
+    Raises:
+        RuntimeError: If the user has no encryption salt in the database
+    """
+    user_data: list[tuple] = sqlite.queryData(user=user, table="users")
+    if not user_data:
+        log("AUTH", f"Authentication failed for '{user}' - user not found")
+        return None
+    stored_hash = user_data[0][1]
+    salt_hex: Optional[str] = sqlite.queryUserSalt(user)
+
+    def verifyAndDerive() -> Optional[bytes]:
+        if not CLI_Guard.verifyPasswordHash(user, attempted_password, stored_hash):
+            return None
+        if salt_hex is None:
+            raise RuntimeError(f"No encryption salt found for user '{user}' — run migration first")
+        return CLI_Guard.deriveEncryptionKey(attempted_password, bytes.fromhex(salt_hex))
+
+    return runInBackground(windows, "Verifying password...", verifyAndDerive)
+
+
+
 def signIn(windows: dict[str, Any], user=None) -> None:    
 
 # WINDOWS
@@ -245,19 +387,18 @@ def authSignIn(windows: dict[str, Any], on_cancel, user: str) -> None:
     login_panel: curses.panel.Panel  = windows["login_panel"]
     message_window: curses.window = windows["message_window"]
 
+    # Everything from here on reads and writes this user's database file (CLIGUARD_DB_ROUTES)
+    if not sqlite.use_database_for_user(user):
+        showMessage(message_window, f"Could not open the database for {user}.", seconds=3)
+        signIn(windows)
+        return
+
     # Check if user is locked before allowing login
     if sqlite.isUserLocked(user):
         # Show locked message
-        message_window.erase()
-        message_window.addstr(2, 2, f"Account {user} is locked until tomorrow. Please try again later.")
-        message_window.noutrefresh()
-        curses.doupdate()
-        time.sleep(3)
+        showMessage(message_window, f"Account {user} is locked until tomorrow. Please try again later.", seconds=3)
 
-        # Clear message and return to sign in
-        message_window.erase()
-        message_window.noutrefresh()
-        curses.doupdate()
+        # Return to sign in
         signIn(windows)
         return
 
@@ -284,6 +425,8 @@ def authSignIn(windows: dict[str, Any], on_cancel, user: str) -> None:
     selected: int = 0
 
     # Initialise attempted_password and attempts counter
+    # Failures are counted in the database (login_attempts), so they persist across dialogs and
+    # include failures from the CLI and token commands
     attempted_password: str = ""
     attempts: int = 0
 
@@ -345,20 +488,21 @@ def authSignIn(windows: dict[str, Any], on_cancel, user: str) -> None:
         elif key == 10 and selected < len(auth_options):  # ASCII value for Enter key, Cancel is not selected
             # Check if password was entered
             if not attempted_password:
-                message_window.erase()
-                message_window.addstr(2, 2, "Please enter a password")
-                message_window.noutrefresh()
-                curses.doupdate()
-                time.sleep(2)
-                message_window.erase()
-                message_window.noutrefresh()
-                curses.doupdate()
+                showMessage(message_window, "Please enter a password", seconds=2)
                 continue
 
-            # Authenticate user
-            if CLI_Guard.authUser(user, attempted_password):
-                # Authentication successful - start session
-                CLI_Guard.startSession(user, attempted_password)
+            # Too many recent failures (from any interface) - refuse before any bcrypt/PBKDF2 work
+            retry_after: float = CLI_Guard.loginRetryAfter(user)
+            if retry_after > 0:
+                showMessage(message_window, f"Too many failed attempts. Try again in {int(retry_after) + 1} seconds.", seconds=2)
+                continue
+
+            # Authenticate user - bcrypt and key derivation run on a worker thread so the UI keeps drawing
+            encryption_key: Optional[bytes] = authenticateInBackground(windows, user, attempted_password)
+            if encryption_key is not None:
+                # Authentication successful - clear recorded failures and start session with the derived key
+                CLI_Guard.clearFailedLogins(user)
+                CLI_Guard.startSessionFromKey(user, encryption_key)
 
                 # Clear login window and hide panel
                 login_window.erase()
@@ -369,19 +513,15 @@ def authSignIn(windows: dict[str, Any], on_cancel, user: str) -> None:
                 mainMenu(windows, user)
                 break
             else:
-                # Authentication failed - increment attempts
-                attempts += 1
+                # Authentication failed - record it; attempts counts every interface's recent failures
+                attempts = CLI_Guard.recordFailedLogin(user)
 
                 if attempts >= 3:
                     # Lock the user account
                     sqlite.lockUser(user)
 
                     # Show lockout message
-                    message_window.erase()
-                    message_window.addstr(2, 2, f"Incorrect password entered 3 times. Account locked until tomorrow.")
-                    message_window.noutrefresh()
-                    curses.doupdate()
-                    time.sleep(3)
+                    showMessage(message_window, f"Incorrect password entered 3 times. Account locked until tomorrow.", seconds=3)
 
                     # Clear and hide
                     login_window.erase()
@@ -397,20 +537,12 @@ def authSignIn(windows: dict[str, Any], on_cancel, user: str) -> None:
                 else:
                     # Show error message with remaining attempts
                     remaining = 3 - attempts
-                    message_window.erase()
-                    message_window.addstr(2, 2, f"Incorrect password. {remaining} attempt(s) remaining.")
-                    message_window.noutrefresh()
-                    curses.doupdate()
-                    time.sleep(2)
+                    showMessage(message_window, f"Incorrect password. {remaining} attempt(s) remaining.", seconds=2)
 
                     # Clear attempted password and reset input
                     attempted_password = ""
                     auth_inputs[0] = ""
 
-                    # Clear message
-                    message_window.erase()
-                    message_window.noutrefresh()
-
                     # Redraw login window
                     login_window.erase()
                     login_window.box()
@@ -663,43 +795,28 @@ def createPassword(windows: dict[str, Any]) -> Optional[list[str]]:
                 elif current_button == 0:  # Create
                     # Validate all fields are filled
                     if not all(inputs):
-                        popup_window.addstr(0, 2, "| All fields required! |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(1)
+                        showMessage(popup_window, "| All fields required! |", seconds=1, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     # Validate each field
                     category_valid, category_error = validation.validate_text_field(inputs[0], "Category", max_len=50)
                     if not category_valid:
-                        popup_window.addstr(0, 2, f"| {category_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {category_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     account_valid, account_error = validation.validate_text_field(inputs[1], "Account", max_len=100)
                     if not account_valid:
-                        popup_window.addstr(0, 2, f"| {account_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {account_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     username_valid, username_error = validation.validate_text_field(inputs[2], "Username", max_len=100)
                     if not username_valid:
-                        popup_window.addstr(0, 2, f"| {username_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {username_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     password_valid, password_error = validation.validate_text_field(inputs[3], "Password", min_len=1, max_len=500)
                     if not password_valid:
-                        popup_window.addstr(0, 2, f"| {password_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {password_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     # All validations passed
@@ -891,43 +1008,28 @@ def updatePassword(windows: dict[str, Any], existing_data: list) -> Optional[lis
                 elif current_button == 0:  # Update
                     # Validate all fields are filled
                     if not all(inputs):
-                        popup_window.addstr(0, 2, "| All fields required! |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(1)
+                        showMessage(popup_window, "| All fields required! |", seconds=1, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     # Validate each field
                     category_valid, category_error = validation.validate_text_field(inputs[0], "Category", max_len=50)
                     if not category_valid:
-                        popup_window.addstr(0, 2, f"| {category_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {category_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     account_valid, account_error = validation.validate_text_field(inputs[1], "Account", max_len=100)
                     if not account_valid:
-                        popup_window.addstr(0, 2, f"| {account_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {account_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     username_valid, username_error = validation.validate_text_field(inputs[2], "Username", max_len=100)
                     if not username_valid:
-                        popup_window.addstr(0, 2, f"| {username_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {username_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     password_valid, password_error = validation.validate_text_field(inputs[3], "Password", min_len=1, max_len=500)
                     if not password_valid:
-                        popup_window.addstr(0, 2, f"| {password_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {password_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     # All validations passed
@@ -1124,11 +1226,17 @@ def searchPasswords(windows: dict[str, Any]) -> tuple[Optional[str], Optional[st
     menu_window: curses.window = windows["menu_window"]
     content_window: curses.window = windows["content_window"]
 
+    # Match counts are served from the in-memory index, so they update on every keystroke
+    # Tags are not in the index: their counts come from one grouped read of the tag index
+    user: Optional[str] = CLI_Guard.getSessionUser()
+    search_index: SearchIndex = getSearchIndex(windows, user)
+    tag_counts: dict[str, int] = dict(sqlite.queryTagNames(user))
+
     # Show popup
     popup_panel.show()
 
     # Column options for search
-    column_options: list[str] = ["Category", "Account", "Username"]
+    column_options: list[str] = ["Category", "Account", "Username", "Tag"]
     buttons: list[str] = ["Search", "Cancel"]
 
     # State
@@ -1169,6 +1277,14 @@ def searchPasswords(windows: dict[str, Any]) -> tuple[Optional[str], Optional[st
             if in_text_field:
                 popup_window.addstr(7, 2, "Search term:", curses.A_REVERSE)
 
+            # Live match count for the current term
+            if search_term:
+                if column_options[selected_column] == "Tag":
+                    match_count: int = tag_counts.get(search_term, 0)
+                else:
+                    match_count = len(search_index.search(search_term, column=column_options[selected_column]))
+                popup_window.addstr(7, 16, f"({match_count} matches)", curses.A_DIM)
+
         # Draw buttons
         for i, button in enumerate(buttons):
             x_pos = 20 + (i * 12)
@@ -1236,19 +1352,16 @@ def searchPasswords(windows: dict[str, Any]) -> tuple[Optional[str], Optional[st
                     return (None, None)
                 elif selected_button == 0:  # Search
                     if not search_term:
-                        popup_window.addstr(0, 2, "| Enter search term! |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(1)
+                        showMessage(popup_window, "| Enter search term! |", seconds=1, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
-                    # Validate search term
-                    search_valid, search_error = validation.validate_text_field(search_term, "Search term", max_len=100)
+                    # Validate search term (a tag filter must be a whole, valid tag)
+                    if column_options[selected_column] == "Tag":
+                        search_valid, search_error = validation.validate_tag(search_term)
+                    else:
+                        search_valid, search_error = validation.validate_text_field(search_term, "Search term", max_len=100)
                     if not search_valid:
-                        popup_window.addstr(0, 2, f"| {search_error} |", curses.A_BOLD)
-                        popup_window.noutrefresh()
-                        curses.doupdate()
-                        time.sleep(2)
+                        showMessage(popup_window, f"| {search_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                         continue
 
                     # Validation passed
@@ -1433,6 +1546,139 @@ def sortPasswords(windows: dict[str, Any]) -> tuple[Optional[str], Optional[str]
 
 
 
+# Number of visible pages fetched per window query — one page either side of the visible rows
+# so scrolling a few rows past the edge is served from the cached window
+PASSWORD_WINDOW_PAGES: int = 3
+
+
+# Row tuple positions of the sortable columns: (user, category, account, username, password, last_modified)
+SORT_COLUMN_POSITIONS: dict[str, int] = {
+    "category": 1,
+    "account": 2,
+    "username": 3,
+    "last_modified": 5,
+}
+
+
+def getSearchIndex(windows: dict[str, Any], user: str) -> SearchIndex:
+    """
+    Return the session's in-memory search index, building it on first use
+
+    The index is built once from a single metadata-only query (no ciphertext
+    is read; rows are padded like fetchPasswordWindow's) and then kept
+    current by passwordManagement on create/update/delete, so searches never
+    hit SQL.
+    passwordManagement drops it when the user's data version shows another
+    process has changed their secrets.
+
+    Args:
+        windows: Dictionary of curses windows and panels (holds the session's index)
+        user: Current session user
+
+    Returns:
+        SearchIndex over the user's secrets
+    """
+    if windows.get("search_index") is None:
+        windows["search_index"] = SearchIndex(padMetadataRows(
+            sqlite.queryData(user=user, table="passwords", columns=sqlite.METADATA_COLUMNS)
+        ))
+        log("TUI", f"Search index built with {len(windows['search_index'])} entries for user '{user}'")
+    return windows["search_index"]
+
+
+def sortRows(rows: list, sort_column: Optional[str], sort_order: Optional[str]) -> list:
+    """
+    Sort index search results in memory the same way queryData's ORDER BY would
+
+    Args:
+        rows: Row tuples from SearchIndex.search
+        sort_column: Display name of the column to sort by (e.g. "Last Modified"), or None
+        sort_order: "Ascending" / "Descending", or None
+
+    Returns:
+        New sorted list (unchanged order if no sort is active)
+    """
+    if not sort_column or not sort_order:
+        return list(rows)
+
+    position: int = SORT_COLUMN_POSITIONS[sort_column.lower().replace(" ", "_")]
+    return sorted(rows, key=lambda row: str(row[position]), reverse=sort_order.lower() == "descending")
+
+
+def padMetadataRows(data: Optional[list]) -> list:
+    """
+    Lay METADATA_COLUMNS rows out like full passwords rows, with the password slot None
+
+    Args:
+        data: Rows of (user, category, account, username, last_modified, secret_id, path), or None
+
+    Returns:
+        List of (user, category, account, username, None, last_modified, secret_id, path) tuples
+        — the table never shows the ciphertext, so it isn't read (see loadFullRecord)
+    """
+    return [row[:4] + (None,) + row[4:] for row in (data or [])]
+
+
+def fetchPasswordWindow(user: str, sort_column: Optional[str], sort_order: Optional[str],
+                        offset: int, limit: int) -> list:
+    """
+    Fetch one window of the unfiltered password table from the database
+
+    Args:
+        user: Current session user
+        sort_column: Display name of the column to sort by (e.g. "Last Modified"), or None
+        sort_order: "Ascending" / "Descending", or None
+        offset: Index of the first row to fetch
+        limit: Maximum number of rows to fetch
+
+    Returns:
+        List of row tuples laid out by padMetadataRows (password slot None)
+    """
+    data = sqlite.queryData(
+        user=user,
+        table="passwords",
+        sort_column=sort_column.lower().replace(" ", "_") if sort_column else None,
+        sort_by=sort_order,
+        limit=limit,
+        offset=offset,
+        columns=sqlite.METADATA_COLUMNS,
+    )
+    return padMetadataRows(data)
+
+
+def fetchTaggedRows(user: str, tag: str) -> list:
+    """
+    Fetch the rows of every secret carrying tag — one lookup on the tag index
+
+    Args:
+        user: Current session user
+        tag: Exact tag (e.g. "service=payments")
+
+    Returns:
+        List of row tuples laid out like fetchPasswordWindow's (password slot None)
+    """
+    data = sqlite.queryDataByTags(user, [tag], columns=sqlite.METADATA_COLUMNS)
+    return padMetadataRows(data)
+
+
+def loadFullRecord(user: str, record: tuple) -> Optional[tuple]:
+    """
+    Full passwords row for a table row, reading the ciphertext only if the table row lacks it
+
+    Args:
+        user: Current session user
+        record: Row tuple from fetchPasswordWindow or the search index
+
+    Returns:
+        (user, category, account, username, password, last_modified, secret_id, path), or None if
+        the secret no longer exists
+    """
+    if record[4] is not None:
+        return record
+    return sqlite.queryDataBySecretId(user, record[6])
+
+
+
 def passwordManagement(windows: dict[str, Any]) -> None:
     """
     Password management interface with full CRUD operations
@@ -1441,7 +1687,8 @@ def passwordManagement(windows: dict[str, Any]) -> None:
     - View all passwords in scrollable table
     - Create new encrypted passwords
     - View decrypted password details
-    - Search passwords by category, account, or username
+    - Search passwords by category, account, or username, or filter them by tag
+    - Live search-as-you-type across all columns (/), served from the in-memory index
     - Sort passwords by any column in ascending/descending order
     """
     content_window: curses.window = windows["content_window"]
@@ -1452,11 +1699,7 @@ def passwordManagement(windows: dict[str, Any]) -> None:
     # Get current authenticated user from session
     user: Optional[str] = CLI_Guard.getSessionUser()
     if not user:
-        message_window.erase()
-        message_window.addstr(2, 2, "Error: No active session. Please sign in again.")
-        message_window.noutrefresh()
-        curses.doupdate()
-        time.sleep(2)
+        showMessage(message_window, "Error: No active session. Please sign in again.", seconds=2)
         return
 
     # Options and headers (removed Update and Delete - they're in the password details popup)
@@ -1473,33 +1716,64 @@ def passwordManagement(windows: dict[str, Any]) -> None:
     search_term: Optional[str] = None      # Search text (e.g. "gmail")
     sort_column: Optional[str] = None      # Column to sort by (e.g. "account", "last_modified")
     sort_order: Optional[str] = None       # Sort direction (e.g. "Ascending", "Descending")
+    live_search: bool = False              # True while typing a live search term (search_column is None)
+
+    # Virtual table state — only a window of rows around the visible page is held in memory
+    # total_rows is re-counted and the window dropped only when filter/sort change or data is mutated
+    total_rows: int = 0
+    window_offset: int = 0
+    window_rows: list = []
+    needs_requery: bool = True
 
     while running:
-        # Query passwords from database
-        passwords_list: list[list] = []
-
-        data = sqlite.queryData(
-            user=user,
-            table="passwords",
-            category=search_column,
-            text=search_term,
-            sort_column=sort_column,
-            sort_by=sort_order,
-        )
-
-        # Build display list
-        if data:
-            for i, password in enumerate(data):
-                # password tuple: [user, category, account, username, password, last_modified]
-                passwords_list.append([i + 1, password[1], password[2], password[3], password[5]])
+        # Maximum visible rows in content window (border + options + headers + border = 5)
+        max_visible_rows: int = content_window.getmaxyx()[0] - 5
+
+        # Another process (CLI, server, a second TUI) changed this user's secrets — drop the index
+        # and cached window. One primary-key lookup per redraw; our own writes record the new
+        # version themselves so they keep the index they just updated in place
+        data_version: int = CLI_Guard.getDataVersion(user)
+        if data_version != windows["data_version"]:
+            windows["search_index"] = None
+            windows["data_version"] = data_version
+            needs_requery = True
+
+        # Recount and drop the cached window after filter/sort changes or mutations
+        # Filtered views come entirely from the in-memory index; unfiltered views page through SQL
+        if needs_requery:
+            if search_term and search_column == "Tag":
+                window_rows = sortRows(fetchTaggedRows(user, search_term), sort_column, sort_order)
+                window_offset = 0
+                total_rows = len(window_rows)
+            elif search_term:
+                window_rows = sortRows(
+                    getSearchIndex(windows, user).search(search_term, column=search_column),
+                    sort_column, sort_order,
+                )
+                window_offset = 0
+                total_rows = len(window_rows)
+            else:
+                total_rows = sqlite.countData(user=user, table="passwords")
+                window_rows = []
+            needs_requery = False
+
+        # Ensure start_index is valid
+        start_index = max(0, min(start_index, total_rows - max_visible_rows if total_rows > 0 else 0))
+
+        # Refetch the window only when the visible page falls outside the cached rows
+        window_end: int = window_offset + len(window_rows)
+        page_end: int = min(start_index + max_visible_rows, total_rows)
+        if total_rows > 0 and (not window_rows or start_index < window_offset or page_end > window_end):
+            window_offset = max(0, start_index - max_visible_rows)
+            window_rows = fetchPasswordWindow(
+                user, sort_column, sort_order,
+                offset=window_offset, limit=max_visible_rows * PASSWORD_WINDOW_PAGES,
+            )
 
         # Calculate column width for table
         content_width: int = content_window.getmaxyx()[1] - 4
         column_width: int = (content_width - 10) // (len(headers) - 1)
 
-        # Maximum visible rows in content window (border + options + headers + border = 5)
-        max_visible_rows: int = content_window.getmaxyx()[0] - 5
-
         # Clear and redraw content window
         content_window.erase()
         content_window.box()
@@ -1515,11 +1789,13 @@ def passwordManagement(windows: dict[str, Any]) -> None:
         # Draw table headers (row 2 — directly below options)
         content_window.addstr(2, 2, f"{headers[0]:<10}{headers[1]:<{column_width}}{headers[2]:<{column_width}}{headers[3]:<{column_width}}{headers[4]:<{column_width}}", curses.A_BOLD)
 
-        # Ensure start_index is valid
-        start_index = max(0, min(start_index, len(passwords_list) - max_visible_rows if len(passwords_list) > 0 else 0))
-
-        # Get visible slice of passwords
-        visible_passwords = passwords_list[start_index:start_index + max_visible_rows] if passwords_list else []
+        # Get visible slice of passwords from the cached window
+        # password tuple: [user, category, account, username, password, last_modified]
+        visible_start: int = start_index - window_offset
+        visible_passwords = [
+            [start_index + i + 1, password[1], password[2], password[3], password[5]]
+            for i, password in enumerate(window_rows[visible_start:visible_start + max_visible_rows])
+        ]
 
         # Draw password rows
         for i, row in enumerate(visible_passwords):
@@ -1550,8 +1826,10 @@ def passwordManagement(windows: dict[str, Any]) -> None:
 
         # Row 1: Active filter/sort status
         status_parts: list[str] = []
-        if search_column and search_term:
-            status_parts.append(f"Filter: {search_column} contains '{search_term}'")
+        if live_search:
+            status_parts.append(f"Search: {search_term or ''}_ ({total_rows} matches)")
+        elif search_term:
+            status_parts.append(f"Filter: {search_column or 'any column'} matches '{search_term}'")
         if sort_column and sort_order:
             status_parts.append(f"Sorted by: {sort_column} ({sort_order})")
         if status_parts:
@@ -1559,10 +1837,12 @@ def passwordManagement(windows: dict[str, Any]) -> None:
             message_window.addstr(1, 2, status_text[:msg_width], curses.A_BOLD)
 
         # Row 3: Contextual navigation help
-        if current_row < len(options):
-            help_text = "\u2190\u2192 Navigate options | \u2193 Jump to list | ENTER Select | C Create | S Search | O Sort | ESC Back"
+        if live_search:
+            help_text = "Type to filter | \u2191\u2193 Navigate list | ENTER Keep filter | ESC Cancel search"
+        elif current_row < len(options):
+            help_text = "\u2190\u2192 Navigate options | \u2193 Jump to list | ENTER Select | C Create | S Search | / Live search | O Sort | ESC Back"
         else:
-            help_text = "\u2191\u2193 Navigate list | ENTER View details | C Create | S Search | O Sort | ESC Clear/Back"
+            help_text = "\u2191\u2193 Navigate list | ENTER View details | C Create | / Live search | O Sort | ESC Clear/Back"
         message_window.addstr(3, 2, help_text[:msg_width], curses.A_DIM)
 
         message_window.noutrefresh()
@@ -1572,8 +1852,38 @@ def passwordManagement(windows: dict[str, Any]) -> None:
         content_window.keypad(True)
         key: int = content_window.getch()
 
+        # Live search: typing edits the term and refilters from the index on every keystroke
+        # Arrow keys fall through to the normal navigation below
+        if live_search and key not in (curses.KEY_UP, curses.KEY_DOWN):
+            if 32 <= key <= 126:
+                search_term = (search_term or "") + chr(key)
+            elif key in (curses.KEY_BACKSPACE, 127, 8):
+                search_term = (search_term or "")[:-1]
+            elif key == 10:  # Enter keeps the filter and leaves typing mode
+                live_search = False
+            elif key == 27:  # ESC cancels the search
+                live_search = False
+                search_term = None
+            else:
+                continue
+
+            if not search_term:
+                search_term = None
+            current_row = len(options)
+            start_index = 0
+            needs_requery = True
+
+        elif key == ord('/'):
+            log("TUI", "Live search started")
+            live_search = True
+            search_column = None
+            search_term = None
+            current_row = len(options)
+            start_index = 0
+            needs_requery = True
+
         # Navigation: Move from options to password list
-        if 0 <= current_row <= (len(options) - 1) and key == curses.KEY_DOWN:
+        elif 0 <= current_row <= (len(options) - 1) and key == curses.KEY_DOWN:
             current_row = len(options)
 
         # Navigation: Move from password list back to options
@@ -1587,13 +1897,13 @@ def passwordManagement(windows: dict[str, Any]) -> None:
             current_row -= 1
 
         # Navigation: Wrap around at end of list
-        elif current_row == (len(passwords_list) + len(options) - 1) and key == curses.KEY_DOWN:
+        elif current_row == (total_rows + len(options) - 1) and key == curses.KEY_DOWN:
             current_row = len(options)
             start_index = 0
 
         # Navigation: Scroll down through passwords
         elif key == curses.KEY_DOWN:
-            if current_row < (len(passwords_list) + len(options) - 1):
+            if current_row < (total_rows + len(options) - 1):
                 current_row += 1
                 if (current_row - len(options)) >= (start_index + max_visible_rows):
                     start_index += 1
@@ -1621,17 +1931,17 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                     encrypted_password = CLI_Guard.encryptPassword(plaintext_password)
 
                     # Save to database
-                    sqlite.insertData(user, category_input, account, username_input, encrypted_password)
+                    secret_id = sqlite.insertData(user, category_input, account, username_input, encrypted_password)
                     log("TUI", f"Password created for account '{account}' by user '{user}'")
+                    if windows["search_index"] is not None and secret_id is not None:
+                        windows["search_index"].add(
+                            (user, category_input, account, username_input, None, str(sqlite.get_today()), secret_id, None)
+                        )
+                    windows["data_version"] = CLI_Guard.getDataVersion(user)
+                    needs_requery = True
 
                     # Show success message
-                    message_window.erase()
-                    message_window.addstr(2, 2, f"Password for {account} created successfully")
-                    message_window.noutrefresh()
-                    curses.doupdate()
-                    time.sleep(1)
-                    message_window.erase()
-                    message_window.noutrefresh()
+                    showMessage(message_window, f"Password for {account} created successfully", seconds=1)
                     # Refresh password list - loop continues to requery and redraw
 
             elif current_row == 1:  # Search Passwords
@@ -1645,6 +1955,7 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                     # Reset cursor to first password
                     current_row = len(options)
                     start_index = 0
+                    needs_requery = True
                     # Refresh password list - continue to requery and redraw
                     # Don't use break here as it exits the entire function!
 
@@ -1659,17 +1970,21 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                     # Reset cursor to first password
                     current_row = len(options)
                     start_index = 0
+                    needs_requery = True
                     # Refresh password list - continue to requery and redraw
                     # Don't use break here as it exits the entire function!
 
             else:  # Password row selected
-                if passwords_list and (current_row - len(options)) < len(passwords_list):
-                    selected_record = passwords_list[current_row - len(options)]
-
-                    # Get original data row to access all password data
-                    data_index = selected_record[0] - 1
-                    original_record = data[data_index]
-
+                window_index: int = current_row - len(options) - window_offset
+                original_record = None
+                if 0 <= window_index < len(window_rows):
+                    # Unfiltered windows hold metadata only — fetch this one row's ciphertext by secret_id
+                    original_record = loadFullRecord(user, window_rows[window_index])
+                    if original_record is None:
+                        showMessage(message_window, "That password no longer exists", seconds=1)
+                        needs_requery = True
+
+                if original_record is not None:
                     # Show password details popup
                     action = viewPasswordDetails(windows, original_record)
 
@@ -1696,14 +2011,17 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                             # Update in database
                             sqlite.updateData(user, new_encrypted_password, new_account, new_username, original_record[4])
                             log("TUI", f"Password updated for account '{new_account}' by user '{user}'")
-
-                            message_window.erase()
-                            message_window.addstr(2, 2, f"Password for {new_account} updated successfully")
-                            message_window.noutrefresh()
-                            curses.doupdate()
-                            time.sleep(1)
-                            message_window.erase()
-                            message_window.noutrefresh()
+                            if windows["search_index"] is not None:
+                                # updateData only rewrites the password and last_modified columns
+                                windows["search_index"].update(
+                                    original_record,
+                                    tuple(original_record[:4]) + (None, str(sqlite.get_today()))
+                                    + tuple(original_record[6:]),
+                                )
+                            windows["data_version"] = CLI_Guard.getDataVersion(user)
+                            needs_requery = True
+
+                            showMessage(message_window, f"Password for {new_account} updated successfully", seconds=1)
                             # Loop continues to requery and redraw
 
                     elif action == "delete":
@@ -1727,14 +2045,12 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                                 original_record[4]   # encrypted password
                             )
                             log("TUI", f"Password deleted for account '{original_record[2]}' by user '{user}'")
+                            if windows["search_index"] is not None:
+                                windows["search_index"].remove(original_record)
+                            windows["data_version"] = CLI_Guard.getDataVersion(user)
+                            needs_requery = True
 
-                            message_window.erase()
-                            message_window.addstr(2, 2, f"Password for {original_record[2]} deleted successfully")
-                            message_window.noutrefresh()
-                            curses.doupdate()
-                            time.sleep(1)
-                            message_window.erase()
-                            message_window.noutrefresh()
+                            showMessage(message_window, f"Password for {original_record[2]} deleted successfully", seconds=1)
                             # Loop continues to requery and redraw
                         else:
                             # Cancelled - just clear message
@@ -1752,13 +2068,7 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                 current_row = 0
                 start_index = 0
                 # Show cleared message
-                message_window.erase()
-                message_window.addstr(2, 2, "Filters cleared - showing all passwords")
-                message_window.noutrefresh()
-                curses.doupdate()
-                time.sleep(1)
-                message_window.erase()
-                message_window.noutrefresh()
+                showMessage(message_window, "Filters cleared - showing all passwords", seconds=1)
                 # Refresh list
                 break
             else:
@@ -1781,12 +2091,14 @@ def passwordManagement(windows: dict[str, Any]) -> None:
                 username_input = inputs[2]
                 plaintext_password = inputs[3]
                 encrypted_password = CLI_Guard.encryptPassword(plaintext_password)
-                sqlite.insertData(user, category_input, account, username_input, encrypted_password)
-                message_window.erase()
-                message_window.addstr(2, 2, f"Password for {account} created successfully")
-                message_window.noutrefresh()
-                curses.doupdate()
-                time.sleep(1)
+                secret_id = sqlite.insertData(user, category_input, account, username_input, encrypted_password)
+                if windows["search_index"] is not None and secret_id is not None:
+                    windows["search_index"].add(
+                        (user, category_input, account, username_input, None, str(sqlite.get_today()), secret_id, None)
+                    )
+                windows["data_version"] = CLI_Guard.getDataVersion(user)
+                needs_requery = True
+                showMessage(message_window, f"Password for {account} created successfully", seconds=1)
                 break
 
 
@@ -1951,10 +2263,7 @@ def createUser(windows: dict[str, any], on_cancel, user=None) -> None:
                 new_user_username: str = create_user_fields["Username"]
                 username_valid, username_error = validation.validate_username(new_user_username)
                 if not username_valid:
-                    popup_window.addstr(0, 2, f"| {username_error} |", curses.A_BOLD)
-                    popup_window.noutrefresh()
-                    curses.doupdate()
-                    time.sleep(2)
+                    showMessage(popup_window, f"| {username_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                     popup_window.erase()
                     popup_window.box()
                     popup_window.noutrefresh()
@@ -1965,19 +2274,18 @@ def createUser(windows: dict[str, any], on_cancel, user=None) -> None:
                 new_user_password: str = create_user_fields["Password"]
                 password_valid, password_error = validation.validate_password(new_user_password)
                 if not password_valid:
-                    popup_window.addstr(0, 2, f"| {password_error} |", curses.A_BOLD)
-                    popup_window.noutrefresh()
-                    curses.doupdate()
-                    time.sleep(2)
+                    showMessage(popup_window, f"| {password_error} |", seconds=2, y=0, attr=curses.A_BOLD, erase=False)
                     popup_window.erase()
                     popup_window.box()
                     popup_window.noutrefresh()
                     curses.doupdate()
                     continue
 
-                # All validations passed - create user
-                new_hashed_password: bytes = hashUser(password=new_user_password)
+                # All validations passed - create user (bcrypt runs on a worker thread behind a spinner)
+                new_hashed_password: bytes = runInBackground(windows, "Creating user...", hashUser, new_user_password)
                 new_salt: bytes = CLI_Guard.generateSalt()
+                # New users are created in the file their name routes to (CLIGUARD_DB_ROUTES)
+                sqlite.use_database_for_user(new_user_username)
                 sqlite.insertUser(user=new_user_username, password=new_hashed_password,
                                   encryption_salt=new_salt.hex())
 
@@ -2103,7 +2411,6 @@ def signOut(windows: dict[str, Any]) -> None:
 
 
 def quitMenu(windows: dict[str, Any], on_cancel=None) -> None:
-    time.sleep(0.2)
     exit()
 
 
@@ -4,6 +4,17 @@ import sqlite3
 # Import OS library
 import os
 
+# Pauses between paged backup steps
+import time
+# Memoized statement builders
+import functools
+
+# Database routing: per-thread connection cache, routes file and user-name patterns
+import threading
+import json
+import fnmatch
+from contextlib import closing
+
 # DateTime used for Logging
 from datetime import date, datetime, timedelta
 
@@ -26,6 +37,44 @@ def get_tomorrow() -> date:
 ALLOWED_COLUMNS = {'category', 'account', 'username', 'last_modified'}
 ALLOWED_SORT_ORDERS = {'ascending', 'descending'}
 
+# Columns each view may be projected to (queryData/searchData columns=) — also an injection whitelist
+TABLE_COLUMNS = {
+    'passwords': ('user', 'category', 'account', 'username', 'password', 'last_modified', 'secret_id', 'path'),
+    'users': ('user', 'user_pw', 'user_last_modified', 'last_locked', 'encryption_salt'),
+}
+
+# Everything a listing shows, without the ciphertext — same order as vw_passwords minus password
+METADATA_COLUMNS = ('user', 'category', 'account', 'username', 'last_modified', 'secret_id', 'path')
+
+# Versions kept per secret in password_versions (the current one included); older ones are pruned on update
+PASSWORD_VERSIONS_KEEP = 10
+
+# change_log keeps at most this many entries whether or not backups run (~2 MB); an incremental backup
+# whose parent has fallen out of the window becomes a full one. Trimmed once every CHANGE_LOG_TRIM_EVERY
+# sequence numbers, so the table holds at most the sum of the two
+CHANGE_LOG_MAX_ENTRIES = 100_000
+CHANGE_LOG_TRIM_EVERY = 1000
+
+# Paged online backups (exportDatabase): pages copied per step (~4 MiB at 4 KiB pages) and the pause
+# between steps that lets other connections write
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP_SECONDS = 0.01
+# Restarts (caused by writes from other connections) tolerated before finishing the copy in one step
+BACKUP_MAX_RESTARTS = 3
+
+# Tables whose row counts queryDatabaseStats reports
+STATS_TABLES = ('users', 'passwords', 'password_versions', 'secret_tags', 'service_tokens', 'login_attempts',
+                'change_log')
+
+# Values bound per IN (...) list — well under SQLite's default limit of 999 host parameters
+MAX_IN_PARAMETERS = 500
+
+# Tags one queryDataByTags call may require together — each is one arm of a compound SELECT
+MAX_FILTER_TAGS = 16
+
+# Compiled statements sqlite3 keeps per connection (its default is 128). Every distinct SQL text the layer
+# issues — each queryData shape, each IN (...) width — takes an entry, and an evicted statement is prepared again
+STATEMENT_CACHE_SIZE = 512
 
 
 # Write to Debugging Log file
@@ -42,13 +91,45 @@ def logging(message=None):
 
 # Database path constant
 # Uses __file__ (not getcwd) so the path is correct regardless of where the CLI is invoked from
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CLI_Guard_DB.db")
-
-
-def get_db_connection() -> sqlite3.Connection:
+# CLIGUARD_DB points CLI Guard at another database file
+DB_PATH = os.path.abspath(os.path.expanduser(
+    os.environ.get("CLIGUARD_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "CLI_Guard_DB.db")
+))
+
+# JSON file mapping user-name patterns to database files (see resolve_db_path); unset means one database
+DB_ROUTES_PATH = os.environ.get("CLIGUARD_DB_ROUTES")
+
+# Tables shipped in CLI_Guard_DB.db before any migration — create_database starts new files from this
+BASE_SCHEMA = """
+    CREATE TABLE users (
+        user TEXT NOT NULL UNIQUE PRIMARY KEY,
+        user_pw BLOB NOT NULL,
+        user_last_modified TEXT NOT NULL,
+        last_locked TEXT
+    );
+    CREATE TABLE passwords (
+        user TEXT NOT NULL,
+        category TEXT NOT NULL,
+        account TEXT NOT NULL,
+        username TEXT NOT NULL,
+        password TEXT NOT NULL,
+        last_modified TEXT NOT NULL,
+        FOREIGN KEY (user) REFERENCES users(user) ON DELETE NO ACTION ON UPDATE NO ACTION
+    );
+    CREATE VIEW vw_users AS SELECT * FROM users;
+    CREATE VIEW vw_passwords AS SELECT * FROM passwords;
+"""
+
+
+def get_db_connection(db_path: str = None, check_same_thread: bool = True) -> sqlite3.Connection:
     """
     Get a database connection with proper error handling
 
+    Args:
+        db_path: Database file to open (defaults to DB_PATH)
+        check_same_thread: Passed to sqlite3.connect — set False only when the
+            caller serializes access itself (e.g. CLI_Guard.Vault's lock)
+
     Returns:
         sqlite3.Connection: Active database connection
 
@@ -56,13 +137,15 @@ def get_db_connection() -> sqlite3.Connection:
         FileNotFoundError: If database file doesn't exist
         sqlite3.Error: If connection fails
     """
-    if not os.path.exists(DB_PATH):
+    db_path = db_path or DB_PATH
+    if not os.path.exists(db_path):
         error_msg = "ERROR: Could not connect to CLI Guard Database - Default database does not exist or cannot be found"
         logging(message=error_msg)
         raise FileNotFoundError(error_msg)
 
     try:
-        connection = sqlite3.connect(DB_PATH)
+        connection = sqlite3.connect(db_path, check_same_thread=check_same_thread,
+                                     cached_statements=STATEMENT_CACHE_SIZE)
         # Enable foreign keys (SQLite doesn't enable them by default)
         connection.execute("PRAGMA foreign_keys = ON")
         return connection
@@ -96,6 +179,12 @@ def close_db_connection() -> None:
             sqlConnection.commit()  # Commit any pending transactions
             sqlConnection.close()
             logging(message="Database connection closed successfully")
+        # Other files this thread opened through database routing
+        connections = _cached_connections()
+        for connection in connections.values():
+            if connection is not sqlConnection:
+                connection.close()
+        connections.clear()
     except sqlite3.Error as e:
         logging(message=f"ERROR: Failed to close database connection - {str(e)}")
 
@@ -112,7 +201,7 @@ def ensure_connection() -> bool:
     # Check if connection exists and is valid
     if sqlConnection is None or sqlCursor is None:
         try:
-            sqlConnection = get_db_connection()
+            sqlConnection = get_db_connection(_active_db_path)
             sqlCursor = sqlConnection.cursor()
             return True
         except (FileNotFoundError, sqlite3.Error):
@@ -123,28 +212,416 @@ def ensure_connection() -> bool:
         sqlConnection.execute("SELECT 1")
         return True
     except sqlite3.Error:
-        # Connection is dead, try to reconnect
+        # Connection is dead (or was opened on another thread), try to reconnect
         try:
-            sqlConnection = get_db_connection()
+            sqlConnection = get_db_connection(_active_db_path)
             sqlCursor = sqlConnection.cursor()
             return True
         except (FileNotFoundError, sqlite3.Error):
             return False
 
 
+# ---------------------------------------------------------------------------
+# Database routing
+# ---------------------------------------------------------------------------
+# Teams can keep their users and secrets in separate files, each with its own write lock and indexes.
+# The routes file (CLIGUARD_DB_ROUTES) maps user-name patterns to files, first match wins:
+#     {"alice": "team-a.db", "ops-*": "/srv/cli-guard/ops.db"}
+# Relative paths are taken from the routes file's directory; unmatched users stay in DB_PATH.
+# Entry points call use_database_for_user() once the user is known, which points the module
+# connection at that user's file. Connections are cached per thread and per file.
+
+# File the module connection currently points at (None = DB_PATH)
+_active_db_path = None
+
+# Per-thread {absolute path: connection} — sqlite3 connections stay on the thread that opened them
+_thread_state = threading.local()
+
+# Files already migrated by this process
+_migrated_paths: set = set()
+
+# (routes path, mtime, [(pattern, absolute db path)]) of the last routes file read
+_routes_cache = None
+
+
+def _cached_connections() -> dict:
+    """This thread's {absolute path: connection} cache"""
+    connections = getattr(_thread_state, "connections", None)
+    if connections is None:
+        connections = _thread_state.connections = {}
+    return connections
+
+
+def load_db_routes() -> list:
+    """
+    Read the routes file named by DB_ROUTES_PATH (re-read when it changes)
+
+    Returns:
+        [(user-name pattern, absolute database path)] in file order; empty when routing
+        is not configured or the file cannot be read (logged)
+    """
+    global _routes_cache
+    if not DB_ROUTES_PATH:
+        return []
+
+    routes_path = os.path.abspath(os.path.expanduser(DB_ROUTES_PATH))
+    try:
+        mtime = os.path.getmtime(routes_path)
+        if _routes_cache is not None and _routes_cache[:2] == (routes_path, mtime):
+            return _routes_cache[2]
+
+        with open(routes_path, "r", encoding="utf-8") as routes_file:
+            mapping = json.load(routes_file)
+        if not isinstance(mapping, dict) or not all(isinstance(v, str) for v in mapping.values()):
+            raise ValueError("expected an object mapping user patterns to database paths")
+
+        base_dir = os.path.dirname(routes_path)
+        routes = [(str(pattern), os.path.abspath(os.path.join(base_dir, os.path.expanduser(path))))
+                  for pattern, path in mapping.items()]
+        _routes_cache = (routes_path, mtime, routes)
+        return routes
+    except (OSError, ValueError) as routes_error:
+        logging(message=f"ERROR: Could not read database routes from {routes_path} - {str(routes_error)}")
+        return []
+
+
+def resolve_db_path(user) -> str:
+    """
+    Database file holding a user's data
+
+    Args:
+        user: CLI Guard username
+
+    Returns:
+        Absolute path of the first route whose pattern matches user, else DB_PATH
+    """
+    for pattern, db_path in load_db_routes():
+        if fnmatch.fnmatchcase(str(user), pattern):
+            return db_path
+    return os.path.abspath(DB_PATH)
+
+
+def routed_database_paths() -> list:
+    """Existing routed database files other than DB_PATH, in routes-file order"""
+    default = os.path.abspath(DB_PATH)
+    paths = dict.fromkeys(db_path for _, db_path in load_db_routes())
+    return [db_path for db_path in paths if db_path != default and os.path.exists(db_path)]
+
+
+def create_database(db_path: str) -> None:
+    """
+    Create an empty CLI Guard database (BASE_SCHEMA; migrations run when it is first opened)
+
+    Raises:
+        FileExistsError: If db_path already exists
+        sqlite3.Error: If the schema cannot be written
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Database already exists: {db_path}")
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    with closing(sqlite3.connect(db_path)) as connection:
+        connection.executescript(BASE_SCHEMA)
+    os.chmod(db_path, 0o600)
+    logging(message=f"SUCCESS: Created database {db_path}")
+
+
+def _migrate(connection: sqlite3.Connection) -> None:
+    """Run MIGRATIONS against connection (the migrations work on the module connection)"""
+    global sqlConnection, sqlCursor
+    saved = sqlConnection, sqlCursor
+    sqlConnection, sqlCursor = connection, connection.cursor()
+    try:
+        runMigrations()
+    finally:
+        sqlConnection, sqlCursor = saved
+
+
+def open_database(db_path: str) -> sqlite3.Connection:
+    """
+    This thread's cached connection to db_path
+
+    A routed file that does not exist yet is created, and each file is
+    migrated the first time this process opens it.
+
+    Raises:
+        sqlite3.Error: If the file cannot be created or opened
+    """
+    db_path = os.path.abspath(db_path)
+    connections = _cached_connections()
+    connection = connections.get(db_path)
+    if connection is None:
+        if not os.path.exists(db_path) and db_path != os.path.abspath(DB_PATH):
+            create_database(db_path)
+        connection = get_db_connection(db_path)
+        if db_path not in _migrated_paths:
+            _migrate(connection)
+            _migrated_paths.add(db_path)
+        connections[db_path] = connection
+    return connection
+
+
+def use_database(db_path: str) -> bool:
+    """
+    Point the module connection (and every function using it) at db_path
+
+    Returns:
+        True on success, False if the file could not be opened (logged)
+    """
+    global sqlConnection, sqlCursor, _active_db_path
+    try:
+        connection = open_database(db_path)
+    except (OSError, sqlite3.Error) as open_error:
+        logging(message=f"ERROR: Could not open database {db_path} - {str(open_error)}")
+        return False
+    if connection is not sqlConnection:
+        sqlConnection, sqlCursor = connection, connection.cursor()
+    _active_db_path = os.path.abspath(db_path)
+    return True
+
+
+def use_database_for_user(user) -> bool:
+    """
+    Point the module connection at the file holding user's data (see resolve_db_path)
+
+    A no-op when user already resolves to the active file — always the case without routes.
+
+    Returns:
+        True if user's database is active, False if it could not be opened
+    """
+    db_path = resolve_db_path(user)
+    if db_path == os.path.abspath(_active_db_path or DB_PATH) and sqlConnection is not None:
+        return True
+    return use_database(db_path)
+
+
+def active_db_path() -> str:
+    """
+    Absolute path of the file the module connection points at — DB_PATH unless
+    use_database/use_database_for_user switched to a routed file
+
+    Functions that open a connection of their own (exportDatabase, backup.py)
+    read this file, so they work on the same data as the module connection.
+    """
+    return os.path.abspath(_active_db_path or DB_PATH)
+
+
+def find_service_token_database(token_id) -> str | None:
+    """
+    With routing configured, the database file holding a service token (tokens live with their user)
+
+    Returns:
+        Path of the first file (DB_PATH, then routed files) with token_id, or None
+        when routing is off or no file has it
+    """
+    if not load_db_routes():
+        return None
+    for db_path in [os.path.abspath(DB_PATH)] + routed_database_paths():
+        try:
+            if queryServiceToken(token_id, connection=open_database(db_path)) is not None:
+                return db_path
+        except (OSError, sqlite3.Error) as open_error:
+            logging(message=f"ERROR: Could not open database {db_path} - {str(open_error)}")
+    return None
+
+
+def _ready(connection=None) -> bool:
+    """True if connection is given, else make sure the legacy global connection is up"""
+    return connection is not None or ensure_connection()
+
+
+def _connection(connection=None) -> sqlite3.Connection:
+    """An explicit connection (e.g. a CLI_Guard.Vault's own) or the legacy global one"""
+    return connection if connection is not None else sqlConnection
+
+
+def _cursor(connection=None) -> sqlite3.Cursor:
+    """A cursor on an explicit connection, or the legacy global cursor"""
+    return connection.cursor() if connection is not None else sqlCursor
+
+
+
+# SELECT list for a view: * when columns is None, else the named columns in the order given
+# Raises ValueError for a column outside TABLE_COLUMNS (callers log and return their empty result)
+def _projection(table, columns=None, alias=None) -> str:
+    prefix = f"{alias}." if alias else ""
+    if columns is None:
+        return f"{prefix}*"
+    allowed = TABLE_COLUMNS.get(table, ())
+    invalid = [column for column in columns if column not in allowed]
+    if invalid or not columns:
+        logging(message=f"ERROR: Invalid projection attempted on {table}: {list(columns)}")
+        raise ValueError(f"Invalid columns for {table}: {invalid or 'none given'}")
+    return ", ".join(f"{prefix}{column}" for column in columns)
+
+
+# ---------------------------------------------------------------------------
+# Statement registry
+# ---------------------------------------------------------------------------
+# sqlite3 caches compiled statements per connection, keyed by SQL text (see STATEMENT_CACHE_SIZE).
+# The lookup paths take their SQL from here so every call passes the identical text and reuses the
+# compiled statement: fixed queries by name from STATEMENTS, variable ones from a memoized builder
+# that assembles each shape (search column, sort, paging, ...) once.
+
+STATEMENTS = {
+    "queryAccountNames": "SELECT DISTINCT account FROM vw_passwords WHERE user = ?",
+    "queryCategoryNames": "SELECT DISTINCT category FROM vw_passwords WHERE user = ?",
+    "queryDataVersion": "SELECT version FROM data_versions WHERE user = ?",
+    "queryDataBySecretId": "SELECT * FROM vw_passwords WHERE secret_id = ? AND user = ?",
+    "queryDataByPath": "SELECT * FROM vw_passwords WHERE user = ? AND path = ?",
+    "queryTags": "SELECT tag FROM secret_tags WHERE secret_id = ? AND user = ? ORDER BY tag",
+    "queryTagNames": "SELECT tag, COUNT(*) FROM secret_tags WHERE user = ? GROUP BY tag ORDER BY tag",
+    "queryUserPasswordVersions": """
+        SELECT v.secret_id, v.version, v.password
+        FROM passwords AS p
+        JOIN password_versions AS v ON v.secret_id = p.secret_id
+        WHERE p.user = ?
+    """,
+    "queryPasswordVersions": """
+        SELECT v.version, v.created_at
+        FROM password_versions AS v
+        JOIN passwords AS p ON p.secret_id = v.secret_id
+        WHERE p.user = ? AND v.secret_id = ?
+        ORDER BY v.version DESC
+    """,
+    "isUserLocked": "SELECT last_locked FROM users WHERE user = ?",
+    "queryUserSalt": "SELECT encryption_salt FROM users WHERE user = ?",
+    "insertLoginAttempt": "INSERT INTO login_attempts (user, attempted_at) VALUES (?, ?)",
+    "pruneLoginAttempts": "DELETE FROM login_attempts WHERE attempted_at < ?",
+    "queryLoginAttempts": "SELECT COUNT(*), MAX(attempted_at) FROM login_attempts WHERE user = ? AND attempted_at >= ?",
+    "deleteLoginAttempts": "DELETE FROM login_attempts WHERE user = ?",
+    "queryServiceToken": "SELECT * FROM vw_service_tokens WHERE token_id = ?",
+    "updateServiceTokenLastUsed": "UPDATE service_tokens SET last_used = ? WHERE token_id = ?",
+}
+
+
+# SELECT for queryData: search_column/sort_column already whitelisted and lower-cased, sort_order "ASC"/"DESC"
+# columns is a tuple (or None) so the shape is hashable; an invalid projection raises ValueError and isn't cached
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _queryDataStatement(table, columns=None, search_column=None, sort_column=None,
+                        sort_order=None, paged=False) -> str:
+    sql_query = f"SELECT {_projection(table, columns)} FROM vw_{table} WHERE user = ?"
+    if search_column is not None:
+        sql_query += f" AND {search_column} LIKE ?"
+    if sort_order is not None and sort_column is not None:
+        sql_query += f" ORDER BY {sort_column} {sort_order}"
+    if paged:
+        sql_query += " LIMIT ? OFFSET ?"
+    return sql_query
+
+
+# SELECT COUNT(*) for countData — the same WHERE clause as _queryDataStatement
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _countDataStatement(table, search_column=None) -> str:
+    sql_query = f"SELECT COUNT(*) FROM vw_{table} WHERE user = ?"
+    if search_column is not None:
+        sql_query += f" AND {search_column} LIKE ?"
+    return sql_query
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _searchDataStatement(columns=None, limited=False) -> str:
+    # The user: column filter lets FTS5 narrow to this user inside the index;
+    # the join on p.user then enforces the exact match
+    sql_query = f"""
+        SELECT {_projection("passwords", columns, alias="p")}
+        FROM passwords_fts
+        JOIN vw_passwords AS p ON p.secret_id = passwords_fts.rowid
+        WHERE passwords_fts MATCH ?
+        AND p.user = ?
+        ORDER BY bm25(passwords_fts, 0.0, 1.0, 2.0, 1.0)
+    """
+    if limited:
+        sql_query += " LIMIT ?"
+    return sql_query
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _iterMetadataStatement(after=False, limited=False) -> str:
+    sql_query = ("SELECT category, account, username, last_modified, secret_id, path "
+                 "FROM vw_passwords WHERE user = ?")
+    if after:
+        sql_query += " AND account >= ? AND (account > ? OR secret_id > ?)"
+    sql_query += " ORDER BY account, secret_id"
+    if limited:
+        sql_query += " LIMIT ?"
+    return sql_query
+
+
+# Range over idx_passwords_user_path: bounded=False lists every secret that has a path
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _pathPrefixStatement(columns=None, bounded=True, limited=False) -> str:
+    sql_query = f"SELECT {_projection('passwords', columns)} FROM vw_passwords WHERE user = ?"
+    sql_query += " AND path >= ? AND path < ?" if bounded else " AND path IS NOT NULL"
+    sql_query += " ORDER BY path"
+    if limited:
+        sql_query += " LIMIT ?"
+    return sql_query
+
+
+# Secrets carrying every one of width tags: one seek on the (user, tag) slice of secret_tags per tag,
+# INTERSECTed, then a primary-key lookup on passwords per secret_id (a GROUP BY ... HAVING COUNT
+# form lets the planner scan all of secret_tags instead)
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _tagFilterStatement(width, columns=None, limited=False) -> str:
+    tagged = " INTERSECT ".join("SELECT secret_id FROM secret_tags WHERE user = ? AND tag = ?"
+                                for _ in range(width))
+    sql_query = (f"SELECT {_projection('passwords', columns)} FROM vw_passwords "
+                 f"WHERE user = ? AND secret_id IN ({tagged}) "
+                 f"ORDER BY secret_id")
+    if limited:
+        sql_query += " LIMIT ?"
+    return sql_query
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _queryDataByAccountsStatement(width) -> str:
+    placeholders = ", ".join("?" for _ in range(width))
+    return (f"SELECT * FROM vw_passwords WHERE user = ? AND account IN ({placeholders}) "
+            f"ORDER BY secret_id")
+
+
+@functools.lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _queryPasswordVersionStatement(by_version=False, by_time=False) -> str:
+    sql_query = """
+        SELECT v.version, v.password, v.created_at
+        FROM password_versions AS v
+        JOIN passwords AS p ON p.secret_id = v.secret_id
+        WHERE p.user = ? AND v.secret_id = ?
+    """
+    if by_version:
+        sql_query += " AND v.version = ?"
+    if by_time:
+        sql_query += " AND v.created_at <= ?"
+    return sql_query + " ORDER BY v.version DESC LIMIT 1"
+
+
+# Width an IN (...) list of count values is padded to: the next power of two, capped at MAX_IN_PARAMETERS
+# Batches of 3, 5 and 7 accounts then share the 4- and 8-wide statements instead of compiling one each
+def _inListWidth(count) -> int:
+    width = 1
+    while width < count:
+        width *= 2
+    return min(width, MAX_IN_PARAMETERS)
+
 
 # Query the passwords table and insert all into list_table ordered by account name or userID
 # ? Placeholders in SQL Queries prevent SQL Injection as per the SQLite3 documentation
 # The trailing comma when passing Placeholder Bindings avoids the "Incorrect number of bindings supplied" error
 # by ensuring the argument is treated as a tuple, which is what execute() expects
 # https://docs.python.org/3/library/sqlite3.html#sqlite3-placeholders
-def queryData(user, table, category=None, text=None, sort_by=None, sort_column=None) -> list:
+# limit/offset let callers page through large result sets (e.g. the TUI table) instead of fetching everything
+# columns projects the result (e.g. METADATA_COLUMNS) so listings don't read ciphertext they never show;
+# None keeps SELECT * and the full positional row
+def queryData(user, table, category=None, text=None, sort_by=None, sort_column=None,
+              limit=None, offset=None, columns=None, connection=None) -> list:
     try:
         # Ensure database connection is active
-        if not ensure_connection():
+        if not _ready(connection):
             logging(message="ERROR: No database connection available")
             return []
 
+        cursor = _cursor(connection)
+
         # Validate search column name against whitelist to prevent SQL injection
         if category is not None and category.lower() not in ALLOWED_COLUMNS:
             logging(message=f"ERROR: Invalid column name attempted: {category}")
@@ -160,29 +637,39 @@ def queryData(user, table, category=None, text=None, sort_by=None, sort_column=N
             logging(message=f"ERROR: Invalid sort order attempted: {sort_by}")
             raise ValueError(f"Invalid sort order: {sort_by}")
 
+        if columns is not None:
+            columns = tuple(columns)
+
         if user is not None:
-            # Build query incrementally — search and sort can combine
-            sql_query = f"SELECT * FROM vw_{table} WHERE user = ?"
+            # The statement's shape — search and sort can combine — comes from the registry (_queryDataStatement)
             params: list = [user]
 
-            # Apply search filter (WHERE ... LIKE)
+            # Search filter (WHERE ... LIKE)
+            search_column = None
             if text is not None and category is not None:
-                sql_query += f" AND {category.lower()} LIKE ?"
+                search_column = category.lower()
                 params.append(f"%{text}%")
 
-            # Apply sort order (ORDER BY)
+            # Sort order (ORDER BY)
             # sort_column is the column to sort by; sort_by is the direction
             # For backward compatibility: if sort_column is None, fall back to category
             effective_sort_col = sort_column if sort_column is not None else category
+            order_column = sort_order = None
             if sort_by is not None and effective_sort_col is not None:
-                sort_sql = "ASC" if sort_by.lower() == "ascending" else "DESC"
-                sql_query += f" ORDER BY {effective_sort_col.lower()} {sort_sql}"
+                order_column = effective_sort_col.lower()
+                sort_order = "ASC" if sort_by.lower() == "ascending" else "DESC"
+
+            # Paging (LIMIT ... OFFSET) — both values are bound, never interpolated
+            if limit is not None:
+                params.extend([int(limit), int(offset or 0)])
 
-            sqlCursor.execute(sql_query, tuple(params))
-            return sqlCursor.fetchall()
+            sql_query = _queryDataStatement(table, columns, search_column, order_column,
+                                            sort_order, limit is not None)
+            cursor.execute(sql_query, tuple(params))
+            return cursor.fetchall()
         else:
-            sqlCursor.execute(f"SELECT * FROM vw_{table}")
-            return sqlCursor.fetchall()
+            cursor.execute(f"SELECT {_projection(table, columns)} FROM vw_{table}")
+            return cursor.fetchall()
     except ValueError:
         # Return empty list for validation errors (already logged above)
         return []
@@ -196,230 +683,1002 @@ def queryData(user, table, category=None, text=None, sort_by=None, sort_column=N
         logging()
 
 
-# INSERT new user into users SQLite table
-def insertUser(user, password, encryption_salt) -> None:
+# COUNT records in the passwords table matching the same filter queryData would apply
+# Used with queryData(limit=, offset=) so the TUI knows the table size without fetching every row
+def countData(user, table, category=None, text=None, connection=None) -> int:
     try:
-        # Ensure database connection is active
-        if not ensure_connection():
-            logging(message="ERROR: Cannot insert user - no database connection")
-            return
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return 0
 
-        # Handle password as bytes (bcrypt hash) or string
-        # SQLite stores bytes as BLOB type
-        # encryption_salt is a hex string from os.urandom(32).hex()
-        sql_query = ("""
-            INSERT INTO users
-            (user, user_pw, user_last_modified, encryption_salt)
-            VALUES(?, ?, ?, ?);
-            """)
-        sqlCursor.execute(sql_query, (user, password, get_today(), encryption_salt))
-        sqlConnection.commit()
-        logging(message=f"SUCCESS: Created User {user}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        cursor = _cursor(connection)
+
+        # Validate search column name against whitelist to prevent SQL injection
+        if category is not None and category.lower() not in ALLOWED_COLUMNS:
+            logging(message=f"ERROR: Invalid column name attempted: {category}")
+            raise ValueError(f"Invalid column name: {category}")
+
+        params: list = [user]
+        search_column = None
+
+        if text is not None and category is not None:
+            search_column = category.lower()
+            params.append(f"%{text}%")
+
+        cursor.execute(_countDataStatement(table, search_column), tuple(params))
+        result = cursor.fetchone()
+        return result[0] if result else 0
+    except ValueError:
+        return 0
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to failed to insert User {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to count data in {table} - {str(sql_error)}")
+        return 0
     except Exception:
         logging()
+        return 0
 
 
-# UPDATE records in the passwords SQLite table
-def updateUserPassword(user, password) -> None:
+# Full-text search over category/account/username via the passwords_fts index
+# match_query is an FTS5 query string built by the business logic layer (CLI_Guard.buildSearchQuery)
+# Results are best match first (bm25 — account matches weigh double, the user column not at all)
+# columns projects the result the same way as queryData
+def searchData(user, match_query, limit=None, columns=None, connection=None) -> list:
     try:
-        # Handle password as bytes (bcrypt hash) or string
-        sql_query = ("""
-            UPDATE users
-            SET user_pw = ?,
-                user_last_modified = ?
-            WHERE user = ?;
-            """)
-        sqlCursor.execute(sql_query, (password, get_today(), user))
-        sqlConnection.commit()
-        logging(message=f"SUCCESS: Updated password for {user}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+
+        quoted_user = '"' + str(user).replace('"', '""') + '"'
+        params: list = [f"user : {quoted_user} AND ({match_query})", user]
+
+        if limit is not None:
+            params.append(int(limit))
+
+        sql_query = _searchDataStatement(tuple(columns) if columns is not None else None, limit is not None)
+        cursor.execute(sql_query, tuple(params))
+        return cursor.fetchall()
+    except ValueError:
+        # Invalid projection (already logged by _projection)
+        return []
     except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        logging(message=f"ERROR: SQLite3 full-text search failed - {str(op_error)}")
+        return []
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to failed to update User {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to search passwords for User {user} - {str(sql_error)}")
+        return []
     except Exception:
         logging()
+        return []
 
 
-# DELETE records from the users SQLite table as well as their passwords
-def deleteUser(user) -> None:
+# Stream a user's passwords metadata in (account, secret_id) order, one row at a time
+# Keyset paging: after=(account, secret_id) of the last row already seen, so each page is an index range
+# scan rather than an OFFSET that re-reads every earlier row. Ciphertext is never selected.
+# Rows: (category, account, username, last_modified, secret_id, path)
+# Uses its own cursor, so the iteration is not disturbed by other queries on the same connection
+def iterMetadata(user, after=None, limit=None, connection=None):
     try:
-        sql_query = (f"""
-            DELETE FROM users 
-            WHERE user = ?;
-            """)
-        sqlCursor.execute(sql_query, (user,))
-        sqlConnection.commit()
-        
-        sql_query = (f"""
-            DELETE FROM passwords 
-            WHERE user = ?;
-            """)
-        sqlCursor.execute(sql_query, (user,))
-        sqlConnection.commit()       
-        logging(message=f"SUCCESS: Deleted User {user}")
-        logging(message=f"SUCCESS: Deleted all passwords for User {user}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return
+
+        cursor = _connection(connection).cursor()
+
+        params: list = [user]
+
+        if after is not None:
+            after_account, after_id = after
+            params.extend([after_account, after_account, int(after_id)])
+
+        if limit is not None:
+            params.append(int(limit))
+
+        cursor.execute(_iterMetadataStatement(after is not None, limit is not None), tuple(params))
+        # Iterating the cursor steps SQLite one row at a time — nothing is buffered here
+        yield from cursor
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to failed to delete User {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to stream passwords for User {user} - {str(sql_error)}")
     except Exception:
         logging()
 
 
-# UPDATE records in the users SQLite table to lock account
-def lockUser(user) -> None:
+# SELECT the distinct account names for a user — metadata only, served from idx_passwords_user_account
+def queryAccountNames(user, connection=None) -> list:
     try:
-        sql_query = ("""
-            UPDATE users
-            SET last_locked = ?
-            WHERE user = ?;
-            """)
-        sqlCursor.execute(sql_query, (get_today(), user))
-        sqlConnection.commit()
-        logging(message=f"SUCCESS: Locked User {user} until {get_tomorrow()}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+
+        cursor.execute(STATEMENTS["queryAccountNames"], (user,))
+        return [row[0] for row in cursor.fetchall()]
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to failed to lock User {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to query account names for User {user} - {str(sql_error)}")
+        return []
     except Exception:
         logging()
+        return []
 
 
-# CHECK if user account is locked
-def isUserLocked(user) -> bool:
+# SELECT the distinct category names for a user — metadata only (shell completion, filters)
+def queryCategoryNames(user, connection=None) -> list:
     try:
-        sql_query = ("""
-            SELECT last_locked
-            FROM users
-            WHERE user = ?;
-            """)
-        sqlCursor.execute(sql_query, (user,))
-        result = sqlCursor.fetchone()
-
-        if result and result[0]:
-            # Check if last_locked is today (still locked)
-            if str(result[0]) == str(get_today()):
-                return True
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
 
-        return False
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryCategoryNames"], (user,))
+        return [row[0] for row in cursor.fetchall()]
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to check lock status for User {user} - {str(sql_error)}")
-        return False
+        logging(message=f"ERROR: SQLite3 failed to query category names for User {user} - {str(sql_error)}")
+        return []
     except Exception:
         logging()
-        return False
+        return []
 
 
-# INSERT new records into passwords SQLite table
-def insertData(user, category, account, username, password) -> None:
+# SELECT a user's data version — a counter bumped by triggers on every change to their passwords rows
+# A single primary-key lookup, so callers can poll it before deciding to requery
+def queryDataVersion(user, connection=None) -> int:
     try:
-        # Ensure database connection is active
-        if not ensure_connection():
-            logging(message="ERROR: Cannot insert password - no database connection")
-            return
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return 0
 
-        sql_query = ("""
-            INSERT INTO passwords
-            VALUES(?, ?, ?, ?, ?, ?);
-            """)
-        sqlCursor.execute(sql_query, (user, category, account, username, password, get_today()))
-        sqlConnection.commit()
-        logging(message=f"SUCCESS: Inserted password for {account} in User account {user}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryDataVersion"], (user,))
+        result = cursor.fetchone()
+        return result[0] if result else 0
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to insert password for {account} in User account {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to query data version for User {user} - {str(sql_error)}")
+        return 0
     except Exception:
         logging()
+        return 0
 
 
-# UPDATE records in the passwords SQLite table
-def updateData(user, password, account, username, old_password) -> None:
+
+# SELECT the passwords rows for several accounts in one round trip
+# Used by batch lookups (e.g. the CLI exec command) instead of one queryData call per account
+# Accounts are bound in chunks to stay under SQLite's host parameter limit; each chunk is padded
+# (repeating its last account) to a power-of-two width so any batch size reuses a handful of statements
+def queryDataByAccounts(user, accounts, connection=None) -> list:
     try:
-        sql_query = ("""
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+
+        names = list(dict.fromkeys(accounts))
+        rows: list = []
+        for start in range(0, len(names), MAX_IN_PARAMETERS):
+            chunk = names[start:start + MAX_IN_PARAMETERS]
+            width = _inListWidth(len(chunk))
+            chunk += chunk[-1:] * (width - len(chunk))
+            cursor.execute(_queryDataByAccountsStatement(width), (user, *chunk))
+            rows.extend(cursor.fetchall())
+        return rows
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query accounts for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT one full passwords row by secret_id — a primary-key lookup
+# Used when a metadata-only listing (e.g. the TUI table) needs the ciphertext of the row the user picked
+def queryDataBySecretId(user, secret_id, connection=None) -> tuple | None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return None
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryDataBySecretId"], (int(secret_id), user))
+        return cursor.fetchone()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query secret {secret_id} for User {user} - {str(sql_error)}")
+        return None
+    except Exception:
+        logging()
+        return None
+
+
+# SELECT one full passwords row by its path (e.g. "prod/payments/stripe") — a seek on idx_passwords_user_path
+def queryDataByPath(user, path, connection=None) -> tuple | None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return None
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryDataByPath"], (user, path))
+        return cursor.fetchone()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query path {path} for User {user} - {str(sql_error)}")
+        return None
+    except Exception:
+        logging()
+        return None
+
+
+# SELECT the passwords rows whose path starts with prefix, in path order
+# "prod/payments/" lists everything under that folder; "" lists every secret that has a path.
+# The prefix becomes a [prefix, prefix-with-last-character-incremented) range on idx_passwords_user_path,
+# so only the matching slice of the index is read. columns projects the result the same way as queryData
+def queryDataByPathPrefix(user, prefix, columns=None, limit=None, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+
+        params: list = [user]
+        if prefix:
+            params.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+        if limit is not None:
+            params.append(int(limit))
+
+        sql_query = _pathPrefixStatement(tuple(columns) if columns is not None else None,
+                                         bool(prefix), limit is not None)
+        cursor.execute(sql_query, tuple(params))
+        return cursor.fetchall()
+    except ValueError:
+        # Invalid projection (already logged by _projection)
+        return []
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to list path prefix {prefix} for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT the passwords rows tagged with every one of tags (e.g. ["service=payments", "env=prod"]), in secret_id order
+# One statement whatever the number of matches: the (user, tag, secret_id) primary key of secret_tags yields
+# the ids and each is a primary-key lookup on passwords. columns projects the result the same way as queryData
+def queryDataByTags(user, tags, columns=None, limit=None, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        names = list(dict.fromkeys(tags))
+        if not names:
+            return []
+        if len(names) > MAX_FILTER_TAGS:
+            logging(message=f"ERROR: Too many tags to filter on ({len(names)}, at most {MAX_FILTER_TAGS})")
+            return []
+
+        cursor = _cursor(connection)
+
+        # Pad to the statement's width by repeating the last tag — intersecting a set with itself is a no-op
+        width = _inListWidth(len(names))
+        params: list = [user]
+        for tag in names + names[-1:] * (width - len(names)):
+            params.extend([user, tag])
+        if limit is not None:
+            params.append(int(limit))
+
+        sql_query = _tagFilterStatement(width, tuple(columns) if columns is not None else None, limit is not None)
+        cursor.execute(sql_query, tuple(params))
+        return cursor.fetchall()
+    except ValueError:
+        # Invalid projection (already logged by _projection)
+        return []
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query tags {tags} for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT the tags of one secret, alphabetically — a seek on idx_secret_tags_secret
+def queryTags(user, secret_id, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryTags"], (int(secret_id), user))
+        return [row[0] for row in cursor.fetchall()]
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query tags of secret {secret_id} for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT a user's distinct tags with the number of secrets carrying each: [(tag, count)] alphabetically
+# Reads only the user's slice of the secret_tags primary key
+def queryTagNames(user, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryTagNames"], (user,))
+        return cursor.fetchall()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query tag names for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT a secret's version history, newest first — metadata only: (version, created_at)
+# Joined to passwords so only the owner's secret_id resolves
+def queryPasswordVersions(user, secret_id, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryPasswordVersions"], (user, int(secret_id)))
+        return cursor.fetchall()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query versions of secret {secret_id} for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# SELECT one version of a secret: (version, password ciphertext, created_at)
+# version picks an exact version; at picks the version in effect at that timestamp ("YYYY-MM-DD HH:MM:SS");
+# neither picks the newest. Each is a single seek on the (secret_id, version) primary key
+def queryPasswordVersion(user, secret_id, version=None, at=None, connection=None) -> tuple | None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return None
+
+        cursor = _cursor(connection)
+        params: list = [user, int(secret_id)]
+        if version is not None:
+            params.append(int(version))
+        if at is not None:
+            params.append(str(at))
+
+        cursor.execute(_queryPasswordVersionStatement(version is not None, at is not None), tuple(params))
+        return cursor.fetchone()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query a version of secret {secret_id} for User {user} - {str(sql_error)}")
+        return None
+    except Exception:
+        logging()
+        return None
+
+
+# INSERT new user into users SQLite table
+def insertUser(user, password, encryption_salt) -> None:
+    try:
+        # Ensure database connection is active
+        if not ensure_connection():
+            logging(message="ERROR: Cannot insert user - no database connection")
+            return
+
+        # Handle password as bytes (bcrypt hash) or string
+        # SQLite stores bytes as BLOB type
+        # encryption_salt is a hex string from os.urandom(32).hex()
+        sql_query = ("""
+            INSERT INTO users
+            (user, user_pw, user_last_modified, encryption_salt)
+            VALUES(?, ?, ?, ?);
+            """)
+        sqlCursor.execute(sql_query, (user, password, get_today(), encryption_salt))
+        sqlConnection.commit()
+        logging(message=f"SUCCESS: Created User {user}")
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to failed to insert User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# UPDATE records in the passwords SQLite table
+def updateUserPassword(user, password) -> None:
+    try:
+        # Handle password as bytes (bcrypt hash) or string
+        sql_query = ("""
+            UPDATE users
+            SET user_pw = ?,
+                user_last_modified = ?
+            WHERE user = ?;
+            """)
+        sqlCursor.execute(sql_query, (password, get_today(), user))
+        sqlConnection.commit()
+        logging(message=f"SUCCESS: Updated password for {user}")
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to failed to update User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# DELETE records from the users SQLite table as well as their passwords
+def deleteUser(user) -> None:
+    try:
+        sql_query = (f"""
+            DELETE FROM users 
+            WHERE user = ?;
+            """)
+        sqlCursor.execute(sql_query, (user,))
+        sqlConnection.commit()
+        
+        sql_query = (f"""
+            DELETE FROM passwords 
+            WHERE user = ?;
+            """)
+        sqlCursor.execute(sql_query, (user,))
+        sqlConnection.commit()       
+        logging(message=f"SUCCESS: Deleted User {user}")
+        logging(message=f"SUCCESS: Deleted all passwords for User {user}")
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to failed to delete User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# UPDATE records in the users SQLite table to lock account
+def lockUser(user) -> None:
+    try:
+        sql_query = ("""
+            UPDATE users
+            SET last_locked = ?
+            WHERE user = ?;
+            """)
+        sqlCursor.execute(sql_query, (get_today(), user))
+        sqlConnection.commit()
+        logging(message=f"SUCCESS: Locked User {user} until {get_tomorrow()}")
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to failed to lock User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# CHECK if user account is locked
+def isUserLocked(user) -> bool:
+    try:
+        sqlCursor.execute(STATEMENTS["isUserLocked"], (user,))
+        result = sqlCursor.fetchone()
+
+        if result and result[0]:
+            # Check if last_locked is today (still locked)
+            if str(result[0]) == str(get_today()):
+                return True
+
+        return False
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to check lock status for User {user} - {str(sql_error)}")
+        return False
+    except Exception:
+        logging()
+        return False
+
+
+# INSERT a failed sign-in attempt (attempted_at is epoch seconds), pruning attempts older than prune_before
+# Rows exist only for the sliding rate-limit window, so the table stays small even under abuse
+def insertLoginAttempt(user, attempted_at, prune_before=None, connection=None) -> None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["insertLoginAttempt"], (user, float(attempted_at)))
+        if prune_before is not None:
+            cursor.execute(STATEMENTS["pruneLoginAttempts"], (float(prune_before),))
+        _connection(connection).commit()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to record login attempt for User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# SELECT (count, latest attempted_at) of a user's failed sign-ins since a point in time (epoch seconds)
+# Served from idx_login_attempts_user — a range scan over the window only
+def queryLoginAttempts(user, since, connection=None) -> tuple[int, float | None]:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return 0, None
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryLoginAttempts"], (user, float(since)))
+        count, latest = cursor.fetchone()
+        return count, latest
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query login attempts for User {user} - {str(sql_error)}")
+        return 0, None
+    except Exception:
+        logging()
+        return 0, None
+
+
+# DELETE a user's failed sign-in attempts (after a successful sign-in)
+def deleteLoginAttempts(user, connection=None) -> None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["deleteLoginAttempts"], (user,))
+        _connection(connection).commit()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to clear login attempts for User {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# INSERT new records into passwords SQLite table
+# path is optional — a unique (per user) hierarchical name such as "prod/payments/stripe"
+# Returns the new row's secret_id (so callers can act on exactly that secret), or None if nothing was inserted
+def insertData(user, category, account, username, password, path=None, connection=None) -> int | None:
+    try:
+        # Ensure database connection is active
+        if not _ready(connection):
+            logging(message="ERROR: Cannot insert password - no database connection")
+            return
+
+        cursor = _cursor(connection)
+
+        sql_query = ("""
+            INSERT INTO passwords
+            (user, category, account, username, password, last_modified, path)
+            VALUES(?, ?, ?, ?, ?, ?, ?);
+            """)
+        cursor.execute(sql_query, (user, category, account, username, password, get_today(), path))
+        secret_id = cursor.lastrowid
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Inserted password for {account} in User account {user}")
+        return secret_id
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to insert password for {account} in User account {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# UPDATE records in the passwords SQLite table
+def updateData(user, password, account, username, old_password, connection=None) -> None:
+    try:
+        cursor = _cursor(connection)
+        sql_query = ("""
             UPDATE passwords
             SET password = ?,
                 last_modified = ?
-            WHERE account = ?
+            WHERE user = ?
+            AND account = ?
             AND username = ?
             AND password = ?;
             """)
-        sqlCursor.execute(sql_query, (password, get_today(), account, username, old_password))
-        sqlConnection.commit()
+        cursor.execute(sql_query, (password, get_today(), user, account, username, old_password))
+
+        # The update trigger appended a version — keep only the newest PASSWORD_VERSIONS_KEEP per secret
+        cursor.execute("""
+            DELETE FROM password_versions
+            WHERE secret_id IN (
+                SELECT secret_id FROM passwords
+                WHERE user = ? AND account = ? AND username = ? AND password = ?
+            )
+            AND version <= (
+                SELECT MAX(version) FROM password_versions AS latest
+                WHERE latest.secret_id = password_versions.secret_id
+            ) - ?;
+            """, (user, account, username, password, PASSWORD_VERSIONS_KEEP))
+        _connection(connection).commit()
         logging(message=f"SUCCESS: Updated password for {account} in User account {user}")
     except sqlite3.IntegrityError as integrity_error:
         logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
     except sqlite3.OperationalError as op_error:
         logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to update password for {account} in User account {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to update password for {account} in User account {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# UPDATE a secret's path (None removes it) — the secret is identified by secret_id
+# Returns False if another of the user's secrets already has that path (idx_passwords_user_path is unique)
+def updateDataPath(user, secret_id, path, connection=None) -> bool:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: Cannot update path - no database connection")
+            return False
+
+        cursor = _cursor(connection)
+        cursor.execute("UPDATE passwords SET path = ?, last_modified = ? WHERE secret_id = ? AND user = ?;",
+                       (path, get_today(), int(secret_id), user))
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Set path of secret {secret_id} in User account {user}")
+        return cursor.rowcount == 1
+    except sqlite3.IntegrityError as integrity_error:
+        _connection(connection).rollback()
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+        return False
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to set path of secret {secret_id} in User account {user} - {str(sql_error)}")
+        return False
+    except Exception:
+        logging()
+        return False
+
+
+# INSERT tags on one of the user's secrets — tags it already carries are ignored
+# The secret's owner is checked in the same statement, so a secret_id of another user tags nothing
+def insertTags(user, secret_id, tags, connection=None) -> None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: Cannot insert tags - no database connection")
+            return
+
+        cursor = _cursor(connection)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO secret_tags (user, tag, secret_id) "
+            "SELECT user, ?, secret_id FROM passwords WHERE secret_id = ? AND user = ?;",
+            [(tag, int(secret_id), user) for tag in dict.fromkeys(tags)],
+        )
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Tagged secret {secret_id} in User account {user}")
+    except sqlite3.Error as sql_error:
+        _connection(connection).rollback()
+        logging(message=f"ERROR: SQLite3 failed to tag secret {secret_id} in User account {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# DELETE tags from one of the user's secrets — tags it does not carry are ignored
+def deleteTags(user, secret_id, tags, connection=None) -> None:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: Cannot delete tags - no database connection")
+            return
+
+        cursor = _cursor(connection)
+        cursor.executemany(
+            "DELETE FROM secret_tags WHERE user = ? AND tag = ? AND secret_id = ?;",
+            [(user, tag, int(secret_id)) for tag in dict.fromkeys(tags)],
+        )
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Untagged secret {secret_id} in User account {user}")
+    except sqlite3.Error as sql_error:
+        _connection(connection).rollback()
+        logging(message=f"ERROR: SQLite3 failed to untag secret {secret_id} in User account {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# DELETE records from the passwords SQLite table
+def deleteData(user, account, username, password, connection=None) -> None:
+    try:
+        cursor = _cursor(connection)
+        sql_query = ("""
+            DELETE FROM passwords
+            WHERE user = ?
+            AND account = ?
+            AND username = ?
+            AND password = ?;
+            """)
+        cursor.execute(sql_query, (user, account, username, password))
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Deleted password for {account} in User account {user}")
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to delete password for {account} in User account {user} - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# Export Database using SQLite.backup function
+# Copy the whole database to export_path from a connection of its own, so the shared connection
+# (and any lookups queued behind it) is never tied up for the length of the copy.
+# The source is the file the module connection points at (active_db_path) — a routed file once
+# use_database/use_database_for_user has switched to it, DB_PATH otherwise.
+#   Paged (default): the sqlite3 backup API copies `pages` pages per step and sleeps `sleep` seconds
+#       between steps. The source is only read-locked during a step, so writers get in between
+#       steps; a write from another connection restarts the copy, so the file is always consistent.
+#       After BACKUP_MAX_RESTARTS restarts (a constantly written vault) the rest is copied in a
+#       single step, which holds writers off but always finishes.
+#       progress(copied, total) is called after each step.
+#   vacuum=True: VACUUM INTO writes a compacted copy in one read transaction — it never restarts,
+#       but writers wait for it to finish. export_path must not exist. progress is not called.
+def exportDatabase(export_path, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP_SECONDS,
+                   progress=None, vacuum=False) -> bool:
+    try:
+        source = get_db_connection(active_db_path())
+        try:
+            if vacuum:
+                source.execute("VACUUM INTO ?;", (export_path,))
+            else:
+                last_remaining = None
+                restarts = 0
+
+                class _Restarted(Exception):
+                    pass
+
+                def step(status, remaining, total):
+                    nonlocal last_remaining, restarts
+                    if last_remaining is not None and remaining > last_remaining:
+                        restarts += 1
+                        if restarts > BACKUP_MAX_RESTARTS:
+                            raise _Restarted()
+                    last_remaining = remaining
+                    if progress is not None:
+                        progress(total - remaining, total)
+                    if remaining and sleep:
+                        time.sleep(sleep)
+
+                with closing(sqlite3.connect(export_path)) as target_conn:
+                    try:
+                        source.backup(target_conn, pages=pages, progress=step)
+                    except _Restarted:
+                        logging(message=f"Backup restarted {restarts} times by concurrent writes - copying the rest in one step")
+                        source.backup(target_conn, pages=-1, progress=step)
+        finally:
+            source.close()
+
+        logging(message=f"Database successfully exported as {export_path}")
+        # Return True to signify operation was successfuls
+        return True
+    except FileNotFoundError:
+        # get_db_connection has already logged it
+        return False
+    except sqlite3.IntegrityError as integrity_error:
+        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
+    except sqlite3.OperationalError as op_error:
+        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to export database - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+# ---------------------------------------------------------------------------
+# Change log (incremental backups)
+# ---------------------------------------------------------------------------
+
+# SELECT the change_log bounds: the oldest sequence number still logged and the highest ever issued
+# An empty log reports oldest as high + 1, so "the log reaches back to seq N" is always oldest <= N + 1
+def queryChangeLogBounds(connection=None) -> tuple[int, int]:
+    try:
+        if not _ready(connection):
+            return 0, 0
+        cursor = _cursor(connection)
+        cursor.execute("""
+            SELECT
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0),
+                (SELECT MIN(seq) FROM change_log);
+        """)
+        high, oldest = cursor.fetchone()
+        return (oldest if oldest is not None else high + 1), high
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query change_log bounds - {str(sql_error)}")
+        return 0, 0
     except Exception:
         logging()
+        return 0, 0
 
 
-# DELETE records from the passwords SQLite table
-def deleteData(user, account, username, password) -> None:
+# DELETE change_log entries a backup has covered, keeping the entry at through_seq itself
+# so the next incremental backup can still see that the log is unbroken since its parent
+def pruneChangeLog(through_seq, connection=None) -> None:
     try:
-        sql_query = ("""
-            DELETE FROM passwords
-            WHERE user = ?
-            AND account = ?
-            AND username = ?
-            AND password = ?;
-            """)
-        sqlCursor.execute(sql_query, (user, account, username, password))
-        sqlConnection.commit()
-        logging(message=f"SUCCESS: Deleted password for {account} in User account {user}")
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
+        if not _ready(connection):
+            return
+        _cursor(connection).execute("""
+            DELETE FROM change_log
+            WHERE seq < ?;
+        """, (through_seq,))
+        _connection(connection).commit()
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to delete password for {account} in User account {user} - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to prune change_log - {str(sql_error)}")
     except Exception:
         logging()
 
 
-# Export Database using SQLite.backup function
-def exportDatabase(export_path) -> bool:
+# ---------------------------------------------------------------------------
+# Maintenance (cli-guard db maintain / db stats)
+# ---------------------------------------------------------------------------
+
+# PRAGMA integrity_check (quick_check when quick), PRAGMA foreign_key_check and the full-text index's own check
+# Returns ["ok"] when healthy, otherwise one line per problem found (at most max_errors from SQLite's checks)
+def checkIntegrity(quick=False, max_errors=100, connection=None) -> list:
     try:
-        # Create a new connection for the export file
-        with sqlite3.connect(export_path) as target_conn:
-            # Use the backup method to copy data from the active connection
-            sqlConnection.backup(target_conn)
+        if not _ready(connection):
+            return ["no database connection"]
+        cursor = _cursor(connection)
+        pragma = "quick_check" if quick else "integrity_check"
+        cursor.execute(f"PRAGMA {pragma}({int(max_errors)});")
+        problems = [row[0] for row in cursor.fetchall() if row[0] != "ok"]
+
+        cursor.execute("PRAGMA foreign_key_check;")
+        problems += [f"foreign key: {table} row {rowid} has no matching {parent}"
+                     for table, rowid, parent, _ in cursor.fetchall()]
+
+        # FTS5's own check covers the index structure; comparing row counts also catches an
+        # index that has drifted from passwords (older SQLite doesn't compare external content)
+        rebuild = "rebuild with: INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild')"
+        try:
+            cursor.execute("INSERT INTO passwords_fts (passwords_fts, rank) VALUES ('integrity-check', 1);")
+            cursor.execute("SELECT (SELECT COUNT(*) FROM passwords_fts_docsize), (SELECT COUNT(*) FROM passwords);")
+            indexed, stored = cursor.fetchone()
+            if indexed != stored:
+                problems.append(f"passwords_fts: indexes {indexed} rows but passwords has {stored} ({rebuild})")
+        except sqlite3.DatabaseError as fts_error:
+            if "no such table" not in str(fts_error):
+                problems.append(f"passwords_fts: {fts_error} ({rebuild})")
+        # The check writes nothing, but the INSERT opened a transaction
+        _connection(connection).rollback()
+        return problems or ["ok"]
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to check database integrity - {str(sql_error)}")
+        return [str(sql_error)]
+    except Exception:
+        logging()
+        return ["integrity check failed (see Logs.txt)"]
 
-        logging(message=f"Database successfully exported as {export_path}")
-        # Return True to signify operation was successfuls
+
+# Merge the full-text index's segments — after mass inserts/deletes it is spread over many small b-trees
+def optimizeSearchIndex(connection=None) -> bool:
+    try:
+        if not _ready(connection):
+            return False
+        _cursor(connection).execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('optimize');")
+        _connection(connection).commit()
         return True
-    except sqlite3.IntegrityError as integrity_error:
-        logging(message=f"ERROR: SQLite3 data integrity issue - {str(integrity_error)}")
-    except sqlite3.OperationalError as op_error:
-        logging(message=f"ERROR: SQLite3 operational failure - {str(op_error)}")
     except sqlite3.Error as sql_error:
-        logging(message=f"ERROR: SQLite3 failed to export database - {str(sql_error)}")
+        logging(message=f"ERROR: SQLite3 failed to optimize passwords_fts - {str(sql_error)}")
+        return False
+    except Exception:
+        logging()
+        return False
+
+
+# ANALYZE then PRAGMA optimize: refresh the statistics (sqlite_stat1) the query planner picks indexes by
+def analyzeDatabase(connection=None) -> bool:
+    try:
+        if not _ready(connection):
+            return False
+        cursor = _cursor(connection)
+        cursor.execute("ANALYZE;")
+        cursor.execute("PRAGMA optimize;")
+        _connection(connection).commit()
+        return True
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to analyze database - {str(sql_error)}")
+        return False
+    except Exception:
+        logging()
+        return False
+
+
+# VACUUM: rewrite the file without its free pages so it shrinks after mass deletes
+# Needs every other connection to be idle; returns (bytes before, bytes after), or None on failure
+def vacuumDatabase(connection=None) -> tuple[int, int] | None:
+    try:
+        if not _ready(connection):
+            return None
+        cursor = _cursor(connection)
+        _connection(connection).commit()
+        cursor.execute("PRAGMA page_size;")
+        page_size = cursor.fetchone()[0]
+        cursor.execute("PRAGMA page_count;")
+        before = cursor.fetchone()[0] * page_size
+        cursor.execute("VACUUM;")
+        cursor.execute("PRAGMA page_count;")
+        after = cursor.fetchone()[0] * page_size
+        logging(message=f"SUCCESS: Vacuumed database from {before} to {after} bytes")
+        return before, after
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to vacuum database - {str(sql_error)}")
+        return None
+    except Exception:
+        logging()
+        return None
+
+
+# Size and health figures for `db stats`:
+#   page_size, page_count, freelist_count, file_bytes, free_bytes
+#   tables:  {table: row count} for STATS_TABLES
+#   users:   [(user, secrets)] largest first
+#   objects: [(name, type, table, bytes, stat)] per table and index — bytes from the dbstat virtual
+#            table (None if this SQLite build lacks it), stat from sqlite_stat1 ("rows rows-per-key ...",
+#            None until ANALYZE has run)
+def queryDatabaseStats(connection=None) -> dict:
+    try:
+        if not _ready(connection):
+            return {}
+        cursor = _cursor(connection)
+        stats = {}
+        for pragma in ("page_size", "page_count", "freelist_count"):
+            cursor.execute(f"PRAGMA {pragma};")
+            stats[pragma] = cursor.fetchone()[0]
+        stats["file_bytes"] = stats["page_size"] * stats["page_count"]
+        stats["free_bytes"] = stats["page_size"] * stats["freelist_count"]
+
+        stats["tables"] = {}
+        for table in STATS_TABLES:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {table};")
+                stats["tables"][table] = cursor.fetchone()[0]
+            except sqlite3.OperationalError:
+                stats["tables"][table] = None
+
+        cursor.execute("""
+            SELECT user, COUNT(*) AS secrets
+            FROM passwords
+            GROUP BY user
+            ORDER BY secrets DESC, user;
+        """)
+        stats["users"] = cursor.fetchall()
+
+        try:
+            cursor.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name;")
+            sizes = dict(cursor.fetchall())
+        except sqlite3.OperationalError:
+            sizes = {}
+        try:
+            cursor.execute("SELECT idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL;")
+            index_stats = dict(cursor.fetchall())
+        except sqlite3.OperationalError:
+            index_stats = {}
+        cursor.execute("""
+            SELECT name, type, tbl_name
+            FROM sqlite_master
+            WHERE type IN ('table', 'index') AND name != 'sqlite_sequence' AND name NOT LIKE 'sqlite_stat%'
+            ORDER BY tbl_name, type DESC, name;
+        """)
+        stats["objects"] = [(name, kind, table, sizes.get(name), index_stats.get(name))
+                            for name, kind, table in cursor.fetchall()]
+        return stats
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query database stats - {str(sql_error)}")
+        return {}
     except Exception:
         logging()
+        return {}
 
 
 # ---------------------------------------------------------------------------
 # Per-user encryption salt
 # ---------------------------------------------------------------------------
 
-def queryUserSalt(user) -> str | None:
+def queryUserSalt(user, connection=None) -> str | None:
     """
     Retrieve the encryption salt for a user
 
@@ -430,13 +1689,14 @@ def queryUserSalt(user) -> str | None:
         Hex-encoded salt string, or None if user not found or salt is NULL
     """
     try:
-        if not ensure_connection():
+        if not _ready(connection):
             logging(message="ERROR: No database connection available")
             return None
 
-        sql_query = "SELECT encryption_salt FROM users WHERE user = ?"
-        sqlCursor.execute(sql_query, (user,))
-        result = sqlCursor.fetchone()
+        cursor = _cursor(connection)
+
+        cursor.execute(STATEMENTS["queryUserSalt"], (user,))
+        result = cursor.fetchone()
 
         if result and result[0]:
             return result[0]
@@ -449,6 +1709,57 @@ def queryUserSalt(user) -> str | None:
         return None
 
 
+# SELECT every stored version of every one of a user's secrets: [(secret_id, version, ciphertext)]
+# Used when the user's key changes and the whole history has to be re-encrypted
+def queryUserPasswordVersions(user, connection=None) -> list:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: No database connection available")
+            return []
+
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryUserPasswordVersions"], (user,))
+        return cursor.fetchall()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to query password versions for User {user} - {str(sql_error)}")
+        return []
+    except Exception:
+        logging()
+        return []
+
+
+# Swap a user's secrets and their whole history to ciphertexts under a new key, and store the new salt
+# One transaction: either everything is re-encrypted under the new salt or nothing changes.
+# passwords: [(secret_id, ciphertext)], versions: [(secret_id, version, ciphertext)]
+# The history trigger appends a version for every password changed here; the plaintext did not change,
+# so those versions are deleted again before the existing ones are rewritten
+def reencryptUserData(user, passwords, versions, encryption_salt, connection=None) -> bool:
+    try:
+        if not _ready(connection):
+            logging(message="ERROR: Cannot re-encrypt user data - no database connection")
+            return False
+
+        cursor = _cursor(connection)
+        cursor.executemany("UPDATE passwords SET password = ? WHERE secret_id = ? AND user = ?;",
+                           [(password, int(secret_id), user) for secret_id, password in passwords])
+        cursor.executemany("DELETE FROM password_versions WHERE secret_id = ? AND password = ?;",
+                           [(int(secret_id), password) for secret_id, password in passwords])
+        cursor.executemany("UPDATE password_versions SET password = ? WHERE secret_id = ? AND version = ?;",
+                           [(password, int(secret_id), int(version)) for secret_id, version, password in versions])
+        cursor.execute("UPDATE users SET encryption_salt = ? WHERE user = ?;", (encryption_salt, user))
+        _connection(connection).commit()
+        logging(message=f"SUCCESS: Re-encrypted {len(passwords)} secrets for User {user}")
+        return True
+    except sqlite3.Error as sql_error:
+        _connection(connection).rollback()
+        logging(message=f"ERROR: SQLite3 failed to re-encrypt data for User {user} - {str(sql_error)}")
+        return False
+    except Exception:
+        _connection(connection).rollback()
+        logging()
+        return False
+
+
 def updateUserSalt(user, encryption_salt) -> None:
     """
     Update the encryption salt for a user
@@ -537,6 +1848,11 @@ def createServiceTokensTable() -> None:
         sqlCursor.execute("""
             CREATE VIEW IF NOT EXISTS vw_service_tokens AS SELECT * FROM service_tokens;
         """)
+        # token list looks tokens up by owner
+        sqlCursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_service_tokens_user
+            ON service_tokens (user);
+        """)
         sqlConnection.commit()
         logging(message="SUCCESS: service_tokens table ready")
     except sqlite3.OperationalError as op_error:
@@ -549,16 +1865,476 @@ def createServiceTokensTable() -> None:
         logging()
 
 
-# Run migrations on module load
-if sqlConnection is not None:
+def createPasswordsIndexes() -> None:
+    """
+    Create lookup indexes on the passwords table if they don't exist (migration)
+
+    Every passwords query filters on user first and most narrow by account/username,
+    so a composite index keeps lookups and paged listings from scanning the whole table.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create passwords indexes - no database connection")
+            return
+
+        sqlCursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_passwords_user_account
+            ON passwords (user, account, username);
+        """)
+        sqlConnection.commit()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to create passwords indexes - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def migrateAddSecretId() -> None:
+    """
+    Migration: rebuild the passwords table with an explicit secret_id INTEGER PRIMARY KEY.
+
+    The implicit rowid of a table without an INTEGER PRIMARY KEY may be renumbered
+    by VACUUM, so anything that refers to a secret by id (the full-text index)
+    needs a declared key. Existing rowids are carried over as secret_ids.
+
+    secret_id is appended as the LAST column of vw_passwords so existing code that
+    reads rows positionally (row[1] category ... row[5] last_modified) is unaffected.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot run secret_id migration - no database connection")
+            return
+
+        sqlCursor.execute("PRAGMA table_info(passwords)")
+        columns = [row[1] for row in sqlCursor.fetchall()]
+        if "secret_id" in columns:
+            return
+
+        # executescript commits any pending transaction first and runs the rebuild as one unit
+        sqlCursor.executescript("""
+            BEGIN;
+            CREATE TABLE passwords_new (
+                secret_id       INTEGER PRIMARY KEY,
+                user            TEXT NOT NULL,
+                category        TEXT NOT NULL,
+                account         TEXT NOT NULL,
+                username        TEXT NOT NULL,
+                password        TEXT NOT NULL,
+                last_modified   TEXT NOT NULL,
+                FOREIGN KEY (user) REFERENCES users(user) ON DELETE NO ACTION ON UPDATE NO ACTION
+            );
+            INSERT INTO passwords_new (secret_id, user, category, account, username, password, last_modified)
+                SELECT rowid, user, category, account, username, password, last_modified FROM passwords;
+            DROP VIEW IF EXISTS vw_passwords;
+            DROP TABLE passwords;
+            ALTER TABLE passwords_new RENAME TO passwords;
+            CREATE VIEW vw_passwords AS
+                SELECT user, category, account, username, password, last_modified, secret_id
+                FROM passwords;
+            CREATE INDEX IF NOT EXISTS idx_passwords_user_account
+                ON passwords (user, account, username);
+            COMMIT;
+        """)
+        logging(message="SUCCESS: Rebuilt passwords table with secret_id primary key")
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: secret_id migration failed - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def createPasswordsFtsTable() -> None:
+    """
+    Create the passwords_fts full-text index and its sync triggers if they don't exist (migration)
+
+    passwords_fts is an external-content FTS5 table: it stores only the index, reading
+    column values from passwords by secret_id. Triggers keep it in step with every
+    INSERT/UPDATE/DELETE on passwords, whichever interface made the change. The
+    encrypted password column is never indexed.
+
+    If the SQLite build lacks FTS5 the error is logged and search is unavailable.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create passwords_fts table - no database connection")
+            return
+
+        sqlCursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'passwords_fts'")
+        if sqlCursor.fetchone():
+            return
+
+        sqlCursor.executescript("""
+            BEGIN;
+            CREATE VIRTUAL TABLE passwords_fts USING fts5(
+                user, category, account, username,
+                content='passwords', content_rowid='secret_id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_fts_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO passwords_fts (rowid, user, category, account, username)
+                VALUES (new.secret_id, new.user, new.category, new.account, new.username);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_fts_delete AFTER DELETE ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, user, category, account, username)
+                VALUES ('delete', old.secret_id, old.user, old.category, old.account, old.username);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_fts_update
+            AFTER UPDATE OF user, category, account, username ON passwords BEGIN
+                INSERT INTO passwords_fts (passwords_fts, rowid, user, category, account, username)
+                VALUES ('delete', old.secret_id, old.user, old.category, old.account, old.username);
+                INSERT INTO passwords_fts (rowid, user, category, account, username)
+                VALUES (new.secret_id, new.user, new.category, new.account, new.username);
+            END;
+
+            -- Index the rows that already exist
+            INSERT INTO passwords_fts (passwords_fts) VALUES ('rebuild');
+            COMMIT;
+        """)
+        logging(message="SUCCESS: passwords_fts full-text index ready")
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: SQLite3 failed to create passwords_fts table - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def createDataVersionsTable() -> None:
+    """
+    Create the data_versions table and the triggers that bump it (migration)
+
+    data_versions holds one counter per user that goes up on every INSERT, UPDATE
+    or DELETE of that user's passwords rows, whichever process or interface made
+    the change. Readers that keep rows in memory (TUI table, secret caches, name
+    indexes) compare it with the value they last saw to skip requerying when
+    nothing changed. Existing users start at 0.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create data_versions table - no database connection")
+            return
+
+        sqlCursor.executescript("""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS data_versions (
+                user        TEXT PRIMARY KEY,
+                version     INTEGER NOT NULL DEFAULT 0
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_version_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO data_versions (user, version) VALUES (new.user, 1)
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_version_update AFTER UPDATE ON passwords BEGIN
+                INSERT INTO data_versions (user, version) VALUES (new.user, 1)
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+                INSERT INTO data_versions (user, version)
+                SELECT old.user, 1 WHERE old.user IS NOT new.user
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_version_delete AFTER DELETE ON passwords BEGIN
+                INSERT INTO data_versions (user, version) VALUES (old.user, 1)
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+            END;
+            COMMIT;
+        """)
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: SQLite3 failed to create data_versions table - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def createLoginAttemptsTable() -> None:
+    """
+    Create the login_attempts table if it doesn't exist (migration)
+
+    One row per failed sign-in, from any interface (CLI, tokens, TUI, server).
+    CLI_Guard.loginRetryAfter reads the attempts inside the sliding window to
+    decide whether the next attempt may even reach bcrypt. Users are not a
+    foreign key: failures for unknown usernames are limited too.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create login_attempts table - no database connection")
+            return
+
+        sqlCursor.execute("""
+            CREATE TABLE IF NOT EXISTS login_attempts (
+                user            TEXT NOT NULL,
+                attempted_at    REAL NOT NULL
+            );
+        """)
+        sqlCursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_login_attempts_user
+            ON login_attempts (user, attempted_at);
+        """)
+        # insertLoginAttempt prunes everyone's expired attempts by time
+        sqlCursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_login_attempts_time
+            ON login_attempts (attempted_at);
+        """)
+        sqlConnection.commit()
+    except sqlite3.Error as sql_error:
+        logging(message=f"ERROR: SQLite3 failed to create login_attempts table - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def createPasswordVersionsTable() -> None:
+    """
+    Create the append-only password_versions table and its triggers (migration)
+
+    Every ciphertext a secret has had is kept as a numbered version: INSERT
+    on passwords writes version 1 and each UPDATE that changes the password
+    appends the next one, whichever interface made the change. Reads by
+    (secret_id, version) or by time are primary-key seeks, so rolling back a
+    rotated credential never needs a full database restore. Deleting a secret
+    deletes its history. updateData prunes to PASSWORD_VERSIONS_KEEP versions.
+
+    Existing secrets are backfilled as version 1, dated from last_modified.
+    """
     try:
-        createServiceTokensTable()
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create password_versions table - no database connection")
+            return
+
+        sqlCursor.executescript("""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS password_versions (
+                secret_id   INTEGER NOT NULL,
+                version     INTEGER NOT NULL,
+                password    TEXT NOT NULL,
+                created_at  TEXT NOT NULL,
+                PRIMARY KEY (secret_id, version)
+            ) WITHOUT ROWID;
+
+            INSERT OR IGNORE INTO password_versions (secret_id, version, password, created_at)
+                SELECT secret_id, 1, password, last_modified || ' 00:00:00' FROM passwords
+                WHERE secret_id NOT IN (SELECT secret_id FROM password_versions);
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_history_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO password_versions (secret_id, version, password, created_at)
+                VALUES (new.secret_id, 1, new.password, datetime('now', 'localtime'));
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_history_update AFTER UPDATE OF password ON passwords
+            WHEN new.password IS NOT old.password BEGIN
+                INSERT INTO password_versions (secret_id, version, password, created_at)
+                VALUES (
+                    new.secret_id,
+                    (SELECT COALESCE(MAX(version), 0) + 1 FROM password_versions WHERE secret_id = new.secret_id),
+                    new.password,
+                    datetime('now', 'localtime')
+                );
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_history_delete AFTER DELETE ON passwords BEGIN
+                DELETE FROM password_versions WHERE secret_id = old.secret_id;
+            END;
+            COMMIT;
+        """)
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: SQLite3 failed to create password_versions table - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def createChangeLogTable() -> None:
+    """
+    Create the change_log table and the triggers that fill it (migration)
+
+    Every INSERT, UPDATE or DELETE on passwords appends the secret's id under
+    the next sequence number (AUTOINCREMENT, so numbers are never reused).
+    Incremental backups (backup.py) copy only the secrets logged since the
+    previous snapshot, so their size follows the volume of changes rather than
+    the size of the vault. Backups prune what they have covered (pruneChangeLog);
+    trg_change_log_trim caps the table at CHANGE_LOG_MAX_ENTRIES (plus one trim
+    interval) on databases that are never backed up, deleting the oldest entries
+    with one primary-key range delete every CHANGE_LOG_TRIM_EVERY changes.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create change_log table - no database connection")
+            return
+
+        sqlCursor.executescript(f"""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+                secret_id   INTEGER NOT NULL
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_change_log_trim AFTER INSERT ON change_log
+            WHEN new.seq % {int(CHANGE_LOG_TRIM_EVERY)} = 0 BEGIN
+                DELETE FROM change_log WHERE seq <= new.seq - {int(CHANGE_LOG_MAX_ENTRIES)};
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_changelog_insert AFTER INSERT ON passwords BEGIN
+                INSERT INTO change_log (secret_id) VALUES (new.secret_id);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_changelog_update AFTER UPDATE ON passwords BEGIN
+                INSERT INTO change_log (secret_id) VALUES (new.secret_id);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_changelog_delete AFTER DELETE ON passwords BEGIN
+                INSERT INTO change_log (secret_id) VALUES (old.secret_id);
+            END;
+            COMMIT;
+        """)
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: SQLite3 failed to create change_log table - {str(sql_error)}")
+    except Exception:
+        logging()
+
+
+def migrateAddSecretPath() -> None:
+    """
+    Migration: add the optional hierarchical path column ("prod/payments/stripe") to passwords.
+
+    path is appended as the LAST column of vw_passwords (after secret_id) so positional
+    readers are unaffected. idx_passwords_user_path is unique per user and partial (rows
+    with a path only), and serves exact path lookups and prefix range scans.
+    """
+    try:
+        if not ensure_connection():
+            logging(message="ERROR: Cannot run path migration - no database connection")
+            return
+
+        sqlCursor.execute("PRAGMA table_info(passwords)")
+        columns = [row[1] for row in sqlCursor.fetchall()]
+        if "path" not in columns:
+            # executescript commits any pending transaction first and runs the change as one unit
+            sqlCursor.executescript("""
+                BEGIN;
+                ALTER TABLE passwords ADD COLUMN path TEXT;
+                DROP VIEW IF EXISTS vw_passwords;
+                CREATE VIEW vw_passwords AS
+                    SELECT user, category, account, username, password, last_modified, secret_id, path
+                    FROM passwords;
+                COMMIT;
+            """)
+            logging(message="SUCCESS: Added path column to passwords table")
+
+        sqlCursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_passwords_user_path
+                ON passwords (user, path) WHERE path IS NOT NULL;
+        """)
+        sqlConnection.commit()
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: path migration failed - {str(sql_error)}")
     except Exception:
-        pass  # Logged internally; don't crash on import
+        logging()
+
+
+def createSecretTagsTable() -> None:
+    """
+    Create the secret_tags table and its triggers (migration)
+
+    Tags ("service=payments", "deploy") group secrets across categories, many
+    to many. The primary key (user, tag, secret_id) makes "every secret tagged
+    X" a seek on one slice of the table; idx_secret_tags_secret serves a
+    secret's own tags and the cleanup when it is deleted. Tagging and untagging
+    are logged in change_log (so incremental backups carry them) and bump the
+    owner's data version (so cached views notice).
+    """
     try:
-        migrateAddEncryptionSalt()
+        if not ensure_connection():
+            logging(message="ERROR: Cannot create secret_tags table - no database connection")
+            return
+
+        sqlCursor.executescript("""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS secret_tags (
+                user        TEXT NOT NULL,
+                tag         TEXT NOT NULL,
+                secret_id   INTEGER NOT NULL,
+                PRIMARY KEY (user, tag, secret_id)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_secret_tags_secret ON secret_tags (secret_id);
+
+            CREATE TRIGGER IF NOT EXISTS trg_passwords_tags_delete AFTER DELETE ON passwords BEGIN
+                DELETE FROM secret_tags WHERE secret_id = old.secret_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_secret_tags_insert AFTER INSERT ON secret_tags BEGIN
+                INSERT INTO change_log (secret_id) VALUES (new.secret_id);
+                INSERT INTO data_versions (user, version) VALUES (new.user, 1)
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_secret_tags_delete AFTER DELETE ON secret_tags BEGIN
+                INSERT INTO change_log (secret_id) VALUES (old.secret_id);
+                INSERT INTO data_versions (user, version) VALUES (old.user, 1)
+                ON CONFLICT (user) DO UPDATE SET version = version + 1;
+            END;
+            COMMIT;
+        """)
+    except sqlite3.Error as sql_error:
+        try:
+            sqlConnection.rollback()
+        except sqlite3.Error:
+            pass
+        logging(message=f"ERROR: SQLite3 failed to create secret_tags table - {str(sql_error)}")
     except Exception:
-        pass  # Logged internally; don't crash on import
+        logging()
+
+
+# Schema migrations, applied in order on module load (each is idempotent and logs its own failures)
+MIGRATIONS = [
+    createServiceTokensTable,
+    migrateAddEncryptionSalt,
+    createPasswordsIndexes,
+    migrateAddSecretId,
+    createPasswordsFtsTable,
+    createDataVersionsTable,
+    createLoginAttemptsTable,
+    createPasswordVersionsTable,
+    createChangeLogTable,
+    migrateAddSecretPath,
+    createSecretTagsTable,
+]
+
+
+def runMigrations() -> None:
+    """Apply every schema migration to the active connection"""
+    for migration in MIGRATIONS:
+        try:
+            migration()
+        except Exception:
+            pass  # Logged internally; don't crash on import
+
+
+# Run migrations on module load
+if sqlConnection is not None:
+    runMigrations()
+    _migrated_paths.add(DB_PATH)
+    _cached_connections()[DB_PATH] = sqlConnection
 
 
 def insertServiceToken(token_id, user, name, token_hash, wrapped_key,
@@ -588,16 +2364,16 @@ def insertServiceToken(token_id, user, name, token_hash, wrapped_key,
         logging()
 
 
-def queryServiceToken(token_id) -> tuple | None:
+def queryServiceToken(token_id, connection=None) -> tuple | None:
     """Query a single service token by token_id"""
     try:
-        if not ensure_connection():
+        if not _ready(connection):
             logging(message="ERROR: No database connection available")
             return None
 
-        sql_query = "SELECT * FROM vw_service_tokens WHERE token_id = ?"
-        sqlCursor.execute(sql_query, (token_id,))
-        return sqlCursor.fetchone()
+        cursor = _cursor(connection)
+        cursor.execute(STATEMENTS["queryServiceToken"], (token_id,))
+        return cursor.fetchone()
     except sqlite3.Error as sql_error:
         logging(message=f"ERROR: SQLite3 failed to query service token - {str(sql_error)}")
         return None
@@ -647,8 +2423,7 @@ def updateServiceTokenLastUsed(token_id, timestamp) -> None:
         if not ensure_connection():
             return
 
-        sql_query = "UPDATE service_tokens SET last_used = ? WHERE token_id = ?"
-        sqlCursor.execute(sql_query, (timestamp, token_id))
+        sqlCursor.execute(STATEMENTS["updateServiceTokenLastUsed"], (timestamp, token_id))
         sqlConnection.commit()
     except sqlite3.Error:
         pass  # Non-critical — don't fail the operation if we can't update last_used
@@ -0,0 +1,204 @@
+"""
+Asyncio client API for CLI Guard secrets
+
+AsyncVault mirrors the CLI_Guard secret functions (getSecret, getSecrets,
+searchSecrets, addSecret, ...) as coroutines, so asyncio services can fetch
+secrets without blocking their event loop. Each AsyncVault carries its own
+user and encryption key, so one process can hold many sessions at once.
+
+Where the work runs:
+    - bcrypt checks and PBKDF2 key derivation run on a shared thread pool
+      (_crypto_executor) — hashlib and bcrypt release the GIL, so several
+      sign-ins proceed in parallel
+    - Everything that touches SQLite runs on one shared worker thread
+      (_db_executor), which owns the module-level connection. Each
+      AsyncVault wraps its own CLI_Guard.Vault, so calls from different
+      users never share (or swap) a key, and each call first selects its
+      user's database file when routing is configured (CLIGUARD_DB_ROUTES).
+
+Usage:
+    from async_vault import AsyncVault
+
+    vault = await AsyncVault.open("admin", password)         # or fromServiceToken / fromKey
+    secret = await vault.getSecret("prod-db")
+    many = await vault.getSecretsByAccounts(["prod-db", "stripe-live"])
+    vault.close()
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import CLI_Guard
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import token_manager
+from logger import log
+from secret_cache import SecretCache
+
+
+# One thread owns the module-level SQLite connection
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cli-guard-db",
+                                  initializer=sqlite.ensure_connection)
+
+# CPU-bound KDF / bcrypt work, safe to run in parallel
+_crypto_executor = ThreadPoolExecutor(thread_name_prefix="cli-guard-kdf")
+
+
+def _inUserDatabase(user: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Run func with the DB thread's connection on user's database file — DB thread only
+
+    Sessions for users routed to different files (CLIGUARD_DB_ROUTES) share the one
+    DB thread, so every call selects its user's file first (a no-op without routes).
+    """
+    if not sqlite.use_database_for_user(user):
+        raise RuntimeError(f"Could not open the database for user '{user}'")
+    return func(*args, **kwargs)
+
+
+def _fetchCredentials(user: str) -> tuple[bool, Optional[tuple], Optional[str]]:
+    """
+    (locked, users row, salt hex) for user — DB thread only
+
+    Raises:
+        CLI_Guard.LoginRateLimitedError: If too many recent sign-ins failed
+    """
+    if sqlite.isUserLocked(user):
+        return True, None, None
+    CLI_Guard.checkLoginAllowed(user)
+    rows = sqlite.queryData(user=user, table="users")
+    return False, (rows[0] if rows else None), sqlite.queryUserSalt(user)
+
+
+class AsyncVault:
+    """An authenticated session for one user, with coroutine versions of the CLI_Guard secret functions"""
+
+    def __init__(self, vault: CLI_Guard.Vault):
+        """Use open(), fromServiceToken() or fromKey() rather than calling this directly"""
+        self.user = vault.user
+        self._vault = vault
+
+    # --- construction ---
+
+    @classmethod
+    async def open(cls, user: str, password: str, cache: Optional[SecretCache] = None) -> "AsyncVault":
+        """
+        Authenticate with the master password and derive the session key
+
+        Args:
+            user: CLI Guard username
+            password: Master password
+            cache: Optional SecretCache for repeat lookups (see CLI_Guard.Vault)
+
+        Returns:
+            An open AsyncVault for user
+
+        Raises:
+            CLI_Guard.AuthenticationError: If the account is locked, unknown, or the password is wrong
+                (CLI_Guard.LoginRateLimitedError after too many recent failures)
+            RuntimeError: If the user has no encryption salt (run migration first)
+        """
+        loop = asyncio.get_running_loop()
+        locked, user_row, salt_hex = await loop.run_in_executor(
+            _db_executor, _inUserDatabase, user, _fetchCredentials, user)
+        if locked:
+            raise CLI_Guard.AuthenticationError(f"Account '{user}' is locked until tomorrow")
+        if user_row is None:
+            log("AUTH", f"Authentication failed for '{user}' - user not found")
+            await loop.run_in_executor(_db_executor, _inUserDatabase, user, CLI_Guard.recordFailedLogin, user)
+            raise CLI_Guard.AuthenticationError(f"Authentication failed for user '{user}'")
+
+        verified = await loop.run_in_executor(
+            _crypto_executor, CLI_Guard.verifyPasswordHash, user, password, user_row[1]
+        )
+        if not verified:
+            await loop.run_in_executor(_db_executor, _inUserDatabase, user, CLI_Guard.recordFailedLogin, user)
+            raise CLI_Guard.AuthenticationError(f"Authentication failed for user '{user}'")
+        await loop.run_in_executor(_db_executor, _inUserDatabase, user, CLI_Guard.clearFailedLogins, user)
+        if salt_hex is None:
+            raise RuntimeError(f"No encryption salt found for user '{user}' — run migration first")
+
+        key = await loop.run_in_executor(
+            _crypto_executor, CLI_Guard.deriveEncryptionKey, password, bytes.fromhex(salt_hex)
+        )
+        return cls.fromKey(user, key, cache=cache)
+
+    @classmethod
+    async def fromServiceToken(cls, token: str, cache: Optional[SecretCache] = None) -> "AsyncVault":
+        """
+        Open a vault from a service token (cg_svc_...)
+
+        Raises:
+            token_manager.TokenInvalidError, TokenRevokedError, TokenExpiredError
+        """
+        loop = asyncio.get_running_loop()
+        # Token lookup and last_used update touch SQLite, so the whole check runs on the DB thread
+        user, key = await loop.run_in_executor(_db_executor, token_manager.load_service_token, token)
+        return cls.fromKey(user, key, cache=cache)
+
+    @classmethod
+    def fromKey(cls, user: str, encryption_key: bytes, cache: Optional[SecretCache] = None) -> "AsyncVault":
+        """
+        Open a vault with an already-derived key
+
+        Raises:
+            ValueError: If the key is not a valid Fernet key
+        """
+        vault = CLI_Guard.Vault(cache=cache)
+        vault.startSessionFromKey(user, encryption_key)
+        return cls(vault)
+
+    def close(self) -> None:
+        """Forget this vault's key; further calls raise RuntimeError"""
+        self._vault.endSession()
+
+    async def __aenter__(self) -> "AsyncVault":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    # --- secret API ---
+
+    async def _call(self, method: Callable, *args, **kwargs) -> Any:
+        if not self._vault.isActive:
+            raise RuntimeError("Vault is closed")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _db_executor, functools.partial(_inUserDatabase, self.user, method, *args, **kwargs))
+
+    async def getSecrets(self, category: str = None, text: str = None,
+                         sort_by: str = None, sort_column: str = None) -> list[dict]:
+        """Coroutine version of CLI_Guard.getSecrets (passwords stay encrypted)"""
+        return await self._call(self._vault.getSecrets, category=category, text=text,
+                                sort_by=sort_by, sort_column=sort_column)
+
+    async def searchSecrets(self, text: str, limit: Optional[int] = 50) -> list[dict]:
+        """Coroutine version of CLI_Guard.searchSecrets"""
+        return await self._call(self._vault.searchSecrets, text, limit=limit)
+
+    async def getSecret(self, account: str, username: str = None) -> Optional[dict]:
+        """Coroutine version of CLI_Guard.getSecret (password decrypted)"""
+        return await self._call(self._vault.getSecret, account, username=username)
+
+    async def getSecretsByAccounts(self, accounts: list[str]) -> dict[str, dict]:
+        """Coroutine version of CLI_Guard.getSecretsByAccounts (one query, passwords decrypted)"""
+        return await self._call(self._vault.getSecretsByAccounts, accounts)
+
+    async def getSecretsByTags(self, tags: list[str]) -> list[dict]:
+        """Coroutine version of CLI_Guard.getSecretsByTags (one query, passwords decrypted)"""
+        return await self._call(self._vault.getSecretsByTags, tags)
+
+    async def addSecret(self, category: str, account: str, username: str, password: str) -> Optional[int]:
+        """Coroutine version of CLI_Guard.addSecret"""
+        return await self._call(self._vault.addSecret, category, account, username, password)
+
+    async def updateSecret(self, account: str, username: str,
+                           old_encrypted_password: str, new_password: str) -> bool:
+        """Coroutine version of CLI_Guard.updateSecret"""
+        return await self._call(self._vault.updateSecret, account, username, old_encrypted_password, new_password)
+
+    async def deleteSecret(self, account: str, username: str, encrypted_password: str) -> bool:
+        """Coroutine version of CLI_Guard.deleteSecret"""
+        return await self._call(self._vault.deleteSecret, account, username, encrypted_password)
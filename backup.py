@@ -0,0 +1,405 @@
+"""
+Full and incremental backups of the CLI Guard database
+
+exportDatabase copies the whole database every time, so nightly backups of a
+large shared vault cost the same whether one secret changed or none did.
+This module keeps a chain of snapshot files in a backup directory instead:
+
+    full         A complete copy of the database (CLI_Guard_SQL.exportDatabase: a
+                 paged online copy, or VACUUM INTO) — the base of a chain
+    incremental  Only the secrets that changed since the previous snapshot,
+                 read from the change_log table (filled by triggers on every
+                 INSERT/UPDATE/DELETE, whichever interface made it) with
+                 their history and tags, plus the small users and
+                 service_tokens tables in full
+
+Every snapshot is itself a SQLite file carrying a backup_snapshot table
+(snapshot_id, kind, parent_id, from_seq, to_seq, created_at, secrets), so a
+backup directory describes its own chains and restore needs nothing from the
+live database. Restore copies the newest full snapshot of the chain and
+replays each incremental on top of it, in order.
+
+Backups read the file the SQL layer's module connection points at
+(CLI_Guard_SQL.active_db_path): DB_PATH, or the routed file a caller switched
+to with use_database/use_database_for_user. Keep one backup directory per file.
+
+Snapshots hold what the database holds — ciphertext and bcrypt hashes, never
+plaintext — so they need the same protection as the database file itself.
+
+The change log is pruned once a backup has covered it, so one backup
+directory per database is supported: a second directory's chain breaks, and
+backupDatabase falls back to a full snapshot when it detects that. Between
+backups (or on a database never backed up) the log is capped at
+CLI_Guard_SQL.CHANGE_LOG_MAX_ENTRIES; a chain whose parent has fallen out of
+that window is detected the same way and continued with a full snapshot.
+
+Usage:
+    import backup
+
+    backup.backupDatabase("/srv/backups/cli-guard")           # full first time, incremental after
+    backup.restoreDatabase("/srv/backups/cli-guard", "restored.db")
+"""
+
+import os
+import shutil
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+import CLI_SQL.CLI_Guard_SQL as sqlite
+from logger import log
+
+
+# Snapshot files in a backup directory: cli-guard-<created>-<kind>-<snapshot_id>.db
+SNAPSHOT_PREFIX = "cli-guard-"
+SNAPSHOT_SUFFIX = ".db"
+
+# Snapshot metadata stored as text in each file's backup_snapshot table, and the ones read back as ints
+SNAPSHOT_FIELDS = ("snapshot_id", "kind", "parent_id", "from_seq", "to_seq", "created_at", "secrets")
+_INT_FIELDS = {"from_seq", "to_seq", "secrets"}
+
+
+class BackupError(Exception):
+    """Raised when a backup cannot be written or a backup chain cannot be restored"""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Snapshot metadata
+# ---------------------------------------------------------------------------
+
+def _writeSnapshotInfo(connection: sqlite3.Connection, info: dict, schema: str = "main") -> None:
+    """Create the backup_snapshot table in schema and store info in it"""
+    connection.execute(f"CREATE TABLE {schema}.backup_snapshot (key TEXT PRIMARY KEY, value TEXT)")
+    connection.executemany(
+        f"INSERT INTO {schema}.backup_snapshot (key, value) VALUES (?, ?)",
+        [(field, None if info[field] is None else str(info[field])) for field in SNAPSHOT_FIELDS],
+    )
+
+
+def readSnapshot(path: str) -> dict | None:
+    """
+    Read a snapshot file's metadata
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Dict of SNAPSHOT_FIELDS plus "path", or None if the file is not a CLI Guard snapshot
+    """
+    try:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+            rows = connection.execute("SELECT key, value FROM backup_snapshot").fetchall()
+    except sqlite3.Error:
+        return None
+    info = {field: None for field in SNAPSHOT_FIELDS}
+    for key, value in rows:
+        if key in info:
+            info[key] = int(value) if key in _INT_FIELDS and value is not None else value
+    if info["snapshot_id"] is None or info["kind"] not in ("full", "incremental"):
+        return None
+    info["path"] = path
+    return info
+
+
+def listSnapshots(backup_dir: str) -> list[dict]:
+    """
+    Every snapshot in a backup directory, oldest first
+
+    Args:
+        backup_dir: Backup directory
+
+    Returns:
+        Snapshot metadata dicts (see readSnapshot); empty if the directory doesn't exist
+    """
+    try:
+        names = os.listdir(backup_dir)
+    except OSError:
+        return []
+    snapshots = []
+    for name in names:
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX):
+            info = readSnapshot(os.path.join(backup_dir, name))
+            if info is not None:
+                snapshots.append(info)
+    return sorted(snapshots, key=lambda info: (info["created_at"] or "", info["to_seq"] or 0))
+
+
+def _snapshotPath(backup_dir: str, info: dict) -> str:
+    """File name for a new snapshot — sorts by creation time"""
+    stamp = info["created_at"].replace("-", "").replace(":", "").replace(" ", "-").replace(".", "")
+    return os.path.join(backup_dir, f"{SNAPSHOT_PREFIX}{stamp}-{info['kind']}-{info['snapshot_id']}{SNAPSHOT_SUFFIX}")
+
+
+def _newSnapshotInfo(kind: str, parent: dict | None) -> dict:
+    return {
+        "snapshot_id": uuid.uuid4().hex[:12],
+        "kind": kind,
+        "parent_id": parent["snapshot_id"] if parent else None,
+        "from_seq": parent["to_seq"] if parent else None,
+        "to_seq": None,
+        # Microseconds so snapshots taken within the same second still sort in order
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
+        "secrets": 0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Backup
+# ---------------------------------------------------------------------------
+
+def _writeFullSnapshot(temp_path: str, info: dict, vacuum: bool = False, progress=None) -> None:
+    """Copy the whole database to temp_path and stamp it as the base of a new chain"""
+    if sqlite.exportDatabase(temp_path, progress=progress, vacuum=vacuum) is not True:
+        raise BackupError("Could not copy the database (see Logs.txt)")
+    with closing(sqlite3.connect(temp_path)) as connection:
+        # The copy's own log position is exactly the state it holds
+        info["to_seq"] = sqlite.queryChangeLogBounds(connection)[1]
+        info["secrets"] = connection.execute("SELECT COUNT(*) FROM passwords").fetchone()[0]
+        connection.execute("DELETE FROM change_log")
+        _writeSnapshotInfo(connection, info)
+        connection.commit()
+
+
+def _writeIncrementalSnapshot(temp_path: str, info: dict) -> bool:
+    """
+    Write the secrets changed since info["from_seq"] to temp_path
+
+    Returns:
+        False (and writes nothing) if the change log no longer reaches back to
+        the parent snapshot, or the parent is ahead of this database
+    """
+    # Same file as the module connection (the routed file a caller switched to), read on a connection of its own
+    connection = sqlite.get_db_connection(sqlite.active_db_path())
+    connection.isolation_level = None
+    try:
+        connection.execute("ATTACH DATABASE ? AS snapshot", (temp_path,))
+        # One read transaction: the log position and the rows copied are the same point in time
+        connection.execute("BEGIN")
+        oldest, high = sqlite.queryChangeLogBounds(connection)
+        from_seq = info["from_seq"]
+        if from_seq > high or oldest > from_seq + 1:
+            connection.execute("ROLLBACK")
+            return False
+        info["to_seq"] = high
+
+        columns = ", ".join(sqlite.TABLE_COLUMNS["passwords"])
+        connection.execute("CREATE TABLE snapshot.changes (secret_id INTEGER PRIMARY KEY)")
+        connection.execute("""
+            INSERT INTO snapshot.changes (secret_id)
+            SELECT DISTINCT secret_id FROM change_log WHERE seq > ? AND seq <= ?
+        """, (from_seq, high))
+        # Changed secrets that still exist; the rest of snapshot.changes were deleted
+        connection.execute(f"CREATE TABLE snapshot.passwords AS SELECT {columns} FROM passwords WHERE 0")
+        connection.execute(f"""
+            INSERT INTO snapshot.passwords
+            SELECT {columns} FROM passwords WHERE secret_id IN (SELECT secret_id FROM snapshot.changes)
+        """)
+        connection.execute("""
+            CREATE TABLE snapshot.password_versions AS
+            SELECT * FROM password_versions WHERE secret_id IN (SELECT secret_id FROM snapshot.changes)
+        """)
+        connection.execute("""
+            CREATE TABLE snapshot.secret_tags AS
+            SELECT user, tag, secret_id FROM secret_tags WHERE secret_id IN (SELECT secret_id FROM snapshot.changes)
+        """)
+        # A few rows per user — cheaper to carry whole than to track
+        connection.execute("CREATE TABLE snapshot.users AS SELECT * FROM users")
+        connection.execute("CREATE TABLE snapshot.service_tokens AS SELECT * FROM service_tokens")
+
+        info["secrets"] = connection.execute("SELECT COUNT(*) FROM snapshot.changes").fetchone()[0]
+        _writeSnapshotInfo(connection, info, schema="snapshot")
+        connection.execute("COMMIT")
+        return True
+    except sqlite3.Error:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+
+def backupDatabase(backup_dir: str, full: bool = False, vacuum: bool = False, progress=None) -> dict:
+    """
+    Write the next snapshot of the database to backup_dir
+
+    Incremental when the directory already holds a chain this database's change
+    log still covers; otherwise (or with full=True) a full copy starts a new chain.
+    The change log is pruned up to the new snapshot afterwards.
+
+    Args:
+        backup_dir: Backup directory (created mode 700 if missing)
+        full: Always take a full snapshot
+        vacuum: Write full snapshots with VACUUM INTO (compacted, never restarted
+            by concurrent writes, but writers wait for it) instead of the paged copy
+        progress: Called as progress(copied_pages, total_pages) during a paged full copy
+
+    Returns:
+        The new snapshot's metadata (see readSnapshot)
+
+    Raises:
+        BackupError: If the snapshot cannot be written
+    """
+    if not os.path.isdir(backup_dir):
+        os.makedirs(backup_dir, mode=0o700)
+
+    snapshots = [] if full else listSnapshots(backup_dir)
+    parent = snapshots[-1] if snapshots else None
+    info = _newSnapshotInfo("incremental" if parent else "full", parent)
+    temp_path = os.path.join(backup_dir, f".{info['snapshot_id']}.tmp")
+    try:
+        if parent and not _writeIncrementalSnapshot(temp_path, info):
+            log("BACKUP", f"Change log no longer covers snapshot {parent['snapshot_id']} - taking a full backup")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            info = _newSnapshotInfo("full", None)
+            temp_path = os.path.join(backup_dir, f".{info['snapshot_id']}.tmp")
+        if info["kind"] == "full":
+            _writeFullSnapshot(temp_path, info, vacuum=vacuum, progress=progress)
+        os.chmod(temp_path, 0o600)
+        info["path"] = _snapshotPath(backup_dir, info)
+        os.replace(temp_path, info["path"])
+    except (OSError, sqlite3.Error) as error:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        log("BACKUP", f"ERROR: Backup to {backup_dir} failed - {error}")
+        raise BackupError(f"Backup failed: {error}") from error
+    except BackupError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    sqlite.pruneChangeLog(info["to_seq"])
+    log("BACKUP", f"SUCCESS: {info['kind']} backup {info['snapshot_id']} "
+                  f"({info['secrets']} secrets, change log through {info['to_seq']}) written to {info['path']}")
+    return info
+
+
+# ---------------------------------------------------------------------------
+# Restore
+# ---------------------------------------------------------------------------
+
+def resolveChain(backup_dir: str, until: str | None = None) -> list[dict]:
+    """
+    The snapshots to replay to restore a backup, full snapshot first
+
+    Args:
+        backup_dir: Backup directory
+        until: Snapshot id or file name to restore to (default: the newest snapshot)
+
+    Returns:
+        Snapshot metadata dicts from the chain's full snapshot up to the target
+
+    Raises:
+        BackupError: If there is no such snapshot or its chain is incomplete
+    """
+    snapshots = listSnapshots(backup_dir)
+    if not snapshots:
+        raise BackupError(f"No snapshots found in {backup_dir}")
+    by_id = {info["snapshot_id"]: info for info in snapshots}
+
+    if until is None:
+        target = snapshots[-1]
+    else:
+        matches = [info for info in snapshots
+                   if until in (info["snapshot_id"], os.path.basename(info["path"]))]
+        if not matches:
+            raise BackupError(f"No snapshot '{until}' in {backup_dir}")
+        target = matches[0]
+
+    chain = [target]
+    while chain[0]["kind"] != "full":
+        child = chain[0]
+        parent = by_id.get(child["parent_id"])
+        if parent is None:
+            raise BackupError(f"Snapshot {child['snapshot_id']} needs missing snapshot {child['parent_id']}")
+        if parent["to_seq"] != child["from_seq"]:
+            raise BackupError(f"Snapshot {child['snapshot_id']} does not follow on from {parent['snapshot_id']}")
+        chain.insert(0, parent)
+    return chain
+
+
+def _applyIncremental(connection: sqlite3.Connection, path: str) -> None:
+    """Replay one incremental snapshot onto connection's database, all or nothing"""
+    connection.execute("ATTACH DATABASE ? AS snapshot", (path,))
+    try:
+        # Columns both sides have — a chain can span a migration that added one (e.g. path)
+        present = [{row[1] for row in connection.execute(f"PRAGMA {schema}.table_info(passwords)")}
+                   for schema in ("main", "snapshot")]
+        columns = ", ".join(c for c in sqlite.TABLE_COLUMNS["passwords"] if all(c in p for p in present))
+        tagged = all(connection.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'secret_tags'").fetchone()
+                     for schema in ("main", "snapshot"))
+        connection.execute("BEGIN")
+        connection.execute("DELETE FROM service_tokens")
+        connection.execute("DELETE FROM users")
+        connection.execute("INSERT INTO users SELECT * FROM snapshot.users")
+        connection.execute("INSERT INTO service_tokens SELECT * FROM snapshot.service_tokens")
+        # Delete + insert (not REPLACE) so the passwords triggers keep the FTS index in step
+        connection.execute("DELETE FROM passwords WHERE secret_id IN (SELECT secret_id FROM snapshot.changes)")
+        connection.execute(f"INSERT INTO passwords ({columns}) SELECT {columns} FROM snapshot.passwords")
+        # ... then put back the history the insert trigger just reset to version 1
+        connection.execute("DELETE FROM password_versions WHERE secret_id IN (SELECT secret_id FROM snapshot.changes)")
+        connection.execute("INSERT INTO password_versions SELECT * FROM snapshot.password_versions")
+        # The passwords delete above dropped the changed secrets' tags; put back the snapshot's
+        if tagged:
+            connection.execute("INSERT INTO secret_tags (user, tag, secret_id) "
+                               "SELECT user, tag, secret_id FROM snapshot.secret_tags")
+        connection.execute("COMMIT")
+    except sqlite3.Error:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.execute("DETACH DATABASE snapshot")
+
+
+def restoreDatabase(backup_dir: str, output_path: str, until: str | None = None) -> list[dict]:
+    """
+    Rebuild a database from a backup chain into a new file
+
+    The restored database continues the chain: its change log starts where
+    the last replayed snapshot ended, so the next backupDatabase into the same
+    directory is incremental.
+
+    Args:
+        backup_dir: Backup directory
+        output_path: New database file (must not exist)
+        until: Snapshot id or file name to restore to (default: the newest snapshot)
+
+    Returns:
+        The snapshots replayed, full snapshot first
+
+    Raises:
+        BackupError: If output_path exists, or the chain is incomplete or cannot be applied
+    """
+    if os.path.exists(output_path):
+        raise BackupError(f"{output_path} already exists")
+    chain = resolveChain(backup_dir, until)
+
+    temp_path = f"{output_path}.tmp"
+    try:
+        shutil.copyfile(chain[0]["path"], temp_path)
+        os.chmod(temp_path, 0o600)
+        # Foreign keys stay off while whole tables are swapped; every snapshot was consistent when taken
+        with closing(sqlite3.connect(temp_path, isolation_level=None)) as connection:
+            for info in chain[1:]:
+                _applyIncremental(connection, info["path"])
+            connection.execute("BEGIN")
+            connection.execute("DROP TABLE backup_snapshot")
+            connection.execute("DELETE FROM change_log")
+            to_seq = chain[-1]["to_seq"]
+            if connection.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'change_log'",
+                                  (to_seq,)).rowcount == 0:
+                connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (to_seq,))
+            connection.execute("COMMIT")
+        os.replace(temp_path, output_path)
+    except (OSError, sqlite3.Error) as error:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        log("BACKUP", f"ERROR: Restore from {backup_dir} failed - {error}")
+        raise BackupError(f"Restore failed: {error}") from error
+
+    log("BACKUP", f"SUCCESS: Restored {output_path} from {len(chain)} snapshot(s) "
+                  f"ending at {chain[-1]['snapshot_id']}")
+    return chain
@@ -0,0 +1,361 @@
+"""
+Shell completion for the CLI Guard CLI
+
+Two halves:
+
+1. Metadata cache — a small per-user file at ~/.cli-guard/cache/{user}.names
+   (mode 600) holding the user's account and category names and the data
+   version they were read at, one per line ("v 3", "a prod-db", "c Database").
+   Names are metadata, never secrets. Authenticated CLI commands rewrite it whenever the user's data version has moved, so it
+   follows every add/update/delete — from the CLI, the TUI or anywhere else —
+   as of the next CLI command.
+
+   Next to it, {user}.trigrams holds the serialized fuzzy-match index over
+   the same account names (search_index.NameIndex.dumps), headed by the data
+   version it was built at, so a CLI process whose --account missed can
+   suggest names without re-reading and re-indexing every account.
+
+2. Completion backend — invoked by the shell on every <TAB>:
+
+       python3 completion.py accounts --user admin prod
+       python3 completion.py categories --user admin
+       python3 completion.py users
+
+   It only reads the cache file: no database, no token validation, no
+   decryption, and none of the heavy imports (bcrypt, cryptography, SQLite —
+   or even json, re and typing), so it answers well inside the 50ms an
+   interactive shell can afford. Keep this module's top-level imports minimal.
+
+The shell scripts themselves are generated by `cli-guard completion bash|zsh|fish`
+(see CLI_Guard_CLI.cmd_completion), which passes in the subcommands and options.
+
+    eval "$(python3 CLI_Guard_CLI.py completion bash)"      # ~/.bashrc
+    eval "$(python3 CLI_Guard_CLI.py completion zsh)"       # ~/.zshrc
+    python3 CLI_Guard_CLI.py completion fish > ~/.config/fish/completions/cli-guard.fish
+"""
+
+import os
+import sys
+
+
+# Metadata cache files live in ~/.cli-guard/cache/
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cli-guard", "cache")
+
+# Names the completion is registered for (installed wrapper and the script itself)
+PROGRAM_NAMES = ("cli-guard", "CLI_Guard_CLI.py")
+
+# Options whose values the backend can complete, and the cache key they complete from
+VALUE_OPTIONS = {
+    "--account": "accounts",
+    "--category": "categories",
+    "--user": "users",
+}
+
+
+# ---------------------------------------------------------------------------
+# Metadata cache
+# ---------------------------------------------------------------------------
+
+def cache_path(user: str) -> str:
+    """Path of a user's metadata cache file"""
+    return os.path.join(CACHE_DIR, f"{user}.names")
+
+
+def name_index_path(user: str) -> str:
+    """Path of a user's serialized account-name index"""
+    return os.path.join(CACHE_DIR, f"{user}.trigrams")
+
+
+def _replace_cache_file(path: str, user: str, data: bytes) -> None:
+    """Atomically write data to path in CACHE_DIR (directory 700, file 600)"""
+    cli_guard_dir = os.path.dirname(CACHE_DIR)
+    if not os.path.exists(cli_guard_dir):
+        os.makedirs(cli_guard_dir, mode=0o700)
+    if not os.path.exists(CACHE_DIR):
+        os.makedirs(CACHE_DIR, mode=0o700)
+
+    # Imported here so the completion backend never pays for it
+    import tempfile
+
+    # mkstemp creates the file mode 600; os.replace swaps it in so readers never see a partial file
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f".{user}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def read_metadata_cache(user: str) -> dict | None:
+    """
+    Load a user's metadata cache
+
+    Args:
+        user: CLI Guard username
+
+    Returns:
+        Dict with keys user, data_version, accounts, categories — or None if
+        the file is missing or unreadable
+    """
+    data: dict = {"user": user, "data_version": None, "accounts": [], "categories": []}
+    try:
+        with open(cache_path(user), "r", encoding="utf-8") as f:
+            for line in f:
+                tag, _, value = line.rstrip("\n").partition(" ")
+                if tag == "a":
+                    data["accounts"].append(value)
+                elif tag == "c":
+                    data["categories"].append(value)
+                elif tag == "v" and value.isdigit():
+                    data["data_version"] = int(value)
+    except (OSError, UnicodeDecodeError):
+        return None
+    return data
+
+
+def write_metadata_cache(user: str, data_version: int, accounts: list[str], categories: list[str]) -> None:
+    """
+    Atomically replace a user's metadata cache (directory 700, file 600)
+
+    Args:
+        user: CLI Guard username
+        data_version: The user's data version the names were read at
+        accounts: Distinct account names
+        categories: Distinct category names
+
+    Raises:
+        OSError: If the cache directory or file cannot be written
+    """
+    # Names containing line breaks can't be stored one per line (and can't be typed at a prompt anyway)
+    lines = [f"v {data_version}"]
+    lines += [f"a {name}" for name in sorted(set(accounts)) if "\n" not in name and "\r" not in name]
+    lines += [f"c {name}" for name in sorted(set(categories)) if "\n" not in name and "\r" not in name]
+
+    _replace_cache_file(cache_path(user), user, ("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def read_name_index(user: str) -> tuple[int, bytes] | None:
+    """
+    Load a user's serialized account-name index
+
+    Args:
+        user: CLI Guard username
+
+    Returns:
+        (data version it was built at, NameIndex.dumps() bytes), or None if
+        the file is missing or unreadable
+    """
+    try:
+        with open(name_index_path(user), "rb") as f:
+            head = f.readline()
+            data = f.read()
+    except OSError:
+        return None
+    if not head.startswith(b"v ") or not head[2:].strip().isdigit():
+        return None
+    return int(head[2:]), data
+
+
+def write_name_index(user: str, data_version: int, data: bytes) -> None:
+    """
+    Atomically replace a user's serialized account-name index (directory 700, file 600)
+
+    Args:
+        user: CLI Guard username
+        data_version: The user's data version the index was built at
+        data: NameIndex.dumps() bytes
+
+    Raises:
+        OSError: If the cache directory or file cannot be written
+    """
+    _replace_cache_file(name_index_path(user), user, f"v {data_version}\n".encode("ascii") + data)
+
+
+def remove_name_index(user: str) -> None:
+    """Delete a user's serialized account-name index (no-op if there is none)"""
+    try:
+        os.unlink(name_index_path(user))
+    except OSError:
+        pass
+
+
+def cached_users() -> list[str]:
+    """Users that have a metadata cache file (i.e. have used the CLI on this machine)"""
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return []
+    return sorted(name[:-6] for name in names if name.endswith(".names") and not name.startswith("."))
+
+
+def complete(kind: str, user: str | None, prefix: str = "") -> list[str]:
+    """
+    Candidate completions from the metadata cache
+
+    Args:
+        kind: "accounts", "categories" or "users"
+        user: CLI Guard username (required for accounts/categories)
+        prefix: Text typed so far
+
+    Returns:
+        Matching names, sorted; empty if there is no cache for the user
+    """
+    if kind == "users":
+        names = cached_users()
+    elif user:
+        data = read_metadata_cache(user) or {}
+        names = data.get(kind) or []
+    else:
+        names = []
+    return [name for name in names if isinstance(name, str) and name.startswith(prefix)]
+
+
+# ---------------------------------------------------------------------------
+# Shell script generators
+# ---------------------------------------------------------------------------
+
+def _backend_command() -> str:
+    """Shell command that runs this module as the completion backend"""
+    return f"'{sys.executable}' '{os.path.abspath(__file__)}'"
+
+
+def bash_script(commands: dict[str, list[str]]) -> str:
+    """
+    Generate a bash completion script
+
+    Args:
+        commands: Subcommand (e.g. "get", "token create") → its option strings
+    """
+    top_level = sorted({name.split()[0] for name in commands})
+    groups = sorted({name.split()[0] for name in commands if " " in name})
+    cases = "\n".join(
+        f'        "{name}") opts="{" ".join(options)}" ;;' for name, options in sorted(commands.items())
+    )
+    value_cases = "\n".join(
+        f'        {option}) kind={kind} ;;' for option, kind in VALUE_OPTIONS.items()
+    )
+    return f'''# CLI Guard bash completion — generated by `cli-guard completion bash`
+_cli_guard_complete() {{
+    local cur prev
+    cur="${{COMP_WORDS[COMP_CWORD]}}"
+    prev="${{COMP_WORDS[COMP_CWORD-1]}}"
+
+    # Subcommand path (first one or two words) and --user value typed so far
+    local command="" user="" i
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        case "${{COMP_WORDS[i]}}" in
+            --user) user="${{COMP_WORDS[i+1]}}" ;;
+            -*) ;;
+            *) if [[ -z "$command" ]]; then command="${{COMP_WORDS[i]}}";
+               elif [[ "$command" != *" "* && " {' '.join(groups)} " == *" $command "* ]]; then command="$command ${{COMP_WORDS[i]}}"; fi ;;
+        esac
+    done
+
+    local kind=""
+    case "$prev" in
+{value_cases}
+    esac
+    if [[ -n "$kind" ]]; then
+        local IFS=$'\\n'
+        COMPREPLY=($({_backend_command()} "$kind" --user "$user" -- "$cur" 2>/dev/null))
+        return
+    fi
+
+    if [[ -z "$command" ]]; then
+        COMPREPLY=($(compgen -W "{' '.join(top_level)}" -- "$cur"))
+        return
+    fi
+
+    local opts=""
+    case "$command" in
+{cases}
+        *) opts="" ;;
+    esac
+    COMPREPLY=($(compgen -W "$opts" -- "$cur"))
+}}
+complete -F _cli_guard_complete {' '.join(PROGRAM_NAMES)}
+'''
+
+
+def zsh_script(commands: dict[str, list[str]]) -> str:
+    """Generate a zsh completion script (the bash script via bashcompinit)"""
+    return ("# CLI Guard zsh completion — generated by `cli-guard completion zsh`\n"
+            "autoload -U +X bashcompinit && bashcompinit\n"
+            + bash_script(commands))
+
+
+def fish_script(commands: dict[str, list[str]]) -> str:
+    """Generate a fish completion script"""
+    lines = [
+        "# CLI Guard fish completion — generated by `cli-guard completion fish`",
+        "function __cli_guard_user",
+        "    set -l words (commandline -opc)",
+        "    set -l index (contains -i -- --user $words)",
+        "    and test (count $words) -gt $index",
+        "    and echo $words[(math $index + 1)]",
+        "end",
+    ]
+    top_level = sorted({name.split()[0] for name in commands})
+    for program in PROGRAM_NAMES:
+        lines.append(f"complete -c {program} -f -n __fish_use_subcommand -a '{' '.join(top_level)}'")
+        for name, options in sorted(commands.items()):
+            words = name.split()
+            condition = " ; and ".join(f"__fish_seen_subcommand_from {word}" for word in words)
+            positional = [word for word in options if not word.startswith("-")]
+            if positional:
+                lines.append(f"complete -c {program} -f -n '{condition}' -a '{' '.join(positional)}'")
+            for option in options:
+                if not option.startswith("--"):
+                    continue
+                kind = VALUE_OPTIONS.get(option)
+                if kind:
+                    args = f'-xa "({_backend_command()} {kind} --user (__cli_guard_user) -- (commandline -ct))"'
+                else:
+                    args = ""
+                lines.append(f"complete -c {program} -n '{condition}' -l {option[2:]} {args}".rstrip())
+    return "\n".join(lines) + "\n"
+
+
+SHELL_SCRIPTS = {
+    "bash": bash_script,
+    "zsh": zsh_script,
+    "fish": fish_script,
+}
+
+
+# ---------------------------------------------------------------------------
+# Backend entry point
+# ---------------------------------------------------------------------------
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Print completions one per line: completion.py KIND [--user USER] [--] [PREFIX]
+
+    Deliberately hand-parsed (no argparse) and silent on bad input — the shell
+    just gets no candidates.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        return 0
+    kind, rest = argv[0], argv[1:]
+    user: str | None = None
+    prefix = ""
+    while rest:
+        word = rest.pop(0)
+        if word == "--user" and rest:
+            user = rest.pop(0)
+        elif word == "--":
+            prefix = rest[0] if rest else ""
+            break
+        else:
+            prefix = word
+    for name in complete(kind, user, prefix):
+        print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
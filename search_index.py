@@ -0,0 +1,408 @@
+"""
+In-memory search index over secret metadata for CLI Guard
+
+Builds a sorted prefix index over the category, account and username of a
+user's secrets so interactive search can filter on every keystroke without a
+SQL round trip. The index is built once per session from the rows returned by
+queryData and kept in step with add/update/delete by the interface layer.
+
+Only metadata is indexed. Rows are stored as given and identified by their
+secret_id; the TUI builds the index from metadata-only rows (password slot
+None) so no ciphertext is read, and loads the full row when one is opened.
+The password column is never tokenized either way.
+
+Matching rules:
+    - Field values are lowercased and split into words on non-alphanumeric
+      characters ("prod-db.eu" → "prod", "db", "eu"); the whole value is
+      also indexed so "prod-d" matches "prod-db"
+    - Every word of the search term must prefix-match a word in the row
+    - An empty search term matches every row
+
+A second structure, NameIndex, serves fuzzy ("did you mean") lookups over
+account names. It keeps a trigram posting list per name so candidates are
+found by shared trigrams instead of comparing the term against every name,
+then ranks them by trigram similarity with edit distance as tie-breaker. It
+serializes to bytes (dumps/loads) so a CLI process can reuse the index an
+earlier one built.
+
+Usage:
+    from search_index import SearchIndex, NameIndex
+
+    index = SearchIndex(rows)                         # rows laid out like vw_passwords
+    rows = index.search("prod db")                    # any indexed column
+    rows = index.search("stripe", column="account")   # one column
+    index.add(new_row)
+    index.update(old_row, new_row)
+    index.remove(row)
+
+    names = NameIndex(["prod-db", "staging-db"])
+    names.suggest("prd-db")                           # [("prod-db", 0.67), ...]
+"""
+
+import heapq
+import json
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Iterable, Optional
+
+
+# Row tuple positions of the indexed columns:
+# (user, category, account, username, password, last_modified)
+INDEXED_COLUMNS: dict[str, int] = {
+    "category": 1,
+    "account": 2,
+    "username": 3,
+}
+
+# Word boundaries for tokenizing — anything that isn't a letter or digit
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def tokenize(value: str) -> list[str]:
+    """
+    Split a value into lowercase search words
+
+    Args:
+        value: Field value or search term
+
+    Returns:
+        List of non-empty lowercase words (order preserved, duplicates removed)
+    """
+    words = _WORD_SPLIT.split(str(value).lower())
+    return list(dict.fromkeys(word for word in words if word))
+
+
+def _row_key(row: tuple) -> int:
+    """Identity of a row — its secret_id (account/username can repeat and the password slot may be None)"""
+    return row[6]
+
+
+class SearchIndex:
+    """Sorted prefix index over the category, account and username of secret rows"""
+
+    def __init__(self, rows: Optional[Iterable[tuple]] = None):
+        self._rows: dict[int, tuple] = {}       # entry id → row tuple
+        self._ids: dict[int, int] = {}          # secret_id → entry id
+        self._tokens: list[tuple[str, int, int]] = []  # sorted (token, column position, entry id)
+        self._next_id: int = 0
+
+        # Bulk build: collect every token then sort once rather than insort per row
+        for row in (rows or []):
+            entry_id = self._store(row)
+            self._tokens.extend(self._row_tokens(row, entry_id))
+        self._tokens.sort()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _store(self, row: tuple) -> int:
+        """Register a row and return its entry id"""
+        entry_id = self._next_id
+        self._next_id += 1
+        row = tuple(row)
+        self._rows[entry_id] = row
+        self._ids[_row_key(row)] = entry_id
+        return entry_id
+
+    @staticmethod
+    def _row_tokens(row: tuple, entry_id: int) -> list[tuple[str, int, int]]:
+        """Build the index entries for one row"""
+        tokens = []
+        for position in INDEXED_COLUMNS.values():
+            value = str(row[position]).lower()
+            words = set(tokenize(value))
+            if value:
+                words.add(value)
+            tokens.extend((word, position, entry_id) for word in words)
+        return tokens
+
+    def add(self, row: tuple) -> None:
+        """Add a newly inserted row to the index"""
+        entry_id = self._store(row)
+        for token in self._row_tokens(self._rows[entry_id], entry_id):
+            insort(self._tokens, token)
+
+    def remove(self, row: tuple) -> bool:
+        """
+        Remove a deleted row from the index
+
+        Returns:
+            True if the row was indexed and has been removed, False otherwise
+        """
+        entry_id = self._ids.pop(_row_key(row), None)
+        if entry_id is None:
+            return False
+
+        stored = self._rows.pop(entry_id)
+        for token in self._row_tokens(stored, entry_id):
+            position = bisect_left(self._tokens, token)
+            if position < len(self._tokens) and self._tokens[position] == token:
+                del self._tokens[position]
+        return True
+
+    def update(self, old_row: tuple, new_row: tuple) -> None:
+        """Replace an updated row, keeping its position in insertion order"""
+        entry_id = self._ids.get(_row_key(old_row))
+        if entry_id is None:
+            self.add(new_row)
+            return
+
+        self.remove(old_row)
+        new_row = tuple(new_row)
+        self._rows[entry_id] = new_row
+        self._ids[_row_key(new_row)] = entry_id
+        for token in self._row_tokens(new_row, entry_id):
+            insort(self._tokens, token)
+
+    def _prefix_ids(self, word: str, position: Optional[int]) -> set[int]:
+        """Entry ids with a token starting with word (optionally in one column)"""
+        ids: set[int] = set()
+        # Walk forward from the first token >= word (indexing, not slicing, to avoid copying the list)
+        index = bisect_left(self._tokens, (word,))
+        while index < len(self._tokens):
+            token, token_position, entry_id = self._tokens[index]
+            if not token.startswith(word):
+                break
+            if position is None or token_position == position:
+                ids.add(entry_id)
+            index += 1
+        return ids
+
+    def search(self, term: Optional[str], column: Optional[str] = None) -> list[tuple]:
+        """
+        Find rows whose metadata matches every word of term
+
+        Args:
+            term: Search text (empty or None matches everything)
+            column: Restrict matching to one of INDEXED_COLUMNS (case-insensitive), or None for all
+
+        Returns:
+            Matching row tuples in insertion order
+
+        Raises:
+            ValueError: If column is not an indexed column
+        """
+        position = None
+        if column is not None:
+            position = INDEXED_COLUMNS.get(column.lower())
+            if position is None:
+                raise ValueError(f"Column '{column}' is not indexed")
+
+        words = tokenize(term or "")
+        if not words:
+            return [self._rows[entry_id] for entry_id in sorted(self._rows)]
+
+        # Intersect the smallest candidate sets first
+        matches: Optional[set[int]] = None
+        for word in sorted(words, key=len, reverse=True):
+            ids = self._prefix_ids(word, position)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        return [self._rows[entry_id] for entry_id in sorted(matches)]
+
+
+# ---------------------------------------------------------------------------
+# Fuzzy name matching
+# ---------------------------------------------------------------------------
+
+# Suggestions scoring below this trigram similarity are not worth showing
+MIN_SIMILARITY: float = 0.3
+
+# With no limit, edit distance orders only this many of the best-scoring names (the rest by score alone)
+SUGGEST_EDIT_DISTANCE_HEAD: int = 100
+
+
+def trigrams(value: str) -> set[str]:
+    """
+    Character trigrams of a lowercased value, padded so short values and word edges still count
+
+    Args:
+        value: Name or search term
+
+    Returns:
+        Set of 3-character strings
+    """
+    padded = f"  {str(value).lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    Edit distance (insertions, deletions, substitutions) between two strings
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        Minimum number of single-character edits to turn a into b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,                        # deletion
+                current[j - 1] + 1,                     # insertion
+                previous[j - 1] + (char_a != char_b),   # substitution
+            ))
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    """
+    Trigram index over a set of names for ranked fuzzy matching
+
+    Names are numbered; each trigram maps to a compact array of the numbers
+    of the names containing it, so a lookup counts shared trigrams in C
+    (Counter over the arrays) and the index serializes to a few flat byte
+    blocks (dumps/loads) that load far faster than rebuilding it.
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None):
+        self._names: list[Optional[str]] = []          # name id → name (None once removed)
+        self._ids: dict[str, int] = {}                 # name → name id
+        self._sizes: array = array("I")                # name id → number of trigrams
+        self._postings: dict[str, array] = {}          # trigram → ids of the names containing it
+        for name in (names or []):
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def add(self, name: str) -> None:
+        """Index a name (no-op if already present)"""
+        if name in self._ids:
+            return
+        name_id = len(self._names)
+        grams = trigrams(name)
+        self._names.append(name)
+        self._ids[name] = name_id
+        self._sizes.append(len(grams))
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(name_id)
+
+    def remove(self, name: str) -> None:
+        """Drop a name from the index (no-op if absent)"""
+        name_id = self._ids.pop(name, None)
+        if name_id is None:
+            return
+        self._names[name_id] = None
+        for gram in trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is not None and name_id in postings:
+                postings.remove(name_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def suggest(self, term: str, limit: Optional[int] = 5,
+                min_similarity: float = MIN_SIMILARITY) -> list[tuple[str, float]]:
+        """
+        Rank indexed names by similarity to term
+
+        Candidates are the names sharing at least one trigram with term;
+        they are scored by Dice similarity of trigram sets. The best `limit`
+        are picked by score (then closeness in length, then name) and only
+        those are ordered by edit distance among equal scores, so a lookup
+        stays fast however many names share the term's trigrams.
+
+        Args:
+            term: Text to match (e.g. a mistyped account name)
+            limit: Maximum number of suggestions (None for all above the threshold;
+                edit distance then only orders the first SUGGEST_EDIT_DISTANCE_HEAD)
+            min_similarity: Minimum score (0.0–1.0) for a name to be returned
+
+        Returns:
+            List of (name, score) tuples, best first; score is 1.0 for a case-insensitive exact match
+        """
+        term_grams = trigrams(term)
+        shared: Counter = Counter()
+        for gram in term_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        term_lower = term.lower()
+        term_size = len(term_grams)
+        scored = []
+        for name_id, count in shared.items():
+            score = 2 * count / (term_size + self._sizes[name_id])
+            if score >= min_similarity:
+                name = self._names[name_id]
+                if name.lower() == term_lower:
+                    score = 1.0
+                scored.append((score, name))
+
+        def cheap(item):
+            return (-item[0], abs(len(item[1]) - len(term)), item[1])
+
+        if limit is not None:
+            top = heapq.nsmallest(limit, scored, key=cheap)
+        else:
+            top = sorted(scored, key=cheap)
+            top, rest = top[:SUGGEST_EDIT_DISTANCE_HEAD], top[SUGGEST_EDIT_DISTANCE_HEAD:]
+
+        # Edit distance only for the few names being returned, and only where scores tie
+        top.sort(key=lambda item: (-item[0], levenshtein(term_lower, item[1].lower()), item[1]))
+        if limit is None:
+            top += rest
+        return [(name, round(score, 3)) for score, name in top]
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the index: a JSON header (names, trigrams and their posting
+        lengths) on the first line, then the raw size and posting arrays
+        """
+        grams = list(self._postings)
+        header = json.dumps({
+            "format": 1,
+            "itemsize": self._sizes.itemsize,
+            "names": self._names,
+            "grams": [[gram, len(self._postings[gram])] for gram in grams],
+        }, ensure_ascii=True)
+        return b"".join([header.encode("ascii"), b"\n", self._sizes.tobytes(),
+                         *(self._postings[gram].tobytes() for gram in grams)])
+
+    @classmethod
+    def loads(cls, data: bytes) -> "NameIndex":
+        """
+        Rebuild an index from dumps() output
+
+        Raises:
+            ValueError: If data is not a serialized index from this version
+        """
+        newline = data.find(b"\n")
+        try:
+            header = json.loads(data[:newline].decode("ascii")) if newline >= 0 else None
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            header = None
+        if not isinstance(header, dict) or header.get("format") != 1 \
+                or header.get("itemsize") != array("I").itemsize:
+            raise ValueError("Not a serialized name index")
+
+        index = cls()
+        index._names = header["names"]
+        index._ids = {name: name_id for name_id, name in enumerate(index._names) if name is not None}
+        view = memoryview(data)[newline + 1:]
+        itemsize = header["itemsize"]
+        offset = len(index._names) * itemsize
+        index._sizes.frombytes(view[:offset])
+        for gram, count in header["grams"]:
+            end = offset + count * itemsize
+            postings = index._postings[gram] = array("I")
+            postings.frombytes(view[offset:end])
+            offset = end
+        if offset != len(view):
+            raise ValueError("Truncated name index")
+        return index
@@ -0,0 +1,220 @@
+"""
+In-memory read-through cache of decrypted secrets for CLI Guard
+
+Jobs that read the same secret over and over (a database password used by
+every task) otherwise pay for a SQL query and a Fernet decrypt on each call.
+SecretCache keeps recently read secrets in memory, keyed by
+(user, account, username), so repeat lookups skip both.
+
+The cache is opt-in: a CLI_Guard.Vault only uses one when given it
+(Vault(cache=SecretCache(...)) or CLI_Guard.enableSecretCache()).
+
+Bounds and lifetime:
+    - ttl:         entries older than this many seconds are treated as misses
+    - max_entries: least-recently-used entries are evicted beyond this count
+    - max_bytes:   ... or beyond this many bytes of cached field data
+    - Writes through the Vault (add/update/delete) drop the account's entries,
+      and ending the session drops the user's entries
+    - Writes by other processes are caught by syncVersion: the Vault checks the
+      user's data_version (one primary-key lookup) before reading the cache and
+      drops the user's entries when it has moved
+
+Zeroing:
+    Decrypted passwords are held in a bytearray which is overwritten with
+    zeros when the entry is evicted, invalidated or cleared. Python strings
+    handed back to callers are immutable copies and cannot be wiped, so this
+    only limits how long the cache itself keeps plaintext around.
+
+Usage:
+    from secret_cache import SecretCache
+
+    cache = SecretCache(ttl=300, max_entries=256)
+    vault = CLI_Guard.Vault(cache=cache)
+    ...
+    cache.stats()       # {"hits": 41, "misses": 3, "evictions": 0, "entries": 3, "bytes": 412}
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+# Defaults for CLI_Guard.enableSecretCache()
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+# Metadata fields stored as given (path may be None); the password is kept separately as a bytearray.
+# Must match the keys of CLI_Guard's secret dicts, so a cache hit has the same shape as a miss
+_METADATA_FIELDS = ("category", "account", "username", "last_modified", "path")
+
+
+def _wipe(buffer: Optional[bytearray]) -> None:
+    """Overwrite a plaintext buffer with zeros"""
+    if buffer is not None:
+        buffer[:] = bytes(len(buffer))
+
+
+class _Entry:
+    """One cached secret: metadata, the plaintext password buffer and its expiry time"""
+
+    __slots__ = ("metadata", "password", "expires_at", "size")
+
+    def __init__(self, secret: dict, expires_at: float):
+        self.metadata = {field: secret[field] for field in _METADATA_FIELDS}
+        password = secret["password"]
+        self.password = bytearray(password.encode("utf-8")) if password is not None else None
+        self.expires_at = expires_at
+        self.size = (sum(len(str(value)) for value in self.metadata.values() if value is not None)
+                     + len(self.password or b""))
+
+    def toSecret(self) -> dict:
+        """A fresh secret dict in the shape CLI_Guard.getSecret returns"""
+        secret = dict(self.metadata)
+        secret["password"] = self.password.decode("utf-8") if self.password is not None else None
+        return secret
+
+
+class SecretCache:
+    """
+    Thread-safe LRU cache of decrypted secrets with a TTL and entry/byte bounds
+
+    Args:
+        ttl: Seconds an entry stays valid (None for no expiry)
+        max_entries: Maximum number of cached secrets
+        max_bytes: Maximum total size of cached field data (None for no byte bound)
+    """
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # (user, account, username) → _Entry, least recently used first
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        # user → data_version the user's entries were read at
+        self._versions: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user: str, account: str, username: Optional[str] = None) -> Optional[dict]:
+        """
+        Look up a cached secret
+
+        Args:
+            user: Owner of the secret
+            account: Account name
+            username: Username the lookup was narrowed by (None for "first match")
+
+        Returns:
+            A copy of the cached secret dict, or None on a miss or expired entry
+        """
+        key = (user, account, username)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() >= entry.expires_at:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.toSecret()
+
+    def put(self, user: str, secret: dict, username: Optional[str] = None) -> None:
+        """
+        Cache a decrypted secret
+
+        Args:
+            user: Owner of the secret
+            secret: Dict as returned by CLI_Guard.getSecret
+            username: Username the lookup was narrowed by (None for "first match")
+        """
+        key = (user, secret["account"], username)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        entry = _Entry(secret, expires_at)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                # Larger than the whole cache — don't evict everything else for it
+                _wipe(entry.password)
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def syncVersion(self, user: str, version: int) -> bool:
+        """
+        Drop a user's entries if their data has changed since they were cached
+
+        Args:
+            user: Owner of the secrets
+            version: The user's current data_version (CLI_SQL.queryDataVersion)
+
+        Returns:
+            True if the cache was still current, False if entries were dropped
+        """
+        with self._lock:
+            if self._versions.get(user) == version:
+                return True
+            self._versions[user] = version
+            for key in [k for k in self._entries if k[0] == user]:
+                self._drop(key)
+            return False
+
+    def invalidate(self, user: str, account: Optional[str] = None) -> None:
+        """
+        Drop cached secrets for one account of a user, or all of the user's if account is None
+
+        Args:
+            user: Owner of the secrets
+            account: Account name (every username variant is dropped)
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user and (account is None or k[1] == account)]:
+                self._drop(key)
+
+    def clear(self) -> None:
+        """Drop (and zero) every cached secret"""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        """
+        Cache counters
+
+        Returns:
+            Dict with keys: hits, misses, evictions, entries, bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: tuple) -> None:
+        """Remove one entry and wipe its plaintext (lock held)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        _wipe(entry.password)
@@ -4,5 +4,27 @@ Unit tests for CLI_Guard password manager
 Run tests with:
     python -m pytest tests/
     or
-    python -m unittest discover tests/
+    python -m unittest discover -s tests -t .
+
+Importing this package points the SQL layer at a temporary copy of
+CLI_SQL/CLI_Guard_DB.db (CLIGUARD_DB) before any project module is imported,
+so the migrations that run on import never rewrite the committed database.
+HOME points into the same directory, so the caches under ~/.cli-guard are
+never written to the real home directory.
 """
+
+import atexit
+import os
+import shutil
+import tempfile
+
+_temp_dir = tempfile.mkdtemp(prefix="cli-guard-tests-")
+atexit.register(shutil.rmtree, _temp_dir, ignore_errors=True)
+
+_committed_db = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "CLI_SQL", "CLI_Guard_DB.db")
+os.environ["CLIGUARD_DB"] = os.path.join(_temp_dir, "CLI_Guard_DB.db")
+shutil.copyfile(_committed_db, os.environ["CLIGUARD_DB"])
+os.environ["HOME"] = _temp_dir
+# Routing to other database files is opted into by the tests that exercise it
+os.environ.pop("CLIGUARD_DB_ROUTES", None)
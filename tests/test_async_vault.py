@@ -0,0 +1,163 @@
+"""
+Unit tests for the asyncio client API (async_vault.py)
+
+Runs against a temporary migrated database (see test_cli_guard_sql.SQLTestCase)
+with a fresh DB worker thread per test, so the real CLI_Guard_DB.db is never touched.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI_Guard
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import async_vault
+from async_vault import AsyncVault
+from tests.test_cli_guard_sql import SQLTestCase
+
+
+PASSWORDS = {"carol": "CarolPass123!", "dave": "DavePass123!"}
+
+
+class AsyncVaultTestCase(SQLTestCase):
+    """Temporary database with two real users and a DB worker thread bound to it"""
+
+    def setUp(self):
+        super().setUp()
+        for user, password in PASSWORDS.items():
+            sqlite.insertUser(user, CLI_Guard.hashPassword(password), CLI_Guard.generateSalt().hex())
+
+        # A fresh single worker reconnects to the temporary database on its own thread
+        self.executor = ThreadPoolExecutor(max_workers=1, initializer=sqlite.ensure_connection)
+        self.executor_patcher = patch.object(async_vault, "_db_executor", self.executor)
+        self.executor_patcher.start()
+
+    def tearDown(self):
+        self.executor_patcher.stop()
+        self.executor.shutdown(wait=True)
+        CLI_Guard.endSession()
+        super().tearDown()
+
+
+class TestOpen(AsyncVaultTestCase):
+    """Test authentication and construction"""
+
+    def test_open_and_round_trip(self):
+        """An opened vault should add and read back a secret"""
+        async def scenario():
+            vault = await AsyncVault.open("carol", PASSWORDS["carol"])
+            await vault.addSecret("Database", "prod-db", "admin", "hunter2")
+            return await vault.getSecret("prod-db")
+        secret = asyncio.run(scenario())
+        self.assertEqual(secret["password"], "hunter2")
+
+    def test_wrong_password_raises(self):
+        """A wrong password should raise AuthenticationError"""
+        with self.assertRaises(CLI_Guard.AuthenticationError):
+            asyncio.run(AsyncVault.open("carol", "nope"))
+
+    def test_unknown_user_raises(self):
+        """An unknown user should raise AuthenticationError"""
+        with self.assertRaises(CLI_Guard.AuthenticationError):
+            asyncio.run(AsyncVault.open("nobody", "whatever"))
+
+    def test_locked_user_raises(self):
+        """A locked account should raise AuthenticationError without checking the password"""
+        sqlite.lockUser("carol")
+        with self.assertRaises(CLI_Guard.AuthenticationError):
+            asyncio.run(AsyncVault.open("carol", PASSWORDS["carol"]))
+
+    def test_failures_are_rate_limited(self):
+        """Repeated wrong passwords should be recorded and then refused before bcrypt"""
+        for _ in range(CLI_Guard.LOGIN_FREE_ATTEMPTS):
+            with self.assertRaises(CLI_Guard.AuthenticationError):
+                asyncio.run(AsyncVault.open("carol", "nope"))
+        with patch("CLI_Guard.verifyPasswordHash") as verify:
+            with self.assertRaises(CLI_Guard.LoginRateLimitedError):
+                asyncio.run(AsyncVault.open("carol", PASSWORDS["carol"]))
+        verify.assert_not_called()
+
+    def test_from_key_rejects_invalid_key(self):
+        """fromKey should reject a key Fernet cannot use"""
+        with self.assertRaises(ValueError):
+            AsyncVault.fromKey("carol", b"short")
+
+    def test_closed_vault_raises(self):
+        """Calls on a closed vault should raise RuntimeError"""
+        async def scenario():
+            async with await AsyncVault.open("carol", PASSWORDS["carol"]) as vault:
+                pass
+            await vault.getSecrets()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(scenario())
+
+    def test_open_does_not_block_event_loop(self):
+        """Key derivation should run off the event loop so other tasks keep running"""
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            await AsyncVault.open("carol", PASSWORDS["carol"])
+            done.set()
+            await task
+            return ticks
+        # bcrypt + PBKDF2 take well over 50ms; a blocked loop would tick only once or twice
+        self.assertGreater(asyncio.run(scenario()), 5)
+
+
+class TestTags(AsyncVaultTestCase):
+    """Test fetching a tagged batch"""
+
+    def test_get_secrets_by_tags(self):
+        """getSecretsByTags should decrypt every secret carrying the tags, and only those"""
+        async def scenario():
+            vault = await AsyncVault.open("carol", PASSWORDS["carol"])
+            for i in range(4):
+                await vault.addSecret("General", f"svc-{i}", "carol", f"pw-{i}")
+            for i in (1, 3):
+                await vault._call(vault._vault.tagSecret, f"svc-{i}", add=["service=payments"])
+            return await vault.getSecretsByTags(["service=payments"])
+        secrets = asyncio.run(scenario())
+        self.assertEqual([(s["account"], s["password"]) for s in secrets], [("svc-1", "pw-1"), ("svc-3", "pw-3")])
+
+
+class TestConcurrentSessions(AsyncVaultTestCase):
+    """Test many vaults for different users in one process"""
+
+    def test_vaults_are_isolated(self):
+        """Interleaved calls from two users should each see and decrypt only their own secrets"""
+        async def scenario():
+            carol, dave = await asyncio.gather(
+                AsyncVault.open("carol", PASSWORDS["carol"]),
+                AsyncVault.open("dave", PASSWORDS["dave"]),
+            )
+            await asyncio.gather(*(
+                vault.addSecret("General", f"acct-{i}", vault.user, f"{vault.user}-pw-{i}")
+                for i in range(10) for vault in (carol, dave)
+            ))
+            return await asyncio.gather(*(
+                vault.getSecretsByAccounts([f"acct-{i}" for i in range(10)]) for vault in (carol, dave, carol, dave)
+            ))
+
+        results = asyncio.run(scenario())
+        for result, user in zip(results, ["carol", "dave", "carol", "dave"]):
+            self.assertEqual(len(result), 10)
+            self.assertTrue(all(s["password"] == f"{user}-pw-{s['account'][5:]}" for s in result.values()))
+            self.assertTrue(all(s["username"] == user for s in result.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
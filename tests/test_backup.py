@@ -0,0 +1,206 @@
+"""
+Unit tests for full and incremental backups (backup.py)
+
+Runs against a temporary migrated database (see test_cli_guard_sql.SQLTestCase),
+with snapshots written to a temporary backup directory.
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+from contextlib import closing
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import backup
+from tests.test_cli_guard_sql import SQLTestCase
+
+
+def table_rows(path, query):
+    with closing(sqlite3.connect(path)) as connection:
+        return sorted(connection.execute(query).fetchall())
+
+
+PASSWORDS_QUERY = "SELECT * FROM vw_passwords"
+VERSIONS_QUERY = "SELECT secret_id, version, password FROM password_versions"
+
+
+class BackupTestCase(SQLTestCase):
+    """Temporary database with a few secrets and an empty backup directory"""
+
+    def setUp(self):
+        super().setUp()
+        self.backup_dir = os.path.join(self.temp_dir, "backups")
+        self.seed_passwords("alice", 20)
+
+    def snapshot_rows(self, info, table="passwords"):
+        return table_rows(info["path"], f"SELECT * FROM {table}")
+
+
+class TestBackupDatabase(BackupTestCase):
+    """Test choosing and writing full and incremental snapshots"""
+
+    def test_first_backup_is_full(self):
+        """An empty backup directory should get a full copy of the database"""
+        info = backup.backupDatabase(self.backup_dir)
+        self.assertEqual(info["kind"], "full")
+        self.assertEqual(info["secrets"], 20)
+        self.assertEqual(table_rows(info["path"], PASSWORDS_QUERY), table_rows(self.db_path, PASSWORDS_QUERY))
+        self.assertEqual(oct(os.stat(info["path"]).st_mode & 0o777), "0o600")
+
+    def test_incremental_holds_only_changed_secrets(self):
+        """An incremental snapshot should hold just the secrets changed since its parent"""
+        full = backup.backupDatabase(self.backup_dir)
+        sqlite.updateData("alice", "new-cipher", "account-003", "user3", "cipher-alice-3")
+        sqlite.deleteData("alice", "account-004", "user4", "cipher-alice-4")
+        sqlite.insertData("bob", "General", "new-account", "bob", "cipher-bob")
+
+        info = backup.backupDatabase(self.backup_dir)
+        self.assertEqual(info["kind"], "incremental")
+        self.assertEqual(info["parent_id"], full["snapshot_id"])
+        self.assertEqual(info["from_seq"], full["to_seq"])
+        self.assertEqual(info["secrets"], 3)
+        accounts = sorted(row[2] for row in self.snapshot_rows(info))
+        self.assertEqual(accounts, ["account-003", "new-account"])
+
+    def test_incremental_without_changes_is_empty(self):
+        """A backup with nothing changed should be an empty incremental"""
+        full = backup.backupDatabase(self.backup_dir)
+        info = backup.backupDatabase(self.backup_dir)
+        self.assertEqual((info["kind"], info["secrets"]), ("incremental", 0))
+        self.assertEqual(info["to_seq"], full["to_seq"])
+
+    def test_full_flag_starts_new_chain(self):
+        """full=True should write a full snapshot even after earlier ones"""
+        backup.backupDatabase(self.backup_dir)
+        info = backup.backupDatabase(self.backup_dir, full=True)
+        self.assertEqual(info["kind"], "full")
+        self.assertIsNone(info["parent_id"])
+
+    def test_change_log_pruned_after_backup(self):
+        """A backup should prune the change log up to (not including) its last entry"""
+        info = backup.backupDatabase(self.backup_dir)
+        oldest, high = sqlite.queryChangeLogBounds()
+        self.assertEqual((oldest, high), (info["to_seq"], info["to_seq"]))
+
+    def test_broken_chain_falls_back_to_full(self):
+        """If the log was pruned past the parent (another backup dir), a full snapshot should be taken"""
+        backup.backupDatabase(self.backup_dir)
+        sqlite.insertData("alice", "General", "extra-1", "a", "c1")
+        sqlite.insertData("alice", "General", "extra-2", "a", "c2")
+        backup.backupDatabase(os.path.join(self.temp_dir, "other"))
+
+        info = backup.backupDatabase(self.backup_dir)
+        self.assertEqual(info["kind"], "full")
+        self.assertEqual(len(backup.listSnapshots(self.backup_dir)), 2)
+        self.assertFalse([name for name in os.listdir(self.backup_dir) if name.endswith(".tmp")])
+
+
+    def test_change_log_capped_between_backups(self):
+        """The log should stay bounded without backups, and a chain it no longer covers restarts with a full copy"""
+        backup.backupDatabase(self.backup_dir)
+        total = sqlite.CHANGE_LOG_MAX_ENTRIES + sqlite.CHANGE_LOG_TRIM_EVERY
+        sqlite.sqlCursor.executemany("INSERT INTO change_log (secret_id) VALUES (?)", ((1,) for _ in range(total)))
+        sqlite.sqlConnection.commit()
+
+        oldest, high = sqlite.queryChangeLogBounds()
+        self.assertLessEqual(high - oldest + 1, total)
+        self.assertGreater(oldest, 1)
+        self.assertEqual(backup.backupDatabase(self.backup_dir)["kind"], "full")
+
+
+class TestRestoreDatabase(BackupTestCase):
+    """Test replaying a chain of snapshots"""
+
+    def make_chain(self):
+        """Full snapshot plus two incrementals covering inserts, updates and deletes"""
+        snapshots = [backup.backupDatabase(self.backup_dir)]
+        sqlite.updateData("alice", "rotated-1", "account-001", "user1", "cipher-alice-1")
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "prod-cipher")
+        snapshots.append(backup.backupDatabase(self.backup_dir))
+        sqlite.updateData("alice", "rotated-2", "account-001", "user1", "rotated-1")
+        sqlite.deleteData("alice", "account-002", "user2", "cipher-alice-2")
+        snapshots.append(backup.backupDatabase(self.backup_dir))
+        return snapshots
+
+    def test_restore_matches_live_database(self):
+        """Replaying the whole chain should reproduce secrets and their history"""
+        self.make_chain()
+        output = os.path.join(self.temp_dir, "restored.db")
+        chain = backup.restoreDatabase(self.backup_dir, output)
+        self.assertEqual([info["kind"] for info in chain], ["full", "incremental", "incremental"])
+        self.assertEqual(table_rows(output, PASSWORDS_QUERY), table_rows(self.db_path, PASSWORDS_QUERY))
+        self.assertEqual(table_rows(output, VERSIONS_QUERY), table_rows(self.db_path, VERSIONS_QUERY))
+        self.assertEqual(table_rows(output, "SELECT * FROM users"), table_rows(self.db_path, "SELECT * FROM users"))
+
+    def test_restore_keeps_tags(self):
+        """Tags added, removed and carried by deleted secrets should replay through incrementals"""
+        ids = {row[2]: row[6] for row in sqlite.queryData("alice", "passwords")}
+        sqlite.insertTags("alice", ids["account-005"], ["service=payments", "env=prod"])
+        sqlite.insertTags("alice", ids["account-006"], ["service=payments"])
+        backup.backupDatabase(self.backup_dir)
+        sqlite.deleteTags("alice", ids["account-005"], ["env=prod"])
+        sqlite.insertTags("alice", ids["account-007"], ["service=payments"])
+        sqlite.deleteData("alice", "account-006", "user6", "cipher-alice-6")
+        backup.backupDatabase(self.backup_dir)
+
+        output = os.path.join(self.temp_dir, "restored.db")
+        backup.restoreDatabase(self.backup_dir, output)
+        tags_query = "SELECT * FROM secret_tags"
+        self.assertEqual(table_rows(output, tags_query), table_rows(self.db_path, tags_query))
+        self.assertEqual(len(table_rows(output, tags_query)), 2)
+
+    def test_restored_search_index_is_consistent(self):
+        """Replayed inserts and deletes should keep the full-text index in step"""
+        self.make_chain()
+        output = os.path.join(self.temp_dir, "restored.db")
+        backup.restoreDatabase(self.backup_dir, output)
+        with closing(sqlite3.connect(output)) as connection:
+            self.assertEqual(sqlite.searchData("alice", "prod", connection=connection)[0][2], "prod-db")
+            self.assertEqual(sqlite.searchData("alice", '"account-002"', connection=connection), [])
+            connection.execute("INSERT INTO passwords_fts (passwords_fts) VALUES ('integrity-check')")
+
+    def test_restore_until_snapshot(self):
+        """until should stop the replay at the named snapshot"""
+        snapshots = self.make_chain()
+        output = os.path.join(self.temp_dir, "restored.db")
+        chain = backup.restoreDatabase(self.backup_dir, output, until=snapshots[1]["snapshot_id"])
+        self.assertEqual(len(chain), 2)
+        passwords = {row[2]: row[4] for row in table_rows(output, PASSWORDS_QUERY)}
+        self.assertEqual(passwords["account-001"], "rotated-1")
+        self.assertIn("account-002", passwords)
+
+    def test_restored_database_continues_chain(self):
+        """The restored change log should start where the last snapshot ended, with no backup metadata left"""
+        snapshots = self.make_chain()
+        output = os.path.join(self.temp_dir, "restored.db")
+        backup.restoreDatabase(self.backup_dir, output)
+        with closing(sqlite3.connect(output)) as connection:
+            self.assertEqual(sqlite.queryChangeLogBounds(connection), (snapshots[-1]["to_seq"] + 1, snapshots[-1]["to_seq"]))
+            self.assertIsNone(connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'backup_snapshot'").fetchone())
+
+    def test_missing_parent_raises(self):
+        """A chain with a missing snapshot should not be restored"""
+        snapshots = self.make_chain()
+        os.unlink(snapshots[1]["path"])
+        with self.assertRaises(backup.BackupError):
+            backup.restoreDatabase(self.backup_dir, os.path.join(self.temp_dir, "restored.db"))
+
+    def test_existing_output_raises(self):
+        """restoreDatabase should never overwrite an existing file"""
+        backup.backupDatabase(self.backup_dir)
+        with self.assertRaises(backup.BackupError):
+            backup.restoreDatabase(self.backup_dir, self.db_path)
+
+    def test_empty_directory_raises(self):
+        """Restoring from a directory without snapshots should raise BackupError"""
+        with self.assertRaises(backup.BackupError):
+            backup.restoreDatabase(self.backup_dir, os.path.join(self.temp_dir, "restored.db"))
+
+
+if __name__ == '__main__':
+    unittest.main()
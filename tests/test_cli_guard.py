@@ -7,12 +7,17 @@ These tests verify the core security functions work correctly.
 import unittest
 import sys
 import os
-
 # Add parent directory to path so we can import CLI_Guard
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import stat
+import threading
+
 import CLI_Guard
+import CLI_SQL.CLI_Guard_SQL as sqlite
+from cryptography.fernet import Fernet
 from unittest.mock import patch
+from tests.test_cli_guard_sql import SQLTestCase
 
 # Fixed 32-byte salt for testing — avoids database dependency in unit tests
 TEST_SALT = b'\x01' * 32
@@ -273,6 +278,32 @@ class TestStartSessionFromKey(unittest.TestCase):
         self.assertEqual(decrypted, "test_secret")
 
 
+class TestVerifyPasswordHash(unittest.TestCase):
+    """Test the DB-free bcrypt check used by authUser and the TUI worker thread"""
+
+    def setUp(self):
+        self.stored_hash = CLI_Guard.hashPassword("TestPassword123!")
+
+    def test_correct_password(self):
+        """verifyPasswordHash should accept the right password"""
+        self.assertTrue(CLI_Guard.verifyPasswordHash("test_user", "TestPassword123!", self.stored_hash))
+
+    def test_wrong_password(self):
+        """verifyPasswordHash should reject the wrong password"""
+        self.assertFalse(CLI_Guard.verifyPasswordHash("test_user", "nope", self.stored_hash))
+
+    def test_string_hash(self):
+        """verifyPasswordHash should accept a hash stored as text"""
+        self.assertTrue(CLI_Guard.verifyPasswordHash("test_user", "TestPassword123!",
+                                                     self.stored_hash.decode('utf-8')))
+
+    def test_auth_user_delegates(self):
+        """authUser should check the hash from the users table"""
+        with patch('CLI_Guard.sqlite.queryData', return_value=[("test_user", self.stored_hash)]):
+            self.assertTrue(CLI_Guard.authUser("test_user", "TestPassword123!"))
+            self.assertFalse(CLI_Guard.authUser("test_user", "wrong"))
+
+
 class TestAuthenticationError(unittest.TestCase):
     """Test AuthenticationError exception"""
 
@@ -316,6 +347,33 @@ class TestConvenienceFunctions(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             CLI_Guard.getSecret("test_user", "some-account")
 
+    def test_get_secrets_by_accounts_no_session_raises(self):
+        """getSecretsByAccounts should raise RuntimeError if no session"""
+        CLI_Guard.endSession()
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.getSecretsByAccounts("test_user", ["some-account"])
+
+    def test_get_secrets_by_accounts_decrypts_first_match(self):
+        """getSecretsByAccounts should key by account and keep the first row per account"""
+        first = CLI_Guard.encryptPassword("first")
+        second = CLI_Guard.encryptPassword("second")
+        rows = [
+            ("test_user", "Database", "prod-db", "admin", first, "2026-01-01", 1, None),
+            ("test_user", "Database", "prod-db", "readonly", second, "2026-01-02", 2, None),
+        ]
+        with patch('CLI_Guard.sqlite.queryDataByAccounts', return_value=rows) as query:
+            secrets = CLI_Guard.getSecretsByAccounts("test_user", ["prod-db", "other"])
+        query.assert_called_once_with("test_user", ["prod-db", "other"])
+        self.assertEqual(list(secrets), ["prod-db"])
+        self.assertEqual(secrets["prod-db"]["password"], "first")
+        self.assertEqual(secrets["prod-db"]["username"], "admin")
+
+    def test_search_secrets_no_session_raises(self):
+        """searchSecrets should raise RuntimeError if no session"""
+        CLI_Guard.endSession()
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.searchSecrets("test_user", "prod")
+
     def test_add_secret_no_session_raises(self):
         """addSecret should raise RuntimeError if no session"""
         CLI_Guard.endSession()
@@ -358,5 +416,479 @@ class TestConvenienceFunctions(unittest.TestCase):
             self.assertEqual(set(secret.keys()), expected_keys)
 
 
+class TestBuildSearchQuery(unittest.TestCase):
+    """Test translation of search text into FTS5 MATCH expressions"""
+
+    def test_terms_become_prefix_matches(self):
+        """Each term should be quoted and prefix-matched within the metadata columns"""
+        self.assertEqual(
+            CLI_Guard.buildSearchQuery("prod db"),
+            '{category account username} : ("prod"* "db"*)'
+        )
+
+    def test_or_is_kept_between_terms(self):
+        """A bare OR between terms should be passed through as an operator"""
+        self.assertEqual(
+            CLI_Guard.buildSearchQuery("stripe OR paypal"),
+            '{category account username} : ("stripe"* OR "paypal"*)'
+        )
+
+    def test_dangling_or_is_dropped(self):
+        """OR without a term on both sides should be ignored"""
+        self.assertEqual(
+            CLI_Guard.buildSearchQuery("OR stripe OR"),
+            '{category account username} : ("stripe"*)'
+        )
+
+    def test_quoted_phrase(self):
+        """A quoted phrase should stay a single term"""
+        self.assertEqual(
+            CLI_Guard.buildSearchQuery('"api keys"'),
+            '{category account username} : ("api keys"*)'
+        )
+
+    def test_fts_syntax_is_escaped(self):
+        """Double quotes and operators inside terms must be treated as text"""
+        self.assertEqual(
+            CLI_Guard.buildSearchQuery('a"b NEAR(x)'),
+            '{category account username} : ("a""b"* "NEAR(x)"*)'
+        )
+
+    def test_empty_text_returns_empty_query(self):
+        """Text with no terms should produce an empty query"""
+        self.assertEqual(CLI_Guard.buildSearchQuery("   "), "")
+        self.assertEqual(CLI_Guard.buildSearchQuery("*"), "")
+
+
+class TestFuzzyAccounts(unittest.TestCase):
+    """Test fuzzy account suggestions and auto-resolution"""
+
+    def setUp(self):
+        self.salt_patcher = patch('CLI_Guard.sqlite.queryUserSalt', return_value=TEST_SALT.hex())
+        self.names_patcher = patch('CLI_Guard.sqlite.queryAccountNames',
+                                   return_value=["prod-db", "staging-db", "stripe-live"])
+        self.salt_patcher.start()
+        self.mock_names = self.names_patcher.start()
+        CLI_Guard.invalidateAccountNameIndex("test_user")
+        CLI_Guard.startSession("test_user", "TestPassword123!")
+
+    def tearDown(self):
+        CLI_Guard.endSession()
+        CLI_Guard.invalidateAccountNameIndex("test_user")
+        self.names_patcher.stop()
+        self.salt_patcher.stop()
+
+    def test_suggest_accounts_ranks_closest_first(self):
+        """suggestAccounts should put the closest account name first"""
+        self.assertEqual(CLI_Guard.suggestAccounts("test_user", "prd-db")[0][0], "prod-db")
+
+    def test_name_index_is_cached(self):
+        """Repeated suggestions should reuse the cached index (one query)"""
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        CLI_Guard.suggestAccounts("test_user", "stripe")
+        self.assertEqual(self.mock_names.call_count, 1)
+
+    def test_invalidate_rebuilds_index(self):
+        """invalidateAccountNameIndex should force a rebuild on next use"""
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        CLI_Guard.invalidateAccountNameIndex("test_user")
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        self.assertEqual(self.mock_names.call_count, 2)
+
+    def test_name_index_rebuilt_when_data_version_changes(self):
+        """A data version change (e.g. another process writing) should rebuild the index"""
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        with patch('CLI_Guard.sqlite.queryDataVersion', return_value=99):
+            CLI_Guard.suggestAccounts("test_user", "prod")
+            CLI_Guard.suggestAccounts("test_user", "prod")
+        self.assertEqual(self.mock_names.call_count, 2)
+
+    def test_name_index_persists_across_processes(self):
+        """A new process (empty in-memory cache) should load the saved index, not re-query"""
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        CLI_Guard._account_name_indexes.clear()
+        self.assertEqual(CLI_Guard.suggestAccounts("test_user", "prd-db")[0][0], "prod-db")
+        self.assertEqual(self.mock_names.call_count, 1)
+        self.assertEqual(stat.S_IMODE(os.stat(CLI_Guard.completion.name_index_path("test_user")).st_mode), 0o600)
+
+    def test_stale_saved_index_is_rebuilt(self):
+        """A saved index from an older data version should be rebuilt"""
+        CLI_Guard.suggestAccounts("test_user", "prod")
+        CLI_Guard._account_name_indexes.clear()
+        with patch('CLI_Guard.sqlite.queryDataVersion', return_value=99):
+            CLI_Guard.suggestAccounts("test_user", "prod")
+        self.assertEqual(self.mock_names.call_count, 2)
+
+    def test_suggest_accounts_no_session_raises(self):
+        """suggestAccounts should raise RuntimeError if no session"""
+        CLI_Guard.endSession()
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.suggestAccounts("test_user", "prod")
+
+    def test_resolve_picks_clear_winner(self):
+        """resolveFuzzyAccount should pick a high-scoring, clearly-best match"""
+        self.assertEqual(CLI_Guard.resolveFuzzyAccount([("prod-db", 0.8), ("staging-db", 0.4)]), "prod-db")
+
+    def test_resolve_rejects_low_score(self):
+        """resolveFuzzyAccount should not auto-resolve weak matches"""
+        self.assertIsNone(CLI_Guard.resolveFuzzyAccount([("prod-db", 0.4)]))
+
+    def test_resolve_rejects_ambiguous(self):
+        """resolveFuzzyAccount should not pick between near-equal matches"""
+        self.assertIsNone(CLI_Guard.resolveFuzzyAccount([("prod-db", 0.7), ("prod-db2", 0.65)]))
+
+    def test_resolve_empty(self):
+        """resolveFuzzyAccount should return None with no suggestions"""
+        self.assertIsNone(CLI_Guard.resolveFuzzyAccount([]))
+
+
+class TestVault(unittest.TestCase):
+    """Test independent Vault sessions alongside the module-level default"""
+
+    def tearDown(self):
+        CLI_Guard.endSession()
+
+    def test_vaults_keep_separate_keys(self):
+        """Two vaults should each decrypt only their own ciphertext"""
+        alice, bob = CLI_Guard.Vault(), CLI_Guard.Vault()
+        alice.startSessionFromKey("alice", Fernet.generate_key())
+        bob.startSessionFromKey("bob", Fernet.generate_key())
+
+        token = alice.encryptPassword("s3cret")
+        self.assertEqual(alice.decryptPassword(token), "s3cret")
+        with self.assertRaises(Exception):
+            bob.decryptPassword(token)
+
+    def test_vault_does_not_touch_default_session(self):
+        """Starting and ending a Vault should leave the module-level session alone"""
+        key = Fernet.generate_key()
+        CLI_Guard.startSessionFromKey("test_user", key)
+        vault = CLI_Guard.Vault()
+        vault.startSessionFromKey("other", Fernet.generate_key())
+        vault.endSession()
+        self.assertEqual(CLI_Guard.getSessionUser(), "test_user")
+        self.assertEqual(CLI_Guard.getSessionEncryptionKey(), key)
+
+    def test_module_functions_use_default_vault(self):
+        """The module-level session should be the default Vault's"""
+        CLI_Guard.startSessionFromKey("test_user", Fernet.generate_key())
+        self.assertEqual(CLI_Guard.getDefaultVault().user, "test_user")
+        self.assertTrue(CLI_Guard.getDefaultVault().isActive)
+
+    def test_inactive_vault_raises(self):
+        """Secret calls on a vault without a session should raise RuntimeError"""
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.Vault().getSecrets()
+
+    def test_invalid_key_raises(self):
+        """startSessionFromKey should reject keys Fernet cannot use"""
+        with self.assertRaises(ValueError):
+            CLI_Guard.Vault().startSessionFromKey("alice", b"short")
+
+
+class TestVaultOwnConnection(SQLTestCase):
+    """Test a Vault with its own database connection"""
+
+    def test_round_trip_from_another_thread(self):
+        """A vault opened on a db_path should work from any thread and see shared writes"""
+        key = Fernet.generate_key()
+        writer = CLI_Guard.Vault()
+        writer.startSessionFromKey("alice", key)
+        writer.addSecret("Database", "prod-db", "admin", "hunter2")
+
+        with CLI_Guard.Vault(db_path=self.db_path) as reader:
+            reader.startSessionFromKey("alice", key)
+            results = {}
+            thread = threading.Thread(target=lambda: results.update(reader.getSecretsByAccounts(["prod-db"])))
+            thread.start()
+            thread.join()
+        self.assertEqual(results["prod-db"]["password"], "hunter2")
+
+    def test_writes_go_to_own_connection(self):
+        """addSecret on a private connection should be committed and visible to other connections"""
+        with CLI_Guard.Vault(db_path=self.db_path) as vault:
+            vault.startSessionFromKey("bob", Fernet.generate_key())
+            vault.addSecret("Email", "gmail", "bob", "pw")
+        self.assertEqual([row[2] for row in sqlite.queryData("bob", "passwords")], ["gmail"])
+
+
+class TestFindSecret(SQLTestCase):
+    """Test the exact lookup the server's update/delete use"""
+
+    def test_find_secret_is_exact_and_keeps_ciphertext(self):
+        """findSecret should match the account exactly and return the encrypted password"""
+        vault = CLI_Guard.Vault()
+        vault.startSessionFromKey("alice", Fernet.generate_key())
+        vault.addSecret("Database", "prod-db", "admin", "hunter2")
+        vault.addSecret("Database", "prod-db-replica", "admin", "other")
+        found = vault.findSecret("prod-db", username="admin")
+        self.assertEqual(found["account"], "prod-db")
+        self.assertNotEqual(found["password"], "hunter2")
+        self.assertEqual(vault.decryptPassword(found["password"]), "hunter2")
+        self.assertIsNone(vault.findSecret("prod"))
+
+
+class TestListStreaming(SQLTestCase):
+    """Test iterSecretMetadata batching and list cursors"""
+
+    def setUp(self):
+        super().setUp()
+        self.vault = CLI_Guard.Vault()
+        self.vault.startSessionFromKey("alice", Fernet.generate_key())
+        for i in range(9):
+            self.vault.addSecret("General", f"acct-{i:02d}", "admin", f"pw-{i}")
+
+    def test_batches_cover_every_secret_without_passwords(self):
+        """Small batches should still yield every secret once, in order, without passwords"""
+        secrets = list(self.vault.iterSecretMetadata(batch_size=2))
+        self.assertEqual([s["account"] for s in secrets], [f"acct-{i:02d}" for i in range(9)])
+        self.assertTrue(all("password" not in s for s in secrets))
+
+    def test_cursor_resumes_after_last_secret(self):
+        """A cursor from one page should start the next page just after it"""
+        first = list(self.vault.iterSecretMetadata(limit=4))
+        cursor = CLI_Guard.encodeListCursor(first[-1])
+        rest = list(self.vault.iterSecretMetadata(cursor=cursor))
+        self.assertEqual([s["account"] for s in first + rest], [f"acct-{i:02d}" for i in range(9)])
+
+    def test_cursor_round_trip_and_rejects_garbage(self):
+        """decodeListCursor should invert encodeListCursor and reject anything else"""
+        cursor = CLI_Guard.encodeListCursor({"account": "host:5432", "secret_id": 17})
+        self.assertEqual(CLI_Guard.decodeListCursor(cursor), ("host:5432", 17))
+        with self.assertRaises(ValueError):
+            CLI_Guard.decodeListCursor("not-a-cursor!")
+
+    def test_metadata_only_listings_have_no_password(self):
+        """getSecrets/searchSecrets with metadata_only should not return ciphertext"""
+        secrets = self.vault.getSecrets(metadata_only=True)
+        self.assertEqual(len(secrets), 9)
+        self.assertTrue(all(set(s) == {"category", "account", "username", "last_modified", "path"} for s in secrets))
+        found = self.vault.searchSecrets("acct", metadata_only=True)
+        self.assertTrue(found and all("password" not in s for s in found))
+
+    def test_requires_session_at_call_time(self):
+        """Listing without a session should raise before any iteration"""
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.Vault().iterSecretMetadata()
+
+
+class TestSecretHistory(SQLTestCase):
+    """Test reading past versions of a secret"""
+
+    def setUp(self):
+        super().setUp()
+        self.vault = CLI_Guard.Vault()
+        self.vault.startSessionFromKey("alice", Fernet.generate_key())
+        self.vault.addSecret("Database", "prod-db", "admin", "first")
+        old = self.vault.getSecrets()[0]["password"]
+        self.vault.updateSecret("prod-db", "admin", old, "second")
+
+    def test_history_lists_versions_newest_first(self):
+        """getSecretHistory should mark only the newest version current"""
+        history = self.vault.getSecretHistory("prod-db")
+        self.assertEqual([(v["version"], v["current"]) for v in history], [(2, True), (1, False)])
+        self.assertIsNone(self.vault.getSecretHistory("missing"))
+
+    def test_get_version_decrypts_old_password(self):
+        """getSecretVersion should return the old password with its version number"""
+        secret = self.vault.getSecretVersion("prod-db", version=1)
+        self.assertEqual((secret["password"], secret["version"]), ("first", 1))
+        self.assertEqual(self.vault.getSecretVersion("prod-db")["password"], "second")
+        self.assertIsNone(self.vault.getSecretVersion("prod-db", version=9))
+
+    def test_get_version_at_time(self):
+        """at should accept ISO dates and reject anything else"""
+        self.assertEqual(self.vault.getSecretVersion("prod-db", at="2999-01-01")["password"], "second")
+        self.assertIsNone(self.vault.getSecretVersion("prod-db", at="2000-01-01"))
+        with self.assertRaises(ValueError):
+            self.vault.getSecretVersion("prod-db", at="last tuesday")
+
+    def test_version_by_path_reads_that_secrets_history(self):
+        """getSecretVersionByPath should not fall back to another secret with the same account/username"""
+        self.vault.addSecret("Database", "prod-db", "admin", "pathed-first", path="prod/db")
+        pathed = self.vault.getSecretByPath("prod/db")
+        self.vault.updateSecret("prod-db", "admin", sqlite.queryDataByPath("alice", "prod/db")[4], "pathed-second")
+        self.assertEqual(pathed["password"], "pathed-first")
+        self.assertEqual(self.vault.getSecretVersionByPath("prod/db", version=1)["password"], "pathed-first")
+        self.assertEqual(self.vault.getSecretVersionByPath("prod/db")["password"], "pathed-second")
+        self.assertEqual(self.vault.getSecretVersion("prod-db", version=1)["password"], "first")
+        self.assertIsNone(self.vault.getSecretVersionByPath("prod/none"))
+
+    def test_normalize_timestamp(self):
+        """normalizeTimestamp should produce the stored YYYY-MM-DD HH:MM:SS form"""
+        self.assertEqual(CLI_Guard.normalizeTimestamp("2026-03-01"), "2026-03-01 00:00:00")
+        self.assertEqual(CLI_Guard.normalizeTimestamp("2026-03-01T14:30"), "2026-03-01 14:30:00")
+
+
+class TestAddSecretTags(SQLTestCase):
+    """Test tagging a secret as it is added"""
+
+    def test_tags_land_on_the_new_secret(self):
+        """Tags given to addSecret should go on the inserted row, not an older duplicate"""
+        vault = CLI_Guard.Vault()
+        vault.startSessionFromKey("alice", Fernet.generate_key())
+        older = vault.addSecret("Database", "prod-db", "admin", "first")
+        newer = vault.addSecret("Database", "prod-db", "admin", "second", tags=["deploy"])
+        self.assertNotEqual(older, newer)
+        self.assertEqual(sqlite.queryTags("alice", newer), ["deploy"])
+        self.assertEqual(sqlite.queryTags("alice", older), [])
+
+
+class TestMigrateUserSalt(SQLTestCase):
+    """Test re-encrypting a legacy-salt user's secrets and history"""
+
+    def setUp(self):
+        super().setUp()
+        sqlite.insertUser("carol", b"hash", None)
+        self.vault = CLI_Guard.Vault()
+        self.vault.startSessionFromKey("carol", CLI_Guard.deriveEncryptionKey("pw", CLI_Guard.LEGACY_SALT))
+        self.vault.addSecret("Database", "prod-db", "admin", "first")
+        self.vault.updateSecret("prod-db", "admin", self.vault.getSecrets()[0]["password"], "second")
+
+    def test_history_survives_migration(self):
+        """After add, update and migrate, every version should decrypt and no version should be added"""
+        self.assertTrue(CLI_Guard.migrateUserSalt("carol", "pw"))
+        vault = CLI_Guard.Vault()
+        vault.startSessionFromKey("carol", CLI_Guard.deriveEncryptionKey(
+            "pw", bytes.fromhex(sqlite.queryUserSalt("carol"))))
+
+        self.assertEqual([v["version"] for v in vault.getSecretHistory("prod-db")], [2, 1])
+        self.assertEqual(vault.getSecretVersion("prod-db", version=1)["password"], "first")
+        self.assertEqual(vault.getSecretVersion("prod-db", version=2)["password"], "second")
+        self.assertEqual(vault.getSecret("prod-db")["password"], "second")
+        self.assertFalse(CLI_Guard.migrateUserSalt("carol", "pw"))
+
+    def test_wrong_password_changes_nothing(self):
+        """A key that cannot decrypt the secrets should leave the user unmigrated"""
+        with self.assertRaises(RuntimeError):
+            CLI_Guard.migrateUserSalt("carol", "wrong")
+        self.assertIsNone(sqlite.queryUserSalt("carol"))
+
+
+class TestLoginRateLimit(SQLTestCase):
+    """Test DB-backed failed sign-in tracking and backoff"""
+
+    def setUp(self):
+        super().setUp()
+        sqlite.insertUser("carol", CLI_Guard.hashPassword("CarolPass123!"), CLI_Guard.generateSalt().hex())
+
+    def test_free_attempts_then_backoff_doubles(self):
+        """No wait until LOGIN_FREE_ATTEMPTS failures, then the wait doubles per failure"""
+        with patch("CLI_Guard.time.time", return_value=1000.0):
+            for _ in range(CLI_Guard.LOGIN_FREE_ATTEMPTS - 1):
+                CLI_Guard.recordFailedLogin("carol")
+            self.assertEqual(CLI_Guard.loginRetryAfter("carol"), 0)
+            CLI_Guard.recordFailedLogin("carol")
+            first = CLI_Guard.loginRetryAfter("carol")
+            CLI_Guard.recordFailedLogin("carol")
+            self.assertEqual(CLI_Guard.loginRetryAfter("carol"), first * 2)
+        self.assertEqual(first, CLI_Guard.LOGIN_BACKOFF_BASE_SECONDS)
+
+    def test_failures_outside_window_are_forgotten(self):
+        """The window slides: old failures stop counting and are pruned"""
+        with patch("CLI_Guard.time.time", return_value=1000.0):
+            for _ in range(5):
+                CLI_Guard.recordFailedLogin("carol")
+        later = 1000.0 + CLI_Guard.LOGIN_WINDOW_SECONDS + 1
+        with patch("CLI_Guard.time.time", return_value=later):
+            self.assertEqual(CLI_Guard.loginRetryAfter("carol"), 0)
+            self.assertEqual(CLI_Guard.recordFailedLogin("carol"), 1)
+        self.assertEqual(sqlite.queryLoginAttempts("carol", 0)[0], 1)
+
+    def test_auth_user_refuses_without_hashing_while_limited(self):
+        """authUser should not call bcrypt while the user must wait"""
+        for _ in range(CLI_Guard.LOGIN_FREE_ATTEMPTS):
+            self.assertFalse(CLI_Guard.authUser("carol", "wrong"))
+        with patch("CLI_Guard.verifyPasswordHash") as verify:
+            self.assertFalse(CLI_Guard.authUser("carol", "CarolPass123!"))
+        verify.assert_not_called()
+        with self.assertRaises(CLI_Guard.LoginRateLimitedError):
+            CLI_Guard.checkLoginAllowed("carol")
+
+    def test_success_clears_failures(self):
+        """A successful sign-in should reset the user's failure count"""
+        CLI_Guard.authUser("carol", "wrong")
+        self.assertTrue(CLI_Guard.authUser("carol", "CarolPass123!"))
+        self.assertEqual(sqlite.queryLoginAttempts("carol", 0)[0], 0)
+
+    def test_unknown_users_are_limited_too(self):
+        """Failures for usernames that don't exist should be counted as well"""
+        for _ in range(CLI_Guard.LOGIN_FREE_ATTEMPTS):
+            CLI_Guard.authUser("nobody", "guess")
+        self.assertGreater(CLI_Guard.loginRetryAfter("nobody"), 0)
+
+
+class TestVaultCache(SQLTestCase):
+    """Test the opt-in decrypted-secret cache on a Vault"""
+
+    def setUp(self):
+        super().setUp()
+        self.vault = CLI_Guard.Vault(cache=CLI_Guard.SecretCache())
+        self.vault.startSessionFromKey("alice", Fernet.generate_key())
+        self.vault.addSecret("Database", "prod-db", "admin", "hunter2")
+
+    def tearDown(self):
+        self.vault.endSession()
+        super().tearDown()
+
+    def test_repeat_get_skips_query(self):
+        """A second getSecret should be served from the cache"""
+        self.vault.getSecret("prod-db")
+        with patch('CLI_Guard.sqlite.queryData') as query:
+            self.assertEqual(self.vault.getSecret("prod-db")["password"], "hunter2")
+        query.assert_not_called()
+        self.assertEqual(self.vault.cache.stats()["hits"], 1)
+
+    def test_hit_has_same_fields_as_miss(self):
+        """A cached secret should carry every field a fresh read does, path included"""
+        self.vault.addSecret("Email", "gmail", "me", "pw", path="personal/gmail")
+        miss = self.vault.getSecret("gmail")
+        hit = self.vault.getSecret("gmail")
+        self.assertEqual(self.vault.cache.stats()["hits"], 1)
+        self.assertEqual(sorted(hit), sorted(miss))
+        self.assertEqual(hit, miss)
+
+    def test_get_many_queries_only_misses(self):
+        """getSecretsByAccounts should only query accounts not already cached"""
+        self.vault.addSecret("Email", "gmail", "me", "pw")
+        self.vault.getSecret("prod-db")
+        with patch('CLI_Guard.sqlite.queryDataByAccounts', wraps=sqlite.queryDataByAccounts) as query:
+            secrets = self.vault.getSecretsByAccounts(["prod-db", "gmail"])
+        query.assert_called_once_with("alice", ["gmail"])
+        self.assertEqual(secrets["prod-db"]["password"], "hunter2")
+        self.assertEqual(secrets["gmail"]["password"], "pw")
+
+    def test_update_invalidates(self):
+        """updateSecret should drop the cached value so the new one is read"""
+        old = self.vault.getSecrets()[0]["password"]
+        self.vault.getSecret("prod-db")
+        self.vault.updateSecret("prod-db", "admin", old, "new-pass")
+        self.assertEqual(self.vault.getSecret("prod-db")["password"], "new-pass")
+
+    def test_end_session_clears_user_entries(self):
+        """Ending the session should drop the user's cached plaintext"""
+        self.vault.getSecret("prod-db")
+        self.vault.endSession()
+        self.assertEqual(len(self.vault.cache), 0)
+
+    def test_external_write_invalidates(self):
+        """A change made through another connection should be picked up via the data version"""
+        self.vault.getSecret("prod-db")
+        other = CLI_Guard.Vault(db_path=self.db_path)
+        other.startSessionFromKey("alice", self.vault.encryptionKey)
+        other.updateSecret("prod-db", "admin", self.vault.getSecrets()[0]["password"], "rotated")
+        other.close()
+        self.assertEqual(self.vault.getSecret("prod-db")["password"], "rotated")
+
+    def test_module_level_enable_disable(self):
+        """enableSecretCache/disableSecretCache should toggle the default vault's cache"""
+        try:
+            CLI_Guard.enableSecretCache(ttl=60)
+            self.assertEqual(CLI_Guard.getSecretCacheStats()["entries"], 0)
+        finally:
+            CLI_Guard.disableSecretCache()
+        self.assertIsNone(CLI_Guard.getSecretCacheStats())
+
+
 if __name__ == '__main__':
     unittest.main()
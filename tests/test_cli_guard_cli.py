@@ -6,8 +6,11 @@ without touching the database or encryption layer.
 """
 
 import unittest
+import json
 import sys
 import os
+import shutil
+import tempfile
 from unittest.mock import patch
 from io import StringIO
 
@@ -43,6 +46,13 @@ class TestBuildParser(unittest.TestCase):
         with self.assertRaises(SystemExit):
             self.parser.parse_args(["get", "--user", "admin"])
 
+    def test_get_by_path(self):
+        """get --path looks a secret up by path instead of --account, never both"""
+        args = self.parser.parse_args(["get", "--user", "admin", "--path", "prod/payments/stripe"])
+        self.assertEqual((args.path, args.account), ("prod/payments/stripe", None))
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["get", "--user", "admin", "--account", "a", "--path", "p"])
+
     def test_get_field_default_is_password(self):
         """get --field defaults to 'password'"""
         args = self.parser.parse_args(["get", "--user", "admin", "--account", "prod-db"])
@@ -89,6 +99,13 @@ class TestBuildParser(unittest.TestCase):
                 "get", "--user", "admin", "--account", "prod-db", "--password", "secret"
             ])
 
+    def test_get_fuzzy_flag(self):
+        """get --fuzzy defaults to False and can be enabled"""
+        args = self.parser.parse_args(["get", "--user", "admin", "--account", "prod-db"])
+        self.assertFalse(args.fuzzy)
+        args = self.parser.parse_args(["get", "--user", "admin", "--account", "prod-db", "--fuzzy"])
+        self.assertTrue(args.fuzzy)
+
     # --- list subcommand ---
 
     def test_list_requires_user(self):
@@ -107,11 +124,52 @@ class TestBuildParser(unittest.TestCase):
         args = self.parser.parse_args(["list", "--user", "admin", "--json"])
         self.assertTrue(args.json)
 
+    def test_list_match_option(self):
+        """list --match accepts a term and defaults to None"""
+        args = self.parser.parse_args(["list", "--user", "admin"])
+        self.assertIsNone(args.match)
+        args = self.parser.parse_args(["list", "--user", "admin", "--match", "prod"])
+        self.assertEqual(args.match, "prod")
+
     def test_list_rejects_password_flag(self):
         """list should NOT accept --password"""
         with self.assertRaises(SystemExit):
             self.parser.parse_args(["list", "--user", "admin", "--password", "secret"])
 
+    def test_list_prefix_option(self):
+        """list --prefix accepts a path prefix and defaults to None"""
+        args = self.parser.parse_args(["list", "--user", "admin"])
+        self.assertIsNone(args.prefix)
+        args = self.parser.parse_args(["list", "--user", "admin", "--prefix", "prod/payments/"])
+        self.assertEqual(args.prefix, "prod/payments/")
+
+    def test_list_tag_option_repeats(self):
+        """list --tag may be given several times and defaults to None"""
+        args = self.parser.parse_args(["list", "--user", "admin"])
+        self.assertIsNone(args.tag)
+        args = self.parser.parse_args(["list", "--user", "admin", "--tag", "service=payments", "--tag", "env=prod"])
+        self.assertEqual(args.tag, ["service=payments", "env=prod"])
+
+    # --- search subcommand ---
+
+    def test_search_collects_terms(self):
+        """search should collect positional terms"""
+        args = self.parser.parse_args(["search", "--user", "admin", "prod", "db"])
+        self.assertEqual(args.command, "search")
+        self.assertEqual(args.terms, ["prod", "db"])
+
+    def test_search_requires_terms(self):
+        """search without terms should cause an error"""
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["search", "--user", "admin"])
+
+    def test_search_limit_default_and_custom(self):
+        """search --limit defaults to 50 and accepts a custom value"""
+        args = self.parser.parse_args(["search", "--user", "admin", "prod"])
+        self.assertEqual(args.limit, 50)
+        args = self.parser.parse_args(["search", "--user", "admin", "prod", "--limit", "5"])
+        self.assertEqual(args.limit, 5)
+
     # --- add subcommand ---
 
     def test_add_requires_all_fields(self):
@@ -170,6 +228,32 @@ class TestBuildParser(unittest.TestCase):
         ])
         self.assertEqual(args.secret_username, "dbadmin")
 
+    # --- set-path subcommand ---
+
+    def test_set_path_requires_path_or_clear(self):
+        """set-path needs exactly one of --path and --clear"""
+        args = self.parser.parse_args([
+            "set-path", "--user", "admin", "--account", "stripe", "--path", "prod/payments/stripe"
+        ])
+        self.assertEqual((args.command, args.path, args.clear), ("set-path", "prod/payments/stripe", False))
+        args = self.parser.parse_args(["set-path", "--user", "admin", "--account", "stripe", "--clear"])
+        self.assertTrue(args.clear)
+        for extra in ([], ["--path", "a/b", "--clear"]):
+            with self.assertRaises(SystemExit):
+                self.parser.parse_args(["set-path", "--user", "admin", "--account", "stripe", *extra])
+
+    # --- tag subcommand ---
+
+    def test_tag_add_and_remove(self):
+        """tag takes repeatable --add and --remove, both defaulting to empty"""
+        args = self.parser.parse_args(["tag", "--user", "admin", "--account", "stripe"])
+        self.assertEqual((args.command, args.add, args.remove), ("tag", [], []))
+        args = self.parser.parse_args([
+            "tag", "--user", "admin", "--account", "stripe",
+            "--add", "service=payments", "--add", "deploy", "--remove", "old"
+        ])
+        self.assertEqual((args.add, args.remove), (["service=payments", "deploy"], ["old"]))
+
     # --- delete subcommand ---
 
     def test_delete_requires_user_and_account(self):
@@ -271,6 +355,72 @@ class TestBuildParser(unittest.TestCase):
         self.assertEqual(args.token_command, "revoke")
         self.assertEqual(args.token_id, "cg_svc_abc123")
 
+    # --- exec subcommand ---
+
+    def test_exec_collects_maps_and_command(self):
+        """exec accepts repeated --map and keeps the command after --"""
+        args = self.parser.parse_args([
+            "exec", "--user", "admin", "--map", "DB_PASS=prod-db",
+            "--map", "DB_USER=prod-db:username", "--", "./deploy.sh", "--prod"
+        ])
+        self.assertEqual(args.map, ["DB_PASS=prod-db", "DB_USER=prod-db:username"])
+        self.assertEqual(args.cmd, ["--", "./deploy.sh", "--prod"])
+
+    def test_exec_requires_map(self):
+        """exec without --map should cause an error"""
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["exec", "--user", "admin", "--", "true"])
+
+    # --- render subcommand ---
+
+    def test_render_accepts_template_and_output(self):
+        """render takes a template path and optional -o"""
+        args = self.parser.parse_args(["render", "--user", "admin", "app.conf.in", "-o", "app.conf"])
+        self.assertEqual(args.template, "app.conf.in")
+        self.assertEqual(args.output, "app.conf")
+
+    # --- history / get --version ---
+
+    def test_history_requires_account(self):
+        """history needs --user and --account"""
+        args = self.parser.parse_args(["history", "--user", "admin", "--account", "prod-db"])
+        self.assertEqual((args.command, args.account), ("history", "prod-db"))
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["history", "--user", "admin"])
+
+    def test_get_version_and_at_are_exclusive(self):
+        """get accepts --version or --at, not both"""
+        args = self.parser.parse_args(["get", "--user", "admin", "--account", "prod-db", "--version", "3"])
+        self.assertEqual(args.version, 3)
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["get", "--user", "admin", "--account", "prod-db",
+                                    "--version", "3", "--at", "2026-01-01"])
+
+    # --- db subcommands ---
+
+    def test_db_backup_and_restore(self):
+        """db backup takes a directory and --full; db restore needs --output"""
+        args = self.parser.parse_args(["db", "backup", "/srv/backups", "--full"])
+        self.assertEqual((args.command, args.db_command, args.backup_dir, args.full),
+                         ("db", "backup", "/srv/backups", True))
+        args = self.parser.parse_args(["db", "restore", "/srv/backups", "-o", "restored.db", "--until", "abc"])
+        self.assertEqual((args.output, args.until), ("restored.db", "abc"))
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["db", "restore", "/srv/backups"])
+
+    # --- completion subcommand ---
+
+    def test_completion_accepts_known_shells(self):
+        """completion takes bash, zsh or fish"""
+        args = self.parser.parse_args(["completion", "fish"])
+        self.assertEqual(args.command, "completion")
+        self.assertEqual(args.shell, "fish")
+
+    def test_completion_rejects_unknown_shell(self):
+        """completion with an unsupported shell should cause an error"""
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(["completion", "tcsh"])
+
     # --- no subcommand ---
 
     def test_no_command_sets_none(self):
@@ -324,6 +474,22 @@ class TestResolvePasswordForAuth(unittest.TestCase):
                 self.assertEqual(result, "env_pass")
 
 
+class TestAuthenticate(unittest.TestCase):
+    """Test password authentication for auth commands"""
+
+    def test_rate_limited_exits_before_auth(self):
+        """A rate-limited user should get EXIT_AUTH_FAILURE without a password check"""
+        with patch("CLI_Guard_CLI.CLI_Guard.isAccountLocked", return_value=False), \
+             patch("CLI_Guard_CLI.CLI_Guard.loginRetryAfter", return_value=12.0), \
+             patch("CLI_Guard_CLI.CLI_Guard.authUser") as auth, \
+             patch("sys.stderr", new_callable=StringIO) as err:
+            with self.assertRaises(SystemExit) as ctx:
+                CLI_Guard_CLI._authenticate("admin", "pw")
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_AUTH_FAILURE)
+        self.assertIn("try again in 13 seconds", err.getvalue())
+        auth.assert_not_called()
+
+
 class TestResolveAuth(unittest.TestCase):
     """Test token-based auth resolution for data commands"""
 
@@ -343,6 +509,348 @@ class TestResolveAuth(unittest.TestCase):
         self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_ERROR)
 
 
+class TestCompletion(unittest.TestCase):
+    """Test completion script generation and the metadata cache refresh"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = patch.object(CLI_Guard_CLI.completion, "CACHE_DIR", os.path.join(self.temp_dir, "cache"))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_completion_commands_cover_subcommands(self):
+        """Every subcommand, nested token subcommand and its options should be listed"""
+        commands = CLI_Guard_CLI._completion_commands(CLI_Guard_CLI.build_parser())
+        self.assertIn("--account", commands["get"])
+        self.assertIn("--user", commands["token create"])
+        self.assertIn("create", commands["token"])
+        self.assertEqual(sorted(commands["completion"])[-3:], ["bash", "fish", "zsh"])
+
+    def test_refresh_writes_cache_once_per_version(self):
+        """The cache should be rewritten only when the data version moves"""
+        with patch("CLI_Guard_CLI.CLI_Guard.getDataVersion", return_value=4), \
+                patch("CLI_Guard_CLI.CLI_Guard.getSecretNames",
+                      return_value=(["prod-db"], ["Database"])) as names:
+            CLI_Guard_CLI._refresh_completion_cache("admin")
+            CLI_Guard_CLI._refresh_completion_cache("admin")
+        names.assert_called_once_with("admin")
+        cached = CLI_Guard_CLI.completion.read_metadata_cache("admin")
+        self.assertEqual((cached["data_version"], cached["accounts"]), (4, ["prod-db"]))
+
+    def test_refresh_failure_is_ignored(self):
+        """A failing refresh must not break the command that triggered it"""
+        with patch("CLI_Guard_CLI.CLI_Guard.getDataVersion", return_value=1), \
+                patch("CLI_Guard_CLI.CLI_Guard.getSecretNames", side_effect=RuntimeError("no session")):
+            CLI_Guard_CLI._refresh_completion_cache("admin")
+        self.assertIsNone(CLI_Guard_CLI.completion.read_metadata_cache("admin"))
+
+
+class TestList(unittest.TestCase):
+    """Test list output formats and paging"""
+
+    SECRETS = [{"category": "General", "account": f"acct-{i}", "username": "admin",
+                "last_modified": "2026-01-01", "secret_id": i} for i in range(5)]
+
+    def run_list(self, argv):
+        args = CLI_Guard_CLI.build_parser().parse_args(["list", "--user", "admin"] + argv)
+
+        def iterate(user, cursor=None, limit=None):
+            start = CLI_Guard_CLI.CLI_Guard.decodeListCursor(cursor)[1] + 1 if cursor else 0
+            return iter(self.SECRETS[start:start + limit if limit else None])
+
+        with patch("CLI_Guard_CLI._resolve_auth"), \
+             patch("CLI_Guard_CLI.CLI_Guard.iterSecretMetadata", side_effect=iterate), \
+             patch("CLI_Guard_CLI.CLI_Guard.endSession"), \
+             patch("sys.stdout", new_callable=StringIO) as out, \
+             patch("sys.stderr", new_callable=StringIO) as err:
+            CLI_Guard_CLI.cmd_list(args)
+        return out.getvalue(), err.getvalue()
+
+    def test_json_matches_json_dumps(self):
+        """Streamed --json output should be identical to dumping the whole list"""
+        out, _ = self.run_list(["--json"])
+        expected = [{k: v for k, v in s.items() if k != "secret_id"} for s in self.SECRETS]
+        self.assertEqual(out, json.dumps(expected, indent=2) + "\n")
+
+    def test_ndjson_one_object_per_line(self):
+        """--ndjson should print one JSON object per secret"""
+        out, _ = self.run_list(["--ndjson"])
+        lines = out.splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])["account"], "acct-0")
+
+    def test_limit_prints_next_cursor_and_resumes(self):
+        """--limit should stop early and print a cursor that resumes after the last row"""
+        out, err = self.run_list(["--ndjson", "--limit", "2"])
+        self.assertEqual([json.loads(line)["account"] for line in out.splitlines()], ["acct-0", "acct-1"])
+        cursor = err.split("next_cursor: ")[1].strip()
+
+        out, err = self.run_list(["--ndjson", "--limit", "3", "--cursor", cursor])
+        self.assertEqual([json.loads(line)["account"] for line in out.splitlines()], ["acct-2", "acct-3", "acct-4"])
+        self.assertNotIn("next_cursor", err)
+
+    def test_bad_cursor_exits_with_error(self):
+        """A malformed --cursor should exit with EXIT_ERROR"""
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_list(["--cursor", "!!"])
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_ERROR)
+
+    def test_limit_refused_with_prefix_or_tag(self):
+        """--limit with --prefix or --tag should be refused rather than truncate without a cursor"""
+        for extra in (["--prefix", "prod/"], ["--tag", "deploy"]):
+            with self.assertRaises(SystemExit) as ctx:
+                self.run_list(["--limit", "2"] + extra)
+            self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_ERROR)
+
+    def test_json_and_ndjson_are_exclusive(self):
+        """--json and --ndjson together should be rejected by the parser"""
+        with self.assertRaises(SystemExit):
+            with patch("sys.stderr", new_callable=StringIO):
+                CLI_Guard_CLI.build_parser().parse_args(["list", "--user", "admin", "--json", "--ndjson"])
+
+
+class TestDb(unittest.TestCase):
+    """Test db backup/restore output and error handling"""
+
+    def run_db(self, argv):
+        args = CLI_Guard_CLI.build_parser().parse_args(["db"] + argv)
+        with patch("sys.stdout", new_callable=StringIO) as out, \
+             patch("sys.stderr", new_callable=StringIO) as err:
+            args.func(args)
+        return out.getvalue(), err.getvalue()
+
+    def test_backup_prints_snapshot_path(self):
+        """db backup should print the snapshot path to stdout and a summary to stderr"""
+        info = {"path": "/srv/backups/cli-guard-x.db", "kind": "incremental", "secrets": 3, "parent_id": "abc"}
+        with patch("CLI_Guard_CLI.backup.backupDatabase", return_value=info) as backup_database:
+            out, err = self.run_db(["backup", "/srv/backups"])
+        backup_database.assert_called_once_with("/srv/backups", full=False, vacuum=False, progress=None)
+        self.assertEqual(out, "/srv/backups/cli-guard-x.db\n")
+        self.assertIn("3 changed secrets", err)
+
+    def test_backup_error_exits_with_db_error(self):
+        """A failed backup should exit with EXIT_DB_ERROR"""
+        with patch("CLI_Guard_CLI.backup.backupDatabase", side_effect=CLI_Guard_CLI.backup.BackupError("disk full")):
+            with self.assertRaises(SystemExit) as ctx:
+                self.run_db(["backup", "/srv/backups"])
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_DB_ERROR)
+
+    def test_restore_passes_until(self):
+        """db restore should pass --until through and print the output path"""
+        chain = [{"snapshot_id": "abc", "created_at": "2026-01-01 00:00:00.000000"}]
+        with patch("CLI_Guard_CLI.backup.restoreDatabase", return_value=chain) as restore_database:
+            out, _ = self.run_db(["restore", "/srv/backups", "-o", "restored.db", "--until", "abc"])
+        restore_database.assert_called_once_with("/srv/backups", "restored.db", until="abc")
+        self.assertEqual(out, "restored.db\n")
+
+
+    def test_maintain_stops_on_integrity_failure(self):
+        """db maintain should exit with EXIT_DB_ERROR and change nothing if the check fails"""
+        with patch("CLI_Guard_CLI.sqlite.ensure_connection", return_value=True), \
+             patch("CLI_Guard_CLI.sqlite.checkIntegrity", return_value=["page 7: corrupt"]), \
+             patch("CLI_Guard_CLI.sqlite.vacuumDatabase") as vacuum:
+            with self.assertRaises(SystemExit) as ctx:
+                self.run_db(["maintain"])
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_DB_ERROR)
+        vacuum.assert_not_called()
+
+    def test_maintain_runs_every_step(self):
+        """db maintain should optimize, analyze and vacuum (unless --no-vacuum)"""
+        with patch("CLI_Guard_CLI.sqlite.ensure_connection", return_value=True), \
+             patch("CLI_Guard_CLI.sqlite.checkIntegrity", return_value=["ok"]), \
+             patch("CLI_Guard_CLI.sqlite.optimizeSearchIndex", return_value=True), \
+             patch("CLI_Guard_CLI.sqlite.analyzeDatabase", return_value=True) as analyze, \
+             patch("CLI_Guard_CLI.sqlite.vacuumDatabase", return_value=(8192, 4096)) as vacuum:
+            _, err = self.run_db(["maintain"])
+            self.run_db(["maintain", "--no-vacuum"])
+        self.assertEqual(analyze.call_count, 2)
+        vacuum.assert_called_once_with()
+        self.assertIn("8.0 KiB -> 4.0 KiB", err)
+
+    def test_stats_json(self):
+        """db stats --json should print the stats with users and objects as objects"""
+        stats = {"page_size": 4096, "page_count": 10, "freelist_count": 2, "file_bytes": 40960,
+                 "free_bytes": 8192, "tables": {"passwords": 3}, "users": [("alice", 3)],
+                 "objects": [("passwords", "table", "passwords", 4096, None)]}
+        with patch("CLI_Guard_CLI.sqlite.ensure_connection", return_value=True), \
+             patch("CLI_Guard_CLI.sqlite.queryDatabaseStats", return_value=stats):
+            out, _ = self.run_db(["stats", "--json"])
+        data = json.loads(out)
+        self.assertEqual(data["users"], [{"user": "alice", "secrets": 3}])
+        self.assertEqual(data["objects"][0]["bytes"], 4096)
+
+
+class TestExec(unittest.TestCase):
+    """Test exec mapping parsing and environment injection"""
+
+    SECRETS = {
+        "prod-db": {"category": "Database", "account": "prod-db", "username": "dbadmin",
+                    "password": "s3cret", "last_modified": "2026-01-01"},
+        "host:5432": {"category": "Database", "account": "host:5432", "username": "pg",
+                      "password": "pg-pass", "last_modified": "2026-01-01"},
+    }
+
+    def test_parse_mapping_defaults_to_password(self):
+        """ENV=account should map to the password field"""
+        self.assertEqual(CLI_Guard_CLI._parse_env_mapping("DB_PASS=prod-db"), ("DB_PASS", "prod-db", "password"))
+
+    def test_parse_mapping_with_field(self):
+        """ENV=account:field should select the field"""
+        self.assertEqual(CLI_Guard_CLI._parse_env_mapping("U=prod-db:username"), ("U", "prod-db", "username"))
+
+    def test_parse_mapping_account_with_colon(self):
+        """Only a trailing known field is split off the account"""
+        self.assertEqual(CLI_Guard_CLI._parse_env_mapping("P=host:5432"), ("P", "host:5432", "password"))
+
+    def test_parse_mapping_rejects_bad_specs(self):
+        """Malformed mappings should raise ValueError"""
+        for spec in ("nodelimiter", "1BAD=prod-db", "BAD-NAME=prod-db", "P=", "P=:username"):
+            with self.assertRaises(ValueError, msg=spec):
+                CLI_Guard_CLI._parse_env_mapping(spec)
+
+    def run_exec(self, maps, cmd=("--", "env")):
+        args = CLI_Guard_CLI.build_parser().parse_args(
+            ["exec", "--user", "admin"] + [f"--map={m}" for m in maps] + list(cmd)
+        )
+        with patch("CLI_Guard_CLI._resolve_auth"), \
+             patch("CLI_Guard_CLI.CLI_Guard.getSecretsByAccounts",
+                   side_effect=lambda user, accounts: {a: self.SECRETS[a] for a in accounts if a in self.SECRETS}) as lookup, \
+             patch("CLI_Guard_CLI.CLI_Guard.endSession"), \
+             patch("CLI_Guard_CLI.os.execvpe") as execvpe, \
+             patch.dict(os.environ, {"CLIGUARD_SESSION": "cg_ses_x"}):
+            CLI_Guard_CLI.cmd_exec(args)
+        return lookup, execvpe
+
+    def test_exec_injects_env_with_one_lookup(self):
+        """All mappings should resolve in one batch and be passed to the child"""
+        lookup, execvpe = self.run_exec(["DB_PASS=prod-db", "DB_USER=prod-db:username", "PG=host:5432"])
+        self.assertEqual(lookup.call_count, 1)
+        file, argv, env = execvpe.call_args[0]
+        self.assertEqual((file, argv), ("env", ["env"]))
+        self.assertEqual((env["DB_PASS"], env["DB_USER"], env["PG"]), ("s3cret", "dbadmin", "pg-pass"))
+        self.assertNotIn("CLIGUARD_SESSION", env)
+
+    def test_exec_missing_account_exits_not_found(self):
+        """An unknown account should exit with EXIT_NOT_FOUND without running the command"""
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_exec(["DB_PASS=nope"])
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_NOT_FOUND)
+
+    def test_exec_without_command_exits(self):
+        """exec with no command should exit with EXIT_ERROR"""
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_exec(["DB_PASS=prod-db"], cmd=("--",))
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_ERROR)
+
+
+class TestRender(unittest.TestCase):
+    """Test template placeholder scanning and rendering"""
+
+    SECRETS = TestExec.SECRETS
+
+    TEMPLATE = (
+        'db_password = {{ cliguard "prod-db" }}\n'
+        'db_user = {{cliguard "prod-db" "username"}}\n'
+        'replica_password = {{ cliguard "prod-db" "password" }}\n'
+        'pg = {{ cliguard "host:5432" }} # plain text {{ not a ref }}\n'
+    )
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.temp_dir, "app.conf.in")
+        with open(self.template_path, "w", encoding="utf-8") as f:
+            f.write(self.TEMPLATE)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_scan_dedupes_references(self):
+        """Repeated references should be collected once, in first-seen order"""
+        refs = CLI_Guard_CLI._scan_template_refs(self.TEMPLATE.splitlines())
+        self.assertEqual(refs, [("prod-db", "password"), ("prod-db", "username"), ("host:5432", "password")])
+
+    def test_scan_unescapes_quotes(self):
+        """Backslash-escaped quotes inside a reference should be unescaped"""
+        refs = CLI_Guard_CLI._scan_template_refs(['{{ cliguard "say \\"hi\\"" }}'])
+        self.assertEqual(refs, [('say "hi"', "password")])
+
+    def run_render(self, extra=()):
+        args = CLI_Guard_CLI.build_parser().parse_args(
+            ["render", "--user", "admin", self.template_path] + list(extra)
+        )
+        with patch("CLI_Guard_CLI._resolve_auth"), \
+             patch("CLI_Guard_CLI.CLI_Guard.getSecretsByAccounts",
+                   side_effect=lambda user, accounts: {a: self.SECRETS[a] for a in accounts if a in self.SECRETS}) as lookup, \
+             patch("CLI_Guard_CLI.CLI_Guard.endSession"), \
+             patch("sys.stdout", new_callable=StringIO) as stdout:
+            CLI_Guard_CLI.cmd_render(args)
+        return lookup, stdout.getvalue()
+
+    def test_render_substitutes_with_one_lookup(self):
+        """All placeholders should be filled from a single batched lookup"""
+        lookup, output = self.run_render()
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(output, (
+            "db_password = s3cret\n"
+            "db_user = dbadmin\n"
+            "replica_password = s3cret\n"
+            "pg = pg-pass # plain text {{ not a ref }}\n"
+        ))
+
+    def test_render_to_private_file(self):
+        """-o should write the rendered file with owner-only permissions"""
+        out_path = os.path.join(self.temp_dir, "app.conf")
+        self.run_render(["-o", out_path])
+        with open(out_path, encoding="utf-8") as f:
+            self.assertIn("db_user = dbadmin", f.read())
+        self.assertEqual(os.stat(out_path).st_mode & 0o777, 0o600)
+
+    def test_render_over_existing_file_is_private(self):
+        """-o onto an existing world-readable file should leave it owner-only"""
+        out_path = os.path.join(self.temp_dir, "app.conf")
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write("old contents\n")
+        os.chmod(out_path, 0o644)
+        self.run_render(["-o", out_path])
+        self.assertEqual(os.stat(out_path).st_mode & 0o777, 0o600)
+        with open(out_path, encoding="utf-8") as f:
+            self.assertEqual(f.readline(), "db_password = s3cret\n")
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["app.conf", "app.conf.in"])
+
+    def test_render_missing_account_exits_not_found(self):
+        """An unknown account should exit with EXIT_NOT_FOUND before writing output"""
+        with open(self.template_path, "a", encoding="utf-8") as f:
+            f.write('x = {{ cliguard "nope" }}\n')
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_render()
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_NOT_FOUND)
+
+    def test_render_unknown_field_exits(self):
+        """An unknown field should exit with EXIT_ERROR"""
+        with open(self.template_path, "w", encoding="utf-8") as f:
+            f.write('x = {{ cliguard "prod-db" "secret_id" }}\n')
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_render()
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_ERROR)
+
+
+class TestMain(unittest.TestCase):
+    """Test dispatch from main()"""
+
+    def test_user_commands_select_user_database(self):
+        """main should switch to the user's database before running the command"""
+        with patch("sys.argv", ["cli-guard", "list", "--user", "team-red"]), \
+             patch("CLI_Guard_CLI.sqlite.use_database_for_user", return_value=False) as use_database, \
+             patch("sys.stderr", new_callable=StringIO):
+            with self.assertRaises(SystemExit) as ctx:
+                CLI_Guard_CLI.main()
+        use_database.assert_called_once_with("team-red")
+        self.assertEqual(ctx.exception.code, CLI_Guard_CLI.EXIT_DB_ERROR)
+
+
 class TestExitCodes(unittest.TestCase):
     """Verify exit code constants are defined correctly"""
 
@@ -0,0 +1,264 @@
+"""
+Unit tests for the local JSON-RPC server (CLI_Guard_Server.py)
+
+The server runs on an ephemeral loopback port inside each test. Token
+validation and the CLI_Guard secret functions are patched, so no database
+or real service token is needed.
+"""
+
+import unittest
+import sys
+import os
+import json
+import asyncio
+from unittest.mock import patch
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI_Guard_Server
+import token_manager
+from cryptography.fernet import Fernet
+
+
+TOKEN = "cg_svc_test-token"
+KEY = Fernet.generate_key()
+SECRET = {"category": "Database", "account": "prod-db", "username": "dbadmin",
+          "password": "s3cret", "last_modified": "2026-01-01"}
+
+
+def fake_get_secret(vault, account, username=None):
+    return dict(SECRET) if account == "prod-db" else None
+
+
+class ServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class: starts a SecretServer on 127.0.0.1:<ephemeral>"""
+
+    async def asyncSetUp(self):
+        self.patchers = [
+            patch("CLI_Guard_Server.sqlite.ensure_connection", return_value=True),
+            patch("CLI_Guard_Server.token_manager.load_service_token", side_effect=self.fake_load_token),
+            patch.object(CLI_Guard_Server.CLI_Guard.Vault, "getSecret", fake_get_secret),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.token_loads = 0
+
+        self.state = CLI_Guard_Server.SecretServer()
+        self.server = await asyncio.start_server(self.state.handle_connection, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.state.close()
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+
+    def fake_load_token(self, token):
+        self.token_loads += 1
+        if token != TOKEN:
+            raise token_manager.TokenInvalidError("Service token not recognized")
+        return "alice", KEY
+
+    async def request(self, reader, writer, payload, token=TOKEN, path="/rpc", close=False):
+        """Send one HTTP request on an open connection and return (status, parsed body)"""
+        body = json.dumps(payload).encode("utf-8")
+        headers = [f"POST {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+        if token:
+            headers.append(f"Authorization: Bearer {token}")
+        if close:
+            headers.append("Connection: close")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(head.split(" ", 2)[1])
+        length = int(next(line.split(":", 1)[1] for line in head.split("\r\n")
+                          if line.lower().startswith("content-length")))
+        data = await reader.readexactly(length) if length else b""
+        return status, (json.loads(data) if data else None)
+
+    async def connect(self):
+        return await asyncio.open_connection("127.0.0.1", self.port)
+
+
+class TestRPC(ServerTestCase):
+    """Test JSON-RPC dispatch over HTTP"""
+
+    async def test_get_returns_secret(self):
+        """get should return the decrypted secret for the token's user"""
+        reader, writer = await self.connect()
+        status, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "get",
+                                                           "params": {"account": "prod-db", "field": "password"}})
+        writer.close()
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"jsonrpc": "2.0", "id": 1, "result": "s3cret"})
+
+    async def test_keep_alive_reuses_connection_and_token(self):
+        """Several requests on one connection should validate the token once"""
+        reader, writer = await self.connect()
+        for i in range(5):
+            status, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": i, "method": "get",
+                                                               "params": {"account": "prod-db"}})
+            self.assertEqual(body["result"]["username"], "dbadmin")
+        writer.close()
+        self.assertEqual(self.token_loads, 1)
+
+    async def test_batch(self):
+        """A batch should return one response per call, skipping notifications"""
+        reader, writer = await self.connect()
+        status, body = await self.request(reader, writer, [
+            {"jsonrpc": "2.0", "id": 1, "method": "get", "params": {"account": "prod-db", "field": "username"}},
+            {"jsonrpc": "2.0", "id": 2, "method": "get", "params": {"account": "missing"}},
+            {"jsonrpc": "2.0", "method": "get", "params": {"account": "prod-db"}},
+        ])
+        writer.close()
+        self.assertEqual([r["id"] for r in body], [1, 2])
+        self.assertEqual(body[0]["result"], "dbadmin")
+        self.assertEqual(body[1]["error"]["code"], CLI_Guard_Server.NOT_FOUND_ERROR)
+
+    async def test_unknown_method(self):
+        """An unknown method should return METHOD_NOT_FOUND"""
+        reader, writer = await self.connect()
+        _, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "drop"})
+        writer.close()
+        self.assertEqual(body["error"]["code"], CLI_Guard_Server.METHOD_NOT_FOUND)
+
+    async def test_invalid_params(self):
+        """Missing required params should return INVALID_PARAMS"""
+        reader, writer = await self.connect()
+        _, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "get", "params": {}})
+        writer.close()
+        self.assertEqual(body["error"]["code"], CLI_Guard_Server.INVALID_PARAMS)
+
+    async def test_non_string_field_is_invalid_params(self):
+        """A non-string field should return INVALID_PARAMS, not an internal error"""
+        reader, writer = await self.connect()
+        _, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "get",
+                                                      "params": {"account": "prod-db", "field": ["x"]}})
+        writer.close()
+        self.assertEqual(body["error"]["code"], CLI_Guard_Server.INVALID_PARAMS)
+
+    async def test_update_looks_up_one_secret(self):
+        """update should find its target by exact account, never by reading every secret"""
+        stored = dict(SECRET, password="ciphertext")
+        with patch.object(CLI_Guard_Server.CLI_Guard.Vault, "findSecret",
+                          lambda vault, account, username=None: stored if account == "prod-db" else None), \
+             patch.object(CLI_Guard_Server.CLI_Guard.Vault, "getSecrets", side_effect=AssertionError), \
+             patch.object(CLI_Guard_Server.CLI_Guard.Vault, "updateSecret", return_value=True) as update:
+            reader, writer = await self.connect()
+            _, body = await self.request(reader, writer, [
+                {"jsonrpc": "2.0", "id": 1, "method": "update", "params": {"account": "prod-db", "password": "n3w"}},
+                {"jsonrpc": "2.0", "id": 2, "method": "update", "params": {"account": "missing", "password": "n3w"}},
+            ])
+            writer.close()
+        self.assertEqual(body[0]["result"], True)
+        update.assert_called_once_with(SECRET["account"], SECRET["username"], "ciphertext", "n3w")
+        self.assertEqual(body[1]["error"]["code"], CLI_Guard_Server.NOT_FOUND_ERROR)
+
+    async def test_get_many_by_tags(self):
+        """getMany with tags should return the tagged batch; invalid tags are INVALID_PARAMS"""
+        with patch.object(CLI_Guard_Server.CLI_Guard.Vault, "getSecretsByTags",
+                          lambda vault, tags: [dict(SECRET)] if tags == ["service=payments"] else []):
+            reader, writer = await self.connect()
+            _, body = await self.request(reader, writer, [
+                {"jsonrpc": "2.0", "id": 1, "method": "getMany", "params": {"tags": ["service=payments"]}},
+                {"jsonrpc": "2.0", "id": 2, "method": "getMany", "params": {"tags": ["bad tag"]}},
+                {"jsonrpc": "2.0", "id": 3, "method": "getMany", "params": {"tags": []}},
+            ])
+            writer.close()
+        self.assertEqual(body[0]["result"], [SECRET])
+        self.assertEqual([r["error"]["code"] for r in body[1:]], [CLI_Guard_Server.INVALID_PARAMS] * 2)
+
+    async def test_missing_token_is_401(self):
+        """Requests without a bearer token should be rejected with 401"""
+        reader, writer = await self.connect()
+        status, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "list"}, token=None)
+        writer.close()
+        self.assertEqual(status, 401)
+        self.assertEqual(body["error"]["code"], CLI_Guard_Server.AUTH_ERROR)
+
+    async def test_bad_token(self):
+        """An unrecognized token should return AUTH_ERROR for every call"""
+        reader, writer = await self.connect()
+        _, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "get",
+                                                      "params": {"account": "prod-db"}}, token="cg_svc_wrong")
+        writer.close()
+        self.assertEqual(body["error"]["code"], CLI_Guard_Server.AUTH_ERROR)
+
+    async def test_parse_error(self):
+        """A non-JSON body should return PARSE_ERROR"""
+        reader, writer = await self.connect()
+        body = b"not json"
+        writer.write(b"POST /rpc HTTP/1.1\r\nAuthorization: Bearer " + TOKEN.encode() +
+                     b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        await reader.readuntil(b"\r\n\r\n")
+        self.assertIn(b'"code": -32700', await reader.read(200))
+        writer.close()
+
+    async def test_unknown_path_is_404(self):
+        """Paths other than /rpc and /health should return 404"""
+        reader, writer = await self.connect()
+        status, _ = await self.request(reader, writer, {}, path="/admin")
+        writer.close()
+        self.assertEqual(status, 404)
+
+    async def test_connection_close_honoured(self):
+        """Connection: close should end the connection after the response"""
+        reader, writer = await self.connect()
+        await self.request(reader, writer, {"jsonrpc": "2.0", "id": 1, "method": "get",
+                                            "params": {"account": "prod-db"}}, close=True)
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_concurrent_clients(self):
+        """Many clients issuing requests concurrently should all be answered"""
+        async def client(n):
+            reader, writer = await self.connect()
+            results = []
+            for i in range(10):
+                _, body = await self.request(reader, writer, {"jsonrpc": "2.0", "id": i, "method": "get",
+                                                              "params": {"account": "prod-db", "field": "account"}})
+                results.append(body["result"])
+            writer.close()
+            return results
+
+        all_results = await asyncio.gather(*(client(n) for n in range(20)))
+        self.assertEqual(sum(len(r) for r in all_results), 200)
+        self.assertTrue(all(value == "prod-db" for r in all_results for value in r))
+        self.assertEqual(self.token_loads, 1)
+
+
+class TestTokenCache(ServerTestCase):
+    """Test that cached tokens are re-validated after the cache window"""
+
+    async def test_stale_token_is_revalidated(self):
+        """A token older than token_cache_seconds should be checked again"""
+        self.state.token_cache_seconds = 0
+        reader, writer = await self.connect()
+        for i in range(2):
+            await self.request(reader, writer, {"jsonrpc": "2.0", "id": i, "method": "get",
+                                                "params": {"account": "prod-db"}})
+        writer.close()
+        self.assertEqual(self.token_loads, 2)
+
+
+class TestLoopbackOnly(unittest.TestCase):
+    """Test that only loopback addresses are accepted"""
+
+    def test_loopback_accepted(self):
+        """127.0.0.1, ::1 and localhost should be allowed"""
+        for host in ("127.0.0.1", "::1", "localhost"):
+            CLI_Guard_Server._check_loopback(host)
+
+    def test_non_loopback_rejected(self):
+        """Wildcard and external addresses should be refused"""
+        for host in ("0.0.0.0", "192.168.1.10", "example.com"):
+            with self.assertRaises(ValueError):
+                CLI_Guard_Server._check_loopback(host)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,836 @@
+"""
+Unit tests for the CLI Guard data access layer (CLI_SQL/CLI_Guard_SQL.py)
+
+Each test runs against a fresh temporary database built from the baseline
+schema, so the real CLI_Guard_DB.db is never touched. The module-level
+connection and cursor are patched to point at the temporary database.
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import shutil
+import threading
+import json
+from contextlib import closing
+from unittest.mock import patch
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI_SQL.CLI_Guard_SQL as sqlite
+import backup
+
+# Baseline schema — matches the tables shipped in CLI_Guard_DB.db before any migrations
+BASE_SCHEMA = """
+    CREATE TABLE users (
+        user TEXT NOT NULL UNIQUE PRIMARY KEY,
+        user_pw BLOB NOT NULL,
+        user_last_modified TEXT NOT NULL,
+        last_locked TEXT
+    );
+    CREATE TABLE passwords (
+        user TEXT NOT NULL,
+        category TEXT NOT NULL,
+        account TEXT NOT NULL,
+        username TEXT NOT NULL,
+        password TEXT NOT NULL,
+        last_modified TEXT NOT NULL,
+        FOREIGN KEY (user) REFERENCES users(user) ON DELETE NO ACTION ON UPDATE NO ACTION
+    );
+    CREATE VIEW vw_users AS SELECT * FROM users;
+    CREATE VIEW vw_passwords AS SELECT * FROM passwords;
+"""
+
+
+class SQLTestCase(unittest.TestCase):
+    """Base class: builds a temporary migrated database and points the SQL layer at it"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(BASE_SCHEMA)
+        connection.commit()
+
+        self.patchers = [
+            patch.object(sqlite, "DB_PATH", self.db_path),
+            patch.object(sqlite, "sqlConnection", connection),
+            patch.object(sqlite, "sqlCursor", connection.cursor()),
+            patch.object(sqlite, "_active_db_path", None),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.connection = connection
+
+        # Apply the same migrations that run on module load
+        sqlite.runMigrations()
+
+        sqlite.insertUser("alice", b"hash", "00" * 32)
+        sqlite.insertUser("bob", b"hash", "00" * 32)
+
+    def tearDown(self):
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+        self.connection.close()
+        shutil.rmtree(self.temp_dir)
+
+    def seed_passwords(self, user, count, category="General"):
+        """Insert count rows named account-000, account-001, ... for user"""
+        for i in range(count):
+            sqlite.insertData(user, category, f"account-{i:03d}", f"user{i}", f"cipher-{user}-{i}")
+
+
+class TestPaging(SQLTestCase):
+    """Test queryData paging and countData"""
+
+    def test_count_data_counts_only_user_rows(self):
+        """countData should count rows for the given user only"""
+        self.seed_passwords("alice", 12)
+        self.seed_passwords("bob", 3)
+        self.assertEqual(sqlite.countData("alice", "passwords"), 12)
+        self.assertEqual(sqlite.countData("bob", "passwords"), 3)
+
+    def test_count_data_applies_filter(self):
+        """countData should apply the same LIKE filter as queryData"""
+        self.seed_passwords("alice", 12)
+        self.assertEqual(sqlite.countData("alice", "passwords", category="account", text="account-01"), 2)
+
+    def test_count_data_rejects_invalid_column(self):
+        """countData should return 0 for a column outside the whitelist"""
+        self.assertEqual(sqlite.countData("alice", "passwords", category="password", text="x"), 0)
+
+    def test_query_data_limit_offset_returns_page(self):
+        """queryData with limit/offset should return only the requested page"""
+        self.seed_passwords("alice", 20)
+        page = sqlite.queryData("alice", "passwords", sort_by="ascending",
+                                sort_column="account", limit=5, offset=10)
+        self.assertEqual([row[2] for row in page],
+                         [f"account-{i:03d}" for i in range(10, 15)])
+
+    def test_query_data_pages_cover_all_rows(self):
+        """Consecutive pages should cover every row exactly once"""
+        self.seed_passwords("alice", 23)
+        seen = []
+        for offset in range(0, 23, 7):
+            page = sqlite.queryData("alice", "passwords", sort_by="ascending",
+                                    sort_column="account", limit=7, offset=offset)
+            seen.extend(row[2] for row in page)
+        self.assertEqual(seen, [f"account-{i:03d}" for i in range(23)])
+
+    def test_query_data_without_limit_returns_everything(self):
+        """queryData without limit should keep returning the full result set"""
+        self.seed_passwords("alice", 15)
+        self.assertEqual(len(sqlite.queryData("alice", "passwords")), 15)
+
+
+class TestKeysetStreaming(SQLTestCase):
+    """Test iterMetadata keyset paging"""
+
+    def test_rows_are_metadata_only_in_account_order(self):
+        """Rows should carry no ciphertext and come back ordered by account"""
+        sqlite.insertData("alice", "General", "b-acct", "u", "cipher-1")
+        sqlite.insertData("alice", "General", "a-acct", "u", "cipher-2")
+        rows = list(sqlite.iterMetadata("alice"))
+        self.assertEqual([row[1] for row in rows], ["a-acct", "b-acct"])
+        self.assertTrue(all(len(row) == 6 and "cipher-1" not in row and "cipher-2" not in row for row in rows))
+
+    def test_after_resumes_past_duplicate_account_names(self):
+        """Keyset pages should cover every row once, even when account names repeat"""
+        for i in range(7):
+            sqlite.insertData("alice", "General", f"acct-{i % 3}", f"user{i}", "c")
+        sqlite.insertData("bob", "General", "acct-0", "bob", "c")
+        seen, after = [], None
+        while True:
+            page = list(sqlite.iterMetadata("alice", after=after, limit=2))
+            if not page:
+                break
+            seen.extend(page)
+            after = (page[-1][1], page[-1][4])
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len({row[4] for row in seen}), 7)
+        self.assertEqual(seen, sorted(seen, key=lambda row: (row[1], row[4])))
+
+
+class TestProjection(SQLTestCase):
+    """Test queryData/searchData column projection"""
+
+    def test_query_data_projects_named_columns(self):
+        """columns should select exactly those columns, in order"""
+        secret_id = sqlite.insertData("alice", "Database", "prod-db", "admin", "cipher-1")
+        rows = sqlite.queryData("alice", "passwords", columns=("account", "username", "secret_id"))
+        self.assertEqual(rows, [("prod-db", "admin", secret_id)])
+
+    def test_metadata_projection_skips_ciphertext(self):
+        """METADATA_COLUMNS rows should not contain the encrypted password"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "cipher-1")
+        row = sqlite.queryData("alice", "passwords", columns=sqlite.METADATA_COLUMNS,
+                               sort_by="ascending", sort_column="account", limit=10, offset=0)[0]
+        self.assertEqual(row[:4], ("alice", "Database", "prod-db", "admin"))
+        self.assertNotIn("cipher-1", row)
+
+    def test_invalid_projection_returns_empty(self):
+        """A column outside TABLE_COLUMNS should be rejected, not interpolated"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "cipher-1")
+        self.assertEqual(sqlite.queryData("alice", "passwords", columns=("account", "1; DROP TABLE users")), [])
+        self.assertEqual(sqlite.searchData("alice", '"prod"*', columns=("nope",)), [])
+
+    def test_search_data_projection(self):
+        """searchData should honour columns the same way"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "cipher-1")
+        self.assertEqual(sqlite.searchData("alice", '"prod"*', columns=("account",)), [("prod-db",)])
+
+    def test_query_by_secret_id_is_user_scoped(self):
+        """queryDataBySecretId should return the full row for its owner only"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "cipher-1")
+        secret_id = sqlite.queryData("alice", "passwords", columns=("secret_id",))[0][0]
+        self.assertEqual(sqlite.queryDataBySecretId("alice", secret_id)[4], "cipher-1")
+        self.assertIsNone(sqlite.queryDataBySecretId("bob", secret_id))
+
+
+class TestPasswordVersions(SQLTestCase):
+    """Test the password_versions history table, its triggers and retention"""
+
+    def secret_id(self, user="alice", account="prod-db"):
+        return sqlite.queryData(user, "passwords", category="account", text=account)[0][6]
+
+    def test_insert_and_update_append_versions(self):
+        """Creating a secret is version 1 and each password change appends the next"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        sqlite.updateData("alice", "c2", "prod-db", "admin", "c1")
+        sqlite.updateData("alice", "c3", "prod-db", "admin", "c2")
+        versions = sqlite.queryPasswordVersions("alice", self.secret_id())
+        self.assertEqual([v[0] for v in versions], [3, 2, 1])
+        self.assertEqual(sqlite.queryPasswordVersion("alice", self.secret_id(), version=2)[1], "c2")
+        self.assertEqual(sqlite.queryPasswordVersion("alice", self.secret_id())[1], "c3")
+
+    def test_lookup_by_time(self):
+        """at should return the newest version created at or before that time"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        secret_id = self.secret_id()
+        sqlite.sqlConnection.execute(
+            "UPDATE password_versions SET created_at = '2026-01-01 09:00:00' WHERE secret_id = ?", (secret_id,))
+        sqlite.updateData("alice", "c2", "prod-db", "admin", "c1")
+        self.assertEqual(sqlite.queryPasswordVersion("alice", secret_id, at="2026-01-02 00:00:00")[1], "c1")
+        self.assertIsNone(sqlite.queryPasswordVersion("alice", secret_id, at="2025-12-31 00:00:00"))
+
+    def test_retention_keeps_newest_versions(self):
+        """updateData should prune history to PASSWORD_VERSIONS_KEEP versions"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c0")
+        with patch.object(sqlite, "PASSWORD_VERSIONS_KEEP", 3):
+            for i in range(1, 6):
+                sqlite.updateData("alice", f"c{i}", "prod-db", "admin", f"c{i - 1}")
+        self.assertEqual([v[0] for v in sqlite.queryPasswordVersions("alice", self.secret_id())], [6, 5, 4])
+
+    def test_history_is_owner_only_and_dropped_on_delete(self):
+        """Other users can't read a secret's history, and deleting the secret deletes it"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        secret_id = self.secret_id()
+        self.assertEqual(sqlite.queryPasswordVersions("bob", secret_id), [])
+        sqlite.deleteData("alice", "prod-db", "admin", "c1")
+        count = sqlite.sqlConnection.execute("SELECT COUNT(*) FROM password_versions").fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+class TestUpdateData(SQLTestCase):
+    """Test that updates are scoped to the owning user"""
+
+    def test_update_leaves_other_users_rows_alone(self):
+        """A matching account/username/ciphertext under another user must not be updated"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "same-cipher")
+        sqlite.insertData("bob", "Database", "prod-db", "admin", "same-cipher")
+        sqlite.updateData("alice", "rotated", "prod-db", "admin", "same-cipher")
+        self.assertEqual(sqlite.queryData("alice", "passwords")[0][4], "rotated")
+        self.assertEqual(sqlite.queryData("bob", "passwords")[0][4], "same-cipher")
+
+
+class TestChangeLog(SQLTestCase):
+    """Test the change_log triggers and pruning used by incremental backups"""
+
+    def test_every_write_is_logged(self):
+        """Insert, update and delete should each append the secret_id"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        sqlite.updateData("alice", "c2", "prod-db", "admin", "c1")
+        sqlite.deleteData("alice", "prod-db", "admin", "c2")
+        rows = sqlite.sqlConnection.execute("SELECT seq, secret_id FROM change_log").fetchall()
+        self.assertEqual([row[0] for row in rows], [1, 2, 3])
+        self.assertEqual(len({row[1] for row in rows}), 1)
+        self.assertEqual(sqlite.queryChangeLogBounds(), (1, 3))
+
+    def test_prune_keeps_last_covered_entry(self):
+        """pruneChangeLog should drop entries before through_seq and never reuse numbers"""
+        self.assertEqual(sqlite.queryChangeLogBounds(), (1, 0))
+        self.seed_passwords("alice", 4)
+        sqlite.pruneChangeLog(4)
+        self.assertEqual(sqlite.queryChangeLogBounds(), (4, 4))
+        sqlite.sqlConnection.execute("DELETE FROM change_log")
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        self.assertEqual(sqlite.queryChangeLogBounds(), (5, 5))
+
+
+class TestSecretIdMigration(SQLTestCase):
+    """Test the passwords table rebuild that adds secret_id"""
+
+    def test_view_keeps_positional_columns(self):
+        """vw_passwords should keep the original column order with secret_id appended"""
+        self.seed_passwords("alice", 1)
+        row = sqlite.queryData("alice", "passwords")[0]
+        self.assertEqual(row[:6], ("alice", "General", "account-000", "user0", "cipher-alice-0", row[5]))
+        self.assertIsInstance(row[6], int)
+
+    def test_existing_rows_keep_rowids(self):
+        """Rows present before the migration should keep their rowid as secret_id"""
+        connection = sqlite3.connect(os.path.join(self.temp_dir, "legacy.db"))
+        connection.executescript(BASE_SCHEMA)
+        connection.execute("INSERT INTO users VALUES ('carol', 'hash', '2026-01-01', NULL)")
+        connection.execute("INSERT INTO passwords VALUES ('carol', 'c', 'a1', 'u1', 'p1', '2026-01-01')")
+        connection.execute("INSERT INTO passwords VALUES ('carol', 'c', 'a2', 'u2', 'p2', '2026-01-01')")
+        connection.commit()
+
+        with patch.object(sqlite, "sqlConnection", connection), \
+             patch.object(sqlite, "sqlCursor", connection.cursor()):
+            sqlite.runMigrations()
+            sqlite.runMigrations()  # idempotent
+            rows = sqlite.queryData("carol", "passwords")
+        connection.close()
+
+        self.assertEqual([(row[2], row[6]) for row in rows], [("a1", 1), ("a2", 2)])
+
+
+class TestSecretPaths(SQLTestCase):
+    """Test the optional hierarchical path column and its prefix listing"""
+
+    def setUp(self):
+        super().setUp()
+        for path in ("prod/payments/stripe", "prod/payments/adyen", "prod/paymentsx", "staging/payments/stripe"):
+            sqlite.insertData("alice", "General", path.replace("/", "-"), "svc", "cipher", path=path)
+        sqlite.insertData("alice", "General", "no-path", "svc", "cipher")
+        sqlite.insertData("bob", "General", "bob-stripe", "svc", "cipher", path="prod/payments/stripe")
+
+    def test_path_is_last_view_column(self):
+        """path should be appended after secret_id, leaving positional readers alone"""
+        row = sqlite.queryDataByPath("alice", "prod/payments/stripe")
+        self.assertEqual((row[2], row[7]), ("prod-payments-stripe", "prod/payments/stripe"))
+        self.assertIsInstance(row[6], int)
+
+    def test_exact_lookup_is_per_user(self):
+        """queryDataByPath should match the whole path for that user only"""
+        self.assertEqual(sqlite.queryDataByPath("bob", "prod/payments/stripe")[2], "bob-stripe")
+        self.assertIsNone(sqlite.queryDataByPath("alice", "prod/payments"))
+
+    def test_prefix_lists_folder_in_path_order(self):
+        """A folder prefix should list just the secrets under it, sorted by path"""
+        rows = sqlite.queryDataByPathPrefix("alice", "prod/payments/", columns=("path",))
+        self.assertEqual(rows, [("prod/payments/adyen",), ("prod/payments/stripe",)])
+        rows = sqlite.queryDataByPathPrefix("alice", "prod/payments", columns=("path",), limit=2)
+        self.assertEqual(rows, [("prod/payments/adyen",), ("prod/payments/stripe",)])
+
+    def test_empty_prefix_lists_every_path(self):
+        """The empty prefix should list every secret with a path and skip those without"""
+        rows = sqlite.queryDataByPathPrefix("alice", "", columns=("account",))
+        self.assertEqual(len(rows), 4)
+        self.assertNotIn(("no-path",), rows)
+
+    def test_path_is_unique_per_user(self):
+        """A second secret with the same path should be refused; moving and clearing should work"""
+        secret_id = sqlite.queryDataByPath("alice", "prod/payments/adyen")[6]
+        self.assertFalse(sqlite.updateDataPath("alice", secret_id, "prod/payments/stripe"))
+        self.assertTrue(sqlite.updateDataPath("alice", secret_id, "prod/payments/braintree"))
+        self.assertEqual(sqlite.queryDataByPath("alice", "prod/payments/braintree")[6], secret_id)
+        self.assertTrue(sqlite.updateDataPath("alice", secret_id, None))
+        self.assertIsNone(sqlite.queryDataByPath("alice", "prod/payments/braintree"))
+
+    def test_update_path_of_other_users_secret_fails(self):
+        """updateDataPath should not touch a secret the user does not own"""
+        secret_id = sqlite.queryDataByPath("bob", "prod/payments/stripe")[6]
+        self.assertFalse(sqlite.updateDataPath("alice", secret_id, "stolen"))
+
+
+class TestSecretTags(SQLTestCase):
+    """Test the secret_tags many-to-many table and the tag lookup"""
+
+    def setUp(self):
+        super().setUp()
+        self.seed_passwords("alice", 6)
+        self.seed_passwords("bob", 2)
+        self.ids = {row[2]: row[6] for row in sqlite.queryData("alice", "passwords")}
+        for account in ("account-001", "account-002", "account-004"):
+            sqlite.insertTags("alice", self.ids[account], ["service=payments"])
+        sqlite.insertTags("alice", self.ids["account-002"], ["env=prod", "env=prod"])
+        sqlite.insertTags("alice", self.ids["account-004"], ["env=prod"])
+
+    def accounts(self, tags, **kwargs):
+        return [row[0] for row in sqlite.queryDataByTags("alice", tags, columns=("account",), **kwargs)]
+
+    def test_lookup_requires_every_tag(self):
+        """queryDataByTags should return the secrets carrying all the tags, oldest first"""
+        self.assertEqual(self.accounts(["service=payments"]), ["account-001", "account-002", "account-004"])
+        self.assertEqual(self.accounts(["service=payments", "env=prod"]), ["account-002", "account-004"])
+        self.assertEqual(self.accounts(["service=payments", "env=prod", "missing"]), [])
+        self.assertEqual(self.accounts(["service=payments"], limit=1), ["account-001"])
+
+    def test_padded_filters_share_a_statement(self):
+        """Three tags are padded to the four-tag statement without changing the result"""
+        self.assertIs(sqlite._tagFilterStatement(4), sqlite._tagFilterStatement(4))
+        self.assertEqual(self.accounts(["env=prod", "service=payments", "env=prod"]), ["account-002", "account-004"])
+
+    def test_tags_are_per_user(self):
+        """Tagging another user's secret_id should do nothing, and lookups never cross users"""
+        bob_id = sqlite.queryData("bob", "passwords")[0][6]
+        sqlite.insertTags("alice", bob_id, ["service=payments"])
+        self.assertEqual(sqlite.queryTags("bob", bob_id), [])
+        self.assertEqual(sqlite.queryDataByTags("bob", ["service=payments"]), [])
+
+    def test_tags_and_tag_names(self):
+        """queryTags lists a secret's tags; queryTagNames counts secrets per tag"""
+        self.assertEqual(sqlite.queryTags("alice", self.ids["account-002"]), ["env=prod", "service=payments"])
+        self.assertEqual(sqlite.queryTagNames("alice"), [("env=prod", 2), ("service=payments", 3)])
+
+    def test_delete_tags_and_secret(self):
+        """Removing a tag or deleting the secret should drop it from the lookup"""
+        sqlite.deleteTags("alice", self.ids["account-001"], ["service=payments", "not-there"])
+        sqlite.deleteData("alice", "account-002", "user2", "cipher-alice-2")
+        self.assertEqual(self.accounts(["service=payments"]), ["account-004"])
+        self.assertEqual(sqlite.queryTags("alice", self.ids["account-002"]), [])
+
+    def test_tag_changes_are_logged_and_versioned(self):
+        """Tagging should log the secret for incremental backups and bump the data version"""
+        version = sqlite.queryDataVersion("alice")
+        _, high = sqlite.queryChangeLogBounds()
+        sqlite.insertTags("alice", self.ids["account-005"], ["deploy"])
+        self.assertGreater(sqlite.queryDataVersion("alice"), version)
+        self.assertEqual(sqlite.queryChangeLogBounds()[1], high + 1)
+
+
+class TestFullTextSearch(SQLTestCase):
+    """Test the passwords_fts index and its sync triggers"""
+
+    def setUp(self):
+        super().setUp()
+        sqlite.insertData("alice", "Database", "prod-db", "dbadmin", "c1")
+        sqlite.insertData("alice", "Database", "staging-postgres", "readonly", "c2")
+        sqlite.insertData("alice", "API Keys", "stripe-live", "payments", "c3")
+        sqlite.insertData("bob", "Database", "prod-db", "bobadmin", "c4")
+
+    def search(self, user, query):
+        return [row[2] for row in sqlite.searchData(user, query)]
+
+    def test_search_finds_rows_across_columns(self):
+        """A term should match category, account or username"""
+        self.assertEqual(sorted(self.search("alice", '"database"*')), ["prod-db", "staging-postgres"])
+        self.assertEqual(self.search("alice", '"pay"*'), ["stripe-live"])
+
+    def test_search_is_scoped_to_user(self):
+        """Other users' rows must never be returned"""
+        self.assertEqual(self.search("bob", '"prod"*'), ["prod-db"])
+        self.assertEqual(self.search("bob", '"stripe"*'), [])
+
+    def test_insert_update_delete_keep_index_in_sync(self):
+        """Triggers should keep the index current on every write"""
+        sqlite.insertData("alice", "Cloud", "azure-portal", "ops", "c5")
+        self.assertEqual(self.search("alice", '"azure"*'), ["azure-portal"])
+
+        self.connection.execute("UPDATE passwords SET account = 'gcp-console' WHERE account = 'azure-portal'")
+        self.assertEqual(self.search("alice", '"azure"*'), [])
+        self.assertEqual(self.search("alice", '"gcp"*'), ["gcp-console"])
+
+        sqlite.deleteData("alice", "gcp-console", "ops", "c5")
+        self.assertEqual(self.search("alice", '"gcp"*'), [])
+
+    def test_account_matches_rank_first(self):
+        """Account matches should outrank category matches"""
+        sqlite.insertData("alice", "Stripe", "billing", "ops", "c6")
+        self.assertEqual(self.search("alice", '"stripe"*')[0], "stripe-live")
+
+    def test_limit(self):
+        """limit should cap the number of results"""
+        self.assertEqual(len(sqlite.searchData("alice", '"database"*', limit=1)), 1)
+
+    def test_invalid_query_returns_empty(self):
+        """Malformed FTS syntax should be logged and return no rows"""
+        self.assertEqual(sqlite.searchData("alice", '"unterminated'), [])
+
+
+class TestAccountNames(SQLTestCase):
+    """Test the metadata-only account name query used for fuzzy matching"""
+
+    def test_distinct_names_for_user_only(self):
+        """queryAccountNames should return each of the user's accounts once"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        sqlite.insertData("alice", "Database", "prod-db", "readonly", "c2")
+        sqlite.insertData("bob", "Email", "gmail", "bob", "c3")
+        self.assertEqual(sqlite.queryAccountNames("alice"), ["prod-db"])
+        self.assertEqual(sqlite.queryAccountNames("carol"), [])
+
+    def test_distinct_categories_for_user_only(self):
+        """queryCategoryNames should return each of the user's categories once"""
+        sqlite.insertData("alice", "Database", "prod-db", "admin", "c1")
+        sqlite.insertData("alice", "Database", "stage-db", "admin", "c2")
+        sqlite.insertData("bob", "Email", "gmail", "bob", "c3")
+        self.assertEqual(sqlite.queryCategoryNames("alice"), ["Database"])
+        self.assertEqual(sqlite.queryCategoryNames("carol"), [])
+
+
+class TestQueryByAccounts(SQLTestCase):
+    """Test the batched IN (...) lookup"""
+
+    def test_returns_only_requested_accounts_for_user(self):
+        """queryDataByAccounts should return the user's rows for the listed accounts only"""
+        self.seed_passwords("alice", 5)
+        self.seed_passwords("bob", 5)
+        rows = sqlite.queryDataByAccounts("alice", ["account-001", "account-003", "account-001", "missing"])
+        self.assertEqual([(row[0], row[2]) for row in rows],
+                         [("alice", "account-001"), ("alice", "account-003")])
+
+    def test_chunks_large_lists(self):
+        """Lists longer than MAX_IN_PARAMETERS should be split across queries"""
+        self.seed_passwords("alice", 12)
+        with patch.object(sqlite, "MAX_IN_PARAMETERS", 5):
+            rows = sqlite.queryDataByAccounts("alice", [f"account-{i:03d}" for i in range(12)])
+        self.assertEqual(len(rows), 12)
+
+    def test_empty_list(self):
+        """An empty account list should return no rows"""
+        self.assertEqual(sqlite.queryDataByAccounts("alice", []), [])
+
+    def test_padded_batch_returns_each_row_once(self):
+        """Padding a batch to its statement width should not duplicate rows"""
+        self.seed_passwords("alice", 5)
+        rows = sqlite.queryDataByAccounts("alice", ["account-000", "account-002", "account-004"])
+        self.assertEqual([row[2] for row in rows], ["account-000", "account-002", "account-004"])
+
+
+class TestExportDatabase(SQLTestCase):
+    """Test paged and VACUUM INTO exports from a separate connection"""
+
+    def setUp(self):
+        super().setUp()
+        self.seed_passwords("alice", 200)
+        self.export_path = os.path.join(self.temp_dir, "export.db")
+
+    def exported_rows(self):
+        connection = sqlite3.connect(self.export_path)
+        try:
+            self.assertEqual(connection.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+            return sorted(connection.execute("SELECT * FROM vw_passwords").fetchall())
+        finally:
+            connection.close()
+
+    def live_rows(self):
+        return sorted(self.connection.execute("SELECT * FROM vw_passwords").fetchall())
+
+    def test_paged_copy_reports_progress(self):
+        """A small page step should copy in several steps, reporting progress after each"""
+        calls = []
+        self.assertTrue(sqlite.exportDatabase(self.export_path, pages=2, sleep=0,
+                                              progress=lambda copied, total: calls.append((copied, total))))
+        self.assertGreater(len(calls), 2)
+        self.assertEqual(calls[-1][0], calls[-1][1])
+        self.assertEqual(self.exported_rows(), self.live_rows())
+
+    def test_writes_proceed_between_steps(self):
+        """The shared connection should be able to write mid-copy, and the copy should include the write"""
+        written = []
+
+        def write_once(copied, total):
+            if not written:
+                written.append(sqlite.insertData("bob", "General", "mid-copy", "bob", "cipher"))
+
+        self.assertTrue(sqlite.exportDatabase(self.export_path, pages=2, sleep=0, progress=write_once))
+        self.assertIn("mid-copy", [row[2] for row in self.exported_rows()])
+
+    def test_constant_writes_fall_back_to_one_step(self):
+        """A copy restarted by a write after every step should still finish, including the writes"""
+        counter = iter(range(1000))
+
+        def write_every_step(copied, total):
+            if copied < total:
+                sqlite.insertData("bob", "General", f"write-{next(counter)}", "bob", "cipher")
+
+        self.assertTrue(sqlite.exportDatabase(self.export_path, pages=2, sleep=0, progress=write_every_step))
+        self.assertEqual(self.exported_rows(), self.live_rows())
+
+    def test_vacuum_into(self):
+        """vacuum=True should write a compacted, consistent copy"""
+        sqlite.sqlConnection.execute("DELETE FROM passwords WHERE account > 'account-050'")
+        sqlite.sqlConnection.commit()
+        self.assertTrue(sqlite.exportDatabase(self.export_path, vacuum=True))
+        self.assertEqual(self.exported_rows(), self.live_rows())
+        self.assertLess(os.path.getsize(self.export_path), os.path.getsize(self.db_path))
+
+    def test_vacuum_into_existing_file_fails(self):
+        """VACUUM INTO must not overwrite an existing file"""
+        with open(self.export_path, "wb") as f:
+            f.write(b"not a database")
+        self.assertIsNone(sqlite.exportDatabase(self.export_path, vacuum=True))
+
+
+class TestMaintenance(SQLTestCase):
+    """Test the integrity check, ANALYZE, VACUUM and stats used by `db maintain` / `db stats`"""
+
+    def test_healthy_database_checks_ok(self):
+        """A fresh database should pass both the full and quick checks, leaving no transaction open"""
+        self.seed_passwords("alice", 5)
+        self.assertEqual(sqlite.checkIntegrity(), ["ok"])
+        self.assertEqual(sqlite.checkIntegrity(quick=True), ["ok"])
+        self.assertFalse(self.connection.in_transaction)
+
+    def test_reports_foreign_key_and_search_index_problems(self):
+        """Orphaned secrets and a search index out of step with passwords should be reported"""
+        self.seed_passwords("alice", 3)
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+        self.connection.execute("DROP TRIGGER trg_passwords_fts_insert")
+        self.connection.execute(
+            "INSERT INTO passwords (user, category, account, username, password, last_modified) "
+            "VALUES ('ghost', 'General', 'orphan', 'x', 'c', '2026-01-01')")
+        self.connection.commit()
+        problems = sqlite.checkIntegrity()
+        self.assertTrue(any(p.startswith("foreign key: passwords") for p in problems))
+        self.assertTrue(any(p.startswith("passwords_fts") for p in problems))
+
+    def test_vacuum_reclaims_free_pages(self):
+        """VACUUM after a mass delete should empty the freelist and shrink the file"""
+        self.seed_passwords("alice", 500)
+        self.connection.execute("DELETE FROM passwords")
+        self.connection.commit()
+        self.assertGreater(sqlite.queryDatabaseStats()["freelist_count"], 0)
+        before, after = sqlite.vacuumDatabase()
+        self.assertLess(after, before)
+        self.assertEqual(sqlite.queryDatabaseStats()["freelist_count"], 0)
+
+    def test_stats_counts_and_index_statistics(self):
+        """Stats should count rows per table and user, and show index statistics once analyzed"""
+        self.seed_passwords("alice", 3)
+        self.seed_passwords("bob", 5)
+        stats = sqlite.queryDatabaseStats()
+        self.assertEqual(stats["tables"]["passwords"], 8)
+        self.assertEqual(stats["users"], [("bob", 5), ("alice", 3)])
+        objects = {name: obj for name, *obj in stats["objects"]}
+        self.assertIsNone(objects["idx_passwords_user_account"][3])
+
+        self.assertTrue(sqlite.analyzeDatabase())
+        self.assertTrue(sqlite.optimizeSearchIndex())
+        objects = {name: obj for name, *obj in sqlite.queryDatabaseStats()["objects"]}
+        self.assertTrue(objects["idx_passwords_user_account"][3].startswith("8 "))
+
+
+class TestExplicitConnection(SQLTestCase):
+    """Test that SQL functions use a connection passed by the caller"""
+
+    def test_query_and_write_on_explicit_connection(self):
+        """Functions given connection= should read and commit through it, not the module connection"""
+        other = sqlite3.connect(self.db_path)
+        try:
+            sqlite.insertData("alice", "General", "gmail", "me", "c1", connection=other)
+            self.assertEqual([row[2] for row in sqlite.queryData("alice", "passwords")], ["gmail"])
+            with patch.object(sqlite, "sqlCursor", None):
+                self.assertEqual(sqlite.countData("alice", "passwords", connection=other), 1)
+                self.assertEqual(sqlite.queryAccountNames("alice", connection=other), ["gmail"])
+                self.assertEqual(sqlite.queryUserSalt("alice", connection=other), "00" * 32)
+        finally:
+            other.close()
+
+
+class TestDataVersion(SQLTestCase):
+    """Test the per-user data_versions counter and its triggers"""
+
+    def test_writes_bump_only_that_users_version(self):
+        """insert/update/delete should each bump the owner's version and leave others alone"""
+        self.assertEqual(sqlite.queryDataVersion("alice"), 0)
+        sqlite.insertData("alice", "General", "gmail", "me", "c1")
+        self.assertEqual(sqlite.queryDataVersion("alice"), 1)
+        sqlite.updateData("alice", "c2", "gmail", "me", "c1")
+        self.assertEqual(sqlite.queryDataVersion("alice"), 2)
+        sqlite.deleteData("alice", "gmail", "me", "c2")
+        self.assertEqual(sqlite.queryDataVersion("alice"), 3)
+        self.assertEqual(sqlite.queryDataVersion("bob"), 0)
+
+    def test_other_connection_writes_are_seen(self):
+        """A write from a second connection (another process) should change the version"""
+        other = sqlite3.connect(self.db_path)
+        try:
+            other.execute("INSERT INTO passwords (user, category, account, username, password, last_modified) "
+                          "VALUES ('bob', 'c', 'a', 'u', 'p', '2026-01-01')")
+            other.commit()
+        finally:
+            other.close()
+        self.assertEqual(sqlite.queryDataVersion("bob"), 1)
+
+    def test_moving_a_row_bumps_both_users(self):
+        """Changing a row's owner should bump the old and the new owner"""
+        sqlite.insertData("alice", "General", "gmail", "me", "c1")
+        self.connection.execute("UPDATE passwords SET user = 'bob'")
+        self.assertEqual((sqlite.queryDataVersion("alice"), sqlite.queryDataVersion("bob")), (2, 1))
+
+
+class TestStatementRegistry(SQLTestCase):
+    """Test that lookups reuse registered SQL text, so sqlite3's statement cache hits"""
+
+    def traced(self, call):
+        statements = []
+        self.connection.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            self.connection.set_trace_callback(None)
+        return statements
+
+    def test_registered_statements_compile(self):
+        """Every statement in STATEMENTS should prepare against the migrated schema"""
+        for name, sql_query in sqlite.STATEMENTS.items():
+            with self.subTest(statement=name):
+                self.connection.execute(f"EXPLAIN {sql_query}", (None,) * sql_query.count("?"))
+
+    def test_same_shape_same_text(self):
+        """queryData calls differing only in bound values should build the same SQL object"""
+        first = sqlite._queryDataStatement("passwords", sqlite.METADATA_COLUMNS, "account", "account", "ASC", True)
+        second = sqlite._queryDataStatement("passwords", sqlite.METADATA_COLUMNS, "account", "account", "ASC", True)
+        self.assertIs(first, second)
+
+    def test_batch_sizes_share_a_statement(self):
+        """Batches of 3 and 4 accounts should run the same 4-wide statement"""
+        self.seed_passwords("alice", 5)
+        three = self.traced(lambda: sqlite.queryDataByAccounts("alice", ["account-000", "account-001", "account-002"]))
+        four = self.traced(lambda: sqlite.queryDataByAccounts("alice", [f"account-{i:03d}" for i in range(4)]))
+        template = lambda sql: sql.split("IN (")[1].count(",")
+        self.assertEqual(template(three[-1]), template(four[-1]))
+        self.assertEqual(template(four[-1]), 3)
+
+    def test_in_list_width(self):
+        """Widths should round up to a power of two, capped at MAX_IN_PARAMETERS"""
+        self.assertEqual([sqlite._inListWidth(n) for n in (1, 2, 3, 5, 8, 9)], [1, 2, 4, 8, 8, 16])
+        self.assertEqual(sqlite._inListWidth(sqlite.MAX_IN_PARAMETERS), sqlite.MAX_IN_PARAMETERS)
+
+    def test_invalid_projection_not_cached(self):
+        """A rejected projection should keep failing rather than be remembered"""
+        self.assertEqual(sqlite.queryData("alice", "passwords", columns=("nope",)), [])
+        self.assertEqual(sqlite.queryData("alice", "passwords", columns=("nope",)), [])
+
+    def test_connections_use_raised_cache_size(self):
+        """get_db_connection should open connections with STATEMENT_CACHE_SIZE cached statements"""
+        with patch("sqlite3.connect", wraps=sqlite3.connect) as connect:
+            sqlite.get_db_connection(self.db_path).close()
+        self.assertEqual(connect.call_args.kwargs["cached_statements"], sqlite.STATEMENT_CACHE_SIZE)
+
+
+class TestDatabaseRouting(SQLTestCase):
+    """Test routing users to their own database files"""
+
+    def setUp(self):
+        super().setUp()
+        self.routes_path = os.path.join(self.temp_dir, "routes.json")
+        self.write_routes({"team-*": "team.db", "ops": "ops/ops.db"})
+        self.team_db = os.path.join(self.temp_dir, "team.db")
+        self.thread_state = threading.local()
+        # Fresh routing state, with the test database as the already-open default
+        self.thread_state.connections = {self.db_path: self.connection}
+        routing_patchers = [
+            patch.object(sqlite, "DB_ROUTES_PATH", self.routes_path),
+            patch.object(sqlite, "_active_db_path", None),
+            patch.object(sqlite, "_routes_cache", None),
+            patch.object(sqlite, "_migrated_paths", {self.db_path}),
+            patch.object(sqlite, "_thread_state", self.thread_state),
+        ]
+        for patcher in routing_patchers:
+            patcher.start()
+        self.patchers.extend(routing_patchers)
+
+    def tearDown(self):
+        for connection in self.thread_state.connections.values():
+            if connection is not self.connection:
+                connection.close()
+        super().tearDown()
+
+    def write_routes(self, mapping):
+        with open(self.routes_path, "w") as routes_file:
+            json.dump(mapping, routes_file)
+
+    def test_resolve_db_path(self):
+        """Users should resolve to the first matching route, relative to the routes file, else DB_PATH"""
+        self.assertEqual(sqlite.resolve_db_path("team-red"), self.team_db)
+        self.assertEqual(sqlite.resolve_db_path("ops"), os.path.join(self.temp_dir, "ops", "ops.db"))
+        self.assertEqual(sqlite.resolve_db_path("alice"), self.db_path)
+
+    def test_routed_user_gets_own_migrated_file(self):
+        """A routed user's writes should land in their own, newly created and migrated, file"""
+        self.assertTrue(sqlite.use_database_for_user("team-red"))
+        sqlite.insertUser("team-red", b"hash", "00" * 32)
+        sqlite.insertData("team-red", "General", "gmail", "me", "c1")
+        self.assertEqual(sqlite.searchData("team-red", "gmail")[0][2], "gmail")
+
+        self.assertTrue(sqlite.use_database_for_user("alice"))
+        self.assertIs(sqlite.sqlConnection, self.connection)
+        self.assertEqual(sqlite.queryData(None, "users"), sqlite.queryData(None, "users", connection=self.connection))
+        self.assertEqual([row[0] for row in sqlite.queryData(None, "users")], ["alice", "bob"])
+        self.assertEqual(oct(os.stat(self.team_db).st_mode & 0o777), "0o600")
+
+    def test_connections_cached_per_file_and_thread(self):
+        """open_database should reuse one handle per file on a thread, and open another on a new thread"""
+        first = sqlite.open_database(self.team_db)
+        self.assertIs(sqlite.open_database(self.team_db), first)
+        self.assertIsNot(sqlite.open_database(self.db_path), first)
+
+        other = []
+
+        def open_on_thread():
+            connection = sqlite.open_database(self.team_db)
+            other.append(connection)
+            connection.close()
+
+        thread = threading.Thread(target=open_on_thread)
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+    def test_find_service_token_database(self):
+        """A service token should be found in its user's routed file, and not looked for without routes"""
+        sqlite.use_database_for_user("team-red")
+        sqlite.insertUser("team-red", b"hash", "00" * 32)
+        sqlite.insertServiceToken("cg_svc_000001", "team-red", "ci", b"hash", "wrapped", "2026-01-01")
+        sqlite.use_database_for_user("alice")
+
+        self.assertEqual(sqlite.find_service_token_database("cg_svc_000001"), self.team_db)
+        self.assertIsNone(sqlite.find_service_token_database("cg_svc_missing"))
+        with patch.object(sqlite, "DB_ROUTES_PATH", None):
+            self.assertIsNone(sqlite.find_service_token_database("cg_svc_000001"))
+
+    def test_backups_read_the_routed_file(self):
+        """exportDatabase and backupDatabase should copy the file the SQL layer was switched to"""
+        sqlite.use_database_for_user("team-red")
+        sqlite.insertUser("team-red", b"hash", "00" * 32)
+        sqlite.insertData("team-red", "General", "gmail", "me", "c1")
+        self.assertEqual(sqlite.active_db_path(), self.team_db)
+
+        export_path = os.path.join(self.temp_dir, "export.db")
+        self.assertTrue(sqlite.exportDatabase(export_path))
+        info = backup.backupDatabase(os.path.join(self.temp_dir, "team-backups"))
+        sqlite.insertData("team-red", "General", "github", "me", "c2")
+        incremental = backup.backupDatabase(os.path.join(self.temp_dir, "team-backups"))
+        for path in (export_path, info["path"]):
+            with closing(sqlite3.connect(path)) as copy:
+                self.assertEqual(copy.execute("SELECT account FROM passwords").fetchall(), [("gmail",)])
+        self.assertEqual((incremental["kind"], incremental["secrets"]), ("incremental", 1))
+
+        sqlite.use_database_for_user("alice")
+        self.assertEqual(sqlite.active_db_path(), self.db_path)
+
+    def test_unreadable_routes_fall_back_to_default(self):
+        """A malformed routes file should be logged and leave every user on DB_PATH"""
+        with open(self.routes_path, "w") as routes_file:
+            routes_file.write("{not json")
+        self.assertEqual(sqlite.load_db_routes(), [])
+        self.assertEqual(sqlite.resolve_db_path("team-red"), self.db_path)
+
+    def test_routes_reloaded_when_file_changes(self):
+        """Editing the routes file should take effect without a restart"""
+        self.assertEqual(sqlite.resolve_db_path("alice"), self.db_path)
+        self.write_routes({"alice": "alice.db"})
+        os.utime(self.routes_path, (0, 12345))
+        self.assertEqual(sqlite.resolve_db_path("alice"), os.path.join(self.temp_dir, "alice.db"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for shell completion (completion.py)
+
+The metadata cache directory is patched to a temporary directory, so the
+real ~/.cli-guard/cache is never touched.
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import completion
+
+
+COMMANDS = {
+    "get": ["-h", "--help", "--user", "--account"],
+    "list": ["-h", "--help", "--user", "--category"],
+    "token": ["create"],
+    "token create": ["--user"],
+}
+
+
+class CacheTestCase(unittest.TestCase):
+    """Base class: points the metadata cache at a temporary directory"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = patch.object(completion, "CACHE_DIR", os.path.join(self.temp_dir, "cache"))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class TestMetadataCache(CacheTestCase):
+    """Test writing and reading the per-user name cache"""
+
+    def test_round_trip(self):
+        """Written names and version should read back sorted and de-duplicated"""
+        completion.write_metadata_cache("admin", 7, ["prod-db", "gmail", "prod-db"], ["Email", "Database"])
+        data = completion.read_metadata_cache("admin")
+        self.assertEqual(data["data_version"], 7)
+        self.assertEqual(data["accounts"], ["gmail", "prod-db"])
+        self.assertEqual(data["categories"], ["Database", "Email"])
+
+    def test_names_with_spaces_survive(self):
+        """Names containing spaces should round-trip intact"""
+        completion.write_metadata_cache("admin", 1, ["my bank"], [])
+        self.assertEqual(completion.read_metadata_cache("admin")["accounts"], ["my bank"])
+
+    def test_file_and_directory_permissions(self):
+        """The cache directory should be 700 and the file 600"""
+        completion.write_metadata_cache("admin", 1, ["prod-db"], [])
+        self.assertEqual(stat.S_IMODE(os.stat(completion.CACHE_DIR).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(completion.cache_path("admin")).st_mode), 0o600)
+
+    def test_missing_cache_returns_none(self):
+        """A user with no cache file should read as None"""
+        self.assertIsNone(completion.read_metadata_cache("nobody"))
+
+
+class TestComplete(CacheTestCase):
+    """Test candidate lookup and the backend entry point"""
+
+    def setUp(self):
+        super().setUp()
+        completion.write_metadata_cache("admin", 1, ["prod-db", "prod-web", "gmail"], ["Database"])
+        completion.write_metadata_cache("alice", 1, [], [])
+
+    def test_prefix_filter(self):
+        """Only names starting with the prefix should be returned"""
+        self.assertEqual(completion.complete("accounts", "admin", "prod"), ["prod-db", "prod-web"])
+        self.assertEqual(completion.complete("categories", "admin"), ["Database"])
+
+    def test_users_from_cache_files(self):
+        """users should list every user with a cache file"""
+        self.assertEqual(completion.complete("users", None), ["admin", "alice"])
+
+    def test_no_user_or_cache_gives_nothing(self):
+        """Without a user, or with no cache for them, there are no candidates"""
+        self.assertEqual(completion.complete("accounts", None), [])
+        self.assertEqual(completion.complete("accounts", "nobody"), [])
+
+    def test_main_prints_one_per_line(self):
+        """main should print matching names one per line"""
+        with patch("sys.stdout", new_callable=StringIO) as out:
+            self.assertEqual(completion.main(["accounts", "--user", "admin", "--", "prod"]), 0)
+        self.assertEqual(out.getvalue(), "prod-db\nprod-web\n")
+
+
+class TestShellScripts(unittest.TestCase):
+    """Test the generated shell scripts"""
+
+    def test_bash_script_lists_commands_and_options(self):
+        """The bash script should offer top-level commands and per-command options"""
+        script = completion.bash_script(COMMANDS)
+        self.assertIn('compgen -W "get list token"', script)
+        self.assertIn('"token create") opts="--user"', script)
+        self.assertIn("complete -F _cli_guard_complete cli-guard", script)
+
+    @unittest.skipUnless(shutil.which("bash"), "bash not installed")
+    def test_bash_script_is_valid_syntax(self):
+        """bash -n should accept the generated script"""
+        result = subprocess.run(["bash", "-n"], input=completion.bash_script(COMMANDS),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_zsh_script_uses_bashcompinit(self):
+        """The zsh script should load bashcompinit before the bash function"""
+        script = completion.zsh_script(COMMANDS)
+        self.assertLess(script.index("bashcompinit"), script.index("_cli_guard_complete()"))
+
+    def test_fish_script_completes_values_from_backend(self):
+        """fish should call the backend for --account values"""
+        script = completion.fish_script(COMMANDS)
+        self.assertIn("-l account -xa", script)
+        self.assertIn("accounts --user (__cli_guard_user)", script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Query-plan assertions for the SQL layer (CLI_SQL/CLI_Guard_SQL.py)
+
+Every lookup-path function is called against a seeded temporary database
+(see test_cli_guard_sql.SQLTestCase) with a trace callback recording the
+statements it runs. Each statement is then put through EXPLAIN QUERY PLAN,
+and the test fails if any step is a full SCAN of a table or index instead of
+an index SEARCH. Adding a function to LOOKUPS (or changing the SQL of one
+already there) is enough to have its plan checked.
+
+Deliberate full scans — maintenance, stats, export, migrations — are not
+lookup paths and are left out.
+"""
+
+import unittest
+import sys
+import os
+import re
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI_SQL.CLI_Guard_SQL as sqlite
+from tests.test_cli_guard_sql import SQLTestCase
+
+
+# (name, call) — each call runs one SQL-layer function on the seeded database
+LOOKUPS = [
+    ("queryData", lambda: sqlite.queryData("alice", "passwords")),
+    ("queryData (search and sort)", lambda: sqlite.queryData(
+        "alice", "passwords", category="account", text="prod", sort_by="ascending")),
+    ("queryData (page)", lambda: sqlite.queryData("alice", "passwords", limit=10, offset=20)),
+    ("queryData (users)", lambda: sqlite.queryData("alice", "users")),
+    ("countData", lambda: sqlite.countData("alice", "passwords", category="category", text="Gen")),
+    ("searchData", lambda: sqlite.searchData("alice", "account", limit=5)),
+    ("iterMetadata", lambda: list(sqlite.iterMetadata("alice", limit=10))),
+    ("iterMetadata (after)", lambda: list(sqlite.iterMetadata("alice", after=("account-050", 51), limit=10))),
+    ("queryAccountNames", lambda: sqlite.queryAccountNames("alice")),
+    ("queryCategoryNames", lambda: sqlite.queryCategoryNames("alice")),
+    ("queryDataVersion", lambda: sqlite.queryDataVersion("alice")),
+    ("queryDataByAccounts", lambda: sqlite.queryDataByAccounts("alice", ["account-001", "account-002"])),
+    ("queryDataBySecretId", lambda: sqlite.queryDataBySecretId("alice", 5)),
+    ("queryDataByPath", lambda: sqlite.queryDataByPath("alice", "prod/account-005")),
+    ("queryDataByPathPrefix", lambda: sqlite.queryDataByPathPrefix("alice", "prod/", limit=10)),
+    ("queryDataByPathPrefix (all)", lambda: sqlite.queryDataByPathPrefix("alice", "", columns=("path",))),
+    ("updateDataPath", lambda: sqlite.updateDataPath("alice", 5, "prod/moved")),
+    ("queryDataByTags", lambda: sqlite.queryDataByTags("alice", ["service=payments"])),
+    ("queryDataByTags (all of)", lambda: sqlite.queryDataByTags(
+        "alice", ["service=payments", "shard=3", "missing"], columns=sqlite.METADATA_COLUMNS, limit=10)),
+    ("queryTags", lambda: sqlite.queryTags("alice", 4)),
+    ("queryTagNames", lambda: sqlite.queryTagNames("alice")),
+    ("insertTags", lambda: sqlite.insertTags("alice", 5, ["deploy"])),
+    ("deleteTags", lambda: sqlite.deleteTags("alice", 4, ["service=payments"])),
+    ("queryUserPasswordVersions", lambda: sqlite.queryUserPasswordVersions("alice")),
+    ("queryPasswordVersions", lambda: sqlite.queryPasswordVersions("alice", 5)),
+    ("queryPasswordVersion", lambda: sqlite.queryPasswordVersion("alice", 5, version=1)),
+    ("queryPasswordVersion (at)", lambda: sqlite.queryPasswordVersion("alice", 5, at="2030-01-01 00:00:00")),
+    ("queryUserSalt", lambda: sqlite.queryUserSalt("alice")),
+    ("isUserLocked", lambda: sqlite.isUserLocked("alice")),
+    ("lockUser", lambda: sqlite.lockUser("bob")),
+    ("updateUserPassword", lambda: sqlite.updateUserPassword("bob", b"new-hash")),
+    ("updateUserSalt", lambda: sqlite.updateUserSalt("bob", "11" * 32)),
+    ("insertLoginAttempt", lambda: sqlite.insertLoginAttempt("alice", 2000.0, prune_before=1000.0)),
+    ("queryLoginAttempts", lambda: sqlite.queryLoginAttempts("alice", 1000.0)),
+    ("deleteLoginAttempts", lambda: sqlite.deleteLoginAttempts("bob")),
+    ("insertData", lambda: sqlite.insertData("alice", "General", "new-account", "admin", "cipher")),
+    ("updateData", lambda: sqlite.updateData("alice", "rotated", "account-010", "user10", "cipher-alice-10")),
+    ("deleteData", lambda: sqlite.deleteData("alice", "account-011", "user11", "cipher-alice-11")),
+    ("queryServiceToken", lambda: sqlite.queryServiceToken("cg_svc_000001")),
+    ("queryServiceTokensByUser", lambda: sqlite.queryServiceTokensByUser("alice")),
+    ("revokeServiceToken", lambda: sqlite.revokeServiceToken("cg_svc_000002")),
+    ("updateServiceTokenLastUsed", lambda: sqlite.updateServiceTokenLastUsed("cg_svc_000001", "2026-01-01")),
+    ("queryChangeLogBounds", lambda: sqlite.queryChangeLogBounds()),
+    ("pruneChangeLog", lambda: sqlite.pruneChangeLog(10)),
+]
+
+# Statements with no query plan of their own; "-- ..." lines are FTS5's internal statements
+_UNPLANNED = re.compile(r"^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|SELECT 1$|--)", re.IGNORECASE)
+
+# A plan step that reads a whole table or index: "SCAN passwords", "SCAN p USING INDEX ..."
+# Virtual tables (the FTS5 index) plan their own access, and SQLite's sqlite_sequence holds one row per table
+_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW|sqlite_sequence\b)(\S+)(?!.*VIRTUAL TABLE)")
+
+
+class TestQueryPlans(SQLTestCase):
+    """Every lookup path should SEARCH an index, never SCAN a table"""
+
+    def setUp(self):
+        super().setUp()
+        # Enough rows in every table that a missing index can't hide behind a tiny table
+        for user in ("alice", "bob"):
+            self.seed_passwords(user, 100)
+        for i in range(20):
+            sqlite.insertServiceToken(f"cg_svc_{i:06d}", "alice" if i % 2 else "bob", f"token-{i}",
+                                      b"hash", "wrapped", "2026-01-01")
+            sqlite.insertLoginAttempt("bob", 1000.0 + i)
+            sqlite.insertData("alice", "General", f"pathed-{i}", "svc", "cipher", path=f"prod/account-{i:03d}")
+        for secret_id in range(1, 200, 3):
+            sqlite.insertTags("alice" if secret_id <= 100 else "bob", secret_id, ["service=payments", f"shard={secret_id % 7}"])
+
+    def statements_run_by(self, call):
+        """SQL text (parameters already substituted) of every statement call runs, first run only"""
+        statements = []
+        self.connection.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            self.connection.set_trace_callback(None)
+        # Trigger programs are reported as repeats of the statement that fired them
+        return [sql for sql in dict.fromkeys(statements) if not _UNPLANNED.match(sql)]
+
+    def full_scans(self, sql):
+        """Plan steps of sql that scan a whole table or index"""
+        plan = self.connection.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        return [detail for *_, detail in plan if _FULL_SCAN.match(detail)]
+
+    def test_lookups_use_indexes(self):
+        """No statement on a lookup path should fall back to a full table scan"""
+        for name, call in LOOKUPS:
+            with self.subTest(function=name):
+                statements = self.statements_run_by(call)
+                self.assertTrue(statements, f"{name} ran no SQL")
+                for sql in statements:
+                    self.assertEqual(self.full_scans(sql), [], f"{name}: {' '.join(sql.split())}")
+
+    def test_harness_detects_full_scan(self):
+        """The check itself should flag an unindexed lookup and pass an indexed one"""
+        self.assertTrue(self.full_scans("SELECT * FROM passwords WHERE password = 'x'"))
+        self.assertEqual(self.full_scans("SELECT * FROM passwords WHERE user = 'alice' AND account = 'x'"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
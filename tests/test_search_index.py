@@ -0,0 +1,237 @@
+"""
+Unit tests for the in-memory search index (search_index.py)
+
+These tests build indexes from literal row tuples — no database needed.
+"""
+
+import unittest
+import sys
+import os
+import time
+from itertools import count
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, NameIndex, tokenize, trigrams, levenshtein
+
+
+_secret_ids = count(1)
+
+
+def make_row(category, account, username, password="enc", last_modified="2026-01-01", secret_id=None):
+    """Build a row tuple shaped like queryData's passwords rows (each with its own secret_id)"""
+    if secret_id is None:
+        secret_id = next(_secret_ids)
+    return ("alice", category, account, username, password, last_modified, secret_id, None)
+
+
+ROWS = [
+    make_row("Database", "prod-db", "dbadmin", "enc1"),
+    make_row("Database", "staging-postgres", "readonly", "enc2"),
+    make_row("API Keys", "stripe-live", "payment-api", "enc3"),
+    make_row("Email", "gmail-work", "alice@example.com", "enc4"),
+]
+
+
+class TestTokenize(unittest.TestCase):
+    """Test word splitting used for both values and search terms"""
+
+    def test_splits_on_punctuation(self):
+        """tokenize should split on non-alphanumeric characters"""
+        self.assertEqual(tokenize("prod-db.eu"), ["prod", "db", "eu"])
+
+    def test_lowercases(self):
+        """tokenize should lowercase words"""
+        self.assertEqual(tokenize("API Keys"), ["api", "keys"])
+
+    def test_empty_value(self):
+        """tokenize should return an empty list for empty input"""
+        self.assertEqual(tokenize(""), [])
+
+
+class TestSearch(unittest.TestCase):
+    """Test prefix matching across and within columns"""
+
+    def setUp(self):
+        self.index = SearchIndex(ROWS)
+
+    def test_empty_term_returns_everything_in_order(self):
+        """An empty term should match every row in insertion order"""
+        self.assertEqual(self.index.search(""), ROWS)
+        self.assertEqual(self.index.search(None), ROWS)
+
+    def test_word_prefix_match(self):
+        """A term should match rows with a word starting with it"""
+        self.assertEqual(self.index.search("post"), [ROWS[1]])
+
+    def test_whole_value_prefix_match(self):
+        """A term spanning punctuation should match the whole value"""
+        self.assertEqual(self.index.search("prod-d"), [ROWS[0]])
+
+    def test_multiple_words_all_required(self):
+        """Every word of the term must match"""
+        self.assertEqual(self.index.search("database prod"), [ROWS[0]])
+        self.assertEqual(self.index.search("database stripe"), [])
+
+    def test_case_insensitive(self):
+        """Matching should ignore case"""
+        self.assertEqual(self.index.search("STRIPE"), [ROWS[2]])
+
+    def test_column_restriction(self):
+        """column should limit matching to one field"""
+        self.assertEqual(self.index.search("alice", column="Username"), [ROWS[3]])
+        self.assertEqual(self.index.search("database", column="account"), [])
+
+    def test_invalid_column_raises(self):
+        """Searching a non-indexed column should raise ValueError"""
+        with self.assertRaises(ValueError):
+            self.index.search("x", column="password")
+
+    def test_password_not_indexed(self):
+        """Encrypted passwords must never be searchable"""
+        self.assertEqual(self.index.search("enc1"), [])
+
+
+class TestMutations(unittest.TestCase):
+    """Test keeping the index in step with add/update/delete"""
+
+    def setUp(self):
+        self.index = SearchIndex(ROWS)
+
+    def test_add_makes_row_searchable(self):
+        """add should index a new row"""
+        row = make_row("Cloud", "azure-portal", "ops", "enc5")
+        self.index.add(row)
+        self.assertEqual(self.index.search("azure"), [row])
+        self.assertEqual(len(self.index), 5)
+
+    def test_remove_drops_row(self):
+        """remove should drop a row from results"""
+        self.assertTrue(self.index.remove(ROWS[2]))
+        self.assertEqual(self.index.search("stripe"), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove_unknown_row_returns_false(self):
+        """remove should return False for rows not in the index"""
+        self.assertFalse(self.index.remove(make_row("x", "y", "z", "nope")))
+
+    def test_update_replaces_row_in_place(self):
+        """update should swap the row without changing its position"""
+        new_row = ROWS[1][:4] + ("enc2-new", "2026-02-02") + ROWS[1][6:]
+        self.index.update(ROWS[1], new_row)
+        self.assertEqual(self.index.search("staging"), [new_row])
+        self.assertEqual(self.index.search("")[1], new_row)
+
+    def test_update_unknown_row_adds_it(self):
+        """update of a row not in the index should add the new row"""
+        new_row = make_row("Cloud", "gcp-console", "ops", "enc9")
+        self.index.update(make_row("x", "y", "z", "nope"), new_row)
+        self.assertEqual(self.index.search("gcp"), [new_row])
+
+    def test_rows_are_keyed_on_secret_id(self):
+        """Metadata rows (no password) for the same account/username should stay distinct secrets"""
+        first = make_row("Database", "prod-db", "admin", password=None)
+        second = make_row("Database", "prod-db", "admin", password=None)
+        index = SearchIndex([first, second])
+        self.assertEqual(len(index), 2)
+        self.assertTrue(index.remove(second))
+        self.assertEqual(index.search("prod-db"), [first])
+
+
+class TestNameIndex(unittest.TestCase):
+    """Test fuzzy account-name matching"""
+
+    def setUp(self):
+        self.index = NameIndex(["prod-db", "staging-db", "stripe-live", "gmail-work"])
+
+    def test_levenshtein(self):
+        """levenshtein should count single-character edits"""
+        self.assertEqual(levenshtein("kitten", "sitting"), 3)
+        self.assertEqual(levenshtein("", "abc"), 3)
+        self.assertEqual(levenshtein("same", "same"), 0)
+
+    def test_trigrams_are_padded(self):
+        """trigrams should include padded word edges"""
+        self.assertIn("  a", trigrams("ab"))
+        self.assertIn("ab ", trigrams("ab"))
+
+    def test_typo_ranks_intended_name_first(self):
+        """A mistyped name should suggest the intended one first"""
+        self.assertEqual(self.index.suggest("prd-db")[0][0], "prod-db")
+        self.assertEqual(self.index.suggest("stirpe-live")[0][0], "stripe-live")
+
+    def test_exact_match_scores_one(self):
+        """A case-insensitive exact match should score 1.0"""
+        self.assertEqual(self.index.suggest("PROD-DB")[0], ("prod-db", 1.0))
+
+    def test_unrelated_term_returns_nothing(self):
+        """Terms sharing too little with any name should return no suggestions"""
+        self.assertEqual(self.index.suggest("zzzz"), [])
+
+    def test_limit(self):
+        """limit should cap the number of suggestions"""
+        self.assertEqual(len(self.index.suggest("db", limit=1, min_similarity=0.0)), 1)
+
+    def test_add_and_remove(self):
+        """add/remove should update suggestions"""
+        self.index.add("azure-portal")
+        self.assertIn("azure-portal", self.index)
+        self.assertEqual(self.index.suggest("azure-portl")[0][0], "azure-portal")
+        self.index.remove("azure-portal")
+        self.assertNotIn("azure-portal", self.index)
+        self.assertEqual(len(self.index), 4)
+
+    def test_dumps_loads_round_trip(self):
+        """loads(dumps()) should give the same suggestions, without removed names"""
+        self.index.remove("gmail-work")
+        restored = NameIndex.loads(self.index.dumps())
+        self.assertEqual(len(restored), 3)
+        self.assertNotIn("gmail-work", restored)
+        for term in ("prd-db", "stirpe-live", "db"):
+            self.assertEqual(restored.suggest(term, min_similarity=0.0), self.index.suggest(term, min_similarity=0.0))
+
+    def test_loads_rejects_bad_data(self):
+        """loads should raise ValueError on foreign or truncated data"""
+        with self.assertRaises(ValueError):
+            NameIndex.loads(b"not an index")
+        with self.assertRaises(ValueError):
+            NameIndex.loads(self.index.dumps()[:-3])
+
+
+class TestNameIndexScale(unittest.TestCase):
+    """Test fuzzy matching stays interactive on a large vault"""
+
+    @classmethod
+    def setUpClass(cls):
+        services = ["github", "gitlab", "aws", "azure", "stripe", "gmail", "slack", "jira", "prod-db", "vpn"]
+        envs = ["prod", "staging", "dev", "test", "qa"]
+        cls.names = [f"{services[i % len(services)]}-{envs[i // len(services) % len(envs)]}-{i}"
+                     for i in range(100_000)]
+        cls.index = NameIndex(cls.names)
+
+    def test_suggest_100k_names(self):
+        """suggest over 100k names should find the intended name well under a second"""
+        start = time.perf_counter()
+        suggestions = self.index.suggest("stirpe-prod-4")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(suggestions), 5)
+        self.assertLess(elapsed, 1.0)
+
+    def test_limit_keeps_best_scores(self):
+        """A bounded suggest should return the head of the unbounded ranking"""
+        term = "gitlab-dev-1234"
+        self.assertEqual(self.index.suggest(term, limit=5), self.index.suggest(term, limit=None)[:5])
+
+    def test_loads_100k_names(self):
+        """A saved 100k-name index should load back faster than rebuilding it"""
+        data = self.index.dumps()
+        start = time.perf_counter()
+        restored = NameIndex.loads(data)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(restored), len(self.names))
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for the decrypted-secret cache (secret_cache.py)
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path so we can import project modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from secret_cache import SecretCache
+
+
+def make_secret(account, password="pw", username="admin"):
+    return {"category": "General", "account": account, "username": username,
+            "password": password, "last_modified": "2026-01-01", "path": None}
+
+
+class TestSecretCache(unittest.TestCase):
+    """Test lookups, bounds, invalidation and stats"""
+
+    def test_hit_returns_copy(self):
+        """A cached secret should come back equal but not the same object"""
+        cache = SecretCache()
+        secret = make_secret("prod-db")
+        cache.put("alice", secret)
+        hit = cache.get("alice", "prod-db")
+        self.assertEqual(hit, secret)
+        hit["password"] = "changed"
+        self.assertEqual(cache.get("alice", "prod-db")["password"], "pw")
+
+    def test_keyed_by_user_and_username(self):
+        """Different users and username-narrowed lookups should not share entries"""
+        cache = SecretCache()
+        cache.put("alice", make_secret("prod-db"), username="admin")
+        self.assertIsNone(cache.get("bob", "prod-db", "admin"))
+        self.assertIsNone(cache.get("alice", "prod-db"))
+        self.assertIsNotNone(cache.get("alice", "prod-db", "admin"))
+
+    def test_ttl_expiry(self):
+        """Entries older than ttl should be misses"""
+        cache = SecretCache(ttl=10)
+        with patch("secret_cache.time.monotonic", return_value=100.0):
+            cache.put("alice", make_secret("prod-db"))
+        with patch("secret_cache.time.monotonic", return_value=109.0):
+            self.assertIsNotNone(cache.get("alice", "prod-db"))
+        with patch("secret_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("alice", "prod-db"))
+        self.assertEqual(len(cache), 0)
+
+    def test_max_entries_evicts_least_recently_used(self):
+        """Beyond max_entries the least recently read entry should go first"""
+        cache = SecretCache(max_entries=2)
+        cache.put("alice", make_secret("a"))
+        cache.put("alice", make_secret("b"))
+        cache.get("alice", "a")
+        cache.put("alice", make_secret("c"))
+        self.assertIsNotNone(cache.get("alice", "a"))
+        self.assertIsNone(cache.get("alice", "b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_max_bytes_bound(self):
+        """Total cached bytes should stay within max_bytes"""
+        cache = SecretCache(max_bytes=200)
+        for i in range(10):
+            cache.put("alice", make_secret(f"acct-{i}", password="x" * 40))
+        self.assertLessEqual(cache.stats()["bytes"], 200)
+        self.assertIsNotNone(cache.get("alice", "acct-9"))
+
+    def test_oversized_entry_not_cached(self):
+        """A secret bigger than max_bytes should be skipped, not flush the cache"""
+        cache = SecretCache(max_bytes=100)
+        cache.put("alice", make_secret("small"))
+        cache.put("alice", make_secret("huge", password="x" * 500))
+        self.assertIsNone(cache.get("alice", "huge"))
+        self.assertIsNotNone(cache.get("alice", "small"))
+
+    def test_invalidate_account_and_user(self):
+        """invalidate should drop one account (all usernames) or all of a user's entries"""
+        cache = SecretCache()
+        cache.put("alice", make_secret("prod-db"))
+        cache.put("alice", make_secret("prod-db"), username="admin")
+        cache.put("alice", make_secret("gmail"))
+        cache.put("bob", make_secret("prod-db"))
+
+        cache.invalidate("alice", "prod-db")
+        self.assertIsNone(cache.get("alice", "prod-db"))
+        self.assertIsNone(cache.get("alice", "prod-db", "admin"))
+        self.assertIsNotNone(cache.get("alice", "gmail"))
+
+        cache.invalidate("alice")
+        self.assertIsNone(cache.get("alice", "gmail"))
+        self.assertIsNotNone(cache.get("bob", "prod-db"))
+
+    def test_eviction_zeroes_plaintext(self):
+        """Dropped entries should have their password buffer overwritten"""
+        cache = SecretCache()
+        cache.put("alice", make_secret("prod-db", password="hunter2"))
+        buffer = cache._entries[("alice", "prod-db", None)].password
+        cache.clear()
+        self.assertEqual(bytes(buffer), bytes(len("hunter2")))
+
+    def test_stats_counts_hits_and_misses(self):
+        """stats should report hits, misses and current size"""
+        cache = SecretCache()
+        cache.get("alice", "prod-db")
+        cache.put("alice", make_secret("prod-db"))
+        cache.get("alice", "prod-db")
+        cache.get("alice", "prod-db")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 1, 1))
+
+    def test_sync_version_drops_stale_user_entries(self):
+        """A changed data version should drop only that user's entries"""
+        cache = SecretCache()
+        self.assertFalse(cache.syncVersion("alice", 1))
+        cache.put("alice", make_secret("prod-db"))
+        cache.put("bob", make_secret("prod-db"))
+        self.assertTrue(cache.syncVersion("alice", 1))
+        self.assertIsNotNone(cache.get("alice", "prod-db"))
+
+        self.assertFalse(cache.syncVersion("alice", 2))
+        self.assertIsNone(cache.get("alice", "prod-db"))
+        self.assertIsNotNone(cache.get("bob", "prod-db"))
+
+    def test_invalid_max_entries(self):
+        """max_entries below 1 should be rejected"""
+        with self.assertRaises(ValueError):
+            SecretCache(max_entries=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -173,6 +173,16 @@ class TestSessionTokens(unittest.TestCase):
         with self.assertRaises(CLI_Guard.AuthenticationError):
             token_manager.create_session("testuser", "WrongPassword!")
 
+    @patch('CLI_Guard.isAccountLocked', return_value=False)
+    @patch('CLI_Guard.loginRetryAfter', return_value=30.0)
+    @patch('CLI_Guard.authUser')
+    def test_create_session_rate_limited(self, mock_auth, mock_retry, mock_locked):
+        """create_session should refuse without checking the password while rate limited"""
+        with self.assertRaises(CLI_Guard.LoginRateLimitedError) as ctx:
+            token_manager.create_session("testuser", "TestPass123!")
+        self.assertEqual(ctx.exception.retry_after, 30.0)
+        mock_auth.assert_not_called()
+
     @patch('CLI_Guard.isAccountLocked', return_value=True)
     def test_create_session_locked_account(self, mock_locked):
         """create_session should raise ValueError on locked account"""
@@ -221,6 +221,51 @@ class TestTokenNameValidation(unittest.TestCase):
             self.assertFalse(valid, f"'{name}' should be invalid")
 
 
+class TestSecretPathValidation(unittest.TestCase):
+    """Test hierarchical secret path validation"""
+
+    def test_valid_paths(self):
+        """Slash-separated segments of safe characters should pass"""
+        for path in ["stripe", "prod/payments/stripe", "team_a/db-1/v1.2"]:
+            valid, error = validation.validate_secret_path(path)
+            self.assertTrue(valid, f"'{path}' should be valid: {error}")
+
+    def test_invalid_paths(self):
+        """Empty segments, dot segments and unsafe characters should fail"""
+        for path in ["", "/prod", "prod/", "prod//db", "prod/../db", "prod/./db", "prod db", "prod/d@b"]:
+            valid, error = validation.validate_secret_path(path)
+            self.assertFalse(valid, f"'{path}' should be invalid")
+
+    def test_path_too_long(self):
+        """Paths over 255 characters should fail"""
+        valid, error = validation.validate_secret_path("a" * 256)
+        self.assertFalse(valid)
+        self.assertIn("255", error)
+
+    def test_prefix_allows_trailing_slash_and_empty(self):
+        """A listing prefix may end in '/' or be empty, but a path may not"""
+        for prefix in ["", "prod/", "prod/payments/", "prod/pay"]:
+            valid, error = validation.validate_secret_path(prefix, prefix=True)
+            self.assertTrue(valid, f"'{prefix}' should be a valid prefix: {error}")
+        self.assertFalse(validation.validate_secret_path("prod//", prefix=True)[0])
+
+
+class TestTagValidation(unittest.TestCase):
+    """Test secret tag validation"""
+
+    def test_valid_tags(self):
+        """Plain words and key=value labels should pass"""
+        for tag in ["deploy", "service=payments", "team:ops", "region/eu-west_1.a"]:
+            valid, error = validation.validate_tag(tag)
+            self.assertTrue(valid, f"'{tag}' should be valid: {error}")
+
+    def test_invalid_tags(self):
+        """Empty, spaced, over-long or oddly-charactered tags should fail"""
+        for tag in ["", "two words", "bad@tag", "a" * 101]:
+            valid, error = validation.validate_tag(tag)
+            self.assertFalse(valid, f"'{tag}' should be invalid")
+
+
 class TestPasswordStrength(unittest.TestCase):
     """Test password strength calculation"""
 
@@ -199,12 +199,16 @@ def create_session(user: str, password: str,
 
     Raises:
         ValueError: If account is locked
+        CLI_Guard.LoginRateLimitedError: If too many recent sign-ins failed
         CLI_Guard.AuthenticationError: If password verification fails
     """
     # Check lockout
     if CLI_Guard.isAccountLocked(user):
         raise ValueError(f"Account '{user}' is locked until tomorrow")
 
+    # Refuse before any bcrypt/PBKDF2 work after too many recent failures
+    CLI_Guard.checkLoginAllowed(user)
+
     # Verify password
     if not CLI_Guard.authUser(user, password):
         raise CLI_Guard.AuthenticationError(f"Authentication failed for user '{user}'")
@@ -409,12 +413,16 @@ def create_service_token(user: str, password: str, name: str,
 
     Raises:
         ValueError: If account is locked
+        CLI_Guard.LoginRateLimitedError: If too many recent sign-ins failed
         CLI_Guard.AuthenticationError: If password verification fails
     """
     # Check lockout
     if CLI_Guard.isAccountLocked(user):
         raise ValueError(f"Account '{user}' is locked until tomorrow")
 
+    # Refuse before any bcrypt/PBKDF2 work after too many recent failures
+    CLI_Guard.checkLoginAllowed(user)
+
     # Verify password
     if not CLI_Guard.authUser(user, password):
         raise CLI_Guard.AuthenticationError(f"Authentication failed for user '{user}'")
@@ -482,6 +490,12 @@ def load_service_token(token: str) -> tuple[str, bytes]:
 
     # Look up token in database
     token_id = _get_service_token_id(token)
+
+    # With database routing, the token lives in its user's file — use that file from here on
+    token_db = sqlite.find_service_token_database(token_id)
+    if token_db is not None:
+        sqlite.use_database(token_db)
+
     row = sqlite.queryServiceToken(token_id)
 
     if row is None:
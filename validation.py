@@ -124,6 +124,68 @@ def validate_text_field(text: str, field_name: str, min_len: int = 1, max_len: i
     return (True, "")
 
 
+def validate_secret_path(path: str, prefix: bool = False) -> Tuple[bool, str]:
+    """
+    Validate a hierarchical secret path (e.g. "prod/payments/stripe")
+
+    Rules:
+    - Length: 1-255 characters
+    - Segments separated by "/", each made of letters, numbers, dots, hyphens, underscores
+    - No empty, "." or ".." segments, and no leading or trailing "/"
+
+    Args:
+        path: Path to validate
+        prefix: Validate a listing prefix instead — a trailing "/" is allowed
+            ("prod/payments/") and so is the empty prefix (everything with a path)
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if prefix:
+        path = path[:-1] if path.endswith("/") else path
+        if not path:
+            return (True, "")
+    elif not path:
+        return (False, "Path cannot be empty")
+
+    if len(path) > 255:
+        return (False, "Path must be 255 characters or less")
+
+    for segment in path.split("/"):
+        if segment in ("", ".", ".."):
+            return (False, "Path segments cannot be empty, '.' or '..' (use a/b/c)")
+        if not re.match(r'^[a-zA-Z0-9._-]+$', segment):
+            return (False, "Path segments may contain only letters, numbers, dots, hyphens, underscores")
+
+    return (True, "")
+
+
+def validate_tag(tag: str) -> Tuple[bool, str]:
+    """
+    Validate a secret tag (e.g. "deploy", "service=payments")
+
+    Rules:
+    - Length: 1-100 characters
+    - Letters, numbers and . _ - = : / only (no spaces)
+
+    Args:
+        tag: Tag to validate
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if not tag:
+        return (False, "Tag cannot be empty")
+
+    if len(tag) > 100:
+        return (False, "Tag must be 100 characters or less")
+
+    if not re.match(r'^[a-zA-Z0-9._=:/-]+$', tag):
+        return (False, "Tag can only contain letters, numbers and . _ - = : /")
+
+    return (True, "")
+
+
 def validate_token_name(name: str) -> Tuple[bool, str]:
     """
     Validate a service token name meets format requirements